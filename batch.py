@@ -3,19 +3,24 @@ Batch processing for PDO calculation.
 Main entry point for runtime execution.
 """
 
+import argparse
 import gc
 import logging
 import os
+from typing import Callable, Optional, Union
 
+import polars as pl
 from ml_utils.inference_decorator import duration_request
 from ml_utils.logger_helper import configure_logger
 from ml_utils.vault_connector import VaultConnector
 
 from common.base_transformation import BaseTransformation
+from common.con_cos import CosManager
 from common.config_context import ConfigContext
 from common.constants import FILE_NAME_PROJECT_CONFIG, LOGGER_NAME
 from common.logging_utils import (
     StepTracker,
+    enable_memory_profiling,
     log_batch_start,
     log_config_loaded,
     log_vault_connected,
@@ -24,6 +29,27 @@ from common.logging_utils import (
     set_final_metrics,
     print_final_summary,
 )
+from common.pdo_checkpoint import DEFAULT_CHECKPOINT_STEPS, CheckpointStore, enable_checkpointing, write_checkpoint
+from common.pdo_contributions import CONTRIBUTIONS_OUTPUT, ContributionRecorder
+from common.pdo_incremental import IncrementalScorer
+from common.pdo_join_planner import join_features
+from common.pdo_output_writer import PartitionedParquetWriter, write_outputs
+from common.pdo_partitioning import run_partitioned
+from common.pdo_pipeline import (
+    build_lazy_plan,
+    collect_lazy_plan,
+    collect_lazy_plans,
+    select_feature_engines,
+    select_pdo_formatter,
+    select_pdo_scorer,
+    select_reference_tables,
+    select_schema_layer,
+)
+from common.pdo_schema import SchemaLayer
+from common.pdo_scope_filters import SCOPE_RULES, ScopeRule, apply_scope_prefilter
+from common.pdo_synthetic import parse_scale
+from common.synthetic_backend import LocalCosManager, SyntheticStarburstConnector
+from common.telemetry_export import export_batch_metrics
 from config.load_config import load_app_config_file, load_config_domino_project_file, load_service_config_file
 from settings import PROJECT_ROOT
 from version import __version__
@@ -31,6 +57,35 @@ from version import __version__
 logger = logging.getLogger(LOGGER_NAME)
 
 TOTAL_STEPS = 13
+LAZY_TOTAL_STEPS = 3
+PARTITIONED_TOTAL_STEPS = 2
+# Étapes de reprise possibles : la première reprend le point de l'étape 2 (df_main), la dernière celui de l'étape 12
+RESUME_STEPS = range(3, TOTAL_STEPS + 1)
+
+# Mode d'exécution des étapes 2 à 13 : "eager" (défaut), "lazy" ou "partitioned"
+EXECUTION_MODE = os.getenv("PDO_EXECUTION_MODE", "eager").lower()
+# Collect du plan lazy avec le moteur streaming
+STREAMING_COLLECT = os.getenv("PDO_STREAMING_COLLECT", "false").lower() == "true"
+# Mode partitionné : nombre de partitions (hash de i_uniq_kpi) et de processus
+N_PARTITIONS = int(os.getenv("PDO_N_PARTITIONS", str(os.cpu_count() or 1)))
+MAX_WORKERS = int(os.getenv("PDO_MAX_WORKERS", str(min(N_PARTITIONS, os.cpu_count() or 1))))
+# Export des métriques : historique JSON-lines/Parquet, textfile Prometheus, spans OpenTelemetry
+TELEMETRY_DIR = os.getenv("PDO_TELEMETRY_DIR")
+PROMETHEUS_TEXTFILE = os.getenv("PDO_PROMETHEUS_TEXTFILE")
+OTEL_SPANS = os.getenv("PDO_OTEL_SPANS", "false").lower() == "true"
+# Profilage mémoire par étape (pic RSS échantillonné, sites d'allocation tracemalloc si frames > 0)
+MEMORY_PROFILING = os.getenv("PDO_MEMORY_PROFILING", "false").lower() == "true"
+TRACEMALLOC_FRAMES = int(os.getenv("PDO_TRACEMALLOC_FRAMES", "0"))
+# Points de reprise de df_main (mode eager) : répertoire, étapes et format ("parquet" ou "ipc")
+CHECKPOINT_DIR = os.getenv("PDO_CHECKPOINT_DIR")
+CHECKPOINT_STEPS = [
+    int(step) for step in os.getenv("PDO_CHECKPOINT_STEPS", ",".join(map(str, DEFAULT_CHECKPOINT_STEPS))).split(",")
+]
+CHECKPOINT_FORMAT = os.getenv("PDO_CHECKPOINT_FORMAT", "parquet").lower()
+# Exécution hors réseau : sources synthétiques locales (Parquet) à l'échelle donnée, sans Vault ni Starburst
+SYNTHETIC_DATA_DIR = os.getenv("PDO_SYNTHETIC_DATA_DIR")
+SYNTHETIC_SCALE = os.getenv("PDO_SYNTHETIC_SCALE", "100k")
+SYNTHETIC_SEED = int(os.getenv("PDO_SYNTHETIC_SEED", "0"))
 
 
 def load_configurations() -> tuple[dict, dict]:
@@ -43,118 +98,185 @@ def load_configurations() -> tuple[dict, dict]:
     return app_config, project_config
 
 
-@duration_request
-def main() -> None:
-    """Run main method for batch."""
-    configure_logger()
-    log_batch_start(__version__)
+def compact_step(df_main: pl.DataFrame, schema_layer: Optional[SchemaLayer], tracker: StepTracker) -> pl.DataFrame:
+    """Apply the compact schema to a step output and log the memory saved."""
+    if schema_layer is None:
+        return df_main
+    before_mb = df_main.estimated_size("mb")
+    df_main = schema_layer.apply(df_main)
+    tracker.log_compaction(before_mb, df_main.estimated_size("mb"))
+    return df_main
+
+
+def run_sequential_joins(
+    base_transformation: BaseTransformation,
+    df_main: pl.DataFrame,
+    initial_data: dict,
+    schema_layer: Optional[SchemaLayer] = None,
+) -> pl.DataFrame:
+    """Run steps 4 to 9, joining each source onto df_main in turn."""
+    # ==================== STEP 4: Risk features ====================
+    with StepTracker(4, "FEATURES RSC (RISK)", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main")
+        tracker.log_input(initial_data["rsc"], "rsc")
+        df_main = base_transformation.preprocess_risk(df_main, initial_data["rsc"])
+        df_main = compact_step(df_main, schema_layer, tracker)
+        tracker.log_output(df_main, "df_main_risk")
+        tracker.log_join("RSC")
     
-    try:
-        # ==================== STEP 0: Configuration ====================
-        with StepTracker(0, "CONFIGURATION", TOTAL_STEPS):
-            app_config, project_config = load_configurations()
-            config_context = ConfigContext()
-            config_context.set("app_config", app_config)
-            
-            VaultConnector("config/domino/starburst_dev1.yml")
-            VaultConnector("config/domino/starburst_dev2.yml")
-            log_vault_connected()
-            
-            base_transformation = BaseTransformation(app_config)
-        
-        # ==================== STEP 1: Chargement SQL ====================
-        with StepTracker(1, "CHARGEMENT DONNÉES SQL", TOTAL_STEPS) as tracker:
-            initial_data = base_transformation.load_data()
-            tracker.log_input_dict(initial_data, "Sources SQL")
-        
+    del initial_data["rsc"]
+    log_memory_freed("rsc")
+    
+    # ==================== STEP 5: Soldes features ====================
+    with StepTracker(5, "FEATURES SOLDES", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main")
+        tracker.log_input(initial_data["soldes"], "soldes")
+        df_main = base_transformation.preprocess_soldes(df_main, initial_data["soldes"])
+        df_main = compact_step(df_main, schema_layer, tracker)
+        tracker.log_output(df_main, "df_main_soldes")
+        tracker.log_join("SOLDES")
+    
+    del initial_data["soldes"]
+    log_memory_freed("soldes")
+    
+    # ==================== STEP 6: Reboot features ====================
+    with StepTracker(6, "FEATURES REBOOT", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main")
+        tracker.log_input(initial_data["reboot"], "reboot")
+        df_main = base_transformation.preprocess_reboot(df_main, initial_data["reboot"])
+        df_main = compact_step(df_main, schema_layer, tracker)
+        tracker.log_output(df_main, "df_main_reboot")
+        tracker.log_join("REBOOT")
+    
+    del initial_data["reboot"]
+    log_memory_freed("reboot")
+    
+    # ==================== STEP 7: Transac features ====================
+    with StepTracker(7, "FEATURES TRANSAC", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main")
+        tracker.log_input(initial_data["donnees_transac"], "donnees_transac")
+        df_main = base_transformation.preprocess_donnees_transac(df_main, initial_data["donnees_transac"])
+        df_main = compact_step(df_main, schema_layer, tracker)
+        tracker.log_output(df_main, "df_main_transac")
+        tracker.log_join("TRANSAC")
+    
+    del initial_data["donnees_transac"]
+    log_memory_freed("donnees_transac")
+    
+    # ==================== STEP 8: Safir Conso features ====================
+    with StepTracker(8, "FEATURES SAFIR CONSO", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main")
+        tracker.log_input(initial_data["safir_cc"], "safir_cc")
+        tracker.log_input(initial_data["safir_cd"], "safir_cd")
+        df_main = base_transformation.preprocess_safir_conso(
+            df_main, initial_data["safir_cc"], initial_data["safir_cd"]
+        )
+        df_main = compact_step(df_main, schema_layer, tracker)
+        tracker.log_output(df_main, "df_main_safir_conso")
+        tracker.log_join("SAFIR CONSO")
+    
+    del initial_data["safir_cc"], initial_data["safir_cd"]
+    log_memory_freed("safir_cc, safir_cd")
+    
+    # ==================== STEP 9: Safir Soc features ====================
+    with StepTracker(9, "FEATURES SAFIR SOC", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main")
+        tracker.log_input(initial_data["safir_sc"], "safir_sc")
+        tracker.log_input(initial_data["safir_sd"], "safir_sd")
+        df_main = base_transformation.preprocess_safir_soc(
+            df_main, initial_data["safir_sc"], initial_data["safir_sd"]
+        )
+        df_main = compact_step(df_main, schema_layer, tracker)
+        tracker.log_output(df_main, "df_main_safir_soc")
+        tracker.log_join("SAFIR SOC")
+        write_checkpoint(tracker.step_number, tracker.step_name, df_main)
+    
+    return df_main
+
+
+def run_planned_joins(
+    base_transformation: BaseTransformation,
+    df_main: pl.DataFrame,
+    initial_data: dict,
+    schema_layer: Optional[SchemaLayer] = None,
+) -> pl.DataFrame:
+    """Run steps 4 to 9 on narrow per-key tables, with a single join onto df_main."""
+    with StepTracker(4, "FEATURES (JOINTURES PLANIFIÉES 4-9)", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main")
+        df_main = join_features(base_transformation, df_main, initial_data)
+        df_main = compact_step(df_main, schema_layer, tracker)
+        tracker.log_output(df_main, "df_main_features")
+        tracker.log_join("RSC, SOLDES, REBOOT, TRANSAC, SAFIR CONSO, SAFIR SOC")
+        write_checkpoint(9, tracker.step_name, df_main)
+    
+    return df_main
+
+
+def run_eager_pipeline(
+    base_transformation: BaseTransformation,
+    initial_data: dict,
+    scorer: Callable,
+    formatter: Callable,
+    schema_layer: Optional[SchemaLayer] = None,
+    plan_joins: bool = False,
+    prefilter: bool = False,
+    start_step: int = 2,
+    df_main: Optional[pl.DataFrame] = None,
+    contributions: Optional[ContributionRecorder] = None,
+    encoder: Optional[Callable] = None,
+    scope_rules: Optional[list[ScopeRule]] = None,
+    incremental: Optional[IncrementalScorer] = None,
+) -> pl.DataFrame:
+    """
+    Run steps 2 to 13, materialising df_main after each step.
+
+    On resume, df_main is the checkpoint reloaded for start_step - 1 and only
+    steps start_step to 13 are run (initial_data is only needed up to step 9).
+    When resuming at step 13, the contributions are read from the step 12 checkpoint.
+    With incremental scoring, steps 4 to 12 only run for the companies whose inputs
+    changed; the other companies get their step 12 rows back from the previous run.
+    """
+    if start_step <= 2:
         # ==================== STEP 2: Preprocessing df_main ====================
         with StepTracker(2, "PREPROCESSING DF_MAIN", TOTAL_STEPS) as tracker:
             tracker.log_input(initial_data["unfiltered_df_main"], "unfiltered_df_main")
             preprocessed_data = base_transformation.preprocess_df_main(initial_data["unfiltered_df_main"])
             df_main = preprocessed_data["df_main"]
+            if prefilter:
+                # Périmètre PDO appliqué avant les jointures 4-9 (l'étape 10 reste le filtre de référence)
+                input_rows = df_main.height
+                df_main = apply_scope_prefilter(df_main, scope_rules if scope_rules is not None else SCOPE_RULES)
+                tracker.log_filter_stats(input_rows, df_main.height)
+            df_main = compact_step(df_main, schema_layer, tracker)
             tracker.log_output(df_main, "df_main")
+            write_checkpoint(tracker.step_number, tracker.step_name, df_main)
         
         del preprocessed_data
         log_memory_freed("preprocessed_data")
-        
+    
+    if start_step <= 3:
         # ==================== STEP 3: Encoding features ====================
         with StepTracker(3, "ENCODING FEATURES", TOTAL_STEPS) as tracker:
             tracker.log_input(df_main, "df_main")
-            df_main = base_transformation.preprocess_encoded_df_main(df_main)
+            df_main = (encoder or base_transformation.preprocess_encoded_df_main)(df_main)
+            df_main = compact_step(df_main, schema_layer, tracker)
             tracker.log_output(df_main, "df_main_encoded")
+            write_checkpoint(tracker.step_number, tracker.step_name, df_main)
+            if incremental is not None:
+                # Entreprises inchangées écartées des étapes 4 à 12, sources réduites aux autres
+                df_main = incremental.split(df_main, initial_data)
+                tracker.log_output(df_main, "df_main_changed")
+    
+    if start_step <= 4:
+        if plan_joins:
+            df_main = run_planned_joins(base_transformation, df_main, initial_data, schema_layer)
+        else:
+            df_main = run_sequential_joins(base_transformation, df_main, initial_data, schema_layer)
         
-        # ==================== STEP 4: Risk features ====================
-        with StepTracker(4, "FEATURES RSC (RISK)", TOTAL_STEPS) as tracker:
-            tracker.log_input(df_main, "df_main")
-            tracker.log_input(initial_data["rsc"], "rsc")
-            df_main = base_transformation.preprocess_risk(df_main, initial_data["rsc"])
-            tracker.log_output(df_main, "df_main_risk")
-            tracker.log_join("RSC")
-        
-        del initial_data["rsc"]
-        log_memory_freed("rsc")
-        
-        # ==================== STEP 5: Soldes features ====================
-        with StepTracker(5, "FEATURES SOLDES", TOTAL_STEPS) as tracker:
-            tracker.log_input(df_main, "df_main")
-            tracker.log_input(initial_data["soldes"], "soldes")
-            df_main = base_transformation.preprocess_soldes(df_main, initial_data["soldes"])
-            tracker.log_output(df_main, "df_main_soldes")
-            tracker.log_join("SOLDES")
-        
-        del initial_data["soldes"]
-        log_memory_freed("soldes")
-        
-        # ==================== STEP 6: Reboot features ====================
-        with StepTracker(6, "FEATURES REBOOT", TOTAL_STEPS) as tracker:
-            tracker.log_input(df_main, "df_main")
-            tracker.log_input(initial_data["reboot"], "reboot")
-            df_main = base_transformation.preprocess_reboot(df_main, initial_data["reboot"])
-            tracker.log_output(df_main, "df_main_reboot")
-            tracker.log_join("REBOOT")
-        
-        del initial_data["reboot"]
-        log_memory_freed("reboot")
-        
-        # ==================== STEP 7: Transac features ====================
-        with StepTracker(7, "FEATURES TRANSAC", TOTAL_STEPS) as tracker:
-            tracker.log_input(df_main, "df_main")
-            tracker.log_input(initial_data["donnees_transac"], "donnees_transac")
-            df_main = base_transformation.preprocess_donnees_transac(df_main, initial_data["donnees_transac"])
-            tracker.log_output(df_main, "df_main_transac")
-            tracker.log_join("TRANSAC")
-        
-        del initial_data["donnees_transac"]
-        log_memory_freed("donnees_transac")
-        
-        # ==================== STEP 8: Safir Conso features ====================
-        with StepTracker(8, "FEATURES SAFIR CONSO", TOTAL_STEPS) as tracker:
-            tracker.log_input(df_main, "df_main")
-            tracker.log_input(initial_data["safir_cc"], "safir_cc")
-            tracker.log_input(initial_data["safir_cd"], "safir_cd")
-            df_main = base_transformation.preprocess_safir_conso(
-                df_main, initial_data["safir_cc"], initial_data["safir_cd"]
-            )
-            tracker.log_output(df_main, "df_main_safir_conso")
-            tracker.log_join("SAFIR CONSO")
-        
-        del initial_data["safir_cc"], initial_data["safir_cd"]
-        log_memory_freed("safir_cc, safir_cd")
-        
-        # ==================== STEP 9: Safir Soc features ====================
-        with StepTracker(9, "FEATURES SAFIR SOC", TOTAL_STEPS) as tracker:
-            tracker.log_input(df_main, "df_main")
-            tracker.log_input(initial_data["safir_sc"], "safir_sc")
-            tracker.log_input(initial_data["safir_sd"], "safir_sd")
-            df_main = base_transformation.preprocess_safir_soc(
-                df_main, initial_data["safir_sc"], initial_data["safir_sd"]
-            )
-            tracker.log_output(df_main, "df_main_safir_soc")
-            tracker.log_join("SAFIR SOC")
-        
-        del initial_data
+        initial_data.clear()
         log_memory_freed("initial_data (toutes sources)")
-        
+    
+    if start_step <= 10:
         # ==================== STEP 10: Filtres PDO ====================
         with StepTracker(10, "FILTRES PDO SCOPE", TOTAL_STEPS) as tracker:
             input_rows = df_main.height
@@ -162,34 +284,290 @@ def main() -> None:
             df_main = base_transformation.preprocess_filters(df_main)
             tracker.log_output(df_main, "df_main_filtered")
             tracker.log_filter_stats(input_rows, df_main.height)
-        
+            write_checkpoint(tracker.step_number, tracker.step_name, df_main)
+    
+    if start_step <= 11:
         # ==================== STEP 11: Format variables ====================
         with StepTracker(11, "FORMATAGE VARIABLES", TOTAL_STEPS) as tracker:
             tracker.log_input(df_main, "df_main")
-            df_main = base_transformation.preprocess_format(df_main)
+            df_main = formatter(df_main)
+            df_main = compact_step(df_main, schema_layer, tracker)
             tracker.log_output(df_main, "df_main_format")
-        
+            write_checkpoint(tracker.step_number, tracker.step_name, df_main)
+    
+    if start_step <= 12:
         # ==================== STEP 12: Calcul PDO ====================
         with StepTracker(12, "CALCUL PDO", TOTAL_STEPS) as tracker:
             tracker.log_input(df_main, "df_main")
-            df_main = base_transformation.calcul_pdo(df_main)
+            df_main = scorer(df_main)
+            df_main = compact_step(df_main, schema_layer, tracker)
+            if incremental is not None:
+                df_main = incremental.merge(df_main)
             tracker.log_output(df_main, "df_main_pdo")
             tracker.log_pdo_stats(df_main)
+            write_checkpoint(tracker.step_number, tracker.step_name, df_main)
+    
+    # ==================== STEP 13: Postprocessing ====================
+    with StepTracker(13, "POSTPROCESSING", TOTAL_STEPS) as tracker:
+        tracker.log_input(df_main, "df_main_pdo")
+        if contributions is not None and contributions.frame is None:
+            contributions.record(df_main)
+        df_final = base_transformation.postprocess_df_main(df_main)
+        tracker.log_output(df_final, "df_main_final")
+    
+    return df_final
+
+
+def run_lazy_pipeline(
+    base_transformation: BaseTransformation,
+    initial_data: dict,
+    scorer: Callable,
+    formatter: Callable,
+    schema_layer: Optional[SchemaLayer] = None,
+    plan_joins: bool = False,
+    prefilter: bool = False,
+    contributions: Optional[ContributionRecorder] = None,
+    encoder: Optional[Callable] = None,
+    scope_rules: Optional[list[ScopeRule]] = None,
+    collect: bool = True,
+) -> Union[pl.DataFrame, pl.LazyFrame]:
+    """
+    Run steps 2 to 13 as a single lazy plan, collected once at the end.
+
+    The contributions plan shares the scoring plan and is collected with it.
+    With collect=False the plan is returned as is (contributions.frame stays lazy)
+    so that the export streams it to Parquet without materialising df_main_final.
+    """
+    with StepTracker(2, "PLAN LAZY (ÉTAPES 2-13)", LAZY_TOTAL_STEPS) as tracker:
+        plan = build_lazy_plan(
+            base_transformation, initial_data, scorer, formatter, schema_layer, plan_joins, prefilter,
+            encoder, scope_rules,
+        )
+        tracker.log_plan(plan, "df_main_final")
+    
+    if not collect:
+        return plan
+    
+    with StepTracker(3, "COLLECT PLAN LAZY", LAZY_TOTAL_STEPS) as tracker:
+        if contributions is None:
+            df_final = collect_lazy_plan(plan, streaming=STREAMING_COLLECT)
+        else:
+            df_final, contributions.frame = collect_lazy_plans(
+                [plan, contributions.frame], streaming=STREAMING_COLLECT
+            )
+            tracker.log_output(contributions.frame, CONTRIBUTIONS_OUTPUT)
+        tracker.log_output(df_final, "df_main_final")
+    
+    del plan
+    initial_data.clear()
+    log_memory_freed("plan lazy, initial_data (toutes sources)")
+    
+    return df_final
+
+
+def run_partitioned_pipeline(app_config: dict, initial_data: dict) -> pl.DataFrame:
+    """Run steps 2 to 13 on hash partitions of i_uniq_kpi in a process pool."""
+    with StepTracker(2, "SCORING PARTITIONNÉ (ÉTAPES 2-13)", PARTITIONED_TOTAL_STEPS) as tracker:
+        df_final = run_partitioned(app_config, initial_data, N_PARTITIONS, MAX_WORKERS)
+        tracker.log_output(df_final, "df_main_final")
+    
+    log_memory_freed("initial_data (toutes sources)")
+    
+    return df_final
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse the batch command line."""
+    parser = argparse.ArgumentParser(description="Batch PDO")
+    parser.add_argument(
+        "--resume-from",
+        type=int,
+        choices=RESUME_STEPS,
+        metavar="STEP",
+        help="Resume at STEP (3-13) from the last checkpoint written before it (requires PDO_CHECKPOINT_DIR)",
+    )
+    return parser.parse_args(argv)
+
+
+def load_resume_checkpoint(store: Optional[CheckpointStore], resume_from: int) -> tuple[int, pl.DataFrame]:
+    """Reload the last checkpoint written before resume_from and return (first step to run, df_main)."""
+    if resume_from not in RESUME_STEPS:
+        raise ValueError(
+            f"--resume-from: étape {resume_from} invalide (attendu: {RESUME_STEPS.start}-{RESUME_STEPS.stop - 1})"
+        )
+    if store is None:
+        raise ValueError("--resume-from nécessite PDO_CHECKPOINT_DIR")
+    if EXECUTION_MODE != "eager":
+        raise ValueError(f"--resume-from n'est disponible qu'en mode eager (mode: {EXECUTION_MODE})")
+    entry = store.latest(before_step=resume_from)
+    if entry is None:
+        raise ValueError(f"Aucun point de reprise antérieur à l'étape {resume_from} dans {store.directory}")
+    with StepTracker(entry.step, f"REPRISE ({entry.file_name})", TOTAL_STEPS) as tracker:
+        df_main = store.load(entry)
+        tracker.log_output(df_main, entry.name)
+    return entry.step + 1, df_main
+
+
+def build_output_writer(app_config: dict) -> Optional[PartitionedParquetWriter]:
+    """Build the partitioned Parquet writer (COS client only when a bucket is configured)."""
+    writer_config = app_config.get("output_writer", {})
+    client = None
+    if writer_config.get("enabled", False) and writer_config.get("bucket"):
+        # Hors réseau, le bucket est un répertoire local à côté des sources synthétiques
+        cos_manager = LocalCosManager(os.path.join(SYNTHETIC_DATA_DIR, "cos")) if SYNTHETIC_DATA_DIR else CosManager()
+        client = cos_manager.client
+    return PartitionedParquetWriter.from_config(app_config, client)
+
+
+def export_outputs(
+    output_writer: PartitionedParquetWriter,
+    df_final: Union[pl.DataFrame, pl.LazyFrame],
+    total_steps: int,
+    df_contributions: Optional[Union[pl.DataFrame, pl.LazyFrame]] = None,
+) -> None:
+    """
+    Stream the final frame (and the score contributions) to partitioned Parquet (and COS) after the last step.
+
+    In lazy mode df_final is the lazy plan: sink_parquet streams it without a final DataFrame.
+    The export gets its own step index, after the last processing step.
+    """
+    export_step = total_steps + 1
+    with StepTracker(export_step, "EXPORT PARQUET PARTITIONNÉ", export_step) as tracker:
+        if isinstance(df_final, pl.LazyFrame):
+            tracker.log_plan(df_final, "df_main_final")
+        else:
+            tracker.log_input(df_final, "df_main_final")
+        outputs = {"df_main_final": df_final}
+        if df_contributions is not None:
+            outputs[CONTRIBUTIONS_OUTPUT] = df_contributions
+        write_outputs(output_writer, outputs)
+        tracker.metrics.output_rows = output_writer.rows["df_main_final"]
+
+
+def export_telemetry() -> None:
+    """Export the run metrics to the configured telemetry targets."""
+    export_batch_metrics(
+        __version__,
+        TELEMETRY_DIR,
+        prometheus_path=PROMETHEUS_TEXTFILE,
+        otel=OTEL_SPANS,
+        extra={"execution_mode": EXECUTION_MODE},
+    )
+
+
+@duration_request
+def main(resume_from: Optional[int] = None) -> None:
+    """Run main method for batch."""
+    configure_logger()
+    log_batch_start(__version__)
+    if MEMORY_PROFILING:
+        enable_memory_profiling(tracemalloc_frames=TRACEMALLOC_FRAMES)
+    checkpoint_store = None
+    if CHECKPOINT_DIR:
+        checkpoint_store = CheckpointStore(CHECKPOINT_DIR, CHECKPOINT_STEPS, CHECKPOINT_FORMAT)
+        enable_checkpointing(checkpoint_store, __version__, resume=resume_from is not None)
+    total_steps = {
+        "lazy": LAZY_TOTAL_STEPS,
+        "partitioned": PARTITIONED_TOTAL_STEPS,
+    }.get(EXECUTION_MODE, TOTAL_STEPS)
+    
+    try:
+        # ==================== STEP 0: Configuration ====================
+        with StepTracker(0, "CONFIGURATION", total_steps):
+            app_config, project_config = load_configurations()
+            config_context = ConfigContext()
+            config_context.set("app_config", app_config)
+            
+            if not SYNTHETIC_DATA_DIR:
+                VaultConnector("config/domino/starburst_dev1.yml")
+                VaultConnector("config/domino/starburst_dev2.yml")
+                log_vault_connected()
+            
+            base_transformation = select_feature_engines(BaseTransformation(app_config), app_config)
+            scorer = select_pdo_scorer(base_transformation, app_config)
+            formatter = select_pdo_formatter(base_transformation, app_config)
+            schema_layer = select_schema_layer(app_config)
+            # Tables de référence : codes c_eco exclus du pré-filtre, encodage de l'étape 3 si versionnées
+            encoder, scope_rules = select_reference_tables(base_transformation, app_config)
+            plan_joins = app_config.get("join_planner", False)
+            prefilter = app_config.get("scope_prefilter", False)
+            output_writer = build_output_writer(app_config)
+            # Mode eager sans points de reprise uniquement : le mode partitionné score chaque
+            # partition dans son propre processus (un seul fichier d'état), le mode lazy ne
+            # matérialise pas l'étape 3 et les points de reprise 9 à 11 seraient partiels
+            incremental_scorer = IncrementalScorer.from_config(app_config, __version__)
+            if incremental_scorer is not None and (EXECUTION_MODE != "eager" or checkpoint_store is not None):
+                logger.warning(
+                    f"   ⚠️  PDO incrémentale ignorée: mode eager sans points de reprise requis (mode {EXECUTION_MODE})"
+                )
+                incremental_scorer = None
+            # Contributions extraites au calcul PDO, écrites à côté de df_main_final
+            contributions = ContributionRecorder.from_config(app_config, scorer)
+            if contributions is not None:
+                if EXECUTION_MODE == "partitioned" or output_writer is None:
+                    logger.warning(
+                        "   ⚠️  Contributions ignorées: export Parquet (output_writer) et mode eager ou lazy requis"
+                    )
+                    contributions = None
+                elif incremental_scorer is None:
+                    scorer = contributions
+                # En incrémental, les contributions sont lues à l'étape 13 sur les lignes fusionnées
+        
+        start_step, df_main = 2, None
+        if resume_from is not None:
+            start_step, df_main = load_resume_checkpoint(checkpoint_store, resume_from)
         
-        # ==================== STEP 13: Postprocessing ====================
-        with StepTracker(13, "POSTPROCESSING", TOTAL_STEPS) as tracker:
-            tracker.log_input(df_main, "df_main_pdo")
-            df_final = base_transformation.postprocess_df_main(df_main)
-            tracker.log_output(df_final, "df_main_final")
+        # ==================== STEP 1: Chargement SQL ====================
+        # Inutile en reprise après les jointures (étapes 10 à 13)
+        initial_data = {}
+        if start_step <= 9:
+            with StepTracker(1, "CHARGEMENT DONNÉES SQL", total_steps) as tracker:
+                if SYNTHETIC_DATA_DIR:
+                    connector = SyntheticStarburstConnector(
+                        SYNTHETIC_DATA_DIR, parse_scale(SYNTHETIC_SCALE), SYNTHETIC_SEED
+                    )
+                    initial_data = connector.load_data()
+                else:
+                    initial_data = base_transformation.load_data()
+                tracker.log_input_dict(initial_data, "Sources SQL")
+        
+        if EXECUTION_MODE == "lazy":
+            # Avec l'export Parquet, le plan est écrit en flux par sink_parquet sans être collecté
+            df_final = run_lazy_pipeline(
+                base_transformation, initial_data, scorer, formatter, schema_layer, plan_joins, prefilter,
+                contributions, encoder, scope_rules, collect=output_writer is None,
+            )
+        elif EXECUTION_MODE == "partitioned":
+            df_final = run_partitioned_pipeline(app_config, initial_data)
+        else:
+            df_final = run_eager_pipeline(
+                base_transformation, initial_data, scorer, formatter, schema_layer, plan_joins, prefilter,
+                start_step, df_main, contributions, encoder, scope_rules, incremental_scorer,
+            )
+        
+        del initial_data, df_main
+        
+        if output_writer is not None:
+            export_outputs(
+                output_writer, df_final, total_steps, contributions.frame if contributions is not None else None
+            )
+        # État incrémental écrit seulement une fois les sorties exportées
+        if incremental_scorer is not None:
+            incremental_scorer.commit()
         
-        set_final_metrics(df_final)
+        if isinstance(df_final, pl.LazyFrame):
+            set_final_metrics(df_final, output_writer.rows["df_main_final"])
+        else:
+            set_final_metrics(df_final)
         print_final_summary()
+        export_telemetry()
         
     except Exception as e:
         log_batch_error(e)
         print_final_summary()
+        export_telemetry()
         raise
 
 
 if __name__ == "__main__":
-    main()
+    main(parse_args().resume_from)
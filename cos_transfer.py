@@ -0,0 +1,324 @@
+"""
+Transferts COS parallèles et reprenables.
+Les téléchargements sont découpés en plages lues en parallèle (get_object Range) et
+écrites à leur position dans un fichier .part ; les uploads passent en multipart avec
+des parties envoyées en parallèle. L'avancement est conservé dans un fichier d'état :
+un transfert interrompu reprend aux parties manquantes. Le contenu est vérifié par
+l'ETag (MD5, ou MD5 des parties pour un objet multipart). ArtifactCache conserve les
+artefacts téléchargés (modèles, pickles) par ETag : tant que l'objet ne change pas,
+il n'est pas retéléchargé.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from common.constants import LOGGER_NAME
+from common.pdo_output_writer import MIN_PART_SIZE
+
+logger = logging.getLogger(LOGGER_NAME)
+
+DEFAULT_PART_SIZE = 16 * 1024**2
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pdo_cos")
+STATE_SUFFIX = ".transfer.json"
+READ_BLOCK_SIZE = 1024**2
+
+
+@dataclass
+class TransferConfig:
+    """Découpage et parallélisme des transferts (multipart au-delà de multipart_threshold octets)."""
+    part_size: int = DEFAULT_PART_SIZE
+    max_workers: int = DEFAULT_MAX_WORKERS
+    multipart_threshold: Optional[int] = None
+
+    def __post_init__(self):
+        if self.part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size doit être >= {MIN_PART_SIZE} octets (minimum multipart S3)")
+        if self.multipart_threshold is None:
+            self.multipart_threshold = self.part_size
+
+
+def _part_ranges(size: int, part_size: int) -> list[tuple[int, int, int]]:
+    """(numéro de partie, début, fin incluse) des parties d'un objet de size octets."""
+    return [
+        (number + 1, start, min(start + part_size, size) - 1)
+        for number, start in enumerate(range(0, max(size, 1), part_size))
+    ]
+
+
+def _md5_range(path: str, start: int, length: int) -> bytes:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(READ_BLOCK_SIZE, length))
+            if not block:
+                break
+            digest.update(block)
+            length -= len(block)
+    return digest.digest()
+
+
+def compute_etag(path: str, part_size: Optional[int] = None) -> str:
+    """ETag S3 d'un fichier : MD5, ou avec part_size "<MD5 des MD5 des parties>-N"."""
+    size = os.path.getsize(path)
+    if part_size is None:
+        return f'"{_md5_range(path, 0, size).hex()}"'
+    parts = _part_ranges(size, part_size)
+    digests = b"".join(_md5_range(path, start, end - start + 1) for _, start, end in parts)
+    return f'"{hashlib.md5(digests).hexdigest()}-{len(parts)}"'
+
+
+def verify_etag(path: str, etag: str, part_size: int) -> Optional[bool]:
+    """
+    Compare un fichier à l'ETag de l'objet.
+
+    Returns:
+        True / False, ou None si l'ETag multipart a été produit avec une taille de
+        partie inconnue (non vérifiable : seule la taille a été contrôlée)
+    """
+    if "-" not in etag:
+        return compute_etag(path) == etag
+    n_parts = int(etag.strip('"').rsplit("-", 1)[1])
+    size = os.path.getsize(path)
+    # Taille de partie de l'uploader : celle de la configuration ou la plus petite en MiB compatible
+    candidates = {part_size, math.ceil(size / n_parts / 1024**2) * 1024**2}
+    for candidate in sorted(candidates):
+        if len(_part_ranges(size, candidate)) == n_parts and compute_etag(path, candidate) == etag:
+            return True
+    return None
+
+
+def _read_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(path: str, state: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def download_file(client: Any, bucket: str, key: str, local_path: str, config: TransferConfig = TransferConfig()) -> str:
+    """
+    Télécharge un objet par plages parallèles, avec reprise et vérification de l'ETag.
+
+    Les plages sont écrites à leur position dans <local_path>.part ; les parties reçues
+    sont notées dans <local_path>.part.transfer.json. Après une interruption, un nouvel
+    appel ne télécharge que les parties manquantes (si l'objet n'a pas changé).
+
+    Returns:
+        ETag de l'objet téléchargé
+
+    Raises:
+        ValueError: Si le contenu reçu ne correspond pas à l'ETag
+    """
+    head = client.head_object(Bucket=bucket, Key=key)
+    size, etag = head["ContentLength"], head["ETag"]
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    part_path = f"{local_path}.part"
+    state_path = f"{part_path}{STATE_SUFFIX}"
+
+    state = _read_state(state_path)
+    if state.get("etag") != etag or state.get("size") != size or not os.path.exists(part_path):
+        state = {"etag": etag, "size": size, "part_size": config.part_size, "done": []}
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+        _write_state(state_path, state)
+    elif state["done"]:
+        logger.info(f"   ♻️  Reprise du téléchargement de {key}: {len(state['done'])} partie(s) déjà reçue(s)")
+
+    done = set(state["done"])
+    todo = [part for part in _part_ranges(size, state["part_size"]) if part[0] not in done]
+    lock = threading.Lock()
+    fd = os.open(part_path, os.O_WRONLY)
+
+    def fetch(part: tuple[int, int, int]) -> None:
+        number, start, end = part
+        if size == 0:
+            return
+        body = client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")["Body"].read()
+        if len(body) != end - start + 1:
+            raise ValueError(f"{key}: partie {number} incomplète ({len(body)} octets au lieu de {end - start + 1})")
+        os.pwrite(fd, body, start)
+        with lock:
+            state["done"].append(number)
+            _write_state(state_path, state)
+
+    try:
+        with ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix="cos-download") as executor:
+            list(executor.map(fetch, todo))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    if verify_etag(part_path, etag, state["part_size"]) is False:
+        os.remove(part_path)
+        os.remove(state_path)
+        raise ValueError(f"{key}: contenu téléchargé différent de l'ETag {etag}")
+    os.replace(part_path, local_path)
+    os.remove(state_path)
+    return etag
+
+
+def upload_file(client: Any, local_path: str, bucket: str, key: str, config: TransferConfig = TransferConfig()) -> str:
+    """
+    Envoie un fichier, en multipart parallèle au-delà de config.multipart_threshold.
+
+    L'upload multipart en cours est noté dans <local_path>.upload.transfer.json : après
+    une interruption, un nouvel appel reprend le même upload et n'envoie que les parties
+    absentes (ou différentes) côté COS.
+
+    Returns:
+        ETag de l'objet
+
+    Raises:
+        FileNotFoundError: Si le fichier local n'existe pas
+        ValueError: Si l'ETag retourné par COS ne correspond pas au fichier
+    """
+    if not os.path.exists(local_path):
+        raise FileNotFoundError(f"Local file not found: {local_path}")
+    size = os.path.getsize(local_path)
+    if size <= config.multipart_threshold:
+        with open(local_path, "rb") as f:
+            etag = client.put_object(Bucket=bucket, Key=key, Body=f.read())["ETag"]
+        if etag != compute_etag(local_path):
+            raise ValueError(f"{key}: ETag retourné par COS différent du fichier envoyé")
+        return etag
+
+    state_path = f"{local_path}.upload{STATE_SUFFIX}"
+    signature = {"bucket": bucket, "key": key, "size": size, "mtime": os.path.getmtime(local_path)}
+    state = _read_state(state_path)
+    uploaded: dict[int, str] = {}
+    if state and all(state.get(name) == value for name, value in signature.items()):
+        try:
+            listed = client.list_parts(Bucket=bucket, Key=key, UploadId=state["upload_id"])["Parts"]
+            uploaded = {part["PartNumber"]: part["ETag"] for part in listed}
+            logger.info(f"   ♻️  Reprise de l'upload de {key}: {len(uploaded)} partie(s) déjà envoyée(s)")
+        except Exception:
+            state = {}
+    else:
+        state = {}
+    if not state:
+        upload_id = client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+        state = {**signature, "upload_id": upload_id, "part_size": config.part_size}
+        _write_state(state_path, state)
+
+    def send(part: tuple[int, int, int]) -> dict:
+        number, start, end = part
+        with open(local_path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        expected = f'"{hashlib.md5(body).hexdigest()}"'
+        if uploaded.get(number) != expected:
+            response = client.upload_part(
+                Bucket=bucket, Key=key, UploadId=state["upload_id"], PartNumber=number, Body=body
+            )
+            if response["ETag"] != expected:
+                raise ValueError(f"{key}: ETag de la partie {number} différent du contenu envoyé")
+        return {"PartNumber": number, "ETag": expected}
+
+    with ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix="cos-upload") as executor:
+        parts = list(executor.map(send, _part_ranges(size, state["part_size"])))
+
+    etag = client.complete_multipart_upload(
+        Bucket=bucket, Key=key, UploadId=state["upload_id"], MultipartUpload={"Parts": parts}
+    )["ETag"]
+    os.remove(state_path)
+    if etag != compute_etag(local_path, state["part_size"]):
+        raise ValueError(f"{key}: ETag retourné par COS différent du fichier envoyé")
+    return etag
+
+
+def abort_upload(client: Any, local_path: str) -> None:
+    """Abandonne l'upload multipart interrompu de local_path (plus de reprise possible)."""
+    state_path = f"{local_path}.upload{STATE_SUFFIX}"
+    state = _read_state(state_path)
+    if state:
+        client.abort_multipart_upload(Bucket=state["bucket"], Key=state["key"], UploadId=state["upload_id"])
+        os.remove(state_path)
+
+
+class ArtifactCache:
+    """
+    Cache local d'artefacts COS adressé par contenu (ETag).
+
+    Usage:
+        cache = ArtifactCache("/mnt/cache/cos")
+        model_path = cache.fetch(client, "models", "pdo/run_42/model.pkl")
+
+    Un objet est stocké sous <cache_dir>/<ETag>/<nom du fichier> : un objet inchangé
+    (même ETag) n'est pas retéléchargé, un objet modifié l'est automatiquement.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, config: TransferConfig = TransferConfig()):
+        self.cache_dir = cache_dir
+        self.config = config
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, key: str, etag: str) -> str:
+        return os.path.join(self.cache_dir, etag.strip('"'), os.path.basename(key))
+
+    def fetch(self, client: Any, bucket: str, key: str) -> str:
+        """Chemin local de l'objet, téléchargé seulement si son ETag n'est pas en cache."""
+        etag = client.head_object(Bucket=bucket, Key=key)["ETag"]
+        path = self.path_for(key, etag)
+        if os.path.exists(path):
+            logger.info(f"   ⚡ Artefact {key} en cache (ETag inchangé)")
+            return path
+        download_file(client, bucket, key, path, self.config)
+        logger.info(f"   📥 Artefact {key} téléchargé ({os.path.getsize(path) / 1024**2:,.1f} MB)")
+        return path
+
+    def fetch_prefix(self, client: Any, bucket: str, prefix: str) -> dict[str, str]:
+        """Tous les objets sous prefix (ex: répertoire d'un modèle) : {clé: chemin local}."""
+        contents = client.list_objects_v2(Bucket=bucket, Prefix=prefix).get("Contents", [])
+        return {item["Key"]: self.fetch(client, bucket, item["Key"]) for item in contents}
+
+
+class CosTransfer:
+    """
+    Transferts de CosManager en parallèle : mêmes signatures que CosManager
+    (download_file, upload_file) sur son client S3, plus le cache d'artefacts.
+
+    Usage:
+        transfer = CosTransfer.from_config(app_config, CosManager().client)
+        transfer.upload_file("/tmp/results.parquet", "pdo-bucket", "outputs/results.parquet")
+        model_path = transfer.fetch_artifact("models", "pdo/run_42/model.pkl")
+    """
+
+    def __init__(self, client: Any, config: TransferConfig = TransferConfig(), cache_dir: str = DEFAULT_CACHE_DIR):
+        self.client = client
+        self.config = config
+        self.cache = ArtifactCache(cache_dir, config)
+
+    @classmethod
+    def from_config(cls, app_config: dict, client: Any) -> "CosTransfer":
+        """Construit les transferts depuis app_config["cos_transfer"] (valeurs par défaut sinon)."""
+        transfer_config = app_config.get("cos_transfer", {})
+        config = TransferConfig(
+            part_size=transfer_config.get("part_size", DEFAULT_PART_SIZE),
+            max_workers=transfer_config.get("max_workers", DEFAULT_MAX_WORKERS),
+            multipart_threshold=transfer_config.get("multipart_threshold"),
+        )
+        return cls(client, config, transfer_config.get("cache_dir", DEFAULT_CACHE_DIR))
+
+    def download_file(self, bucket: str, key: str, local_path: str) -> str:
+        return download_file(self.client, bucket, key, local_path, self.config)
+
+    def upload_file(self, local_path: str, bucket: str, key: str) -> str:
+        return upload_file(self.client, local_path, bucket, key, self.config)
+
+    def fetch_artifact(self, bucket: str, key: str) -> str:
+        return self.cache.fetch(self.client, bucket, key)
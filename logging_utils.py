@@ -5,10 +5,14 @@ Contains all logging, metrics collection and display functions.
 
 import gc
 import logging
+import os
+import resource
+import threading
 import time
+import tracemalloc
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Optional, Union
 
 import polars as pl
 
@@ -34,6 +38,14 @@ class StepMetrics:
     output_cols: int = 0
     status: str = "PENDING"
     error_message: str = ""
+    source_latencies: dict = field(default_factory=dict)
+    cpu_seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    step_peak_rss_mb: float = 0.0
+    rss_start_mb: float = 0.0
+    top_allocations: list = field(default_factory=list)
 
 
 @dataclass
@@ -64,6 +76,100 @@ class BatchMetrics:
 batch_metrics = BatchMetrics()
 
 
+# =============================================================================
+# MEMORY PROFILING
+# =============================================================================
+
+@dataclass
+class MemoryProfilingConfig:
+    """Configuration du profilage mémoire par étape (désactivé par défaut)."""
+    enabled: bool = False
+    sample_interval_seconds: float = 0.05
+    tracemalloc_frames: int = 0
+    top_allocations: int = 5
+
+
+memory_profiling = MemoryProfilingConfig()
+
+
+def enable_memory_profiling(
+    sample_interval_seconds: float = 0.05,
+    tracemalloc_frames: int = 0,
+    top_allocations: int = 5,
+) -> None:
+    """
+    Active le profilage mémoire des StepTracker.
+
+    Args:
+        sample_interval_seconds: Période d'échantillonnage du RSS
+        tracemalloc_frames: Profondeur de pile tracemalloc (0 = pas d'attribution des
+            allocations Python, tracemalloc ralentit sensiblement le batch)
+        top_allocations: Nombre de sites d'allocation retenus par étape
+    """
+    memory_profiling.enabled = True
+    memory_profiling.sample_interval_seconds = sample_interval_seconds
+    memory_profiling.tracemalloc_frames = tracemalloc_frames
+    memory_profiling.top_allocations = top_allocations
+    if tracemalloc_frames > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(tracemalloc_frames)
+
+
+def get_current_rss_mb() -> float:
+    """Mémoire résidente actuelle du processus (MB), pic depuis le démarrage hors Linux."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError, IndexError):
+        return get_peak_rss_mb()
+
+
+class RssSampler:
+    """
+    Échantillonne le RSS du processus sur un thread de fond et retient le pic.
+
+    Le RSS couvre les allocations Rust/Arrow de Polars (invisibles pour tracemalloc),
+    dont les copies intermédiaires des jointures qui n'apparaissent dans aucun
+    DataFrame loggé.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        self.peak_mb = max(self.peak_mb, get_current_rss_mb())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def start(self) -> None:
+        self._sample()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return self.peak_mb
+
+
+def _top_allocations(before: tracemalloc.Snapshot, limit: int) -> list[tuple[str, float]]:
+    """Sites d'allocation Python ayant le plus augmenté depuis `before` (MB)."""
+    # Les allocations du profilage lui-même (snapshots tracemalloc) sont exclues
+    excluded = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    after = tracemalloc.take_snapshot().filter_traces(excluded)
+    stats = after.compare_to(before.filter_traces(excluded), "lineno")
+    return [
+        (str(stat.traceback), stat.size_diff / 1024**2)
+        for stat in stats[:limit]
+        if stat.size_diff > 0
+    ]
+
+
 # =============================================================================
 # STEP TRACKER CLASS
 # =============================================================================
@@ -85,16 +191,44 @@ class StepTracker:
         self.total_steps = total_steps
         self.metrics = StepMetrics(step_name=step_name)
         self.start_time = 0.0
+        self.start_cpu = 0.0
+        self._rss_sampler: Optional[RssSampler] = None
+        self._tracemalloc_snapshot: Optional[tracemalloc.Snapshot] = None
     
     def __enter__(self):
         self.start_time = time.time()
+        self.start_cpu = time.process_time()
         self.metrics.start_time = self.start_time
         _log_step_header(self.step_number, self.step_name, self.total_steps)
+        if memory_profiling.enabled:
+            self._start_memory_profiling()
         return self
     
+    def _start_memory_profiling(self) -> None:
+        self.metrics.rss_start_mb = get_current_rss_mb()
+        self._rss_sampler = RssSampler(memory_profiling.sample_interval_seconds)
+        self._rss_sampler.start()
+        if tracemalloc.is_tracing():
+            self._tracemalloc_snapshot = tracemalloc.take_snapshot()
+    
+    def _stop_memory_profiling(self) -> None:
+        self.metrics.step_peak_rss_mb = self._rss_sampler.stop()
+        self._rss_sampler = None
+        if self._tracemalloc_snapshot is not None:
+            self.metrics.top_allocations = _top_allocations(
+                self._tracemalloc_snapshot, memory_profiling.top_allocations
+            )
+            self._tracemalloc_snapshot = None
+        growth = self.metrics.step_peak_rss_mb - self.metrics.rss_start_mb
+        logger.info(f"   🧠 Pic RSS étape: {self.metrics.step_peak_rss_mb:,.0f} MB (+{growth:,.0f} MB)")
+    
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.metrics.end_time = time.time()
         self.metrics.duration_seconds = self.metrics.end_time - self.metrics.start_time
+        self.metrics.cpu_seconds = time.process_time() - self.start_cpu
+        self.metrics.peak_rss_mb = get_peak_rss_mb()
+        if self._rss_sampler is not None:
+            self._stop_memory_profiling()
         
         if exc_type is not None:
             self.metrics.status = "FAILED"
@@ -113,22 +247,49 @@ class StepTracker:
         _log_dataframe_info(df, name, "   ")
         self.metrics.input_rows = df.height
         self.metrics.input_cols = df.width
+        self.metrics.input_bytes = df.estimated_size()
     
-    def log_input_dict(self, data_dict: dict, name: str = "Data") -> None:
-        """Log un dictionnaire de DataFrames."""
+    def log_input_dict(
+        self,
+        data_dict: dict,
+        name: str = "Data",
+        latencies: Optional[dict[str, float]] = None,
+    ) -> None:
+        """Log un dictionnaire de DataFrames (et la latence de chaque requête si fournie)."""
         total_rows = 0
+        total_bytes = 0
         for key, df in data_dict.items():
             if isinstance(df, pl.DataFrame):
                 _log_dataframe_info(df, key, "      ")
                 total_rows += df.height
+                total_bytes += df.estimated_size()
+                if latencies and key in latencies:
+                    rows_per_s = df.height / latencies[key] if latencies[key] > 0 else 0
+                    logger.info(f"         └── Latence: {latencies[key]:.2f}s | {rows_per_s:,.0f} lignes/s")
         logger.info(f"   📊 Total lignes chargées: {total_rows:,}")
         self.metrics.input_rows = total_rows
+        self.metrics.input_bytes = total_bytes
+        if latencies:
+            self.metrics.source_latencies = dict(latencies)
     
     def log_output(self, df: pl.DataFrame, name: str = "Output") -> None:
         """Log un DataFrame de sortie."""
         _log_dataframe_info(df, name, "   ")
         self.metrics.output_rows = df.height
         self.metrics.output_cols = df.width
+        self.metrics.output_bytes = df.estimated_size()
+    
+    def log_plan(self, plan: pl.LazyFrame, name: str = "Plan") -> None:
+        """Log un plan lazy (schéma en INFO, plan optimisé en DEBUG)."""
+        n_cols = len(plan.collect_schema())
+        logger.info(f"   🧭 {name}: plan lazy | Colonnes: {n_cols}")
+        logger.debug(plan.explain())
+        self.metrics.output_cols = n_cols
+
+    def log_compaction(self, before_mb: float, after_mb: float) -> None:
+        """Log le gain mémoire du schéma compact."""
+        saved_pct = (1 - after_mb / before_mb) * 100 if before_mb > 0 else 0
+        logger.info(f"   🗜️  Schéma compact: {before_mb:.2f} MB → {after_mb:.2f} MB (-{saved_pct:.1f}%)")
     
     def log_join(self, source_name: str) -> None:
         """Log une opération de jointure."""
@@ -218,19 +379,50 @@ def log_vault_connected() -> None:
     logger.info("   ✅ Vault connecté")
 
 
+def get_peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus depuis son démarrage (MB)."""
+    # ru_maxrss est en KB sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
 def log_memory_freed(data_name: str) -> None:
     """Log la libération de mémoire et force gc."""
     gc.collect()
     logger.info(f"   🗑️  Mémoire libérée: {data_name}")
 
 
-def set_final_metrics(df: pl.DataFrame) -> None:
-    """Enregistre les métriques finales."""
-    batch_metrics.final_output_rows = df.height
-    batch_metrics.final_output_cols = df.width
+def set_final_metrics(df: Union[pl.DataFrame, pl.LazyFrame], rows: Optional[int] = None) -> None:
+    """Enregistre les métriques finales (plan lazy exporté en flux : lignes comptées à l'écriture)."""
+    batch_metrics.final_output_rows = df.height if rows is None else rows
+    batch_metrics.final_output_cols = len(df.collect_schema())
     batch_metrics.status = "SUCCESS"
 
 
+def _log_memory_summary(steps: list) -> None:
+    """Affiche le pic RSS par étape et les principaux sites d'allocation (profilage actif)."""
+    profiled_steps = [s for s in steps if s.step_peak_rss_mb > 0]
+    if not profiled_steps:
+        return
+    
+    logger.info("")
+    logger.info("🧠 MÉMOIRE PAR ÉTAPE (pic RSS | croissance):")
+    peak_step = max(profiled_steps, key=lambda x: x.step_peak_rss_mb)
+    for step in profiled_steps:
+        marker = " ⬅️  pic du batch" if step is peak_step else ""
+        growth = step.step_peak_rss_mb - step.rss_start_mb
+        logger.info(f"   • {step.step_name:<35} {step.step_peak_rss_mb:>10,.0f} MB | +{growth:,.0f} MB{marker}")
+    
+    allocations = sorted(
+        ((size_mb, site, step.step_name) for step in profiled_steps for site, size_mb in step.top_allocations),
+        reverse=True,
+    )[:memory_profiling.top_allocations]
+    if allocations:
+        logger.info("")
+        logger.info("🔬 TOP SITES D'ALLOCATION PYTHON (tracemalloc):")
+        for size_mb, site, step_name in allocations:
+            logger.info(f"   • {size_mb:,.1f} MB - {site} ({step_name})")
+
+
 def log_batch_error(error: Exception) -> None:
     """Log une erreur fatale du batch."""
     batch_metrics.status = "FAILED"
@@ -303,6 +495,8 @@ def print_final_summary() -> None:
             pct = (step.duration_seconds / total_processing_time * 100) if total_processing_time > 0 else 0
             logger.info(f"   {i}. {step.step_name}: {step.duration_seconds:.2f}s ({pct:.1f}%)")
     
+    _log_memory_summary(batch_metrics.steps)
+    
     _log_separator("=")
     logger.info("🏁 FIN DU BATCH PDO")
     _log_separator("=")
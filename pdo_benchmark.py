@@ -0,0 +1,327 @@
+"""
+Banc de mesure des fonctions de preprocessing et de calcul PDO.
+Chaque fonction est exécutée sur des données synthétiques (pdo_synthetic) à plusieurs
+tailles ; le temps (médiane et minimum sur plusieurs répétitions), le pic RSS
+échantillonné pendant l'appel et le débit sont ajoutés à un historique Parquet.
+Une exécution peut être comparée à une référence (historique d'une version
+précédente) pour détecter les régressions.
+
+Usage:
+    python pdo_benchmark.py --sizes 10k,1M --repeats 3 --output benchmarks/
+    python pdo_benchmark.py --sizes 1M --functions calcul_pdo,calcul_pdo_table --baseline benchmarks/pdo_benchmarks.parquet
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.logging_utils import RssSampler, get_current_rss_mb
+from common.pdo_scoring import calcul_pdo_table
+from common.pdo_synthetic import (
+    generate_donnees_transac,
+    generate_format_input,
+    generate_reboot,
+    generate_rsc,
+    generate_safir_cc,
+    generate_safir_cd,
+    generate_safir_sc,
+    generate_safir_sd,
+    generate_score_input,
+    generate_soldes,
+    generate_unfiltered_df_main,
+    parse_scale,
+    synthetic_model_config,
+    synthetic_safir_config,
+)
+
+logger = logging.getLogger(LOGGER_NAME)
+
+BENCHMARK_FILE = "pdo_benchmarks.parquet"
+# Ralentissement (ou hausse mémoire) relatif toléré avant de signaler une régression
+DEFAULT_TOLERANCE = 0.2
+RSS_SAMPLE_INTERVAL_SECONDS = 0.01
+
+
+def _df_main_keys(n_companies: int, seed: int) -> pl.DataFrame:
+    return generate_unfiltered_df_main(n_companies, seed).select(["i_uniq_kpi", "i_intrn", "i_siren"])
+
+
+def _scored(n_companies: int, seed: int) -> pl.DataFrame:
+    return calcul_pdo_table(generate_score_input(n_companies, seed), synthetic_model_config(seed))
+
+
+@dataclass
+class BenchmarkCase:
+    """Fonction mesurée : module, nom et construction de ses arguments (n_companies, seed)."""
+    name: str
+    module: str
+    function: str
+    inputs: Callable[[int, int], tuple]
+
+    def resolve(self) -> Optional[Callable]:
+        """Fonction à mesurer, None si son module n'est pas disponible."""
+        try:
+            return getattr(importlib.import_module(self.module), self.function)
+        except ImportError:
+            return None
+
+
+CASES = [
+    BenchmarkCase(
+        "add_transac_features", "common.preprocessing_transac_corrected", "add_transac_features",
+        lambda n, seed: (_df_main_keys(n, seed), generate_donnees_transac(n, seed)),
+    ),
+    BenchmarkCase(
+        "add_reboot_features", "common.preprocessing_reboot", "add_reboot_features",
+        lambda n, seed: (_df_main_keys(n, seed), generate_reboot(n, seed)),
+    ),
+    BenchmarkCase(
+        "add_reboot_features_vectorized", "common.pdo_reboot", "add_reboot_features",
+        lambda n, seed: (_df_main_keys(n, seed), generate_reboot(n, seed)),
+    ),
+    BenchmarkCase(
+        "add_safir_conso_features", "common.pdo_safir", "add_safir_conso_features",
+        lambda n, seed: (_df_main_keys(n, seed), generate_safir_cc(n, seed), generate_safir_cd(n, seed)),
+    ),
+    BenchmarkCase(
+        "add_safir_soc_features", "common.pdo_safir", "add_safir_soc_features",
+        lambda n, seed: (
+            _df_main_keys(n, seed), generate_safir_sc(n, seed), generate_safir_sd(n, seed), synthetic_safir_config()
+        ),
+    ),
+    BenchmarkCase(
+        "add_soldes_features","common.preprocessing_soldes", "add_soldes_features",
+        lambda n, seed: (_df_main_keys(n, seed), generate_soldes(n, seed)),
+    ),
+    BenchmarkCase(
+        "add_risk_features", "common.preprocessing_risk", "add_risk_features",
+        lambda n, seed: (_df_main_keys(n, seed), generate_rsc(n, seed)),
+    ),
+    BenchmarkCase(
+        "df_encoding", "common.preprocessing_df_main", "df_encoding",
+        lambda n, seed: (generate_unfiltered_df_main(n, seed),),
+    ),
+    BenchmarkCase(
+        "df_encoding_lookup", "common.pdo_reference", "df_encoding_lookup",
+        lambda n, seed: (generate_unfiltered_df_main(n, seed),),
+    ),
+    BenchmarkCase(
+        "format_variables", "common.preprocessing_format_variables", "format_variables",
+        lambda n, seed: (generate_format_input(n, seed),),
+    ),
+    BenchmarkCase(
+        "format_variables_table", "common.pdo_bucketing", "format_variables_table",
+        lambda n, seed: (generate_format_input(n, seed),),
+    ),
+    BenchmarkCase(
+        "calcul_pdo", "common.calcul_pdo", "calcul_pdo",
+        lambda n, seed: (generate_score_input(n, seed), synthetic_model_config(seed)),
+    ),
+    BenchmarkCase(
+        "calcul_pdo_table", "common.pdo_scoring", "calcul_pdo_table",
+        lambda n, seed: (generate_score_input(n, seed), synthetic_model_config(seed)),
+    ),
+    BenchmarkCase(
+        "calcul_contributions", "common.pdo_contributions", "calcul_contributions",
+        lambda n, seed: (_scored(n, seed), synthetic_model_config(seed)),
+    ),
+]
+
+
+@dataclass
+class BenchmarkResult:
+    """Mesures d'une fonction à une taille donnée."""
+    function: str
+    n_companies: int
+    status: str = "SUCCESS"
+    error_message: str = ""
+    repeats: int = 0
+    input_rows: int = 0
+    output_rows: int = 0
+    wall_seconds_median: float = 0.0
+    wall_seconds_min: float = 0.0
+    peak_rss_mb: float = 0.0
+    rss_growth_mb: float = 0.0
+    companies_per_s: float = 0.0
+    input_rows_per_s: float = 0.0
+
+
+def run_case(case: BenchmarkCase, n_companies: int, repeats: int = 3, warmup: int = 1, seed: int = 0) -> BenchmarkResult:
+    """
+    Mesure une fonction sur des données synthétiques de n_companies entreprises.
+
+    Les données sont générées une seule fois, hors mesure. Le pic RSS est celui du
+    processus pendant l'appel (allocations Polars incluses), rss_growth_mb la
+    hausse par rapport au RSS avant l'appel.
+    """
+    result = BenchmarkResult(function=case.name, n_companies=n_companies)
+    func = case.resolve()
+    if func is None:
+        result.status = "SKIPPED"
+        result.error_message = f"module {case.module} indisponible"
+        return result
+
+    args = case.inputs(n_companies, seed)
+    result.input_rows = sum(arg.height for arg in args if isinstance(arg, pl.DataFrame))
+    timings = []
+    try:
+        for iteration in range(warmup + repeats):
+            gc.collect()
+            rss_start = get_current_rss_mb()
+            sampler = RssSampler(RSS_SAMPLE_INTERVAL_SECONDS)
+            sampler.start()
+            start = time.perf_counter()
+            output = func(*args)
+            if isinstance(output, pl.LazyFrame):
+                output = output.collect()
+            duration = time.perf_counter() - start
+            peak_mb = sampler.stop()
+            if iteration >= warmup:
+                timings.append(duration)
+                result.peak_rss_mb = max(result.peak_rss_mb, peak_mb)
+                result.rss_growth_mb = max(result.rss_growth_mb, peak_mb - rss_start)
+            result.output_rows = output.height
+            del output
+    except Exception as e:
+        result.status = "FAILED"
+        result.error_message = str(e)
+        return result
+
+    result.repeats = len(timings)
+    result.wall_seconds_median = statistics.median(timings)
+    result.wall_seconds_min = min(timings)
+    if result.wall_seconds_median > 0:
+        result.companies_per_s = n_companies / result.wall_seconds_median
+        result.input_rows_per_s = result.input_rows / result.wall_seconds_median
+    return result
+
+
+def run_benchmarks(
+    sizes: list[int],
+    functions: Optional[list[str]] = None,
+    repeats: int = 3,
+    warmup: int = 1,
+    seed: int = 0,
+) -> pl.DataFrame:
+    """
+    Mesure les fonctions demandées (défaut: toutes) à chaque taille.
+
+    Returns:
+        Une ligne par (fonction, taille), avec le contexte de l'exécution
+    """
+    cases = [case for case in CASES if functions is None or case.name in functions]
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+    records = []
+    for n_companies in sizes:
+        for case in cases:
+            result = run_case(case, n_companies, repeats, warmup, seed)
+            if result.status == "SUCCESS":
+                logger.info(
+                    f"   ⏱️  {case.name} [{n_companies:,}]: {result.wall_seconds_median:.3f}s | "
+                    f"pic RSS {result.peak_rss_mb:,.0f} MB (+{result.rss_growth_mb:,.0f} MB) | "
+                    f"{result.companies_per_s:,.0f} entreprises/s"
+                )
+            else:
+                logger.warning(f"   ⚠️  {case.name} [{n_companies:,}]: {result.status} ({result.error_message})")
+            records.append(asdict(result))
+    return pl.DataFrame(records).with_columns([
+        pl.lit(run_id).alias("run_id"),
+        pl.lit(pl.__version__).alias("polars_version"),
+        pl.lit(platform.node()).alias("host"),
+        pl.lit(os.cpu_count()).alias("cpu_count"),
+    ])
+
+
+def append_results(results: pl.DataFrame, output_dir: str) -> str:
+    """Ajoute les mesures à l'historique Parquet (écriture atomique)."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, BENCHMARK_FILE)
+    if os.path.exists(path):
+        results = pl.concat([pl.read_parquet(path), results], how="diagonal_relaxed")
+    tmp_path = f"{path}.tmp"
+    results.write_parquet(tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return path
+
+
+def compare_to_baseline(results: pl.DataFrame, baseline: pl.DataFrame, tolerance: float = DEFAULT_TOLERANCE) -> pl.DataFrame:
+    """
+    Compare les mesures à la référence (dernière mesure réussie de chaque fonction et taille).
+
+    Returns:
+        Une ligne par (fonction, taille) mesurée dans les deux, avec les ratios
+        temps / mémoire et un indicateur de régression (ratio > 1 + tolerance)
+    """
+    keys = ["function", "n_companies"]
+    metrics = ["wall_seconds_median", "rss_growth_mb"]
+    reference = (
+        baseline
+        .filter(pl.col("status") == "SUCCESS")
+        .sort("run_id")
+        .group_by(keys)
+        .agg([pl.col(metric).last() for metric in metrics])
+    )
+    return (
+        results
+        .filter(pl.col("status") == "SUCCESS")
+        .select([*keys, *metrics])
+        .join(reference, on=keys, how="inner", suffix="_baseline")
+        .with_columns([
+            (pl.col("wall_seconds_median") / pl.col("wall_seconds_median_baseline")).alias("time_ratio"),
+            (pl.col("rss_growth_mb") / pl.col("rss_growth_mb_baseline").clip(lower_bound=1.0)).alias("memory_ratio"),
+        ])
+        .with_columns(
+            ((pl.col("time_ratio") > 1 + tolerance) | (pl.col("memory_ratio") > 1 + tolerance)).alias("regression")
+        )
+        .sort(keys)
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Point d'entrée : mesure, ajout à l'historique et comparaison à la référence."""
+    parser = argparse.ArgumentParser(description="Banc de mesure des fonctions PDO")
+    parser.add_argument("--sizes", default="10k,1M", help="Tailles (10k, 100k, 1M, 10M ou nombre d'entreprises)")
+    parser.add_argument("--functions", help=f"Fonctions mesurées (défaut: toutes) parmi {[c.name for c in CASES]}")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Répertoire de l'historique Parquet")
+    parser.add_argument("--baseline", help="Historique Parquet de référence")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    results = run_benchmarks(
+        sizes=[parse_scale(size) for size in args.sizes.split(",")],
+        functions=args.functions.split(",") if args.functions else None,
+        repeats=args.repeats,
+        warmup=args.warmup,
+        seed=args.seed,
+    )
+    if args.output:
+        logger.info(f"   💾 Mesures ajoutées à {append_results(results, args.output)}")
+    if args.baseline:
+        comparison = compare_to_baseline(results, pl.read_parquet(args.baseline), args.tolerance)
+        for row in comparison.iter_rows(named=True):
+            marker = "🔴 RÉGRESSION" if row["regression"] else "🟢"
+            logger.info(
+                f"   {marker} {row['function']} [{row['n_companies']:,}]: "
+                f"temps x{row['time_ratio']:.2f} | mémoire x{row['memory_ratio']:.2f}"
+            )
+        return int(comparison["regression"].any())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+"""
+Formatage des variables PDO piloté par une table de seuils.
+Remplace les chaînes pl.when().then() de format_variables par des points de coupure
+triés : l'indice de classe est obtenu par search_sorted et la modalité est émise
+directement en pl.Enum. Les modalités (et leur ordre) sont celles du modèle
+(PDO_MODALITIES ou config["model"]["modalities"]) : le scorer de pdo_scoring lit
+les codes Enum sans conversion de chaîne.
+
+Écart de comportement avec format_variables : reboot_score2 égal au dernier seuil
+(0.0456250459) donne la classe "9" ; la chaîne historique (< b8 puis > b8) ne couvre
+pas l'égalité et laisse reboot_score_char2 à NULL (coefficient par défaut).
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+import polars as pl
+
+from common.pdo_scoring import PDO_MODALITIES
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+# Variable du modèle -> colonne source, points de coupure, côté fermé et modalité si NULL
+# (clause otherwise de format_variables ; absente ou None : NULL, coefficient par défaut).
+# closed="left" : x < b1 -> 1re modalité, b1 <= x < b2 -> 2e, ... (classes [b_i, b_i+1[)
+# closed="right": x <= b1 -> 1re modalité, x > b1 -> 2e, ...     (classes ]b_i, b_i+1])
+# Surchargeable par config["model"]["thresholds"].
+PDO_THRESHOLDS: dict[str, dict] = {
+    # RSC
+    "nbj": {"source": "Q_JJ_DEPST_MM", "breaks": [12], "closed": "right", "null": "<=12"},
+    # Soldes
+    "solde_cav_char": {"source": "solde_cav", "breaks": [-9.10499954, 15235.6445, 76378.7031], "null": "4"},
+    # Reboot
+    "reboot_score_char2": {
+        "source": "reboot_score2",
+        "breaks": [
+            0.00142771716, 0.00274042692, 0.00563700218, 0.0102700535,
+            0.0129012, 0.0147122974, 0.0159990136, 0.0456250459,
+        ],
+        # Pas de clause otherwise dans format_variables : score REBOOT absent -> NULL
+        "null": None,
+    },
+    # Safir conso
+    "rn_ca_conso_023b": {"source": "VB023", "breaks": [0.430999994, 2.99849987], "null": "2"},
+    # Safir soc
+    "caf_dmlt_005": {"source": "VB005", "breaks": [66.2200012], "null": "2"},
+    "res_total_passif_035": {"source": "VB035", "breaks": [-8.19350052, 2.02049994, 7.10350037], "null": "3"},
+    "immob_total_passif_055": {"source": "VB055", "breaks": [22.6430016, 47.4615021], "null": "1"},
+}
+
+
+@dataclass
+class Bucketizer:
+    """Découpage d'une colonne continue en modalités Enum du modèle."""
+    name: str
+    source: str
+    breaks: list[float]
+    labels: list[str]
+    closed: str = "left"
+    null_label: Optional[str] = None
+
+    def __post_init__(self):
+        if len(self.labels) != len(self.breaks) + 1:
+            raise ValueError(
+                f"{self.name}: {len(self.breaks)} seuils pour {len(self.labels)} modalités "
+                f"(attendu {len(self.breaks) + 1})"
+            )
+        if sorted(self.breaks) != list(self.breaks):
+            raise ValueError(f"{self.name}: les seuils doivent être triés par ordre croissant")
+
+    @property
+    def dtype(self) -> pl.Enum:
+        return pl.Enum(self.labels)
+
+    def expr(self) -> pl.Expr:
+        """Modalité Enum : indice de classe par search_sorted puis indexation dans les modalités."""
+        side = "right" if self.closed == "left" else "left"
+        codes = pl.lit(pl.Series(self.breaks, dtype=pl.Float64)).search_sorted(
+            pl.col(self.source).cast(pl.Float64), side=side
+        )
+        labels = pl.lit(pl.Series(self.labels, dtype=self.dtype))
+        null_label = pl.lit(self.null_label, dtype=self.dtype)
+        return (
+            pl.when(pl.col(self.source).is_null())
+            .then(null_label)
+            .otherwise(labels.gather(codes))
+            .alias(self.name)
+        )
+
+
+@dataclass
+class BucketTable:
+    """Table de seuils des variables continues du modèle PDO."""
+    bucketizers: list[Bucketizer] = field(default_factory=list)
+    seg_nae_labels: list[str] = field(default_factory=lambda: list(PDO_MODALITIES["seg_nae"]))
+
+    @classmethod
+    def from_config(cls, config: Optional[dict] = None) -> "BucketTable":
+        """
+        Construit la table depuis config["model"] (seuils et modalités par défaut sinon).
+
+        Raises:
+            ValueError: Si le nombre de seuils ne correspond pas au nombre de modalités
+        """
+        model_config = (config or {}).get("model", {})
+        modalities = model_config.get("modalities", PDO_MODALITIES)
+        thresholds = model_config.get("thresholds", PDO_THRESHOLDS)
+        bucketizers = [
+            Bucketizer(
+                name=name,
+                source=spec["source"],
+                breaks=[float(b) for b in spec["breaks"]],
+                labels=list(modalities[name]),
+                closed=spec.get("closed", "left"),
+                null_label=spec.get("null"),
+            )
+            for name, spec in thresholds.items()
+        ]
+        return cls(bucketizers, seg_nae_labels=list(modalities["seg_nae"]))
+
+    def exprs(self) -> list[pl.Expr]:
+        return [bucketizer.expr() for bucketizer in self.bucketizers]
+
+    def format(self, df_main: Frame) -> Frame:
+        """
+        Formate les variables du modèle en une passe (équivalent de format_variables).
+
+        Colonnes créées:
+            - nat_jur_a, secto_b (String, valeurs source conservées)
+            - seg_nae et les variables de PDO_THRESHOLDS (pl.Enum)
+            - flag_format
+        """
+        seg_nae_dtype = pl.Enum(self.seg_nae_labels)
+        return df_main.with_columns([
+            # RP
+            pl.when(pl.col("c_njur_prsne_enc") == "7")
+            .then(pl.lit(">=7"))
+            .otherwise(pl.col("c_njur_prsne_enc"))
+            .alias("nat_jur_a"),
+            pl.col("c_sectrl_1_enc").alias("secto_b"),
+            pl.when(pl.col("c_sgmttn_nae") == "ME")
+            .then(pl.lit("ME", dtype=seg_nae_dtype))
+            .otherwise(pl.lit("autres", dtype=seg_nae_dtype))
+            .alias("seg_nae"),
+            *self.exprs(),
+            pl.lit("OK").alias("flag_format"),
+        ])
+
+
+def format_variables_table(df_main: Frame, config: Optional[dict] = None) -> Frame:
+    """Preprocess data for PDO prediction : formatting variables from threshold table."""
+    return BucketTable.from_config(config).format(df_main)
@@ -0,0 +1,218 @@
+"""
+Points de reprise du batch PDO.
+Après les étapes configurées, df_main est écrit sur disque (Parquet zstd, ou Arrow
+IPC relu en memory-map) et référencé dans un manifeste JSON du run. En cas d'échec,
+le batch relancé avec --resume-from STEP recharge le dernier point de reprise
+antérieur à STEP et n'exécute que la fin du traitement, sans recharger Starburst
+quand les jointures sont déjà faites.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+MANIFEST_FILE = "checkpoint_manifest.json"
+FORMAT_SUFFIXES = {"parquet": ".parquet", "ipc": ".arrow"}
+# Étapes à la fin desquelles batch.py écrit df_main (prétraitement, encodage, jointures, filtres, formatage, score)
+SUPPORTED_CHECKPOINT_STEPS = (2, 3, 9, 10, 11, 12)
+# Étapes après lesquelles df_main est écrit par défaut (fin des jointures, filtres, formatage, score)
+DEFAULT_CHECKPOINT_STEPS = (9, 10, 11, 12)
+
+
+@dataclass
+class CheckpointEntry:
+    """Point de reprise : état de df_main à la fin d'une étape."""
+    step: int
+    step_name: str
+    name: str
+    file_name: str
+    format: str
+    rows: int
+    cols: int
+    written_at: str
+
+
+class CheckpointStore:
+    """
+    Répertoire des points de reprise d'un run.
+
+    Usage:
+        store = CheckpointStore("/mnt/checkpoints", steps=[9, 11])
+        store.start_run(version)                 # nouveau run : manifeste réinitialisé
+        store.write(9, "FEATURES SAFIR SOC", df_main, "df_main")
+        entry = store.latest(before_step=12)     # reprise à l'étape 12
+        df_main = store.load(entry)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        steps: Iterable[int] = DEFAULT_CHECKPOINT_STEPS,
+        file_format: str = "parquet",
+        compression_level: int = 3,
+    ):
+        if file_format not in FORMAT_SUFFIXES:
+            raise ValueError(f"Format de point de reprise inconnu: {file_format} (attendu: {list(FORMAT_SUFFIXES)})")
+        unsupported = sorted(set(steps) - set(SUPPORTED_CHECKPOINT_STEPS))
+        if unsupported:
+            raise ValueError(
+                f"Étapes de point de reprise non supportées: {unsupported} "
+                f"(attendu: {list(SUPPORTED_CHECKPOINT_STEPS)})"
+            )
+        self.directory = directory
+        self.steps = set(steps)
+        self.file_format = file_format
+        self.compression_level = compression_level
+        self.manifest: dict = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def read_manifest(self) -> dict:
+        """Manifeste du dernier run (vide si aucun point de reprise)."""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self) -> None:
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def start_run(self, version: str, resume: bool = False) -> None:
+        """
+        Démarre l'écriture des points de reprise.
+
+        Un nouveau run réinitialise le manifeste (les fichiers d'un run précédent ne
+        sont plus proposés à la reprise). Une reprise conserve le manifeste du run repris.
+        """
+        self.manifest = self.read_manifest() if resume else {}
+        if not self.manifest:
+            self.manifest = {
+                "run_id": uuid.uuid4().hex,
+                "version": version,
+                "polars_version": pl.__version__,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "checkpoints": [],
+            }
+        elif self.manifest.get("version") != version:
+            logger.warning(
+                f"   ⚠️  Reprise d'un run de la version {self.manifest.get('version')} avec la version {version}"
+            )
+        self._write_manifest()
+
+    def should_write(self, step: int) -> bool:
+        return step in self.steps
+
+    def write(self, step: int, step_name: str, df: pl.DataFrame, name: str = "df_main") -> CheckpointEntry:
+        """
+        Écrit df (écriture atomique) et l'ajoute au manifeste.
+
+        Les points de reprise des étapes >= step (run repris plus tôt) sont
+        retirés du manifeste : ils ne correspondent plus à l'état courant.
+        """
+        file_name = f"step_{step:02d}_{name}{FORMAT_SUFFIXES[self.file_format]}"
+        path = os.path.join(self.directory, file_name)
+        tmp_path = f"{path}.tmp"
+        if self.file_format == "ipc":
+            df.write_ipc(tmp_path, compression="uncompressed")
+        else:
+            df.write_parquet(tmp_path, compression="zstd", compression_level=self.compression_level)
+        os.replace(tmp_path, path)
+
+        entry = CheckpointEntry(
+            step=step,
+            step_name=step_name,
+            name=name,
+            file_name=file_name,
+            format=self.file_format,
+            rows=df.height,
+            cols=df.width,
+            written_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        self.manifest["checkpoints"] = [
+            checkpoint for checkpoint in self.manifest.get("checkpoints", []) if checkpoint["step"] < step
+        ] + [asdict(entry)]
+        self._write_manifest()
+        return entry
+
+    def latest(self, before_step: int) -> Optional[CheckpointEntry]:
+        """Dernier point de reprise écrit à la fin d'une étape antérieure à before_step."""
+        candidates = [
+            CheckpointEntry(**checkpoint)
+            for checkpoint in self.read_manifest().get("checkpoints", [])
+            if checkpoint["step"] < before_step
+            and os.path.exists(os.path.join(self.directory, checkpoint["file_name"]))
+        ]
+        return max(candidates, key=lambda entry: entry.step, default=None)
+
+    def load(self, entry: CheckpointEntry) -> pl.DataFrame:
+        """Relit un point de reprise (memory-map pour Arrow IPC)."""
+        path = os.path.join(self.directory, entry.file_name)
+        if entry.format == "ipc":
+            # Fichier IPC non compressé : le lecteur natif le relit en memory-map
+            df = pl.read_ipc(path)
+        else:
+            df = pl.read_parquet(path)
+        if df.height != entry.rows:
+            raise ValueError(f"Point de reprise {entry.file_name} incomplet: {df.height} lignes au lieu de {entry.rows}")
+        return df
+
+
+@dataclass
+class CheckpointingConfig:
+    """Points de reprise écrits par batch.py (désactivé si store est None)."""
+    store: Optional[CheckpointStore] = None
+
+
+checkpointing = CheckpointingConfig()
+
+
+def enable_checkpointing(store: CheckpointStore, version: str, resume: bool = False) -> None:
+    """
+    Active l'écriture des points de reprise de df_main (write_checkpoint).
+
+    Args:
+        store: Répertoire et étapes des points de reprise
+        version: Version du batch, enregistrée dans le manifeste
+        resume: True si le run reprend un run précédent (manifeste conservé)
+    """
+    store.start_run(version, resume=resume)
+    checkpointing.store = store
+    logger.info(
+        f"   💾 Points de reprise: {store.directory} ({store.file_format}, "
+        f"étapes {sorted(store.steps)})"
+    )
+
+
+def write_checkpoint(step: int, step_name: str, df: pl.DataFrame, name: str = "df_main") -> None:
+    """
+    Écrit un point de reprise de df si l'étape fait partie des étapes configurées.
+
+    Args:
+        step: Numéro d'étape enregistré (ex: 9 pour les jointures planifiées 4-9)
+        step_name: Nom de l'étape
+        df: État de df_main à la fin de l'étape
+        name: Nom du DataFrame
+    """
+    store = checkpointing.store
+    if store is None or not store.should_write(step):
+        return
+    start = time.time()
+    entry = store.write(step, step_name, df, name)
+    logger.info(f"   💾 Point de reprise: {entry.file_name} ({time.time() - start:.2f}s)")
@@ -0,0 +1,183 @@
+"""
+Contributions de chaque variable au score PDO (explicabilité).
+Le calcul PDO produit une contribution en log-odds par variable ({variable}_coeffs)
+que postprocess_df_main écarte ensuite. ContributionRecorder enveloppe le calcul PDO
+de l'étape 12 et extrait ces colonnes au passage, sans recalcul : contributions en
+Float32 et top_k facteurs de risque de chaque entreprise. Le résultat est écrit à côté
+de df_main_final (df_main_contributions) ; en mode lazy il fait partie du même plan
+et est matérialisé par le même collect.
+
+Formats (app_config["contributions"]["layout"]):
+    - wide : une ligne par entreprise, une colonne Float32 par variable
+    - long : une ligne par (entreprise, variable), rang de facteur de risque
+"""
+
+import logging
+from typing import Callable, Optional, Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.pdo_scoring import PDO_MODALITIES
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+KEY_COL = "i_uniq_kpi"
+# Clé et colonne de partition de l'export reprises des scores (si présentes à l'étape 12)
+ID_COLUMNS = [KEY_COL, "c_sgmttn_nae"]
+CONTRIBUTIONS_OUTPUT = "df_main_contributions"
+CONTRIBUTION_DTYPE = pl.Float32
+DEFAULT_TOP_K = 3
+LAYOUTS = ["wide", "long"]
+
+
+def top_drivers(frame: Frame, coeff_columns: list[str], variables: list[str], top_k: int = DEFAULT_TOP_K) -> Frame:
+    """
+    Ajoute les top_k facteurs de risque de chaque ligne : les contributions les plus négatives.
+
+    Convention de signe : le modèle est calibré sur P(non-défaut) et PDO = 1 - σ(sum_total_coeffs),
+    donc une contribution positive est protectrice (fait baisser la PDO) et une contribution
+    négative fait monter la PDO.
+
+    Chaque variable est insérée dans top_k emplacements triés (une projection vectorisée
+    par variable, compatible lazy et streaming) ; à contribution égale, la première
+    variable du modèle l'emporte. Un rang sans contribution négative reste NULL.
+
+    Colonnes ajoutées (rang de 1 à top_k):
+        - top_driver_{rang} : variable (pl.Enum des variables du modèle)
+        - top_driver_{rang}_coeffs : contribution
+    """
+    values = [f"_top_value_{rank}" for rank in range(top_k)]
+    indices = [f"_top_index_{rank}" for rank in range(top_k)]
+    frame = frame.with_columns(
+        [pl.lit(0.0, dtype=CONTRIBUTION_DTYPE).alias(col) for col in values]
+        + [pl.lit(None, dtype=pl.UInt8).alias(col) for col in indices]
+    )
+    for index, col in enumerate(coeff_columns):
+        contribution = pl.col(col).cast(CONTRIBUTION_DTYPE)
+        # Plus négative que le rang r : la variable prend le rang r
+        above = [contribution < pl.col(value) for value in values]
+        new_index = pl.lit(index, dtype=pl.UInt8)
+        # Rang r : inchangé, remplacé par la contribution, ou décalé depuis le rang r - 1
+        exprs = [
+            pl.when(above[0]).then(contribution).otherwise(pl.col(values[0])).alias(values[0]),
+            pl.when(above[0]).then(new_index).otherwise(pl.col(indices[0])).alias(indices[0]),
+        ]
+        for rank in range(1, top_k):
+            exprs += [
+                pl.when(above[rank - 1]).then(pl.col(values[rank - 1]))
+                .when(above[rank]).then(contribution)
+                .otherwise(pl.col(values[rank])).alias(values[rank]),
+                pl.when(above[rank - 1]).then(pl.col(indices[rank - 1]))
+                .when(above[rank]).then(new_index)
+                .otherwise(pl.col(indices[rank])).alias(indices[rank]),
+            ]
+        frame = frame.with_columns(exprs)
+
+    names = dict(enumerate(variables))
+    drivers = []
+    for rank, (value, index) in enumerate(zip(values, indices), start=1):
+        drivers += [
+            pl.col(index).replace_strict(names, return_dtype=pl.Enum(variables)).alias(f"top_driver_{rank}"),
+            pl.when(pl.col(index).is_not_null()).then(pl.col(value)).alias(f"top_driver_{rank}_coeffs"),
+        ]
+    return frame.with_columns(drivers).drop(values + indices)
+
+
+class ContributionRecorder:
+    """
+    Calcul PDO de l'étape 12 qui garde les contributions de chaque variable.
+
+    Usage:
+        contributions = ContributionRecorder.from_config(app_config, scorer)
+        df_main = contributions(df_main)    # mêmes colonnes que scorer(df_main)
+        contributions.frame                 # DataFrame ou LazyFrame, comme df_main
+
+    En mode lazy, contributions.frame partage le plan de df_main : les deux doivent être
+    matérialisés ensemble (pl.collect_all) pour ne calculer le plan qu'une fois.
+    """
+
+    def __init__(
+        self,
+        scorer: Callable[[Frame], Frame],
+        variables: list[str],
+        layout: str = "wide",
+        top_k: int = DEFAULT_TOP_K,
+    ):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Format de contributions inconnu: {layout!r} (attendu: {LAYOUTS})")
+        self.scorer = scorer
+        self.variables = variables
+        self.layout = layout
+        self.top_k = top_k
+        self.frame: Optional[Frame] = None
+
+    @classmethod
+    def from_config(cls, app_config: dict, scorer: Callable[[Frame], Frame]) -> Optional["ContributionRecorder"]:
+        """Construit le recorder depuis app_config["contributions"] (None si désactivé)."""
+        contributions_config = app_config.get("contributions", {})
+        if not contributions_config.get("enabled", False):
+            return None
+        modalities = app_config.get("model", {}).get("modalities", PDO_MODALITIES)
+        return cls(
+            scorer=scorer,
+            variables=list(modalities),
+            layout=contributions_config.get("layout", "wide"),
+            top_k=contributions_config.get("top_k", DEFAULT_TOP_K),
+        )
+
+    @property
+    def coeff_columns(self) -> list[str]:
+        return [f"{variable}_coeffs" for variable in self.variables]
+
+    def contributions(self, df_pdo: Frame) -> Frame:
+        """
+        Contributions et facteurs de risque extraits du résultat du calcul PDO.
+
+        Raises:
+            ValueError: Si une colonne {variable}_coeffs est absente
+        """
+        columns = df_pdo.collect_schema().names()
+        missing = [col for col in self.coeff_columns if col not in columns]
+        if missing:
+            raise ValueError(f"Colonnes de contributions absentes du calcul PDO: {missing}")
+        id_columns = [col for col in ID_COLUMNS if col in columns]
+
+        frame = df_pdo.select(
+            id_columns
+            + [pl.col(col).cast(CONTRIBUTION_DTYPE) for col in self.coeff_columns]
+            + ["sum_total_coeffs"]
+        )
+        frame = top_drivers(frame, self.coeff_columns, self.variables, self.top_k)
+        if self.layout == "wide":
+            return frame
+
+        drivers = [f"top_driver_{rank}" for rank in range(1, self.top_k + 1)]
+        return (
+            frame.unpivot(on=self.coeff_columns, index=id_columns + drivers, variable_name="variable", value_name="contribution")
+            .with_columns(pl.col("variable").str.strip_suffix("_coeffs").cast(pl.Enum(self.variables)))
+            .with_columns(
+                pl.coalesce([
+                    pl.when(pl.col("variable") == pl.col(driver)).then(pl.lit(rank, dtype=pl.UInt8))
+                    for rank, driver in enumerate(drivers, start=1)
+                ]).alias("driver_rank")
+            )
+            .select(id_columns + ["variable", "contribution", "driver_rank"])
+        )
+
+    def record(self, df_pdo: Frame) -> Frame:
+        """Mémorise les contributions d'un résultat de calcul PDO (ex: point de reprise de l'étape 12)."""
+        self.frame = self.contributions(df_pdo)
+        return df_pdo
+
+    def __call__(self, df_main: Frame) -> Frame:
+        """Calcul PDO et extraction des contributions dans la même passe."""
+        return self.record(self.scorer(df_main))
+
+
+def calcul_contributions(df_pdo: Frame, config: dict, layout: str = "wide") -> Frame:
+    """Contributions et top 3 des facteurs de risque d'un résultat de calcul PDO."""
+    modalities = config.get("model", {}).get("modalities", PDO_MODALITIES)
+    return ContributionRecorder(lambda df: df, list(modalities), layout).contributions(df_pdo)
@@ -0,0 +1,219 @@
+"""
+Recalcul incrémental (delta) de la PDO entre deux runs mensuels.
+Après l'encodage (étape 3), chaque entreprise reçoit une empreinte de ses entrées :
+ses lignes de df_main et ses tranches de chaque source (lignes jointes sur son
+i_uniq_kpi ou sur son i_intrn, cf. SOURCE_JOIN_KEYS). Seules les entreprises nouvelles
+ou dont l'empreinte a changé passent les étapes 4 à 12, avec les seules lignes des
+sources qui les concernent ; les autres reprennent leurs lignes de l'étape 12 du run
+précédent (ou restent écartées si le filtre de l'étape 10 les avait exclues).
+
+L'état (empreinte par entreprise et sorties de l'étape 12) est conservé en Parquet.
+Tout changement de configuration (app_config hors incremental_scoring), de version du
+batch ou de Polars (algorithme de hash) invalide l'état et déclenche un recalcul complet.
+
+Hypothèse (celle de l'exécution partitionnée) : les étapes 4 à 12 d'une entreprise ne
+dépendent que de ses lignes de df_main et de ses tranches de sources. Le mode incrémental
+est réservé au mode eager sans points de reprise : les points de reprise des étapes 9 à
+11 ne contiendraient que les entreprises recalculées.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.pdo_partitioning import SOURCE_JOIN_KEYS
+from common.pdo_pipeline import SOURCE_KEYS
+
+logger = logging.getLogger(LOGGER_NAME)
+
+KEY_COL = "i_uniq_kpi"
+HASH_COL = "_inputs_hash"
+HASH_SEED = 0
+ROW_INDEX_COL = "_row_index"
+STATE_FILE = "pdo_state.parquet"
+KEYS_FILE = "pdo_state_keys.parquet"
+METADATA_FILE = "pdo_state.json"
+
+
+def run_fingerprint(app_config: dict, version: str) -> str:
+    """Empreinte du traitement : sha256 de app_config (hors incremental_scoring), de la version du batch et de Polars."""
+    config = {key: value for key, value in app_config.items() if key != "incremental_scoring"}
+    payload = json.dumps(
+        {"app_config": config, "version": version, "polars": pl.__version__},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def slice_hashes(frame: pl.DataFrame, key: str, name: str) -> pl.DataFrame:
+    """Empreinte des lignes de frame par valeur de key, indépendante de l'ordre des lignes."""
+    return (
+        frame
+        .group_by(key)
+        .agg(pl.struct(pl.all()).hash(HASH_SEED).sort().alias(name))
+        .with_columns(pl.col(name).hash(HASH_SEED))
+    )
+
+
+def input_hashes(df_main: pl.DataFrame, sources: dict[str, pl.DataFrame]) -> pl.DataFrame:
+    """
+    Une ligne par i_uniq_kpi : empreinte de ses lignes de df_main et de ses tranches de sources.
+
+    Les sources jointes sur i_intrn (rsc, soldes) sont rattachées à chaque entreprise par
+    ses couples (i_uniq_kpi, i_intrn) de df_main.
+    """
+    hashes = slice_hashes(df_main, KEY_COL, "df_main")
+    for key in SOURCE_KEYS[1:]:
+        join_key = SOURCE_JOIN_KEYS[key]
+        slices = slice_hashes(sources[key], join_key, key)
+        if join_key != KEY_COL:
+            slices = slice_hashes(
+                df_main.select([KEY_COL, join_key]).unique().join(slices, on=join_key, how="left"), KEY_COL, key
+            )
+        hashes = hashes.join(slices, on=KEY_COL, how="left")
+    return hashes.select([KEY_COL, pl.struct(pl.all().exclude(KEY_COL)).hash(HASH_SEED).alias(HASH_COL)])
+
+
+class IncrementalScorer:
+    """
+    Étapes 4 à 12 limitées aux entreprises dont les entrées ont changé.
+
+    Usage:
+        incremental = IncrementalScorer.from_config(app_config, version)
+        df_main = incremental.split(df_main, initial_data)   # après l'étape 3
+        # ... étapes 4 à 12 sur les entreprises modifiées
+        df_main = incremental.merge(df_main)                 # avant postprocess_df_main
+        # ... export des sorties
+        incremental.commit()                                 # état écrit une fois l'export réussi
+
+    Le nouvel état est gardé en attente et n'est écrit que par commit() : un run
+    interrompu avant l'export laisse l'état précédent.
+    """
+
+    def __init__(self, state_dir: str, fingerprint: str):
+        self.state_dir = state_dir
+        self.fingerprint = fingerprint
+        self.hashes: Optional[pl.DataFrame] = None
+        self.carried: Optional[pl.DataFrame] = None
+        self.order: Optional[pl.DataFrame] = None
+        self.pending: Optional[tuple[pl.DataFrame, pl.DataFrame]] = None
+        os.makedirs(state_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, app_config: dict, version: str) -> Optional["IncrementalScorer"]:
+        """Construit le scorer depuis app_config["incremental_scoring"] (None si désactivé)."""
+        incremental_config = app_config.get("incremental_scoring", {})
+        if not incremental_config.get("enabled", False):
+            return None
+        return cls(state_dir=incremental_config["state_dir"], fingerprint=run_fingerprint(app_config, version))
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.state_dir, STATE_FILE)
+
+    @property
+    def keys_path(self) -> str:
+        return os.path.join(self.state_dir, KEYS_FILE)
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.state_dir, METADATA_FILE)
+
+    def load_state(self) -> Optional[tuple[pl.DataFrame, pl.DataFrame]]:
+        """
+        Relit l'état du run précédent : (empreintes par entreprise, lignes de l'étape 12).
+
+        None s'il est absent ou produit par une autre configuration.
+        """
+        paths = [self.state_path, self.keys_path, self.metadata_path]
+        if not all(os.path.exists(path) for path in paths):
+            logger.info("   🆕 Aucun état PDO précédent: recalcul complet")
+            return None
+        with open(self.metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("fingerprint") != self.fingerprint:
+            logger.info("   ♻️  Configuration, version du batch ou de Polars modifiée: recalcul complet")
+            return None
+        return pl.read_parquet(self.keys_path), pl.read_parquet(self.state_path, memory_map=True)
+
+    def save_state(self, hashes: pl.DataFrame, rows: pl.DataFrame) -> None:
+        """Écrit l'état (fichiers temporaires puis renommage atomique, métadonnées en dernier)."""
+        for frame, path in [(hashes, self.keys_path), (rows, self.state_path)]:
+            tmp_path = f"{path}.tmp"
+            frame.write_parquet(tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        with open(self.metadata_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "companies": hashes.height, "rows": rows.height}, f)
+
+    def split(self, df_main: pl.DataFrame, initial_data: dict[str, pl.DataFrame]) -> pl.DataFrame:
+        """
+        Garde les entreprises nouvelles ou modifiées de df_main (sortie de l'étape 3).
+
+        Les sources de initial_data sont remplacées par leurs seules lignes rattachées
+        à ces entreprises ; les lignes de l'étape 12 des autres sont reprises par merge().
+
+        Raises:
+            TypeError: Si df_main est un LazyFrame (mode lazy non supporté)
+        """
+        if isinstance(df_main, pl.LazyFrame):
+            raise TypeError("Le recalcul PDO incrémental nécessite un DataFrame (mode lazy non supporté)")
+
+        self.hashes = input_hashes(df_main, initial_data)
+        self.order = (
+            df_main.select(KEY_COL).with_row_index(ROW_INDEX_COL)
+            .group_by(KEY_COL).agg(pl.col(ROW_INDEX_COL).min())
+        )
+        previous = self.load_state()
+        if previous is None:
+            changed, self.carried = self.hashes, None
+        else:
+            previous_hashes, previous_rows = previous
+            changed = self.hashes.join(previous_hashes, on=[KEY_COL, HASH_COL], how="anti")
+            unchanged = self.hashes.join(previous_hashes, on=[KEY_COL, HASH_COL], how="semi")
+            self.carried = previous_rows.join(unchanged.select(KEY_COL), on=KEY_COL, how="semi")
+
+        df_main = df_main.join(changed.select(KEY_COL), on=KEY_COL, how="semi")
+        for key in SOURCE_KEYS[1:]:
+            join_key = SOURCE_JOIN_KEYS[key]
+            initial_data[key] = initial_data[key].join(df_main.select(join_key).unique(), on=join_key, how="semi")
+
+        n_unchanged = self.hashes.height - changed.height
+        logger.info(
+            f"   🔁 PDO incrémentale: {changed.height:,} entreprise(s) recalculée(s) (étapes 4-12) | "
+            f"{n_unchanged:,} inchangée(s)"
+        )
+        return df_main
+
+    def merge(self, df_pdo: pl.DataFrame) -> pl.DataFrame:
+        """Ajoute aux lignes recalculées (sortie de l'étape 12) celles reprises du run précédent, dans l'ordre de df_main."""
+        if self.hashes is None:
+            return df_pdo
+        merged = df_pdo
+        if self.carried is not None:
+            merged = pl.concat([df_pdo, self.carried.select(df_pdo.columns)], how="vertical_relaxed")
+        merged = (
+            merged
+            .join(self.order, on=KEY_COL, how="left")
+            .sort(ROW_INDEX_COL, maintain_order=True)
+            .drop(ROW_INDEX_COL)
+        )
+        n_carried = 0 if self.carried is None else self.carried.height
+        logger.info(f"   🔁 PDO incrémentale: {df_pdo.height:,} ligne(s) calculée(s) | {n_carried:,} reprise(s)")
+        self.pending = (self.hashes, merged)
+        self.hashes = self.carried = self.order = None
+        return merged
+
+    def commit(self) -> None:
+        """Écrit l'état en attente du dernier run (à appeler une fois les sorties exportées)."""
+        if self.pending is None:
+            return
+        hashes, rows = self.pending
+        self.save_state(hashes, rows)
+        self.pending = None
+        logger.info(f"   💾 État PDO incrémental écrit ({hashes.height:,} entreprises)")
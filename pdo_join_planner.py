@@ -0,0 +1,125 @@
+"""
+Planificateur des jointures de features (étapes 4 à 9).
+Au lieu de joindre chaque source sur df_main (qui est recopié à chaque jointure),
+chaque étape est exécutée sur une table étroite ne contenant que les clés
+distinctes de df_main : elle produit une ligne par clé. Les tables étroites
+d'une même clé sont jointes entre elles, celles indexées sur i_intrn sont
+rattachées à i_uniq_kpi via les couples de clés de df_main, puis une seule
+jointure finale enrichit df_main.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+KPI_KEY = "i_uniq_kpi"
+INTRN_KEY = "i_intrn"
+KEY_COLUMNS = [KPI_KEY, INTRN_KEY]
+
+
+@dataclass
+class JoinStep:
+    """Étape de features : méthode de BaseTransformation, sources consommées et clé de jointure."""
+    name: str
+    method: str
+    sources: list[str]
+    key: str
+    # Colonnes de df_main lues par l'étape en plus de la clé
+    input_columns: list[str] = field(default_factory=list)
+
+
+# Étapes 4 à 9, dans l'ordre du batch (une colonne produite par deux étapes,
+# ex: check, prend la valeur de la dernière comme en séquentiel)
+JOIN_STEPS = [
+    JoinStep("RSC", "preprocess_risk", ["rsc"], INTRN_KEY),
+    JoinStep("SOLDES", "preprocess_soldes", ["soldes"], INTRN_KEY),
+    JoinStep("REBOOT", "preprocess_reboot", ["reboot"], KPI_KEY),
+    JoinStep("TRANSAC", "preprocess_donnees_transac", ["donnees_transac"], KPI_KEY),
+    JoinStep("SAFIR CONSO", "preprocess_safir_conso", ["safir_cc", "safir_cd"], KPI_KEY),
+    JoinStep("SAFIR SOC", "preprocess_safir_soc", ["safir_sc", "safir_sd"], KPI_KEY),
+]
+
+
+def _feature_table(base_transformation, step: JoinStep, df_main: Frame, sources: dict[str, Frame]) -> Frame:
+    """Exécute une étape sur les clés distinctes de df_main (une ligne par clé, triée)."""
+    narrow_input = df_main.select([step.key, *step.input_columns]).unique(subset=[step.key])
+    features = getattr(base_transformation, step.method)(
+        narrow_input, *[sources[name] for name in step.sources]
+    )
+    return features.drop(step.input_columns).sort(step.key)
+
+
+def _combine(tables: list[Frame], key: str) -> Frame:
+    """Joint les tables étroites d'une même clé (toutes ont le même ensemble de clés)."""
+    combined = tables[0]
+    for table in tables[1:]:
+        combined = combined.join(table, on=key, how="left", nulls_equal=True)
+    return combined
+
+
+def join_features(
+    base_transformation,
+    df_main: Frame,
+    sources: dict[str, Frame],
+    steps: list[JoinStep] = JOIN_STEPS,
+) -> Frame:
+    """
+    Enrichit df_main des features des étapes 4 à 9 en une seule jointure.
+
+    Hypothèse: chaque étape ne lit de df_main que sa clé (et ses input_columns)
+    et ajoute des colonnes par une jointure LEFT, ce qui est le cas des
+    preprocess_* de BaseTransformation.
+
+    Args:
+        base_transformation: Instance de BaseTransformation
+        df_main: DataFrame principal (sortie de l'étape 3)
+        sources: Sources SQL (clés de JOIN_STEPS)
+        steps: Étapes à planifier (défaut: JOIN_STEPS)
+
+    Returns:
+        df_main enrichi (mêmes colonnes que l'enchaînement séquentiel des étapes)
+    """
+    tables = [_feature_table(base_transformation, step, df_main, sources) for step in steps]
+    main_columns = df_main.collect_schema().names()
+
+    # Une colonne produite par plusieurs étapes est conservée depuis la dernière,
+    # à la position de sa première apparition (comme avec les with_columns successifs)
+    owner: dict[str, int] = {}
+    output_columns = list(main_columns)
+    for index, table in enumerate(tables):
+        for col in table.collect_schema().names():
+            if col not in KEY_COLUMNS:
+                owner[col] = index
+                if col not in output_columns:
+                    output_columns.append(col)
+    tables = [
+        table.select([step.key, *[col for col, i in owner.items() if i == index]])
+        for index, (step, table) in enumerate(zip(steps, tables))
+    ]
+
+    key_pairs = df_main.select(KEY_COLUMNS).unique()
+    features = key_pairs
+    for key in (KPI_KEY, INTRN_KEY):
+        key_tables = [table for step, table in zip(steps, tables) if step.key == key]
+        if key_tables:
+            features = features.join(_combine(key_tables, key), on=key, how="left", nulls_equal=True)
+
+    # Colonnes de df_main réécrites par une étape : la valeur de l'étape l'emporte
+    overwritten = [col for col in owner if col in main_columns]
+    if overwritten:
+        df_main = df_main.drop(overwritten)
+
+    logger.info(f"   🧩 Jointures planifiées: {len(steps)} étapes → 1 jointure sur df_main")
+    return (
+        df_main
+        .join(features, on=KEY_COLUMNS, how="left", nulls_equal=True, maintain_order="left")
+        .select(output_columns)
+    )
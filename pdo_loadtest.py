@@ -0,0 +1,203 @@
+"""
+Test de charge du service de scoring PDO (pdo_service).
+Démarre le service dans un processus séparé épinglé sur un cœur (POLARS_MAX_THREADS=1,
+entreprises synthétiques préchargées) ou cible un service existant (--url), envoie les
+requêtes depuis plusieurs connexions persistantes et mesure la latence côté client.
+Le code de sortie vaut 1 si le p99 dépasse l'objectif.
+
+Usage:
+    python pdo_loadtest.py --requests 20000 --concurrency 4 --p99-target-ms 5
+    python pdo_loadtest.py --mode features --batch-size 50
+    python pdo_loadtest.py --url http://pdo-scoring:8080 --mode cached --companies 100k
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+from common.constants import LOGGER_NAME
+from common.pdo_service import KPI_KEY
+from common.pdo_synthetic import generate_service_input, parse_scale
+
+logger = logging.getLogger(LOGGER_NAME)
+
+DEFAULT_P99_TARGET_MS = 5.0
+STARTUP_TIMEOUT_SECONDS = 120.0
+# Modes : cached (GET /score/<id>), ids (POST d'identifiants du cache), features (POST des features)
+MODES = ["cached", "ids", "features"]
+
+
+@dataclass
+class LoadTestResult:
+    """Latences côté client (ms) et débit d'un test de charge."""
+    mode: str
+    requests: int
+    concurrency: int
+    batch_size: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    requests_per_s: float
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(companies: str, cpu: Optional[int] = 0) -> tuple[subprocess.Popen, str]:
+    """Démarre le service (modèle synthétique, entreprises préchargées) et attend /health."""
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "common.pdo_service", "--host", "127.0.0.1", "--port", str(port),
+        "--synthetic-model", "--synthetic-companies", companies,
+    ]
+    if cpu is not None:
+        command += ["--cpu", str(cpu)]
+    process = subprocess.Popen(command, env={**os.environ, "POLARS_MAX_THREADS": "1"})
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le service s'est arrêté au démarrage (code {process.returncode})")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise TimeoutError(f"Le service n'a pas répondu sur {url} en {STARTUP_TIMEOUT_SECONDS:.0f}s")
+
+
+def build_requests(mode: str, n_requests: int, batch_size: int, n_companies: int, seed: int = 0) -> list[tuple]:
+    """Requêtes (méthode, chemin, corps) tirées sur les entreprises synthétiques préchargées."""
+    rng = np.random.default_rng(seed)
+    companies = generate_service_input(n_companies)
+    picks = rng.integers(0, n_companies, size=(n_requests, batch_size))
+    if mode == "cached":
+        keys = companies[KPI_KEY]
+        return [("GET", f"/score/{keys[int(row[0])]}", None) for row in picks]
+    if mode == "ids":
+        keys = companies[KPI_KEY].to_list()
+        return [("POST", "/score", json.dumps({KPI_KEY: [keys[i] for i in row]}).encode()) for row in picks]
+    rows = companies.to_dicts()
+    return [("POST", "/score", json.dumps({"companies": [rows[i] for i in row]}).encode()) for row in picks]
+
+
+def run_load(url: str, requests: list[tuple], concurrency: int) -> tuple[list[float], int, float]:
+    """Envoie les requêtes sur concurrency connexions persistantes ; (latences en s, erreurs, durée totale)."""
+    target = urlparse(url)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker(chunk: list[tuple]) -> None:
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        local, failed = [], 0
+        headers = {"Content-Type": "application/json"}
+        for method, path, body in chunk:
+            start = time.perf_counter()
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            failed += response.status != 200
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(requests[i::concurrency],)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def run_load_test(
+    url: str,
+    mode: str = "cached",
+    n_requests: int = 20_000,
+    concurrency: int = 4,
+    batch_size: int = 1,
+    n_companies: int = 100_000,
+    warmup: int = 500,
+) -> LoadTestResult:
+    """Test de charge d'un service démarré (les requêtes de chauffe ne sont pas mesurées)."""
+    requests = build_requests(mode, warmup + n_requests, batch_size, n_companies)
+    run_load(url, requests[:warmup], concurrency)
+    latencies, errors, duration = run_load(url, requests[warmup:], concurrency)
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1e3, [50, 95, 99])
+    return LoadTestResult(
+        mode=mode,
+        requests=len(latencies),
+        concurrency=concurrency,
+        batch_size=batch_size,
+        errors=errors,
+        p50_ms=float(p50),
+        p95_ms=float(p95),
+        p99_ms=float(p99),
+        max_ms=max(latencies) * 1e3,
+        requests_per_s=len(latencies) / duration,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Point d'entrée : test de charge et comparaison du p99 à l'objectif."""
+    parser = argparse.ArgumentParser(description="Test de charge du service de scoring PDO")
+    parser.add_argument("--url", help="Service existant (défaut: service local démarré pour le test)")
+    parser.add_argument("--mode", choices=MODES, default="cached")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1, help="Entreprises par requête (modes ids et features)")
+    parser.add_argument("--companies", default="100k", help="Entreprises préchargées (10k, 100k, ...)")
+    parser.add_argument("--cpu", type=int, default=0, help="Cœur du service local")
+    parser.add_argument("--p99-target-ms", type=float, default=DEFAULT_P99_TARGET_MS)
+    parser.add_argument("--output", help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    process, url = None, args.url
+    if url is None:
+        process, url = start_service(args.companies, args.cpu)
+    try:
+        result = run_load_test(
+            url, args.mode, args.requests, args.concurrency, args.batch_size, parse_scale(args.companies)
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    marker = "🟢" if result.p99_ms <= args.p99_target_ms and result.errors == 0 else "🔴"
+    logger.info(
+        f"   {marker} {result.mode} x{result.batch_size} [{result.concurrency} connexions]: "
+        f"p50 {result.p50_ms:.2f} ms | p95 {result.p95_ms:.2f} ms | p99 {result.p99_ms:.2f} ms "
+        f"(objectif {args.p99_target_ms:.1f} ms) | {result.requests_per_s:,.0f} req/s | {result.errors} erreurs"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(asdict(result), f, indent=2)
+    return int(marker == "🔴")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,390 @@
+"""
+Export des sorties du batch PDO en Parquet partitionné.
+Les DataFrames finaux (df_main_final, df_main_audit_final) sont écrits en flux par
+sink_parquet en répertoires Hive (segment, date de calcul), avec des row groups de
+taille bornée et leurs statistiques. Chaque fichier est envoyé à COS en upload
+multipart pendant son écriture : les parties pleines partent dès qu'elles sont
+produites, sans sérialiser tout le DataFrame en mémoire après le scoring.
+"""
+
+import io
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+DEFAULT_PARTITION_COLUMNS = ("c_sgmttn_nae", "D_CALCUL_PDO")
+DEFAULT_ROW_GROUP_SIZE = 128_000
+DEFAULT_MAX_ROWS_PER_FILE = 2_000_000
+# Taille des parties multipart (S3 / COS : 5 MiB minimum, sauf la dernière partie)
+MIN_PART_SIZE = 5 * 1024**2
+DEFAULT_PART_SIZE = 16 * 1024**2
+DEFAULT_MAX_WORKERS = 4
+MANIFEST_FILE = "_manifest.json"
+# Valeur de répertoire Hive d'une clé de partition NULL
+HIVE_NULL = "__HIVE_DEFAULT_PARTITION__"
+
+
+@dataclass
+class WrittenFile:
+    """Fichier Parquet écrit (chemin relatif à la racine de l'export)."""
+    path: str
+    bytes: int
+    etag: Optional[str] = None
+
+
+class MultipartUploadStream(io.RawIOBase):
+    """
+    Fichier en écriture seule envoyé à COS par upload multipart pendant son écriture.
+
+    Les parties de part_size octets sont envoyées sur le pool du writer dès qu'elles
+    sont pleines (au plus max_pending parties en attente, la mémoire reste bornée) ;
+    close() envoie le reste et termine l'upload. Un fichier plus petit qu'une partie
+    est envoyé en un seul put_object. Avec local_path, une copie locale est écrite
+    (atomiquement) en parallèle.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        executor: ThreadPoolExecutor,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_pending: int = 2 * DEFAULT_MAX_WORKERS,
+        local_path: Optional[str] = None,
+    ):
+        super().__init__()
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size doit être >= {MIN_PART_SIZE} octets (minimum multipart S3)")
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.executor = executor
+        self.part_size = part_size
+        self.local_path = local_path
+        self.size = 0
+        self.etag: Optional[str] = None
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: list[Future] = []
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._local_file = None
+        if local_path is not None:
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            self._local_file = open(f"{local_path}.tmp", "wb")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self.size += len(data)
+        if self._local_file is not None:
+            self._local_file.write(data)
+        while len(self._buffer) >= self.part_size:
+            self._submit_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def _upload_part(self, part_number: int, body: bytes) -> dict:
+        try:
+            response = self.client.upload_part(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=part_number, Body=body
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            self._slots.release()
+
+    def _submit_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)["UploadId"]
+        self._slots.acquire()
+        self._parts.append(self.executor.submit(self._upload_part, len(self._parts) + 1, body))
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self.etag = self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))["ETag"]
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+                parts = [future.result() for future in self._parts]
+                self.etag = self.client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={"Parts": parts}
+                )["ETag"]
+            if self._local_file is not None:
+                self._local_file.close()
+                os.replace(f"{self.local_path}.tmp", self.local_path)
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self) -> None:
+        """Abandonne l'upload multipart en cours et la copie locale."""
+        if self._upload_id is not None:
+            for future in self._parts:
+                future.cancel()
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+        if self._local_file is not None and not self._local_file.closed:
+            self._local_file.close()
+            os.remove(f"{self.local_path}.tmp")
+
+
+class _LocalFileStream(io.RawIOBase):
+    """Fichier local en écriture seule, renommé à la fermeture (écriture atomique)."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.size = 0
+        self.etag = None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(f"{path}.tmp", "wb")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        return self._file.write(data)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._file.close()
+        os.replace(f"{self.path}.tmp", self.path)
+        super().close()
+
+    def abort(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+            os.remove(f"{self.path}.tmp")
+
+
+class PartitionedParquetWriter:
+    """
+    Écrit les sorties en Parquet partitionné (Hive), en local et/ou sur COS.
+
+    Usage:
+        writer = PartitionedParquetWriter.from_config(app_config, cos_client)
+        files = writer.write(df_main_final, "df_main_final")
+        # <prefix>/df_main_final/c_sgmttn_nae=ME/D_CALCUL_PDO=2026-10-17/part-00000.parquet
+        # <prefix>/df_main_final/_manifest.json (écrit en dernier : export complet)
+
+    Les colonnes de partition absentes du DataFrame sont ignorées.
+    """
+
+    def __init__(
+        self,
+        output_dir: Optional[str] = None,
+        client: Any = None,
+        bucket: Optional[str] = None,
+        prefix: str = "",
+        partition_by: Sequence[str] = DEFAULT_PARTITION_COLUMNS,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        compression_level: int = 3,
+    ):
+        if output_dir is None and client is None:
+            raise ValueError("PartitionedParquetWriter: output_dir ou client COS requis")
+        if client is not None and not bucket:
+            raise ValueError("PartitionedParquetWriter: bucket requis avec un client COS")
+        self.output_dir = output_dir
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.partition_by = list(partition_by)
+        self.row_group_size = row_group_size
+        self.max_rows_per_file = max_rows_per_file
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.compression_level = compression_level
+        # Nombre de lignes de la dernière écriture de chaque sortie
+        self.rows: dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, app_config: dict, client: Any = None) -> Optional["PartitionedParquetWriter"]:
+        """Construit le writer depuis app_config["output_writer"] (None si désactivé)."""
+        writer_config = app_config.get("output_writer", {})
+        if not writer_config.get("enabled", False):
+            return None
+        return cls(
+            output_dir=writer_config.get("output_dir"),
+            client=client if writer_config.get("bucket") else None,
+            bucket=writer_config.get("bucket"),
+            prefix=writer_config.get("prefix", ""),
+            partition_by=writer_config.get("partition_by", DEFAULT_PARTITION_COLUMNS),
+            row_group_size=writer_config.get("row_group_size", DEFAULT_ROW_GROUP_SIZE),
+            max_rows_per_file=writer_config.get("max_rows_per_file", DEFAULT_MAX_ROWS_PER_FILE),
+            part_size=writer_config.get("part_size", DEFAULT_PART_SIZE),
+            max_workers=writer_config.get("max_workers", DEFAULT_MAX_WORKERS),
+        )
+
+    def _key(self, relative_path: str) -> str:
+        return f"{self.prefix}/{relative_path}" if self.prefix else relative_path
+
+    @staticmethod
+    def _partition_dir(partition_keys: pl.DataFrame) -> str:
+        return "/".join(
+            f"{name}={HIVE_NULL if value is None else value}" for name, value in partition_keys.row(0, named=True).items()
+        )
+
+    def write(self, frame: Frame, name: str) -> list[WrittenFile]:
+        """
+        Écrit frame sous <name>/ en un seul passage streaming, puis le manifeste de l'export.
+
+        Returns:
+            Fichiers écrits (chemins relatifs à la racine de l'export)
+        """
+        return self.write_all({name: frame})[name]
+
+    def write_all(self, frames: dict[str, Frame]) -> dict[str, list[WrittenFile]]:
+        """
+        Écrit plusieurs sorties en un seul passage streaming, puis le manifeste de chacune.
+
+        Les sink_parquet de toutes les sorties sont exécutés ensemble (pl.collect_all) :
+        des LazyFrames issus du même plan (ex: df_main_final et ses contributions en mode
+        lazy) sont écrits depuis le plan sans DataFrame intermédiaire, et leurs sous-plans
+        communs ne sont calculés qu'une fois. Le nombre de lignes de chaque sortie est
+        compté au passage des morceaux (self.rows et manifeste).
+
+        Returns:
+            Fichiers écrits par sortie (chemins relatifs à la racine de l'export)
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cos-upload")
+        streams: dict[str, list[tuple[str, io.RawIOBase]]] = {name: [] for name in frames}
+        keys: dict[str, list[str]] = {}
+        heights: dict[str, list[int]] = {name: [] for name in frames}
+        queries: list[pl.LazyFrame] = []
+        for name, frame in frames.items():
+            lf = frame.lazy() if isinstance(frame, pl.DataFrame) else frame
+            columns = lf.collect_schema().names()
+            keys[name] = [column for column in self.partition_by if column in columns]
+            missing = [column for column in self.partition_by if column not in columns]
+            if missing:
+                logger.warning(f"   ⚠️  {name}: colonnes de partition absentes ignorées: {missing}")
+            queries.append(
+                _counted(lf, heights[name]).sink_parquet(
+                    pl.PartitionBy(
+                        self.output_dir or f"cos://{self.bucket}",
+                        key=keys[name] or None,
+                        include_key=True if keys[name] else None,
+                        max_rows_per_file=self.max_rows_per_file,
+                        file_path_provider=self._file_opener(name, keys[name], executor, streams[name]),
+                    ),
+                    compression="zstd",
+                    compression_level=self.compression_level,
+                    statistics=True,
+                    row_group_size=self.row_group_size,
+                    lazy=True,
+                )
+            )
+
+        try:
+            pl.collect_all(queries, engine="streaming")
+            # sink_parquet laisse les fichiers ouverts : la fermeture termine les uploads
+            for _, stream in (opened for name in frames for opened in streams[name]):
+                stream.close()
+        except BaseException:
+            for _, stream in (opened for name in frames for opened in streams[name]):
+                if not stream.closed:
+                    stream.abort()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+
+        written: dict[str, list[WrittenFile]] = {}
+        for name in frames:
+            files = [WrittenFile(path, stream.size, stream.etag) for path, stream in streams[name]]
+            self.rows[name] = sum(heights[name])
+            self._write_manifest(name, keys[name], files, self.rows[name])
+            logger.info(
+                f"   💾 {name}: {self.rows[name]:,} lignes, {len(files)} fichier(s) Parquet, "
+                f"{sum(f.bytes for f in files) / 1024**2:,.1f} MB"
+                + (f" → cos://{self.bucket}/{self._key(name)}" if self.client is not None else "")
+            )
+            written[name] = files
+        return written
+
+    def _file_opener(
+        self,
+        name: str,
+        keys: list[str],
+        executor: ThreadPoolExecutor,
+        streams: list[tuple[str, io.RawIOBase]],
+    ) -> Callable[[Any], io.RawIOBase]:
+        """file_path_provider de sink_parquet : ouvre chaque fichier de <name>/ (local ou upload COS)."""
+        def open_file(args: Any) -> io.RawIOBase:
+            partition_dir = self._partition_dir(args.partition_keys) if keys else ""
+            relative_path = "/".join(
+                part for part in [name, partition_dir, f"part-{args.index_in_partition:05d}.parquet"] if part
+            )
+            local_path = os.path.join(self.output_dir, relative_path) if self.output_dir else None
+            if self.client is not None:
+                stream = MultipartUploadStream(
+                    self.client, self.bucket, self._key(relative_path), executor,
+                    self.part_size, 2 * self.max_workers, local_path,
+                )
+            else:
+                stream = _LocalFileStream(local_path)
+            streams.append((relative_path, stream))
+            return stream
+
+        return open_file
+
+    def _write_manifest(self, name: str, keys: list[str], files: list[WrittenFile], rows: int) -> None:
+        """Manifeste de l'export, écrit après tous les fichiers de données."""
+        manifest = {
+            "name": name,
+            "partition_by": keys,
+            "rows": rows,
+            "written_at": datetime.now().isoformat(timespec="seconds"),
+            "files": [asdict(f) for f in files],
+        }
+        body = json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")
+        relative_path = f"{name}/{MANIFEST_FILE}"
+        if self.output_dir:
+            path = os.path.join(self.output_dir, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        if self.client is not None:
+            self.client.put_object(Bucket=self.bucket, Key=self._key(relative_path), Body=body)
+
+
+def _counted(lf: pl.LazyFrame, heights: list[int]) -> pl.LazyFrame:
+    """Ajoute à heights la taille de chaque morceau qui traverse le plan (streaming et partage du plan conservés)."""
+    def count(batch: pl.DataFrame) -> pl.DataFrame:
+        heights.append(batch.height)
+        return batch
+
+    return lf.map_batches(count, streamable=True)
+
+
+def write_outputs(writer: PartitionedParquetWriter, frames: dict[str, Frame]) -> dict[str, list[WrittenFile]]:
+    """Écrit plusieurs sorties (ex: df_main_final et df_main_contributions) en un seul passage."""
+    return writer.write_all(frames)
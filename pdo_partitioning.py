@@ -0,0 +1,142 @@
+"""
+Exécution partitionnée du batch PDO.
+Le périmètre est découpé par hash de i_uniq_kpi : chaque partition passe les
+étapes 2 à 13 dans un processus séparé avec uniquement sa part des sources,
+puis les sorties partielles sont concaténées.
+"""
+
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.pdo_pipeline import (
+    SOURCE_KEYS,
+    run_pdo_steps,
+    select_feature_engines,
+    select_pdo_formatter,
+    select_pdo_scorer,
+    select_reference_tables,
+    select_schema_layer,
+)
+
+logger = logging.getLogger(LOGGER_NAME)
+
+SHARD_COL = "_shard"
+SHARD_KEY = "i_uniq_kpi"
+HASH_SEED = 0
+
+# Clé de jointure de chaque source sur df_main
+SOURCE_JOIN_KEYS = {
+    "rsc": "i_intrn",
+    "soldes": "i_intrn",
+    "reboot": "i_uniq_kpi",
+    "donnees_transac": "i_uniq_kpi",
+    "safir_cc": "i_uniq_kpi",
+    "safir_cd": "i_uniq_kpi",
+    "safir_sc": "i_uniq_kpi",
+    "safir_sd": "i_uniq_kpi",
+}
+
+
+def shard_expr(n_shards: int) -> pl.Expr:
+    """Numéro de partition d'une ligne : hash stable de i_uniq_kpi modulo n_shards."""
+    return (pl.col(SHARD_KEY).hash(seed=HASH_SEED) % n_shards).cast(pl.UInt32).alias(SHARD_COL)
+
+
+def assign_shards(initial_data: dict[str, pl.DataFrame], n_shards: int) -> dict[str, pl.DataFrame]:
+    """
+    Ajoute la colonne de partition à chaque source.
+
+    Les sources jointes sur une autre clé que i_uniq_kpi (rsc, soldes sur i_intrn) sont
+    routées via la correspondance clé → partition de unfiltered_df_main : une ligne
+    rattachée à plusieurs partitions est dupliquée dans chacune d'elles.
+    """
+    df_main = initial_data["unfiltered_df_main"].with_columns(shard_expr(n_shards))
+
+    sharded = {"unfiltered_df_main": df_main}
+    for key in SOURCE_KEYS[1:]:
+        join_key = SOURCE_JOIN_KEYS[key]
+        if join_key == SHARD_KEY:
+            sharded[key] = initial_data[key].with_columns(shard_expr(n_shards))
+        else:
+            key_to_shard = df_main.select([join_key, SHARD_COL]).unique()
+            sharded[key] = initial_data[key].join(key_to_shard, on=join_key, how="inner")
+    return sharded
+
+
+def write_shards(initial_data: dict[str, pl.DataFrame], n_shards: int, shard_dir: str) -> list[dict[str, str]]:
+    """
+    Écrit chaque partition de chaque source en Parquet.
+
+    Les workers relisent uniquement leur partition : rien n'est sérialisé entre
+    processus et les sources peuvent être libérées par le processus principal.
+
+    Returns:
+        Liste (une entrée par partition) de dictionnaires {source: chemin Parquet}
+    """
+    shard_paths: list[dict[str, str]] = [{} for _ in range(n_shards)]
+    for key, source in assign_shards(initial_data, n_shards).items():
+        parts = source.partition_by(SHARD_COL, as_dict=True, include_key=False)
+        for shard in range(n_shards):
+            part = parts.get((shard,), source.clear().drop(SHARD_COL))
+            path = os.path.join(shard_dir, f"{key}_{shard:03d}.parquet")
+            part.write_parquet(path)
+            shard_paths[shard][key] = path
+    return shard_paths
+
+
+def score_shard(app_config: dict, source_paths: dict[str, str]) -> pl.DataFrame:
+    """Exécute les étapes 2 à 13 sur une partition (point d'entrée d'un worker)."""
+    from common.base_transformation import BaseTransformation
+    from common.config_context import ConfigContext
+
+    ConfigContext().set("app_config", app_config)
+    base_transformation = select_feature_engines(BaseTransformation(app_config), app_config)
+    scorer = select_pdo_scorer(base_transformation, app_config)
+    formatter = select_pdo_formatter(base_transformation, app_config)
+    schema_layer = select_schema_layer(app_config)
+    encoder, scope_rules = select_reference_tables(base_transformation, app_config)
+
+    sources = {key: pl.read_parquet(path) for key, path in source_paths.items()}
+    plan_joins = app_config.get("join_planner", False)
+    prefilter = app_config.get("scope_prefilter", False)
+    return run_pdo_steps(
+        base_transformation, sources, scorer, formatter, schema_layer, plan_joins, prefilter, encoder, scope_rules
+    )
+
+
+def run_partitioned(
+    app_config: dict,
+    initial_data: dict[str, pl.DataFrame],
+    n_shards: int,
+    max_workers: int,
+) -> pl.DataFrame:
+    """
+    Exécute les étapes 2 à 13 partition par partition dans un pool de processus.
+
+    Args:
+        app_config: Configuration applicative (recréation de BaseTransformation dans chaque worker)
+        initial_data: Sources SQL chargées (vidé après écriture des partitions)
+        n_shards: Nombre de partitions
+        max_workers: Nombre de processus en parallèle
+
+    Returns:
+        Concaténation des sorties de toutes les partitions
+    """
+    with tempfile.TemporaryDirectory(prefix="pdo_shards_") as shard_dir:
+        shard_paths = write_shards(initial_data, n_shards, shard_dir)
+        initial_data.clear()
+        logger.info(f"   🧩 {n_shards} partitions écrites, {max_workers} workers")
+
+        # spawn : fork est déconseillé avec le pool de threads de Polars
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [executor.submit(score_shard, app_config, paths) for paths in shard_paths]
+            results = [future.result() for future in futures]
+
+    return pl.concat(results, how="vertical_relaxed")
@@ -0,0 +1,261 @@
+"""
+Enchaînement des étapes de preprocessing et de calcul PDO.
+Permet d'exécuter les étapes 2 à 13 en mode lazy : un seul plan pl.LazyFrame
+est construit puis matérialisé en une fois à la fin.
+"""
+
+import logging
+from typing import Callable, Optional, Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.pdo_bucketing import BucketTable
+from common.pdo_join_planner import join_features
+from common.pdo_reboot import add_reboot_features
+from common.pdo_reference import ReferenceTables
+from common.pdo_safir import SafirEngine
+from common.pdo_schema import SchemaLayer
+from common.pdo_scope_filters import SCOPE_RULES, ScopeRule, apply_scope_prefilter
+from common.pdo_scoring import CoefficientTable
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+# Sources SQL consommées par les étapes 2 à 9
+SOURCE_KEYS = [
+    "unfiltered_df_main",
+    "rsc",
+    "soldes",
+    "reboot",
+    "donnees_transac",
+    "safir_cc",
+    "safir_cd",
+    "safir_sc",
+    "safir_sd",
+]
+
+
+def to_lazy_sources(initial_data: dict[str, Frame]) -> dict[str, pl.LazyFrame]:
+    """Convertit les sources chargées en LazyFrames (sans copie des données)."""
+    return {
+        key: df.lazy() if isinstance(df, pl.DataFrame) else df
+        for key, df in initial_data.items()
+        if key in SOURCE_KEYS
+    }
+
+# Moteurs vectorisés activables par étape (app_config["feature_engines"]) :
+# nom → (méthode de BaseTransformation remplacée, construction depuis app_config
+# d'une fonction de même signature)
+FEATURE_ENGINES = {
+    "reboot": ("preprocess_reboot", lambda app_config: add_reboot_features),
+    "safir_conso": (
+        "preprocess_safir_conso",
+        lambda app_config: SafirEngine.from_config(app_config, require_soc=False).add_conso_features,
+    ),
+    "safir_soc": ("preprocess_safir_soc", lambda app_config: SafirEngine.from_config(app_config).add_soc_features),
+}
+
+
+class FeatureEngines:
+    """BaseTransformation dont certaines méthodes preprocess_* sont remplacées par les moteurs vectorisés."""
+
+    def __init__(self, base_transformation, overrides: dict[str, Callable]):
+        self.base_transformation = base_transformation
+        self.overrides = overrides
+
+    def __getattr__(self, name: str):
+        overrides = self.__dict__.get("overrides", {})
+        if name in overrides:
+            return overrides[name]
+        if "base_transformation" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.base_transformation, name)
+
+
+def select_feature_engines(base_transformation, app_config: dict):
+    """
+    Retourne base_transformation, avec les étapes listées dans app_config["feature_engines"]
+    (ex: ["reboot", "safir_soc"]) exécutées par les moteurs vectorisés de FEATURE_ENGINES.
+    """
+    names = app_config.get("feature_engines", [])
+    unknown = sorted(set(names) - set(FEATURE_ENGINES))
+    if unknown:
+        raise ValueError(f"Moteurs de features inconnus: {unknown} (disponibles: {sorted(FEATURE_ENGINES)})")
+    if not names:
+        return base_transformation
+    logger.info(f"   ✅ Moteurs de features vectorisés: {', '.join(names)}")
+    overrides = {}
+    for name in names:
+        method, build = FEATURE_ENGINES[name]
+        overrides[method] = build(app_config)
+    return FeatureEngines(base_transformation, overrides)
+
+
+def select_pdo_scorer(base_transformation, app_config: dict) -> Callable[[Frame], Frame]:
+    """
+    Retourne la fonction de calcul PDO de l'étape 12.
+
+    config["model"]["scoring_engine"] == "table" active la table de coefficients
+    (compilée une seule fois ici), sinon BaseTransformation.calcul_pdo est utilisé.
+    """
+    if app_config.get("model", {}).get("scoring_engine") == "table":
+        table = CoefficientTable.from_config(app_config)
+        logger.info(f"   ✅ Table de coefficients PDO chargée ({len(table.variables)} variables)")
+        return table.score
+    return base_transformation.calcul_pdo
+
+
+def select_pdo_formatter(base_transformation, app_config: dict) -> Callable[[Frame], Frame]:
+    """
+    Retourne la fonction de formatage des variables de l'étape 11.
+
+    config["model"]["format_engine"] == "table" active la table de seuils (modalités
+    émises en pl.Enum), sinon BaseTransformation.preprocess_format est utilisé.
+    """
+    if app_config.get("model", {}).get("format_engine") == "table":
+        table = BucketTable.from_config(app_config)
+        logger.info(f"   ✅ Table de seuils chargée ({len(table.bucketizers)} variables continues)")
+        return table.format
+    return base_transformation.preprocess_format
+
+
+def select_reference_tables(base_transformation, app_config: dict) -> tuple[Callable[[Frame], Frame], list[ScopeRule]]:
+    """
+    Retourne l'encodage de l'étape 3 et les règles de périmètre du pré-filtre.
+
+    Les codes économiques exclus viennent toujours des tables de référence
+    (ReferenceTables.from_config). Avec un référentiel versionné
+    (app_config["reference_tables"]["path"]), l'étape 3 est aussi faite par les tables ;
+    sinon BaseTransformation.preprocess_encoded_df_main est utilisé.
+    """
+    tables = ReferenceTables.from_config(app_config)
+    encoder = base_transformation.preprocess_encoded_df_main
+    if app_config.get("reference_tables", {}).get("path"):
+        logger.info(f"   ✅ Encodage df_main par les tables de référence {tables.version}")
+        encoder = tables.encode
+    return encoder, tables.scope_rules()
+
+
+def select_schema_layer(app_config: dict) -> Optional[SchemaLayer]:
+    """Retourne le schéma compact appliqué après chaque étape (app_config["compact_dtypes"]), sinon None."""
+    if not app_config.get("compact_dtypes", False):
+        return None
+    logger.info("   ✅ Schéma compact activé (Enum/Categorical, Int32)")
+    return SchemaLayer.from_config(app_config)
+
+
+def run_pdo_steps(
+    base_transformation,
+    sources: dict[str, Frame],
+    scorer: Optional[Callable[[Frame], Frame]] = None,
+    formatter: Optional[Callable[[Frame], Frame]] = None,
+    schema_layer: Optional[SchemaLayer] = None,
+    plan_joins: bool = False,
+    prefilter: bool = False,
+    encoder: Optional[Callable[[Frame], Frame]] = None,
+    scope_rules: Optional[list[ScopeRule]] = None,
+) -> Frame:
+    """
+    Enchaîne les étapes 2 à 13 du batch (preprocess_df_main → postprocess_df_main).
+
+    Les méthodes de BaseTransformation n'utilisent que des opérations Polars
+    communes à DataFrame et LazyFrame : la fonction renvoie donc un DataFrame
+    si les sources sont des DataFrames, un LazyFrame si ce sont des LazyFrames.
+
+    Args:
+        base_transformation: Instance de BaseTransformation
+        sources: Dictionnaire des sources SQL (clés de SOURCE_KEYS)
+        scorer: Calcul PDO de l'étape 12 (défaut: BaseTransformation.calcul_pdo)
+        formatter: Formatage de l'étape 11 (défaut: BaseTransformation.preprocess_format)
+        schema_layer: Schéma compact appliqué après chaque étape (défaut: aucun)
+        plan_joins: True pour exécuter les étapes 4 à 9 avec une seule jointure sur df_main
+        prefilter: True pour appliquer les règles de périmètre dès l'étape 2 (avant les jointures)
+        encoder: Encodage de l'étape 3 (défaut: BaseTransformation.preprocess_encoded_df_main)
+        scope_rules: Règles de périmètre du pré-filtre (défaut: SCOPE_RULES)
+
+    Returns:
+        Frame final (même type que les sources)
+    """
+    compact = schema_layer.apply if schema_layer is not None else (lambda df: df)
+
+    df_main = compact(base_transformation.preprocess_df_main(sources["unfiltered_df_main"])["df_main"])
+    if prefilter:
+        df_main = apply_scope_prefilter(df_main, scope_rules if scope_rules is not None else SCOPE_RULES)
+    df_main = compact((encoder or base_transformation.preprocess_encoded_df_main)(df_main))
+    if plan_joins:
+        df_main = compact(join_features(base_transformation, df_main, sources))
+    else:
+        df_main = compact(base_transformation.preprocess_risk(df_main, sources["rsc"]))
+        df_main = compact(base_transformation.preprocess_soldes(df_main, sources["soldes"]))
+        df_main = compact(base_transformation.preprocess_reboot(df_main, sources["reboot"]))
+        df_main = compact(base_transformation.preprocess_donnees_transac(df_main, sources["donnees_transac"]))
+        df_main = compact(base_transformation.preprocess_safir_conso(df_main, sources["safir_cc"], sources["safir_cd"]))
+        df_main = compact(base_transformation.preprocess_safir_soc(df_main, sources["safir_sc"], sources["safir_sd"]))
+    df_main = base_transformation.preprocess_filters(df_main)
+    df_main = compact((formatter or base_transformation.preprocess_format)(df_main))
+    df_main = compact((scorer or base_transformation.calcul_pdo)(df_main))
+    return base_transformation.postprocess_df_main(df_main)
+
+
+def build_lazy_plan(
+    base_transformation,
+    initial_data: dict[str, Frame],
+    scorer: Optional[Callable[[Frame], Frame]] = None,
+    formatter: Optional[Callable[[Frame], Frame]] = None,
+    schema_layer: Optional[SchemaLayer] = None,
+    plan_joins: bool = False,
+    prefilter: bool = False,
+    encoder: Optional[Callable[[Frame], Frame]] = None,
+    scope_rules: Optional[list[ScopeRule]] = None,
+) -> pl.LazyFrame:
+    """
+    Construit le plan lazy couvrant les étapes 2 à 13.
+
+    Aucune donnée n'est matérialisée : Polars peut pousser les projections et
+    les prédicats vers les sources et fusionner les jointures.
+    """
+    plan = run_pdo_steps(
+        base_transformation,
+        to_lazy_sources(initial_data),
+        scorer,
+        formatter,
+        schema_layer,
+        plan_joins,
+        prefilter,
+        encoder,
+        scope_rules,
+    )
+    if not isinstance(plan, pl.LazyFrame):
+        raise TypeError(
+            f"Le plan lazy a été matérialisé en cours de route (type obtenu: {type(plan).__name__})"
+        )
+    return plan
+
+
+def collect_lazy_plan(plan: pl.LazyFrame, streaming: bool = False) -> pl.DataFrame:
+    """
+    Matérialise le plan lazy.
+
+    Args:
+        plan: Plan construit par build_lazy_plan
+        streaming: True pour utiliser le moteur streaming (traitement par morceaux)
+
+    Returns:
+        DataFrame final
+    """
+    engine = "streaming" if streaming else "auto"
+    logger.info(f"   ⚙️  Collect du plan lazy (moteur: {engine})")
+    return plan.collect(engine=engine)
+
+
+def collect_lazy_plans(plans: list[pl.LazyFrame], streaming: bool = False) -> list[pl.DataFrame]:
+    """
+    Matérialise plusieurs plans issus du même plan lazy (ex: df_main_final et ses contributions).
+
+    Les sous-plans communs ne sont calculés qu'une fois (pl.collect_all).
+    """
+    engine = "streaming" if streaming else "auto"
+    logger.info(f"   ⚙️  Collect de {len(plans)} plans lazy (moteur: {engine})")
+    return pl.collect_all(plans, engine=engine)
@@ -0,0 +1,105 @@
+"""
+Moteur vectorisé des features REBOOT (étape 6).
+Remplace l'enchaînement de preprocessing_reboot (str.replace regex + cast, group_by
+sur les 7 colonnes de la notation, unique(keep="first"), puis sigmoid) : les drivers
+sont sommés par notation, la notation la plus récente (d_rev_notation, puis d_histo,
+puis codes) est choisie sans tri (max par entreprise, arg_max pour départager) et la
+sigmoid est calculée dans la même agrégation. Le résultat ne dépend plus de l'ordre
+des lignes.
+
+Comme preprocessing_reboot, les drivers non numériques ("N/A", "#REF!") sont ignorés
+dans la somme (NULL comptés 0) : une notation dont aucun driver n'est numérique donne
+reboot_score 0 et reboot_score2 0.5. Seule une entreprise sans notation a des scores NULL.
+"""
+
+import logging
+from typing import Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+KPI_KEY = "i_uniq_kpi"
+# Dates d'une notation, de la plus à la moins prioritaire pour choisir la plus récente
+DATE_COLUMNS = ["d_rev_notation", "d_histo"]
+# Codes de la notation : identifient la notation et départagent deux notations de mêmes dates
+CODE_COLUMNS = ["c_int_modele", "c_not", "c_type_prsne", "b_bddf_gestionnaire"]
+# Décalage des jours (dates antérieures à 1970 positives, NULL = 0 = plus ancienne)
+DAYS_OFFSET = 2**20
+KEY_SEPARATOR = "\x1f"
+
+
+def parse_decimal_comma(expr: pl.Expr) -> pl.Expr:
+    """
+    Convertit un score à virgule décimale ("1,5") en Float64.
+
+    Remplacement littéral du premier caractère "," (sans moteur regex) puis cast
+    non strict : les valeurs non numériques ("N/A", "#REF!") deviennent NULL.
+    """
+    return expr.str.replace(",", ".", literal=True, n=1).cast(pl.Float64, strict=False)
+
+
+def _recency_key(schema: pl.Schema) -> pl.Expr:
+    """Clé entière croissante avec (d_rev_notation, d_histo), NULL classé le plus ancien."""
+    key = pl.lit(0, dtype=pl.Int64)
+    for col in DATE_COLUMNS:
+        if col not in schema:
+            continue
+        days = pl.col(col)
+        if schema[col] == pl.String:
+            days = days.str.to_date(strict=False)
+        days = (days.cast(pl.Date).cast(pl.Int64) + DAYS_OFFSET).fill_null(0)
+        key = key * (2 * DAYS_OFFSET) + days
+    return key
+
+
+def _codes_key(columns: list[str]) -> pl.Expr:
+    """Clé texte des codes de la notation (départage déterministe à dates égales)."""
+    return pl.concat_str(
+        [pl.col(col).cast(pl.String).fill_null("") for col in CODE_COLUMNS if col in columns],
+        separator=KEY_SEPARATOR,
+    )
+
+
+def latest_reboot_scores(reboot: Frame) -> Frame:
+    """
+    Une ligne par i_uniq_kpi : reboot_score (somme des drivers de la notation la plus
+    récente, 0 si aucun n'est numérique) et reboot_score2 (sigmoid).
+    """
+    schema = reboot.collect_schema()
+    q_score = pl.col("q_score")
+    if schema["q_score"] == pl.String:
+        q_score = parse_decimal_comma(q_score)
+    else:
+        q_score = q_score.cast(pl.Float64)
+
+    notation_columns = [col for col in DATE_COLUMNS + CODE_COLUMNS if col in schema]
+    # Les clés de recherche ne sont construites que sur les notations (une ligne par
+    # notation après la somme des drivers), pas sur les lignes de drivers
+    latest = pl.col("score").get(pl.col("codes").arg_max())
+    return (
+        reboot
+        .group_by([KPI_KEY, *notation_columns])
+        .agg(q_score.sum().alias("score"))
+        .with_columns(_recency_key(schema).alias("recency"))
+        .filter(pl.col("recency") == pl.col("recency").max().over(KPI_KEY))
+        .with_columns(_codes_key(notation_columns).alias("codes"))
+        .group_by(KPI_KEY)
+        .agg([
+            latest.alias("reboot_score"),
+            (1 / (1 + (-latest).exp())).alias("reboot_score2"),
+        ])
+    )
+
+
+def add_reboot_features(df_main: Frame, reboot: Frame) -> Frame:
+    """Enrichit df_main des scores REBOOT (jointure LEFT sur i_uniq_kpi) et du flag flag_reboot."""
+    return (
+        df_main
+        .join(latest_reboot_scores(reboot), on=KPI_KEY, how="left")
+        .with_columns(pl.lit("OK").alias("flag_reboot"))
+    )
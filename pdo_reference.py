@@ -0,0 +1,211 @@
+"""
+Tables de référence des codes de df_main : classes de nature juridique (c_njur_prsne),
+classes de code sectoriel (c_sectrl_1) et codes économiques exclus du périmètre (c_eco).
+Remplace les listes littérales de df_encoding (when / is_in enchaînés, une passe par
+classe) : chaque table est compilée une fois en dictionnaire code → classe et appliquée
+par un seul replace_strict par colonne, les codes inconnus ou NULL allant dans une classe
+explicite. Les exclusions c_eco sont lues dans la même table que les encodages et
+alimentent les règles de périmètre (pdo_scope_filters).
+
+La table peut être chargée depuis un fichier versionné (app_config["reference_tables"]
+["path"], Parquet ou CSV) de colonnes table, code, bucket, version ; une ligne de code
+NULL donne la classe des codes inconnus de la table.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, replace
+from typing import Optional, Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.pdo_scope_filters import EXCLUDED_ECO_CODES, SCOPE_RULES, ScopeRule
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+DEFAULT_VERSION = "builtin"
+REFERENCE_COLUMNS = ["table", "code", "bucket", "version"]
+
+# Nature juridique → classe, "7" pour les codes inconnus ou NULL
+LEGAL_NATURE_CLASSES = {
+    "1-3": ["26", "27", "33", "30"],
+    "4-6": ["20", "21", "29", "55", "59", "64"],
+    "7": ["22", "25", "56", "57", "58"],
+}
+LEGAL_NATURE_UNKNOWN = "7"
+
+# Code sectoriel → classe, "3" pour les codes inconnus ou NULL ("" est explicitement en classe 3).
+# Listes connues du dépôt : le référentiel complet est à fournir par le fichier versionné.
+SECTOR_CLASSES = {
+    "1": [
+        "420053", "420051", "420050", "420052", "420040", "420013", "420020",
+        "420010", "420012", "420011", "420060", "420030", "460010", "470050",
+        "460020", "360140", "460040", "480010", "280050", "230010", "290010",
+        "240010", "230030", "110010", "240020", "230020",
+    ],
+    "2": [
+        "360120", "500030", "360130", "350010", "500010", "470030", "500020",
+        "470040", "470010", "470020", "300040", "300030", "270030", "090030",
+        "600020", "600010", "600040", "600030", "270050", "270010", "350030",
+        "350020", "350040",
+    ],
+    "3": ["380020", ""],
+    "4": ["010010"],
+}
+SECTOR_UNKNOWN = "3"
+
+ECO_EXCLUDED = "exclu"
+ECO_KEPT = "retenu"
+
+
+@dataclass(frozen=True)
+class LookupTable:
+    """Table code → classe d'une colonne, classe unknown pour les codes absents ou NULL."""
+    name: str
+    source: str
+    mapping: dict[str, str]
+    unknown: str
+
+    @classmethod
+    def from_classes(cls, name: str, source: str, classes: dict[str, list[str]], unknown: str) -> "LookupTable":
+        """
+        Construit la table depuis {classe: [codes]}.
+
+        Raises:
+            ValueError: Si un code est rangé dans deux classes
+        """
+        mapping = {}
+        for bucket, codes in classes.items():
+            for code in codes:
+                if code in mapping and mapping[code] != bucket:
+                    raise ValueError(
+                        f"Table {name}: code {code!r} dans les classes {mapping[code]!r} et {bucket!r}"
+                    )
+                mapping[code] = bucket
+        return cls(name, source, mapping, unknown)
+
+    def codes(self, bucket: str) -> list[str]:
+        """Codes rangés dans la classe bucket (ordre de la table)."""
+        return [code for code, value in self.mapping.items() if value == bucket]
+
+    def expr(self, alias: str) -> pl.Expr:
+        """Classe de chaque ligne (une seule recherche par valeur, String)."""
+        return (
+            pl.col(self.source)
+            .cast(pl.String)
+            .replace_strict(self.mapping, default=self.unknown, return_dtype=pl.String)
+            .alias(alias)
+        )
+
+
+@dataclass(frozen=True)
+class ReferenceTables:
+    """Tables de référence de df_main et leur version."""
+    legal_natures: LookupTable
+    sectors: LookupTable
+    eco_codes: LookupTable
+    version: str = DEFAULT_VERSION
+
+    @classmethod
+    def default(cls) -> "ReferenceTables":
+        """Tables intégrées au code (listes de df_encoding et de filtre_df_main)."""
+        return cls(
+            LookupTable.from_classes("nature_juridique", "c_njur_prsne", LEGAL_NATURE_CLASSES, LEGAL_NATURE_UNKNOWN),
+            LookupTable.from_classes("secteur", "c_sectrl_1", SECTOR_CLASSES, SECTOR_UNKNOWN),
+            LookupTable.from_classes("eco", "c_eco", {ECO_EXCLUDED: EXCLUDED_ECO_CODES}, ECO_KEPT),
+        )
+
+    @classmethod
+    def from_frame(cls, reference: pl.DataFrame) -> "ReferenceTables":
+        """
+        Construit les tables depuis un référentiel long (table, code, bucket, version).
+
+        Les tables absentes du référentiel gardent leur contenu intégré.
+
+        Raises:
+            ValueError: Si une colonne manque, si le référentiel mélange plusieurs
+                versions ou si un code est rangé dans deux classes
+        """
+        missing = [col for col in REFERENCE_COLUMNS if col not in reference.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans le référentiel: {missing}")
+        versions = reference["version"].unique().to_list()
+        if len(versions) != 1:
+            raise ValueError(f"Le référentiel doit avoir une seule version, trouvé: {versions}")
+
+        tables = cls.default()
+        by_name = {}
+        for default in (tables.legal_natures, tables.sectors, tables.eco_codes):
+            rows = reference.filter(pl.col("table") == default.name)
+            if rows.is_empty():
+                by_name[default.name] = default
+                continue
+            known = rows.filter(pl.col("code").is_not_null())
+            classes = {}
+            for code, bucket in zip(known["code"].cast(pl.String).to_list(), known["bucket"].to_list()):
+                classes.setdefault(bucket, []).append(code)
+            unknown = rows.filter(pl.col("code").is_null())["bucket"]
+            by_name[default.name] = LookupTable.from_classes(
+                default.name, default.source, classes, unknown[0] if len(unknown) else default.unknown
+            )
+        return cls(by_name["nature_juridique"], by_name["secteur"], by_name["eco"], str(versions[0]))
+
+    @classmethod
+    def from_config(cls, config: Optional[dict] = None) -> "ReferenceTables":
+        """Tables du fichier config["reference_tables"]["path"] (Parquet ou CSV), intégrées sinon."""
+        path = (config or {}).get("reference_tables", {}).get("path")
+        if not path:
+            return cls.default()
+        if os.path.splitext(path)[1].lower() == ".csv":
+            reference = pl.read_csv(path, schema_overrides={col: pl.String for col in REFERENCE_COLUMNS})
+        else:
+            reference = pl.read_parquet(path)
+        tables = cls.from_frame(reference)
+        logger.info(f"   📚 Tables de référence {tables.version} chargées ({reference.height:,} codes)")
+        return tables
+
+    def to_frame(self) -> pl.DataFrame:
+        """Référentiel long (table, code, bucket, version), ligne de code NULL pour la classe des inconnus."""
+        rows = []
+        for table in (self.legal_natures, self.sectors, self.eco_codes):
+            rows += [(table.name, code, bucket) for code, bucket in table.mapping.items()]
+            rows.append((table.name, None, table.unknown))
+        return pl.DataFrame(rows, schema=REFERENCE_COLUMNS[:3], orient="row").with_columns(
+            pl.lit(self.version).alias("version")
+        )
+
+    def encode(self, df_main: Frame) -> Frame:
+        """
+        Encodage de df_main (équivalent de df_encoding) en une seule projection.
+
+        Colonnes ajoutées:
+            - c_njur_prsne_enc ("1-3", "4-6", "7")
+            - c_sectrl_1_enc ("1" à "4")
+            - top_ga ("1" si i_g_affre_rmpm est renseigné, "0" sinon)
+            - flag_df_main
+        """
+        return df_main.with_columns([
+            self.legal_natures.expr("c_njur_prsne_enc"),
+            self.sectors.expr("c_sectrl_1_enc"),
+            pl.when(pl.col("i_g_affre_rmpm").is_null()).then(pl.lit("0")).otherwise(pl.lit("1")).alias("top_ga"),
+            pl.lit("OK").alias("flag_df_main"),
+        ])
+
+    def scope_rules(self, rules: list[ScopeRule] = SCOPE_RULES) -> list[ScopeRule]:
+        """Règles de périmètre dont les codes économiques exclus sont ceux de la table eco."""
+        excluded = tuple(self.eco_codes.codes(ECO_EXCLUDED))
+        return [
+            replace(rule, values=excluded) if rule.columns == (self.eco_codes.source,) else rule
+            for rule in rules
+        ]
+
+
+DEFAULT_REFERENCE_TABLES = ReferenceTables.default()
+
+
+def df_encoding_lookup(df_main: Frame, tables: Optional[ReferenceTables] = None) -> Frame:
+    """df_encoding par les tables de référence (intégrées par défaut, compilées une seule fois)."""
+    return (tables or DEFAULT_REFERENCE_TABLES).encode(df_main)
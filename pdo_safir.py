@@ -0,0 +1,278 @@
+"""
+Moteur des features SAFIR consolidées (VB023) et sociales (VB005, VB035, VB055).
+Remplace preprocessing_safir_conso / preprocessing_safir_soc : au lieu de joindre
+l'en-tête (cc/sc) au détail (cd/sd) complet puis de classer les bilans par tri, le
+détail est réduit aux seuls postes utilisés par les formules, les deux derniers bilans
+de chaque entreprise sont choisis par agrégation (max, puis max des dates antérieures)
+sans tri global, seuls les postes du dernier bilan sont pivotés (une colonne mt_XXX par
+poste) avant la jointure à l'en-tête, et tous les ratios sont calculés dans une seule
+projection.
+
+Les formules sont des combinaisons linéaires de postes, annualisées (/ durée * 12) ou
+non, surchargeables par app_config["safir"]["formulas"] ; le code c_code de chaque
+poste (défaut : mt_310 → "310") par app_config["safir"]["item_codes"].
+
+Les numérateurs de VB035 (res_soc) et VB055 (immob) n'ont pas de valeur par défaut :
+ils doivent être fournis par app_config["safir"]["formulas"] (ValueError sinon), des
+ratios NULL changeant silencieusement les modalités de l'étape 11 et donc la PDO.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+KPI_KEY = "i_uniq_kpi"
+CONSO_DATE = "d_fin_excce_conso"
+SOC_DATE = "d_fin_excce_soc"
+# Durée moyenne d'un mois (imputation de la durée d'exercice par l'écart entre deux bilans)
+DAYS_PER_MONTH = 30.44
+DEFAULT_DURATION_MONTHS = 12
+DEFAULT_REGIME = "1"
+
+# Formules : {"items": {poste: signe}, "annualised": bool}
+CONSO_FORMULAS = {
+    "ca_conso": {"items": {"mt_310": 1}, "annualised": True},
+    # Chiffre d'affaires reconstitué quand mt_310 n'est pas renseigné : clause otherwise de
+    # preprocessing_safir_conso.py (l. 37-38, citée dans code_review_pdo_v7_complet.md, CRITIQUE-008)
+    "ca_conso_fallback": {"items": {"mt_24": 1, "mt_309": 1}, "annualised": True},
+    "res_net_conso": {
+        "items": {
+            "mt_310": 1, "mt_26": 1, "mt_27": -1, "mt_28": -1, "mt_29": -1, "mt_30": -1, "mt_31": -1,
+            "mt_32": 1, "mt_33": 1, "mt_34": -1, "mt_35": -1, "mt_36": 1, "mt_37": -1, "mt_38": 1,
+            "mt_39": -1,
+        },
+        "annualised": True,
+    },
+}
+SOC_REQUIRED_FORMULAS = ["res_soc", "immob"]
+SOC_FORMULAS = {
+    "caf_regime_1": {
+        "items": {
+            "mt_182": 1, "mt_469": -1, "mt_287": 1, "mt_290": 1, "mt_289": 1, "mt_288": 1, "mt_471": -1,
+            "mt_286": 1, "mt_470": -1, "mt_294": 1,
+        },
+        "annualised": True,
+    },
+    "caf_regime_2": {"items": {"mt_182": 1, "mt_285": 1, "mt_295": 1}, "annualised": True},
+    # Service de la dette par régime : preprocessing_safir_soc.py (l. 127-129, citée dans
+    # code_review_pdo_v7_complet.md, HAUTE-017) ; CAF : rapport_logiques_metier.md, § 18
+    "servicedette_regime_1": {"items": {"mt_479": 1}, "annualised": True},
+    "servicedette_regime_2": {"items": {"mt_480": 1, "mt_435": 1, "mt_209": -1}, "annualised": True},
+    "totb": {"items": {"mt_534": 1}, "annualised": False},
+    # Numérateurs de VB035 (résultat) et VB055 (immobilisations) : absents des extraits du
+    # code historique disponibles, à fournir par app_config["safir"]["formulas"]
+    "res_soc": None,
+    "immob": None,
+}
+
+
+def _combination(formula: dict) -> pl.Expr:
+    """Somme signée des postes (NULL comptés 0), NULL si aucun poste n'est renseigné."""
+    terms = [pl.col(item) * sign for item, sign in formula["items"].items()]
+    return pl.when(pl.any_horizontal([term.is_not_null() for term in terms])).then(pl.sum_horizontal(terms))
+
+
+def _ratio(numerator: pl.Expr, denominator: pl.Expr) -> pl.Expr:
+    """numerator / denominator * 100, 0 si le dénominateur est nul (NULL s'il est NULL)."""
+    return pl.when(denominator == 0).then(pl.lit(0.0)).otherwise(numerator / denominator * 100)
+
+
+@dataclass
+class SafirEngine:
+    """Formules SAFIR et codes c_code des postes utilisés."""
+    formulas: dict = field(default_factory=lambda: {**CONSO_FORMULAS, **SOC_FORMULAS})
+    item_codes: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, config: Optional[dict] = None, require_soc: bool = True) -> "SafirEngine":
+        """
+        Construit le moteur depuis config["safir"] (formules et codes par défaut sinon).
+
+        Args:
+            config: Configuration applicative
+            require_soc: False pour un moteur limité aux features consolidées (VB023)
+
+        Raises:
+            ValueError: Si require_soc et qu'une formule de SOC_REQUIRED_FORMULAS n'est pas configurée
+        """
+        safir_config = (config or {}).get("safir", {})
+        formulas = {**CONSO_FORMULAS, **SOC_FORMULAS, **safir_config.get("formulas", {})}
+        engine = cls(formulas, dict(safir_config.get("item_codes", {})))
+        if require_soc:
+            engine.check_soc_formulas()
+        return engine
+
+    def check_soc_formulas(self) -> None:
+        """
+        Vérifie que les numérateurs de VB035 / VB055 sont configurés.
+
+        Raises:
+            ValueError: Si une formule de SOC_REQUIRED_FORMULAS n'est pas configurée
+        """
+        missing = [name for name in SOC_REQUIRED_FORMULAS if not self.formulas.get(name)]
+        if missing:
+            raise ValueError(
+                f"Formules SAFIR sociales non configurées: {missing} "
+                "(app_config['safir']['formulas'], VB035 / VB055 seraient NULL)"
+            )
+
+    def code_of(self, item: str) -> str:
+        """Code c_code d'un poste (défaut : mt_310 → "310")."""
+        return self.item_codes.get(item, item.removeprefix("mt_"))
+
+    def _items(self, names: list[str]) -> list[str]:
+        """Postes utilisés par les formules names (configurées)."""
+        items = {item for name in names if self.formulas[name] for item in self.formulas[name]["items"]}
+        return sorted(items)
+
+    def _value(self, name: str, duration: pl.Expr) -> pl.Expr:
+        """Valeur d'une formule sur le dernier bilan, annualisée si besoin (NULL si non configurée)."""
+        formula = self.formulas[name]
+        if formula is None:
+            return pl.lit(None, dtype=pl.Float64)
+        value = _combination(formula)
+        return value / duration * 12 if formula.get("annualised", True) else value
+
+    def latest_balances(self, detail: Frame, date_column: str, items: list[str]) -> Frame:
+        """
+        Une ligne par i_uniq_kpi : postes items du dernier bilan (colonnes mt_XXX, NULL si
+        absent), date du dernier bilan (date_column) et du précédent (d_fin_n2).
+
+        Les deux dernières dates sont des agrégats par entreprise (pas de tri ni de rang)
+        sur les couples (entreprise, date) distincts du détail complet, comme le rang
+        historique : un dernier bilan sans aucun poste utilisé reste le dernier bilan
+        (postes NULL) et compte comme bilan précédent pour la durée imputée. Seuls les
+        postes utilisés du dernier bilan sont ensuite pivotés.
+        """
+        codes = {self.code_of(item): item for item in items}
+        date = pl.col(date_column)
+        balances = (
+            detail
+            .select([KPI_KEY, date_column])
+            .unique()
+            .group_by(KPI_KEY)
+            .agg([
+                date.max(),
+                # Bilan précédent : max des dates antérieures au dernier bilan
+                date.filter(date < date.max()).max().alias("d_fin_n2"),
+            ])
+        )
+        value = pl.element()
+        postes = (
+            detail
+            .select([KPI_KEY, date_column, "c_code", "c_val"])
+            .filter(pl.col("c_code").is_in(list(codes)))
+            .join(balances.select([KPI_KEY, date_column]), on=[KPI_KEY, date_column], how="semi")
+            .with_columns(pl.col("c_code").cast(pl.String), pl.col("c_val").cast(pl.Float64))
+            .pivot(
+                on="c_code",
+                on_columns=list(codes),
+                index=[KPI_KEY, date_column],
+                values="c_val",
+                aggregate_function=pl.when(value.count() > 0).then(value.sum()),
+            )
+            .rename(codes)
+        )
+        return (
+            balances
+            .join(postes, on=[KPI_KEY, date_column], how="left")
+            .select([KPI_KEY, date_column, *codes.values(), "d_fin_n2"])
+        )
+
+    def conso_ratios(self, safir_cc: Frame, safir_cd: Frame) -> Frame:
+        """Une ligne par i_uniq_kpi : VB023 (résultat net / chiffre d'affaires consolidés)."""
+        items = self._items(list(CONSO_FORMULAS))
+        duration = pl.col("c_duree_excce_conso").cast(pl.Float64)
+        duration = pl.when(duration.is_null() | (duration == 0)).then(DEFAULT_DURATION_MONTHS).otherwise(duration)
+        ca_conso = pl.coalesce(self._value("ca_conso", duration), self._value("ca_conso_fallback", duration))
+        return (
+            self.latest_balances(safir_cd, CONSO_DATE, items)
+            .join(safir_cc.select([KPI_KEY, CONSO_DATE, "c_duree_excce_conso"]), on=[KPI_KEY, CONSO_DATE], how="inner")
+            .select([
+                KPI_KEY,
+                _ratio(self._value("res_net_conso", duration), ca_conso).alias("VB023"),
+            ])
+        )
+
+    def soc_ratios(self, safir_sc: Frame, safir_sd: Frame) -> Frame:
+        """
+        Une ligne par i_uniq_kpi : VB005 (CAF / service de la dette), VB035 (résultat /
+        total bilan) et VB055 (immobilisations / total bilan), selon le régime fiscal.
+
+        Durée d'exercice non renseignée ou nulle : écart en mois avec le bilan précédent,
+        12 à défaut. Régime non renseigné : réel normal ("1").
+
+        Raises:
+            ValueError: Si les numérateurs de VB035 / VB055 ne sont pas configurés
+        """
+        self.check_soc_formulas()
+        items = self._items(list(SOC_FORMULAS))
+        duration = pl.col("c_duree_excce_soc").cast(pl.Float64)
+        gap = (pl.col(SOC_DATE) - pl.col("d_fin_n2")).dt.total_days() / DAYS_PER_MONTH
+        duration = pl.when(duration.is_null() | (duration == 0)).then(gap).otherwise(duration)
+        duration = pl.when(duration.is_null() | (duration <= 0)).then(DEFAULT_DURATION_MONTHS).otherwise(duration)
+        regime = pl.col("c_regme_fisc").fill_null(DEFAULT_REGIME)
+
+        def by_regime(name: str) -> pl.Expr:
+            return (
+                pl.when(regime == "1").then(self._value(f"{name}_regime_1", duration))
+                .when(regime == "2").then(self._value(f"{name}_regime_2", duration))
+            )
+
+        def total_ratio(name: str) -> pl.Expr:
+            return _ratio(self._value(name, duration), self._value("totb", duration))
+
+        caf, servicedette = by_regime("caf"), by_regime("servicedette")
+        return (
+            self.latest_balances(safir_sd, SOC_DATE, items)
+            .join(
+                safir_sc.select([KPI_KEY, SOC_DATE, "c_duree_excce_soc", "c_regme_fisc"]),
+                on=[KPI_KEY, SOC_DATE],
+                how="inner",
+            )
+            .select([
+                KPI_KEY,
+                pl.when(caf.is_null()).then(pl.lit(0.0)).otherwise(_ratio(caf, servicedette)).alias("VB005"),
+                total_ratio("res_soc").alias("VB035"),
+                total_ratio("immob").alias("VB055"),
+            ])
+        )
+
+    def add_conso_features(self, df_main: Frame, safir_cc: Frame, safir_cd: Frame) -> Frame:
+        """Enrichit df_main de VB023 (jointure LEFT sur i_uniq_kpi) et du flag flag_safir_conso."""
+        return (
+            df_main
+            .join(self.conso_ratios(safir_cc, safir_cd), on=KPI_KEY, how="left")
+            .with_columns(pl.lit("OK").alias("flag_safir_conso"))
+        )
+
+    def add_soc_features(self, df_main: Frame, safir_sc: Frame, safir_sd: Frame) -> Frame:
+        """Enrichit df_main de VB005, VB035, VB055 (jointure LEFT sur i_uniq_kpi) et du flag flag_safir_soc."""
+        return (
+            df_main
+            .join(self.soc_ratios(safir_sc, safir_sd), on=KPI_KEY, how="left")
+            .with_columns(pl.lit("OK").alias("flag_safir_soc"))
+        )
+
+
+def add_safir_conso_features(df_main: Frame, safir_cc: Frame, safir_cd: Frame) -> Frame:
+    """add_conso_features avec les formules par défaut."""
+    return SafirEngine().add_conso_features(df_main, safir_cc, safir_cd)
+
+
+def add_safir_soc_features(df_main: Frame, safir_sc: Frame, safir_sd: Frame, config: dict) -> Frame:
+    """
+    add_soc_features avec les formules de config["safir"] (numérateurs de VB035 / VB055 requis).
+
+    Raises:
+        ValueError: Si les numérateurs de VB035 / VB055 ne sont pas configurés
+    """
+    return SafirEngine.from_config(config).add_soc_features(df_main, safir_sc, safir_sd)
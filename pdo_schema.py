@@ -0,0 +1,96 @@
+"""
+Schéma compact des colonnes du pipeline PDO.
+Les modalités du modèle et les flags de contrôle sont portés en pl.Enum /
+pl.Categorical au lieu de chaînes Utf8, les compteurs en Int32. Appliqué après
+chaque étape, le schéma réduit la taille de df_main qui s'élargit à chaque jointure.
+Les montants et les variables comparées aux seuils du modèle restent en Float64 :
+Float32 ne conserve que 7 chiffres significatifs (centimes perdus au-delà de
+~100 000 €, seuils du modèle définis sur 9 chiffres).
+"""
+
+from dataclasses import dataclass, field
+from typing import Union
+
+import polars as pl
+
+from common.pdo_scoring import PDO_MODALITIES
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+# Modalités dont les valeurs viennent des données sources (ensemble ouvert) : Categorical
+OPEN_MODALITIES = ["nat_jur_a", "secto_b", "top_ga"]
+
+# Compteurs (nombre de comptes, d'opérations, de jours)
+INT32_COLUMNS = [
+    "solde_nb",
+    "nops",
+    "Q_JJ_DEPST_MM",
+    "interets__nops",
+    "turnover__nops",
+    "prlv_sepa_retourne__nops",
+    "rembt_prlv_sepa__nops",
+    "saisie__nops",
+]
+
+# Ratios déjà convertis en modalités (plus comparés à un seuil après leur étape)
+FLOAT32_COLUMNS = ["net_interets_sur_turnover"]
+
+
+def _is_flag(col: str) -> bool:
+    return col == "check" or col.startswith("flag")
+
+
+@dataclass
+class SchemaLayer:
+    """Types compacts appliqués aux colonnes présentes de df_main."""
+    enums: dict[str, list[str]] = field(default_factory=dict)
+    categoricals: list[str] = field(default_factory=list)
+    int32: list[str] = field(default_factory=list)
+    float32: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SchemaLayer":
+        """Construit le schéma depuis les modalités du modèle (config["model"]["modalities"] si présent)."""
+        modalities = config.get("model", {}).get("modalities", PDO_MODALITIES)
+        return cls(
+            enums={name: list(mapping) for name, mapping in modalities.items() if name not in OPEN_MODALITIES},
+            categoricals=[name for name in OPEN_MODALITIES if name in modalities],
+            int32=list(INT32_COLUMNS),
+            float32=list(FLOAT32_COLUMNS),
+        )
+
+    def casts(self, schema: pl.Schema) -> list[pl.Expr]:
+        """Casts à appliquer (colonnes présentes et pas déjà au type compact)."""
+        targets: dict[str, pl.DataType] = {}
+        for name, labels in self.enums.items():
+            targets[name] = pl.Enum(labels)
+        for name in self.categoricals:
+            targets[name] = pl.Categorical()
+        for name in self.int32:
+            targets[name] = pl.Int32
+        for name in self.float32:
+            targets[name] = pl.Float32
+        for name, dtype in schema.items():
+            if _is_flag(name) and dtype == pl.String:
+                targets[name] = pl.Categorical()
+
+        return [
+            pl.col(name).cast(dtype)
+            for name, dtype in targets.items()
+            if name in schema and schema[name] != dtype and schema[name] != pl.Null
+        ]
+
+    def apply(self, df_main: Frame) -> Frame:
+        """
+        Applique les types compacts.
+
+        Le cast en Enum est strict : une modalité hors modèle (erreur de formatage
+        en amont) fait échouer l'étape au lieu de devenir NULL silencieusement.
+        """
+        casts = self.casts(df_main.collect_schema())
+        return df_main.with_columns(casts) if casts else df_main
+
+
+def size_saving_mb(df_main: pl.DataFrame, schema_layer: SchemaLayer) -> tuple[float, float]:
+    """Taille estimée de df_main avant / après application du schéma compact (MB)."""
+    return df_main.estimated_size("mb"), schema_layer.apply(df_main).estimated_size("mb")
@@ -0,0 +1,166 @@
+"""
+Critères d'éligibilité au périmètre PDO (filtre_df_main) déclarés sous forme de règles.
+Toutes les règles portent sur des colonnes de unfiltered_df_main : elles peuvent être
+appliquées dès la sortie de l'étape 2, avant les jointures des étapes 4 à 9, et
+poussées dans la requête SQL de unfiltered_df_main (paramètres liés, pas de littéraux).
+L'étape 10 (preprocess_filters) reste le filtre de référence : elle est idempotente
+et ne retire plus aucune ligne quand le pré-filtre a été appliqué.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Union
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+# Natures juridiques exclues (c_njur_prsne)
+EXCLUDED_LEGAL_NATURES = ["31", "32", "34", "35", "93", "95", "99"]
+
+# Segments NAE du périmètre
+SCOPE_SEGMENTS = ["ME", "GR", "A3"]
+
+# Codes économiques exclus (c_eco)
+EXCLUDED_ECO_CODES = [
+    "011", "012", "021", "031", "039", "111", "112", "121",
+    "131", "132", "133", "134", "135", "136", "137", "141",
+    "142", "161", "162", "163", "164", "165", "166", "167",
+    "168", "169", "171", "172", "181", "182", "183", "184",
+    "189", "231", "232", "233", "234", "235", "236", "237",
+    "238", "239", "251", "252", "253", "254", "261", "262",
+    "263", "264", "265", "266", "267", "268", "269", "270",
+    "271", "281", "291", "292", "293", "431", "432", "433",
+]
+
+
+@dataclass(frozen=True)
+class ScopeRule:
+    """
+    Règle de périmètre : une ligne est conservée si la condition est vraie.
+
+    Opérateurs : "in", "not_in", "eq", "ne", "is_null" et "not_pair"
+    (exclut la combinaison columns[0] == values[0] ET columns[1] == values[1]).
+    Une valeur NULL rend la condition NULL et la ligne est retirée, en Polars
+    (filter) comme en SQL (WHERE).
+    """
+    name: str
+    op: str
+    columns: tuple[str, ...]
+    values: tuple[str, ...] = ()
+
+    def expr(self) -> pl.Expr:
+        """Prédicat Polars de la règle."""
+        col = pl.col(self.columns[0])
+        if self.op == "in":
+            return col.is_in(list(self.values))
+        if self.op == "not_in":
+            return ~col.is_in(list(self.values))
+        if self.op == "eq":
+            return col == self.values[0]
+        if self.op == "ne":
+            return col != self.values[0]
+        if self.op == "is_null":
+            return col.is_null()
+        if self.op == "not_pair":
+            return ~((col == self.values[0]) & (pl.col(self.columns[1]) == self.values[1]))
+        raise ValueError(f"Opérateur de périmètre inconnu: {self.op}")
+
+    def sql(self, alias: str = "") -> tuple[str, list[Any]]:
+        """Prédicat SQL de la règle (placeholders ?) et ses paramètres."""
+        prefix = f"{alias}." if alias else ""
+        col = f"{prefix}{self.columns[0]}"
+        placeholders = ", ".join("?" for _ in self.values)
+        if self.op == "in":
+            return f"{col} IN ({placeholders})", list(self.values)
+        if self.op == "not_in":
+            return f"{col} NOT IN ({placeholders})", list(self.values)
+        if self.op == "eq":
+            return f"{col} = ?", [self.values[0]]
+        if self.op == "ne":
+            return f"{col} <> ?", [self.values[0]]
+        if self.op == "is_null":
+            return f"{col} IS NULL", []
+        if self.op == "not_pair":
+            return f"NOT ({col} = ? AND {prefix}{self.columns[1]} = ?)", list(self.values[:2])
+        raise ValueError(f"Opérateur de périmètre inconnu: {self.op}")
+
+
+# Critères de filtre_df_main, dans l'ordre de preprocessing_filters.py
+SCOPE_RULES = [
+    ScopeRule("natures_juridiques", "not_in", ("c_njur_prsne",), tuple(EXCLUDED_LEGAL_NATURES)),
+    ScopeRule("naf_holdings", "not_in", ("c_naf",), ("6419Z",)),
+    ScopeRule("administrations_publiques", "not_pair", ("c_sgmttn_nae", "c_naf"), ("AP", "8411Z")),
+    ScopeRule("segments", "in", ("c_sgmttn_nae",), tuple(SCOPE_SEGMENTS)),
+    ScopeRule("profil_immobilier", "is_null", ("c_profl_immbr",)),
+    ScopeRule("presence_compte", "eq", ("c_pres_cpt",), ("1",)),
+    ScopeRule("creances_risquees", "not_in", ("c_crisq",), ("1", "2")),
+    ScopeRule("codes_economiques", "not_in", ("c_eco",), tuple(EXCLUDED_ECO_CODES)),
+    ScopeRule("nature_relation_client", "ne", ("c_nture_clt_entrp",), ("00003",)),
+]
+
+
+def applicable_rules(columns: list[str], rules: list[ScopeRule] = SCOPE_RULES) -> list[ScopeRule]:
+    """Règles dont toutes les colonnes sont présentes."""
+    return [rule for rule in rules if all(col in columns for col in rule.columns)]
+
+
+def apply_scope_prefilter(df_main: Frame, rules: list[ScopeRule] = SCOPE_RULES) -> Frame:
+    """
+    Applique les règles de périmètre évaluables sur df_main (sortie de l'étape 2).
+
+    Les règles dont une colonne est absente sont ignorées : elles restent
+    appliquées par preprocess_filters à l'étape 10.
+
+    Args:
+        df_main: DataFrame ou LazyFrame
+        rules: Règles de périmètre (défaut: SCOPE_RULES)
+
+    Returns:
+        df_main restreint au périmètre (même type que l'entrée)
+    """
+    applicable = applicable_rules(df_main.collect_schema().names(), rules)
+    if len(applicable) < len(rules):
+        logger.info(f"   ⏭️  {len(rules) - len(applicable)} règles reportées à l'étape 10 (colonnes absentes)")
+    if not applicable:
+        return df_main
+    logger.info(f"   🔎 Pré-filtre périmètre PDO: {len(applicable)} règles")
+    return df_main.filter(pl.all_horizontal([rule.expr() for rule in applicable]))
+
+
+def scope_sql_clause(rules: list[ScopeRule] = SCOPE_RULES, alias: str = "") -> tuple[str, list[Any]]:
+    """
+    Clause WHERE (sans le mot-clé) équivalente aux règles, avec paramètres liés.
+
+    Returns:
+        (clause SQL avec placeholders ?, paramètres dans l'ordre des placeholders)
+    """
+    clauses, params = [], []
+    for rule in rules:
+        clause, rule_params = rule.sql(alias)
+        clauses.append(clause)
+        params.extend(rule_params)
+    return "\n  AND ".join(clauses), params
+
+
+def push_scope_filter(query: str, rules: list[ScopeRule] = SCOPE_RULES) -> tuple[str, list[Any]]:
+    """
+    Restreint la requête unfiltered_df_main au périmètre PDO.
+
+    La requête rendue est encapsulée dans une sous-requête filtrée : l'optimiseur
+    de Starburst pousse les prédicats jusqu'aux CTE rp / rc, les lignes hors
+    périmètre ne sont ni jointes ni transférées.
+
+    Usage:
+        sql, params = push_scope_filter(query)
+        df = fetch_frame(connection, sql, parameters=params)
+
+    Returns:
+        (requête filtrée, paramètres liés)
+    """
+    clause, params = scope_sql_clause(rules, alias="scope")
+    return f"SELECT scope.*\nFROM (\n{query.rstrip().rstrip(';')}\n) AS scope\nWHERE {clause}", params
@@ -0,0 +1,138 @@
+"""
+Calcul PDO piloté par une table de coefficients.
+Remplace les chaînes pl.when().then() de calcul_pdo par une table lue depuis
+config["model"]["coeffs"] : chaque variable est encodée en pl.Enum et son
+coefficient est récupéré par indexation vectorisée, puis tout est sommé en une passe.
+"""
+
+from dataclasses import dataclass, field
+from typing import Union
+
+import polars as pl
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+# Coefficient appliqué à une modalité inconnue, vide ou NULL (clause otherwise historique,
+# égale au coefficient de la modalité de référence)
+DEFAULT_COEFF = 0.0
+
+PDO_FLOOR = 0.0001
+
+# Structure du modèle : variable -> {modalité: clé du coefficient dans config["model"]["coeffs"]}
+# Surchargeable par config["model"]["modalities"] pour livrer un nouveau modèle par configuration.
+PDO_MODALITIES: dict[str, dict[str, str]] = {
+    # RP
+    "nat_jur_a": {"1-3": "nat_jur_a_1_3", "4-6": "nat_jur_a_4_6", ">=7": "nat_jur_a_sup7"},
+    "secto_b": {"1": "secto_b_1", "2": "secto_b_2", "3": "secto_b_3", "4": "secto_b_4"},
+    "seg_nae": {"ME": "seg_nae_ME", "autres": "seg_nae_autres"},
+    "top_ga": {"0": "top_ga_0", "1": "top_ga_1"},
+    # RSC
+    "nbj": {"<=12": "nbj_inf_equal_12", ">12": "nbj_sup_12"},
+    # Soldes
+    "solde_cav_char": {str(i): f"solde_cav_char_{i}" for i in range(1, 5)},
+    # Reboot
+    "reboot_score_char2": {str(i): f"reboot_score_char2_{i}" for i in range(1, 10)},
+    # Transac
+    "remb_sepa_max": {"1": "remb_sepa_max_1", "2": "remb_sepa_max_2"},
+    "pres_prlv_retourne": {"1": "pres_prlv_retourne_1", "2": "pres_prlv_retourne_2"},
+    "pres_saisie": {"1": "pres_saisie_1", "2": "pres_saisie_2"},
+    "net_int_turnover": {"1": "net_int_turnover_1", "2": "net_int_turnover_2"},
+    # Safir conso
+    "rn_ca_conso_023b": {str(i): f"rn_ca_conso_023b_{i}" for i in range(1, 4)},
+    # Safir soc
+    "caf_dmlt_005": {"1": "caf_dmlt_005_1", "2": "caf_dmlt_005_2"},
+    "res_total_passif_035": {str(i): f"res_total_passif_035_{i}" for i in range(1, 5)},
+    "immob_total_passif_055": {str(i): f"immob_total_passif_055_{i}" for i in range(1, 4)},
+}
+
+
+@dataclass
+class VariableCoefficients:
+    """Modalités (ordre des codes Enum) et coefficients associés d'une variable."""
+    name: str
+    modalities: list[str]
+    coeffs: list[float]
+
+    @property
+    def dtype(self) -> pl.Enum:
+        return pl.Enum(self.modalities)
+
+    def expr(self) -> pl.Expr:
+        """Coefficient de la variable : code Enum → indexation dans la table des coefficients."""
+        codes = pl.col(self.name).cast(self.dtype, strict=False).to_physical()
+        return (
+            pl.lit(pl.Series(self.coeffs, dtype=pl.Float64))
+            .gather(codes)
+            .fill_null(DEFAULT_COEFF)
+            .alias(f"{self.name}_coeffs")
+        )
+
+
+@dataclass
+class CoefficientTable:
+    """Table de coefficients du modèle PDO, compilée une fois depuis la configuration."""
+    intercept: float
+    variables: list[VariableCoefficients] = field(default_factory=list)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "CoefficientTable":
+        """
+        Construit la table depuis config["model"].
+
+        Raises:
+            KeyError: Si un coefficient référencé par la structure du modèle est absent
+        """
+        model_config = config["model"]
+        coeffs = model_config["coeffs"]
+        modalities = model_config.get("modalities", PDO_MODALITIES)
+
+        missing = [key for mapping in modalities.values() for key in mapping.values() if key not in coeffs]
+        if missing:
+            raise KeyError(f"Coefficients absents de config['model']['coeffs']: {missing}")
+
+        variables = [
+            VariableCoefficients(
+                name=name,
+                modalities=list(mapping),
+                coeffs=[float(coeffs[key]) for key in mapping.values()],
+            )
+            for name, mapping in modalities.items()
+        ]
+        return cls(intercept=float(coeffs["intercept"]), variables=variables)
+
+    @property
+    def coeff_columns(self) -> list[str]:
+        return [f"{variable.name}_coeffs" for variable in self.variables]
+
+    def score(self, df_main: Frame) -> Frame:
+        """
+        Calcule les coefficients, sum_total_coeffs et la PDO en une passe.
+
+        Colonnes créées (identiques à calcul_pdo):
+            - {variable}_coeffs pour chaque variable du modèle
+            - intercept, sum_total_coeffs, PDO_compute, PDO, flag_pdo_OK
+        """
+        df_main = df_main.with_columns(
+            [variable.expr() for variable in self.variables]
+            + [pl.lit(self.intercept).alias("intercept")]
+        )
+
+        sum_total_coeffs = pl.sum_horizontal(["intercept", *self.coeff_columns])
+        # Modèle calibré sur P(non-défaut) : PDO = 1 - σ(z), comme calcul_pdo
+        pdo_compute = 1 - 1 / (1 + (-sum_total_coeffs).exp())
+
+        return df_main.with_columns([
+            sum_total_coeffs.alias("sum_total_coeffs"),
+            pdo_compute.alias("PDO_compute"),
+            pl.when(pdo_compute < PDO_FLOOR)
+            .then(pl.lit(PDO_FLOOR))
+            .otherwise(pdo_compute.round(4))
+            .alias("PDO"),
+            pl.lit("flag").alias("flag_pdo_OK"),
+        ])
+
+
+def calcul_pdo_table(df_main: Frame, config: dict) -> Frame:
+    """Preprocess data for PDO prediction : calculating pdo from config["model"]["coeffs"]."""
+    return CoefficientTable.from_config(config).score(df_main)
+
@@ -0,0 +1,369 @@
+"""
+Service HTTP de scoring PDO à la demande (une entreprise ou un micro-lot).
+Enchaîne les mêmes tables que le batch : encodage de df_main (pdo_reference),
+formatage des variables (pdo_bucketing) et calcul PDO (pdo_scoring), compilées une
+seule fois au démarrage. Les lots d'au moins micro_batch_rows lignes passent par ces
+tables en Polars ; en dessous, le coût fixe d'une requête Polars (plusieurs ms sur un
+cœur) dépasse le budget de latence et les lignes sont scorées par les dictionnaires,
+seuils et coefficients extraits de ces mêmes tables.
+Les features de chaque entreprise (et sa PDO, une fois calculée) sont gardées dans un
+cache mémoire LRU : une entreprise déjà connue est scorée par son seul i_uniq_kpi.
+
+Routes:
+    GET  /health                  état du service
+    GET  /score/<i_uniq_kpi>      PDO d'une entreprise du cache
+    POST /score                   {"companies": [{features}, ...]} ou {"i_uniq_kpi": [...]}
+
+Usage:
+    python -m common.pdo_service --port 8080 --features features.parquet
+    POLARS_MAX_THREADS=1 python -m common.pdo_service --synthetic-model --synthetic-companies 100k --cpu 0
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import unquote
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.pdo_bucketing import BucketTable
+from common.pdo_reference import ReferenceTables
+from common.pdo_scoring import DEFAULT_COEFF, PDO_FLOOR, CoefficientTable
+
+logger = logging.getLogger(LOGGER_NAME)
+
+KPI_KEY = "i_uniq_kpi"
+OUTPUT_COLUMNS = [KPI_KEY, "PDO", "PDO_compute", "sum_total_coeffs"]
+# Variables du modèle calculées par l'encodage et le formatage (les autres sont lues telles quelles)
+DERIVED_VARIABLES = ["nat_jur_a", "secto_b", "seg_nae", "top_ga"]
+PDO_DECIMALS = 4
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8080
+DEFAULT_CACHE_SIZE = 200_000
+DEFAULT_MICRO_BATCH_ROWS = 2_000
+MAX_BODY_BYTES = 8 * 1024**2
+
+
+class PdoModel:
+    """Tables d'encodage, de seuils et de coefficients compilées pour le scoring en ligne."""
+
+    def __init__(
+        self,
+        tables: ReferenceTables,
+        buckets: BucketTable,
+        coefficients: CoefficientTable,
+        micro_batch_rows: int = DEFAULT_MICRO_BATCH_ROWS,
+    ):
+        self.tables = tables
+        self.buckets = buckets
+        self.coefficients = coefficients
+        self.micro_batch_rows = micro_batch_rows
+        self.input_schema = self._input_schema()
+        # Chemin ligne à ligne : mêmes tables, en structures Python
+        self._bucketizers = [
+            (
+                bucketizer.name,
+                bucketizer.source,
+                bucketizer.breaks,
+                bucketizer.labels,
+                bisect_right if bucketizer.closed == "left" else bisect_left,
+                bucketizer.null_label,
+            )
+            for bucketizer in buckets.bucketizers
+        ]
+        self._coeffs = [(variable.name, dict(zip(variable.modalities, variable.coeffs))) for variable in coefficients.variables]
+
+    @classmethod
+    def from_config(cls, app_config: dict) -> "PdoModel":
+        """Compile les tables depuis app_config (model, reference_tables, scoring_service)."""
+        service_config = app_config.get("scoring_service", {})
+        return cls(
+            ReferenceTables.from_config(app_config),
+            BucketTable.from_config(app_config),
+            CoefficientTable.from_config(app_config),
+            service_config.get("micro_batch_rows", DEFAULT_MICRO_BATCH_ROWS),
+        )
+
+    def _input_schema(self) -> dict[str, pl.DataType]:
+        """Features attendues par entreprise : codes bruts, variables continues et modalités lues telles quelles."""
+        schema = {
+            KPI_KEY: pl.String,
+            self.tables.legal_natures.source: pl.String,
+            self.tables.sectors.source: pl.String,
+            "i_g_affre_rmpm": pl.String,
+            "c_sgmttn_nae": pl.String,
+        }
+        schema.update({bucketizer.source: pl.Float64 for bucketizer in self.buckets.bucketizers})
+        derived = set(DERIVED_VARIABLES) | {bucketizer.name for bucketizer in self.buckets.bucketizers}
+        schema.update({variable.name: pl.String for variable in self.coefficients.variables if variable.name not in derived})
+        return schema
+
+    def coerce(self, row: dict) -> dict:
+        """
+        Features d'une entreprise aux types du schéma d'entrée (colonnes absentes à NULL).
+
+        Raises:
+            ValueError: Si une variable continue n'est pas numérique
+        """
+        features = {}
+        for col, dtype in self.input_schema.items():
+            value = row.get(col)
+            if value is None:
+                features[col] = None
+            elif dtype == pl.Float64:
+                try:
+                    features[col] = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"{col}: valeur numérique attendue, reçu {value!r}") from None
+            else:
+                features[col] = str(value)
+        return features
+
+    def score_frame(self, df_main: pl.DataFrame) -> pl.DataFrame:
+        """Encodage, formatage et calcul PDO des tables du batch (micro-lots)."""
+        return self.coefficients.score(self.buckets.format(self.tables.encode(df_main))).select(OUTPUT_COLUMNS)
+
+    def modalities(self, features: dict) -> dict[str, Optional[str]]:
+        """Modalité de chaque variable du modèle pour une entreprise (features coercées)."""
+        legal, sectors = self.tables.legal_natures, self.tables.sectors
+        legal_class = legal.mapping.get(features[legal.source], legal.unknown)
+        values = {
+            "nat_jur_a": ">=7" if legal_class == "7" else legal_class,
+            "secto_b": sectors.mapping.get(features[sectors.source], sectors.unknown),
+            "seg_nae": "ME" if features["c_sgmttn_nae"] == "ME" else "autres",
+            "top_ga": "0" if features["i_g_affre_rmpm"] is None else "1",
+        }
+        for name, source, breaks, labels, search, null_label in self._bucketizers:
+            value = features[source]
+            if value is None:
+                values[name] = null_label
+            elif math.isnan(value):
+                values[name] = labels[len(breaks)]
+            else:
+                values[name] = labels[search(breaks, value)]
+        for name, _ in self._coeffs:
+            if name not in values:
+                values[name] = features.get(name)
+        return values
+
+    def score_row(self, features: dict) -> dict:
+        """PDO d'une entreprise (features coercées), identique à score_frame."""
+        values = self.modalities(features)
+        total = self.coefficients.intercept
+        for name, coeffs in self._coeffs:
+            total += coeffs.get(values[name], DEFAULT_COEFF)
+        # PDO = 1 - σ(total) comme calcul_pdo ; exp() évalué sur un exposant négatif (pas d'OverflowError)
+        if total >= 0:
+            pdo_compute = 1 - 1 / (1 + math.exp(-total))
+        else:
+            pdo_compute = 1 / (1 + math.exp(total))
+        pdo = PDO_FLOOR if pdo_compute < PDO_FLOOR else round(pdo_compute * 10**PDO_DECIMALS) / 10**PDO_DECIMALS
+        return {KPI_KEY: features.get(KPI_KEY), "PDO": pdo, "PDO_compute": pdo_compute, "sum_total_coeffs": total}
+
+    def score(self, rows: list[dict]) -> list[dict]:
+        """PDO de chaque entreprise (features coercées), en Polars à partir de micro_batch_rows lignes."""
+        if len(rows) >= self.micro_batch_rows:
+            return self.score_frame(pl.DataFrame(rows, schema=self.input_schema)).to_dicts()
+        return [self.score_row(features) for features in rows]
+
+
+class FeatureCache:
+    """Cache LRU des features (et de la PDO calculée) par entreprise, partagé entre les threads."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, key: str, features: dict, result: Optional[dict] = None) -> None:
+        """Enregistre les features d'une entreprise (la PDO en cache est remplacée)."""
+        with self._lock:
+            self._entries[key] = [features, result]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[list]:
+        """[features, PDO ou None] d'une entreprise, None si absente."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set_result(self, key: str, features: dict, result: dict) -> None:
+        """Mémorise la PDO si les features de l'entreprise n'ont pas changé entre-temps."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is features:
+                entry[1] = result
+
+
+class PdoScoringService:
+    """Scoring à la demande : features reçues ou lues dans le cache, PDO mémorisée par entreprise."""
+
+    def __init__(self, model: PdoModel, cache: Optional[FeatureCache] = None):
+        self.model = model
+        self.cache = cache if cache is not None else FeatureCache()
+
+    @classmethod
+    def from_config(cls, app_config: dict) -> "PdoScoringService":
+        service_config = app_config.get("scoring_service", {})
+        return cls(PdoModel.from_config(app_config), FeatureCache(service_config.get("cache_size", DEFAULT_CACHE_SIZE)))
+
+    def load_features(self, features: pl.DataFrame) -> int:
+        """Précharge le cache (une ligne par entreprise, colonnes du schéma d'entrée)."""
+        columns = [col for col in self.model.input_schema if col in features.columns]
+        for row in features.select(columns).iter_rows(named=True):
+            self.cache.put(row[KPI_KEY], self.model.coerce(row))
+        logger.info(f"   🗂️  {features.height:,} entreprises chargées dans le cache de features")
+        return features.height
+
+    def score_companies(self, companies: list[dict]) -> list[dict]:
+        """
+        Score des features reçues ; celles identifiées par i_uniq_kpi remplacent le cache.
+
+        Raises:
+            ValueError: Si une variable continue n'est pas numérique
+        """
+        rows = [self.model.coerce(company) for company in companies]
+        results = self.model.score(rows)
+        for features, result in zip(rows, results):
+            if features[KPI_KEY] is not None:
+                self.cache.put(features[KPI_KEY], features, result)
+        return results
+
+    def score_cached(self, keys: list[str]) -> tuple[list[dict], list[str]]:
+        """PDO des entreprises du cache (calculée une fois par version de features) et clés inconnues."""
+        results, pending, unknown = {}, [], []
+        for key in keys:
+            entry = self.cache.get(key)
+            if entry is None:
+                unknown.append(key)
+            elif entry[1] is not None:
+                results[key] = entry[1]
+            else:
+                pending.append((key, entry[0]))
+        for (key, features), result in zip(pending, self.model.score([features for _, features in pending])):
+            self.cache.set_result(key, features, result)
+            results[key] = result
+        return [results[key] for key in keys if key in results], unknown
+
+
+class PdoRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP du service (connexions persistantes HTTP/1.1)."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "PdoScoring"
+
+    @property
+    def service(self) -> PdoScoringService:
+        return self.server.service
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"   🌐 {self.address_string()} {format % args}")
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send(200, {"status": "healthy", "cached_companies": len(self.service.cache)})
+        elif self.path.startswith("/score/"):
+            key = unquote(self.path[len("/score/"):])
+            results, unknown = self.service.score_cached([key])
+            if unknown:
+                self._send(404, {"error": f"entreprise inconnue: {key}"})
+            else:
+                self._send(200, results[0])
+        else:
+            self._send(404, {"error": f"route inconnue: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != "/score":
+            self._send(404, {"error": f"route inconnue: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(413, {"error": f"corps de requête limité à {MAX_BODY_BYTES} octets"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            if "companies" in request:
+                self._send(200, {"scores": self.service.score_companies(request["companies"]), "unknown": []})
+            elif KPI_KEY in request:
+                scores, unknown = self.service.score_cached([str(key) for key in request[KPI_KEY]])
+                self._send(200, {"scores": scores, "unknown": unknown})
+            else:
+                self._send(400, {"error": f"'companies' ou '{KPI_KEY}' attendu"})
+        except (ValueError, TypeError, AttributeError) as e:
+            self._send(400, {"error": str(e)})
+
+
+def make_server(service: PdoScoringService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Serveur HTTP du service (port 0 : port libre choisi par le système)."""
+    server = ThreadingHTTPServer((host, port), PdoRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Point d'entrée : compilation du modèle, préchargement du cache et service HTTP."""
+    from common.pdo_synthetic import generate_service_input, parse_scale, synthetic_model_config
+
+    parser = argparse.ArgumentParser(description="Service HTTP de scoring PDO")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--features", help="Parquet des features par entreprise préchargé dans le cache")
+    parser.add_argument("--synthetic-model", action="store_true", help="Coefficients synthétiques (sans configuration)")
+    parser.add_argument("--synthetic-companies", help="Précharge N entreprises synthétiques (10k, 100k, ...)")
+    parser.add_argument("--cpu", type=int, help="Cœur sur lequel épingler le service")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {args.cpu})
+    if args.synthetic_model:
+        app_config = synthetic_model_config()
+    else:
+        from config.load_config import load_app_config_file
+
+        app_config = load_app_config_file()
+    service = PdoScoringService.from_config(app_config)
+    if args.features:
+        service.load_features(pl.read_parquet(args.features))
+    if args.synthetic_companies:
+        service.load_features(generate_service_input(parse_scale(args.synthetic_companies)))
+
+    server = make_server(service, args.host, args.port)
+    logger.info(f"   🚀 Service de scoring PDO sur http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
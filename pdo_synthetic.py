@@ -0,0 +1,390 @@
+"""
+Générateurs de données synthétiques pour les mesures de performance du pipeline PDO.
+Les extraits ont le schéma des requêtes Starburst (mêmes colonnes, mêmes types que
+starburst_io) et des distributions réalistes : plusieurs comptes et plusieurs lignes
+RSC par entreprise, drivers reboot avec virgule décimale, transactions sur des
+catégories utilisées ou non par le modèle, valeurs NULL. Les générateurs sont
+déterministes (graine) et vectorisés : 10 millions d'entreprises se génèrent sans
+boucle Python.
+"""
+
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import polars as pl
+
+from common.pdo_scope_filters import EXCLUDED_ECO_CODES
+from common.pdo_scoring import PDO_MODALITIES
+
+# Tailles nommées (nombre d'entreprises)
+SCALES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+EXTRACT_DATE = date(2026, 10, 1)
+
+# Postes SAFIR des formules (résultat net consolidé, CAF sociale) et autres postes
+# (numérateurs de VB035 / VB055 de synthetic_safir_config, postes non utilisés)
+SAFIR_CONSO_CODES = [
+    "310", "26", "27", "28", "29", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "24", "309",
+]
+SAFIR_SOC_CODES = [
+    "182", "469", "287", "290", "289", "288", "471", "286", "470", "294", "285", "295", "479", "480", "435",
+    "209", "534",
+]
+SAFIR_OTHER_CODES = ["100", "120", "140", "160", "200", "220", "240", "260"]
+
+
+def parse_scale(value: str) -> int:
+    """Nombre d'entreprises d'une taille nommée ("10k", "1M") ou numérique ("250000")."""
+    if value in SCALES:
+        return SCALES[value]
+    return int(value.replace("_", ""))
+
+
+def _rng(seed: int) -> np.random.Generator:
+    return np.random.default_rng(seed)
+
+
+def _ids(prefix: str, ids: np.ndarray) -> pl.Series:
+    """Identifiants "PREFIX_000000042" (chaînes de longueur fixe comme les clés RMPM)."""
+    return (prefix + pl.Series(ids, dtype=pl.Int64).cast(pl.String).str.zfill(9)).rename(prefix.lower())
+
+
+def _pick(rng: np.random.Generator, values: list, n: int, p: Optional[list[float]] = None) -> pl.Series:
+    """Tirage de n valeurs parmi values (None = NULL), par indices puis gather."""
+    if p is not None:
+        p = np.asarray(p, dtype=float) / np.sum(p)
+    return pl.Series(values).gather(rng.choice(len(values), size=n, p=p))
+
+
+def _with_nulls(series: pl.Series, rng: np.random.Generator, rate: float) -> pl.Series:
+    """Remplace une proportion rate des valeurs par NULL."""
+    if rate <= 0:
+        return series
+    mask = pl.Series(rng.random(len(series)) < rate)
+    return pl.select(pl.when(mask).then(None).otherwise(series).alias(series.name)).to_series()
+
+
+def _siren(ids: np.ndarray) -> pl.Series:
+    """SIREN d'une entreprise (déterministe : les extraits SAFIR retrouvent celui de df_main)."""
+    return _ids("", 300_000_000 + ids).rename("i_siren")
+
+
+def _dates_before(days: np.ndarray) -> pl.Series:
+    """Dates antérieures de `days` jours à la date d'extraction."""
+    return pl.Series((EXTRACT_DATE - date(1970, 1, 1)).days - days).cast(pl.Date)
+
+
+def _repeat_keys(rng: np.random.Generator, n_companies: int, mean_rows: float, coverage: float) -> np.ndarray:
+    """Index d'entreprise de chaque ligne : coverage des entreprises, 1 + Poisson(mean_rows - 1) lignes chacune."""
+    covered = np.flatnonzero(rng.random(n_companies) < coverage)
+    counts = 1 + rng.poisson(max(mean_rows - 1, 0), size=len(covered))
+    return np.repeat(covered, counts)
+
+
+# =============================================================================
+# SOURCES (schéma des requêtes Starburst)
+# =============================================================================
+
+def generate_unfiltered_df_main(n_companies: int, seed: int = 0) -> pl.DataFrame:
+    """Extrait unfiltered_df_main : une ligne par entreprise (~20% hors périmètre PDO)."""
+    rng = _rng(seed)
+    n = n_companies
+    ids = np.arange(n)
+    has_ga = rng.random(n) < 0.3
+    return pl.DataFrame([
+        _ids("KPII_", ids).rename("i_uniq_kpi_i"),
+        pl.Series("c_mrche_b", ["EN"] * n),
+        pl.Series("c_etat_prsne", ["C"] * n),
+        _ids("KPI_", ids).rename("i_uniq_kpi"),
+        _with_nulls(_ids("INTRN_", ids).rename("i_intrn"), rng, 0.01),
+        _pick(rng, ["54", "57", "55", "65", "26", "27", "20", "21", "22", "25", "56", "31", "92", "99", None], n,
+              [30, 25, 8, 6, 3, 3, 2, 2, 2, 2, 2, 1, 1, 1, 1]).rename("c_njur_prsne"),
+        _siren(ids),
+        _pick(rng, ["4711D", "6201Z", "4120A", "7022Z", "5610A", "6820B", "4673A", "6419Z", "8411Z"], n,
+              [15, 15, 15, 15, 10, 10, 10, 2, 1]).rename("c_naf"),
+        _dates_before(rng.integers(0, 365 * 40, size=n)).rename("d_creat_entrp_rpp"),
+        _pick(rng, ["0", "1"], n, [95, 5]).rename("c_pclte_inbg"),
+        _pick(rng, ["0", "1"], n, [97, 3]).rename("c_pclte_inb"),
+        _pick(rng, ["0", "1"], n, [98, 2]).rename("c_pclte_inj"),
+        _pick(rng, ["ME", "GR", "A3", "PE", "AP", None], n, [55, 10, 10, 15, 5, 5]).rename("c_sgmttn_nae"),
+        _ids("RC_", ids).rename("i_rel_cmrcl"),
+        _pick(rng, ["0", "1"], n, [70, 30]).rename("b_i_g"),
+        _pick(rng, ["420053", "460010", "360120", "500030", "270030", "600020", "710010", "720020", "", None], n,
+              [8, 8, 8, 8, 8, 8, 20, 20, 6, 6]).rename("c_sectrl_1"),
+        _pick(rng, [None, "I1", "I2"], n, [90, 6, 4]).rename("c_profl_immbr"),
+        _pick(rng, ["510", "520", "530", "540", "560", *EXCLUDED_ECO_CODES[:4]], n,
+              [20, 20, 20, 20, 12, 2, 2, 2, 2]).rename("c_eco"),
+        _ids("UO_", rng.integers(0, 2_000, size=n)).rename("i_uo_agce"),
+        _pick(rng, ["00001", "00002", "00003"], n, [80, 15, 5]).rename("c_nture_clt_entrp"),
+        _pick(rng, ["0", "1", "2", "3"], n, [88, 3, 3, 6]).rename("c_crisq"),
+        _pick(rng, ["1", "0"], n, [92, 8]).rename("c_pres_cpt"),
+        pl.select(pl.when(pl.Series(has_ga)).then(_ids("KPIJ_", ids))).to_series().rename("i_uniq_kpi_jurid_m"),
+        pl.select(pl.when(pl.Series(has_ga)).then(_ids("GA_", ids // 7))).to_series().rename("i_g_affre_rmpm"),
+    ])
+
+
+def generate_rsc(n_companies: int, seed: int = 1) -> pl.DataFrame:
+    """Extrait rsc : jours de dépassement autorisé (0 à 10, quelques valeurs aberrantes) par i_intrn."""
+    rng = _rng(seed)
+    keys = _repeat_keys(rng, n_companies, mean_rows=1.5, coverage=0.8)
+    n = len(keys)
+    days = np.where(rng.random(n) < 0.7, 0, rng.integers(1, 11, size=n))
+    days = np.where(rng.random(n) < 0.001, rng.integers(-2, 30, size=n), days)
+    return pl.DataFrame([
+        _ids("INTRN_", keys).rename("i_intrn"),
+        pl.Series("k_dep_auth_10j", days, dtype=pl.Int64),
+        pl.Series("extract_date", [EXTRACT_DATE] * n, dtype=pl.Date),
+    ])
+
+
+def generate_soldes(n_companies: int, seed: int = 2) -> pl.DataFrame:
+    """Extrait soldes : soldes en centimes (log-normaux, ~15% débiteurs) de 2.5 comptes par entreprise."""
+    rng = _rng(seed)
+    keys = _repeat_keys(rng, n_companies, mean_rows=2.5, coverage=0.9)
+    n = len(keys)
+    amounts = np.round(rng.lognormal(mean=10.5, sigma=2.0, size=n))
+    amounts = np.where(rng.random(n) < 0.15, -amounts / 10, amounts)
+    return pl.DataFrame([
+        _ids("CPT_", np.arange(n)).rename("pref_i_uniq_cpt"),
+        pl.Series("pref_m_ctrvl_sld_arr", amounts, dtype=pl.Float64),
+        _pick(rng, ["CAV", "CAT", "LIV"], n, [80, 15, 5]).rename("pref_c_type_cntrt"),
+        _ids("KPII_", keys).rename("i_uniq_kpi_i"),
+        pl.Series("c_mrche_b", ["EN"] * n),
+        pl.Series("c_etat_prsne", ["C"] * n),
+        _ids("KPI_", keys).rename("i_uniq_kpi"),
+        _ids("INTRN_", keys).rename("i_intrn"),
+        _pick(rng, ["54", "57", "55"], n).rename("c_njur_prsne"),
+    ])
+
+
+def generate_reboot(n_companies: int, seed: int = 3) -> pl.DataFrame:
+    """Extrait reboot : une notation par entreprise, ~6 drivers par notation, q_score à virgule décimale."""
+    rng = _rng(seed)
+    keys = _repeat_keys(rng, n_companies, mean_rows=6, coverage=0.7)
+    n = len(keys)
+    # Colonnes de la notation : une valeur par entreprise, répétée sur ses drivers
+    companies, counts = np.unique(keys, return_counts=True)
+    row_company = np.repeat(np.arange(len(companies)), counts)
+    rev_dates = _dates_before(rng.integers(0, 365, size=len(companies))).gather(row_company)
+    scores = rng.normal(loc=-0.9, scale=0.5, size=n)
+    return pl.DataFrame([
+        pl.Series("d_histo", [EXTRACT_DATE] * n, dtype=pl.Date),
+        _ids("KPI_", keys).rename("i_uniq_kpi"),
+        _pick(rng, ["011", "111", "012", "112", "013", "113"], len(companies)).gather(row_company).rename("c_int_modele"),
+        rev_dates.rename("d_not"),
+        rev_dates.rename("d_rev_notation"),
+        _pick(rng, ["3+", "3", "3-", "4+", "4", "4-", "5+", "5"], len(companies)).gather(row_company).rename("c_not"),
+        pl.Series("c_type_prsne", ["PM"] * n),
+        _pick(rng, ["O", "N"], len(companies), [60, 40]).gather(row_company).rename("b_bddf_gestionnaire"),
+        rev_dates.rename("d_rev_modele"),
+        _ids("DRV_", rng.integers(0, 40, size=n)).rename("c_driver"),
+        _ids("DON_", rng.integers(0, 200, size=n)).rename("c_donnee"),
+        pl.Series("c_val_donnee", np.round(rng.normal(size=n), 3)).cast(pl.String),
+        pl.Series("q_score", np.round(scores, 6)).cast(pl.String).str.replace(".", ",", literal=True),
+    ])
+
+
+def generate_donnees_transac(n_companies: int, seed: int = 4) -> pl.DataFrame:
+    """Extrait donnees_transac : agrégats par (entreprise, catégorie), ~8 catégories par entreprise."""
+    rng = _rng(seed)
+    keys = _repeat_keys(rng, n_companies, mean_rows=8, coverage=0.85)
+    n = len(keys)
+    nops = rng.integers(1, 120, size=n).astype(float)
+    min_amount = -np.round(rng.lognormal(4, 1.5, size=n), 2)
+    max_amount = np.round(rng.lognormal(7, 1.5, size=n), 2)
+    return pl.DataFrame([
+        _ids("KPI_", keys).rename("i_uniq_kpi"),
+        _pick(rng, ["turnover", "interets", "prlv_sepa_retourne", "rembt_prlv_sepa", "attri_blocage",
+                    "atd_tres_pub", "carte", "virement", "cheque", "frais"], n,
+              [25, 15, 3, 6, 1, 1, 20, 15, 9, 5]).rename("category"),
+        pl.Series("netamount", np.round(rng.normal(0, 5_000, size=n), 2)),
+        pl.Series("nops_category", nops),
+        pl.Series("min_amount", min_amount),
+        pl.Series("max_amount", max_amount),
+        pl.Series("nops_total", nops + rng.integers(0, 200, size=n)),
+    ])
+
+
+def _safir_balances(rng: np.random.Generator, n_companies: int, coverage: float, max_balances: int) -> tuple:
+    """
+    Bilans SAFIR des entreprises couvertes sur 24 mois : 1 à max_balances bilans annuels
+    par entreprise, le plus récent clôturé 3 à 15 mois avant l'extraction.
+
+    Returns:
+        (entreprise de chaque bilan, rang du bilan (0 = plus récent), jours avant l'extraction)
+    """
+    covered = np.flatnonzero(rng.random(n_companies) < coverage)
+    n_balances = rng.integers(1, max_balances + 1, size=len(covered))
+    companies = np.repeat(covered, n_balances)
+    rank = np.arange(len(companies)) - np.repeat(np.cumsum(n_balances) - n_balances, n_balances)
+    latest = np.repeat(rng.integers(90, 450, size=len(covered)), n_balances)
+    return companies, rank, latest + 365 * rank
+
+
+def _safir_mapping(companies: np.ndarray, with_market: bool) -> list[pl.Series]:
+    """Colonnes du mapping périmètre PDO (safir_mapping) des requêtes SAFIR."""
+    n = len(companies)
+    columns = [_ids("KPII_", companies).rename("i_uniq_kpi_i")]
+    if with_market:
+        columns += [pl.Series("c_mrche_b", ["EN"] * n), pl.Series("c_etat_prsne", ["C"] * n)]
+    return columns + [_ids("KPI_", companies).rename("i_uniq_kpi"), _ids("INTRN_", companies).rename("i_intrn")]
+
+
+def _safir_items(rng: np.random.Generator, companies: np.ndarray, days: np.ndarray, codes: list[str]) -> tuple:
+    """Postes des bilans : chaque code de codes (~90% renseignés) et quelques postes non utilisés."""
+    all_codes = codes + SAFIR_OTHER_CODES
+    balance = np.repeat(np.arange(len(companies)), len(all_codes))
+    code_index = np.tile(np.arange(len(all_codes)), len(companies))
+    kept = rng.random(len(balance)) < np.where(code_index < len(codes), 0.9, 0.3)
+    balance, code_index = balance[kept], code_index[kept]
+    values = np.round(rng.lognormal(11, 2, size=len(balance)) * rng.choice([-1, 1], size=len(balance), p=[0.2, 0.8]))
+    return (
+        companies[balance],
+        _dates_before(days[balance]),
+        pl.Series(all_codes).gather(code_index).rename("c_code"),
+        pl.Series("c_val", values, dtype=pl.Float64),
+    )
+
+
+def generate_safir_cc(n_companies: int, seed: int = 8) -> pl.DataFrame:
+    """Extrait safir_cc : dernier bilan consolidé (~8% des entreprises, têtes de groupe)."""
+    rng = _rng(seed)
+    companies, rank, days = _safir_balances(rng, n_companies, coverage=0.08, max_balances=2)
+    latest = rank == 0
+    companies, days = companies[latest], days[latest]
+    n = len(companies)
+    return pl.DataFrame([
+        _pick(rng, ["1", "2", "3"], n, [90, 5, 5]).rename("c_nture_excce"),
+        _siren(companies),
+        _dates_before(days).rename("d_fin_excce_conso"),
+        _pick(rng, [12, 6, 18], n, [94, 3, 3]).cast(pl.Int32).rename("c_duree_excce_conso"),
+        _dates_before(days - rng.integers(30, 80, size=n)).rename("d_der_maj_conso"),
+        pl.Series("extract_date", [EXTRACT_DATE] * n, dtype=pl.Date),
+        *_safir_mapping(companies, with_market=False),
+    ])
+
+
+def generate_safir_cd(n_companies: int, seed: int = 8) -> pl.DataFrame:
+    """Extrait safir_cd : postes des bilans consolidés sur 24 mois (mêmes entreprises que safir_cc à graine égale)."""
+    rng = _rng(seed)
+    companies, _, days = _safir_balances(rng, n_companies, coverage=0.08, max_balances=2)
+    companies, d_fin, c_code, c_val = _safir_items(_rng(seed + 1), companies, days, SAFIR_CONSO_CODES)
+    n = len(companies)
+    return pl.DataFrame([
+        _siren(companies),
+        d_fin.rename("d_fin_excce_conso"),
+        c_code,
+        c_val,
+        pl.Series("extract_date", [EXTRACT_DATE] * n, dtype=pl.Date),
+        *_safir_mapping(companies, with_market=False),
+    ])
+
+
+def generate_safir_sc(n_companies: int, seed: int = 10) -> pl.DataFrame:
+    """Extrait safir_sc : dernier bilan social (~55% des entreprises), régime réel normal ou simplifié."""
+    rng = _rng(seed)
+    companies, rank, days = _safir_balances(rng, n_companies, coverage=0.55, max_balances=2)
+    latest = rank == 0
+    companies, days = companies[latest], days[latest]
+    n = len(companies)
+    return pl.DataFrame([
+        _pick(rng, ["1", "2"], n, [70, 30]).rename("c_regme_fisc"),
+        _siren(companies),
+        _dates_before(days).rename("d_fin_excce_soc"),
+        _pick(rng, [12, 6, 18], n, [94, 3, 3]).cast(pl.Int32).rename("c_duree_excce_soc"),
+        _dates_before(days - rng.integers(30, 80, size=n)).rename("d_der_maj_soc"),
+        *_safir_mapping(companies, with_market=True),
+    ])
+
+
+def generate_safir_sd(n_companies: int, seed: int = 10) -> pl.DataFrame:
+    """Extrait safir_sd : postes des bilans sociaux sur 24 mois (mêmes entreprises que safir_sc à graine égale)."""
+    rng = _rng(seed)
+    companies, _, days = _safir_balances(rng, n_companies, coverage=0.55, max_balances=2)
+    companies, d_fin, c_code, c_val = _safir_items(_rng(seed + 1), companies, days, SAFIR_SOC_CODES)
+    return pl.DataFrame([
+        _siren(companies),
+        d_fin.rename("d_fin_excce_soc"),
+        c_code,
+        c_val,
+        *_safir_mapping(companies, with_market=True),
+    ])
+
+
+# =============================================================================
+# ENTRÉES DES ÉTAPES AVAL (format_variables, calcul_pdo)
+# =============================================================================
+
+def generate_format_input(n_companies: int, seed: int = 5) -> pl.DataFrame:
+    """df_main à l'entrée de format_variables (sorties des étapes 3 à 9, NULL inclus)."""
+    rng = _rng(seed)
+    n = n_companies
+
+    def feature(name: str, values: np.ndarray, null_rate: float) -> pl.Series:
+        return _with_nulls(pl.Series(name, values, dtype=pl.Float64), rng, null_rate)
+
+    return pl.DataFrame([
+        _ids("KPI_", np.arange(n)).rename("i_uniq_kpi"),
+        _pick(rng, ["1-3", "4-6", "7"], n, [10, 60, 30]).rename("c_njur_prsne_enc"),
+        _pick(rng, ["1", "2", "3", "4"], n, [25, 25, 25, 25]).rename("c_sectrl_1_enc"),
+        _pick(rng, ["ME", "GR", "A3"], n, [70, 15, 15]).rename("c_sgmttn_nae"),
+        _pick(rng, ["0", "1"], n, [70, 30]).rename("top_ga"),
+        feature("Q_JJ_DEPST_MM", rng.integers(0, 40, size=n), 0.2),
+        feature("solde_cav", np.round(rng.lognormal(9, 2.5, size=n) * rng.choice([-0.1, 1], size=n, p=[0.15, 0.85]), 2), 0.1),
+        feature("reboot_score2", 1 / (1 + np.exp(-rng.normal(-5, 1, size=n))), 0.3),
+        feature("VB023", rng.normal(2, 2, size=n), 0.5),
+        feature("VB005", rng.normal(60, 40, size=n), 0.5),
+        feature("VB035", rng.normal(3, 8, size=n), 0.5),
+        feature("VB055", rng.uniform(0, 100, size=n), 0.5),
+        _pick(rng, ["1", "2"], n, [5, 95]).rename("remb_sepa_max"),
+        _pick(rng, ["1", "2"], n, [3, 97]).rename("pres_prlv_retourne"),
+        _pick(rng, ["1", "2"], n, [1, 99]).rename("pres_saisie"),
+        _pick(rng, ["1", "2"], n, [10, 90]).rename("net_int_turnover"),
+    ])
+
+
+def generate_service_input(n_companies: int, seed: int = 9) -> pl.DataFrame:
+    """Features d'une entreprise à l'entrée du service de scoring (codes bruts de df_main, sorties des étapes 3 à 9)."""
+    rng = _rng(seed)
+    ids = np.arange(n_companies)
+    features = generate_format_input(n_companies, seed).drop(["c_njur_prsne_enc", "c_sectrl_1_enc", "top_ga"])
+    raw = generate_unfiltered_df_main(n_companies, seed).select(["c_njur_prsne", "c_sectrl_1"])
+    has_ga = rng.random(n_companies) < 0.3
+    return pl.concat([
+        features.select("i_uniq_kpi"),
+        raw,
+        pl.select(pl.when(pl.Series(has_ga)).then(_ids("GA_", ids // 7))).to_series().rename("i_g_affre_rmpm").to_frame(),
+        features.drop("i_uniq_kpi"),
+    ], how="horizontal")
+
+
+def generate_score_input(n_companies: int, seed: int = 6) -> pl.DataFrame:
+    """df_main à l'entrée de calcul_pdo : une modalité par variable du modèle (chaînes)."""
+    rng = _rng(seed)
+    columns = [_ids("KPI_", np.arange(n_companies)).rename("i_uniq_kpi")]
+    for name, mapping in PDO_MODALITIES.items():
+        columns.append(_pick(rng, list(mapping), n_companies).rename(name))
+    return pl.DataFrame(columns)
+
+
+def synthetic_model_config(seed: int = 7) -> dict:
+    """Configuration de modèle (config["model"]["coeffs"]) à coefficients aléatoires, modalités de PDO_MODALITIES."""
+    rng = _rng(seed)
+    coeffs = {"intercept": -3.864}
+    for mapping in PDO_MODALITIES.values():
+        for key in mapping.values():
+            coeffs[key] = float(np.round(rng.normal(0, 0.5), 6))
+    return {"model": {"coeffs": coeffs}}
+
+
+def synthetic_safir_config() -> dict:
+    """Configuration SAFIR (config["safir"]) : numérateurs de VB035 / VB055 sur les postes synthétiques 100 à 160."""
+    return {
+        "safir": {
+            "formulas": {
+                "res_soc": {"items": {"mt_100": 1, "mt_120": -1}, "annualised": True},
+                "immob": {"items": {"mt_140": 1, "mt_160": 1}, "annualised": False},
+            }
+        }
+    }
@@ -0,0 +1,73 @@
+"""
+Agrégation des soldes CAV par morceaux (variante de preprocessing_soldes.add_soldes_features).
+Mêmes colonnes et même contrat de sortie : solde_cav (Float64, euros), solde_nb (Int64)
+et check == "flag_soldes_OK".
+"""
+
+from typing import Iterable, Union
+
+import polars as pl
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+SOLDES_CHECK = "flag_soldes_OK"
+
+
+def aggregate_soldes_partial(soldes: Frame) -> Frame:
+    """
+    Agrège les soldes par entreprise (i_intrn).
+
+    Somme des soldes en euros et nombre de comptes : les deux agrégats sont additifs,
+    un morceau de soldes peut donc être agrégé seul puis fusionné avec merge_soldes_partials.
+
+    Args:
+        soldes: Soldes bruts (i_intrn, pref_i_uniq_cpt, pref_m_ctrvl_sld_arr en centimes)
+
+    Returns:
+        Frame avec colonnes: i_intrn, solde_cav, solde_nb
+    """
+    return soldes.group_by("i_intrn").agg([
+        (pl.col("pref_m_ctrvl_sld_arr") / 100).sum().alias("solde_cav"),
+        pl.col("pref_i_uniq_cpt").count().cast(pl.Int64).alias("solde_nb"),
+    ])
+
+
+def merge_soldes_partials(partials: Frame) -> Frame:
+    """Fusionne des agrégats partiels (concaténés) en un agrégat par i_intrn."""
+    return partials.group_by("i_intrn").agg([
+        pl.col("solde_cav").sum(),
+        pl.col("solde_nb").sum(),
+    ])
+
+
+def add_soldes_features_chunked(df_main: pl.DataFrame, soldes_chunks: Iterable[Frame]) -> pl.DataFrame:
+    """
+    Variante de add_soldes_features_optimized sur des soldes découpés en morceaux.
+
+    Chaque morceau (ex: un lot de starburst_io.iter_frames) est agrégé puis replié dans
+    un état courant par i_intrn : la mémoire dépend du nombre d'entreprises et non du
+    nombre de comptes.
+
+    Args:
+        df_main: DataFrame principal
+        soldes_chunks: Itérable de morceaux de soldes (DataFrame ou LazyFrame)
+
+    Returns:
+        df_main enrichi de solde_cav, solde_nb et check (identique à add_soldes_features_optimized) ;
+        sans aucun morceau, solde_cav et solde_nb sont NULL (comme avec une table soldes vide)
+    """
+    state = None
+    for chunk in soldes_chunks:
+        partial = aggregate_soldes_partial(chunk)
+        if isinstance(partial, pl.LazyFrame):
+            partial = partial.collect(engine="streaming")
+        state = partial if state is None else merge_soldes_partials(pl.concat([state, partial]))
+
+    if state is None:
+        state = pl.DataFrame(
+            schema={"i_intrn": df_main.schema["i_intrn"], "solde_cav": pl.Float64, "solde_nb": pl.Int64}
+        )
+
+    df_main = df_main.join(state, on="i_intrn", how="left")
+
+    return df_main.with_columns(pl.lit(SOLDES_CHECK).alias("check"))
@@ -0,0 +1,86 @@
+"""
+Chargement concurrent des sources Starburst.
+Les neuf requêtes sources sont indépendantes : elles sont exécutées sur un pool de
+threads borné (l'attente réseau libère le GIL), avec un timeout par requête.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+DEFAULT_MAX_CONCURRENCY = 4
+POLL_INTERVAL_SECONDS = 0.5
+
+
+def load_sources_concurrently(
+    loaders: dict[str, Callable[[], pl.DataFrame]],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    timeout_seconds: Optional[float] = None,
+) -> tuple[dict[str, pl.DataFrame], dict[str, float]]:
+    """
+    Exécute les chargements de sources en parallèle.
+
+    Usage:
+        data, latencies = load_sources_concurrently({"soldes": lambda: ..., ...})
+        tracker.log_input_dict(data, "Sources SQL", latencies=latencies)
+
+    Args:
+        loaders: Dictionnaire {nom de la source: fonction exécutant la requête}
+        max_concurrency: Nombre maximal de requêtes simultanées
+        timeout_seconds: Durée maximale d'une requête, mesurée à partir de son démarrage
+            effectif (l'attente d'un slot du pool n'est pas comptée)
+
+    Returns:
+        (sources chargées, latence de chaque requête en secondes)
+
+    Raises:
+        TimeoutError: Si une requête dépasse timeout_seconds
+        Exception: La première erreur levée par un chargement
+    """
+    started_at: dict[str, float] = {}
+    latencies: dict[str, float] = {}
+    lock = threading.Lock()
+
+    def run(name: str) -> pl.DataFrame:
+        start = time.perf_counter()
+        with lock:
+            started_at[name] = start
+        df = loaders[name]()
+        latencies[name] = time.perf_counter() - start
+        logger.info(f"      ✅ {name}: {df.height:,} lignes en {latencies[name]:.2f}s")
+        return df
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="starburst")
+    futures: dict[Future, str] = {executor.submit(run, name): name for name in loaders}
+    results: dict[str, pl.DataFrame] = {}
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=POLL_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+
+            if timeout_seconds is not None:
+                now = time.perf_counter()
+                with lock:
+                    timed_out = [
+                        futures[future] for future in pending
+                        if futures[future] in started_at and now - started_at[futures[future]] > timeout_seconds
+                    ]
+                if timed_out:
+                    raise TimeoutError(f"Requête(s) Starburst au-delà de {timeout_seconds}s: {timed_out}")
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+    # Ordre des sources identique à celui des loaders
+    return {name: results[name] for name in loaders}, {name: latencies[name] for name in loaders}
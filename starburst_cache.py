@@ -0,0 +1,163 @@
+"""
+Cache local Parquet des extractions Starburst.
+Les résultats sont indexés par (requête SQL rendue, paramètres, date d'extraction),
+écrits en Parquet compressé zstd et relus en memory-map. Expiration par TTL et
+éviction LRU au-delà d'une taille maximale.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Optional
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pdo_starburst")
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_SIZE_BYTES = 20 * 1024**3
+CACHE_SUFFIX = ".parquet"
+
+
+class StarburstCache:
+    """
+    Cache disque des résultats de requêtes Starburst.
+
+    Usage:
+        cache = StarburstCache.from_config(app_config)
+        df = cache.get_or_fetch("soldes", sql, lambda: connector.get_engine(sql), extraction_date=date)
+
+    La date de dernière modification d'un fichier sert au TTL, sa date de dernier
+    accès (mise à jour à chaque lecture) sert à l'éviction LRU.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+        compression_level: int = 3,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self.compression_level = compression_level
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, app_config: dict) -> Optional["StarburstCache"]:
+        """Construit le cache depuis app_config["starburst_cache"] (None si désactivé)."""
+        cache_config = app_config.get("starburst_cache", {})
+        if not cache_config.get("enabled", False):
+            return None
+        return cls(
+            cache_dir=cache_config.get("cache_dir", DEFAULT_CACHE_DIR),
+            ttl_seconds=cache_config.get("ttl_seconds", DEFAULT_TTL_SECONDS),
+            max_size_bytes=cache_config.get("max_size_bytes", DEFAULT_MAX_SIZE_BYTES),
+        )
+
+    @staticmethod
+    def make_key(sql: str, params: Optional[dict[str, Any]] = None, extraction_date: Optional[str] = None) -> str:
+        """Clé de cache : sha256 de la requête rendue, des paramètres et de la date d'extraction."""
+        payload = json.dumps(
+            {"sql": sql, "params": params or {}, "extraction_date": extraction_date},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}_{key}{CACHE_SUFFIX}")
+
+    def _is_expired(self, path: str, now: float) -> bool:
+        return now - os.stat(path).st_mtime > self.ttl_seconds
+
+    def get(self, name: str, key: str) -> Optional[pl.DataFrame]:
+        """Retourne le DataFrame en cache (memory-map) ou None si absent ou expiré."""
+        path = self._path(name, key)
+        now = time.time()
+        if not os.path.exists(path) or self._is_expired(path, now):
+            return None
+        os.utime(path, times=(now, os.stat(path).st_mtime))
+        return pl.read_parquet(path, memory_map=True)
+
+    def put(self, name: str, key: str, df: pl.DataFrame) -> None:
+        """Écrit le DataFrame en cache (écriture atomique) puis applique l'éviction."""
+        path = self._path(name, key)
+        tmp_path = f"{path}.tmp"
+        df.write_parquet(
+            tmp_path,
+            compression="zstd",
+            compression_level=self.compression_level,
+            statistics=True,
+        )
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> list[str]:
+        """
+        Supprime les entrées expirées puis les moins récemment lues tant que la taille
+        totale dépasse max_size_bytes.
+
+        Returns:
+            Liste des fichiers supprimés
+        """
+        now = time.time()
+        removed = []
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, file_name)
+            if self._is_expired(path, now):
+                os.remove(path)
+                removed.append(path)
+            else:
+                stat = os.stat(path)
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            os.remove(path)
+            removed.append(path)
+            total_size -= size
+
+        if removed:
+            logger.info(f"   🗑️  Cache Starburst: {len(removed)} fichier(s) évincé(s)")
+        return removed
+
+    def get_or_fetch(
+        self,
+        name: str,
+        sql: str,
+        fetch: Callable[[], pl.DataFrame],
+        params: Optional[dict[str, Any]] = None,
+        extraction_date: Optional[str] = None,
+    ) -> pl.DataFrame:
+        """
+        Retourne le résultat en cache, ou exécute fetch() et met le résultat en cache.
+
+        Args:
+            name: Nom de la source (ex: "soldes"), utilisé dans le nom du fichier
+            sql: Requête SQL rendue (sortie de retrieve_sql_query)
+            fetch: Exécution de la requête sur Starburst
+            params: Paramètres de la requête
+            extraction_date: Date de partition extraite
+        """
+        key = self.make_key(sql, params, extraction_date)
+        df = self.get(name, key)
+        if df is not None:
+            logger.info(f"   ♻️  Cache Starburst HIT: {name} ({df.height:,} lignes)")
+            return df
+
+        logger.info(f"   🌐 Cache Starburst MISS: {name}")
+        df = fetch()
+        self.put(name, key, df)
+        return df
@@ -0,0 +1,114 @@
+"""
+Lecture des résultats Starburst en DataFrames Polars.
+Simple enveloppe de pl.read_database : seuls les drivers exposant Arrow (ADBC,
+curseurs fetch_arrow_table / fetch_record_batch) sont lus en Arrow. Un curseur DBAPI
+classique (client trino) est lu par fetchmany : les lignes arrivent en tuples Python,
+batch_size lignes à la fois, et chaque lot est converti en DataFrame sans passer par
+pandas. Les types sont déclarés à la construction : les colonnes Decimal arrivent en
+Float64 et n'ont plus à être recastées ensuite.
+Pour les très gros extraits (transactions, soldes), iter_frames produit des morceaux
+de taille bornée au lieu d'un seul DataFrame.
+"""
+
+from typing import Any, Iterator, Optional, Sequence
+
+import polars as pl
+
+DEFAULT_BATCH_SIZE = 500_000
+
+# Types déclarés par source (colonnes Decimal côté Starburst)
+SOURCE_SCHEMA_OVERRIDES: dict[str, dict[str, pl.DataType]] = {
+    "donnees_transac": {
+        "netamount": pl.Float64,
+        "nops_category": pl.Float64,
+        "min_amount": pl.Float64,
+        "max_amount": pl.Float64,
+        "nops_total": pl.Float64,
+    },
+    "soldes": {
+        "pref_m_ctrvl_sld_arr": pl.Float64,
+    },
+}
+
+
+def fetch_frame(
+    connection: Any,
+    query: str,
+    source: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    schema_overrides: Optional[dict[str, pl.DataType]] = None,
+    parameters: Optional[Sequence[Any]] = None,
+) -> pl.DataFrame:
+    """
+    Exécute une requête et retourne le résultat en DataFrame Polars.
+
+    Args:
+        connection: Connexion DBAPI / ADBC / SQLAlchemy vers Starburst
+        query: Requête SQL rendue
+        source: Nom de la source (ex: "donnees_transac") pour les types déclarés
+        batch_size: Nombre de lignes lues par lot côté driver
+        schema_overrides: Types supplémentaires (prioritaires sur ceux de la source)
+        parameters: Paramètres liés aux placeholders ? de la requête (ex: push_scope_filter)
+
+    Returns:
+        DataFrame avec les types déclarés
+    """
+    return pl.read_database(
+        query,
+        connection,
+        batch_size=batch_size,
+        schema_overrides=source_schema_overrides(source, schema_overrides),
+        infer_schema_length=None,
+        execute_options=execute_options(parameters),
+    )
+
+
+def iter_frames(
+    connection: Any,
+    query: str,
+    source: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    schema_overrides: Optional[dict[str, pl.DataType]] = None,
+    parameters: Optional[Sequence[Any]] = None,
+) -> Iterator[pl.DataFrame]:
+    """
+    Exécute une requête et produit le résultat par morceaux d'au plus batch_size lignes.
+
+    Tous les morceaux ont le même schéma (types déclarés de la source). À consommer
+    avec les variantes incrémentales des preprocessings (add_transac_features_chunked,
+    add_soldes_features_chunked) : seul le morceau courant est en mémoire.
+
+    Args:
+        connection: Connexion DBAPI / ADBC / SQLAlchemy vers Starburst
+        query: Requête SQL rendue
+        source: Nom de la source (ex: "donnees_transac") pour les types déclarés
+        batch_size: Nombre maximal de lignes par morceau
+        schema_overrides: Types supplémentaires (prioritaires sur ceux de la source)
+        parameters: Paramètres liés aux placeholders ? de la requête
+
+    Yields:
+        DataFrames d'au plus batch_size lignes
+    """
+    yield from pl.read_database(
+        query,
+        connection,
+        iter_batches=True,
+        batch_size=batch_size,
+        schema_overrides=source_schema_overrides(source, schema_overrides),
+        infer_schema_length=None,
+        execute_options=execute_options(parameters),
+    )
+
+
+def source_schema_overrides(
+    source: Optional[str],
+    schema_overrides: Optional[dict[str, pl.DataType]] = None,
+) -> Optional[dict[str, pl.DataType]]:
+    """Fusionne les types déclarés de la source et les types fournis par l'appelant."""
+    overrides = {**SOURCE_SCHEMA_OVERRIDES.get(source, {}), **(schema_overrides or {})}
+    return overrides or None
+
+
+def execute_options(parameters: Optional[Sequence[Any]]) -> Optional[dict[str, Any]]:
+    """Options d'exécution transmises au driver (paramètres liés de la requête)."""
+    return {"parameters": tuple(parameters)} if parameters else None
@@ -0,0 +1,335 @@
+"""
+Backend local de remplacement de Starburst et de COS pour les exécutions hors réseau.
+Les neuf extraits du batch sont générés une fois (pdo_synthetic) à l'échelle demandée,
+écrits en Parquet dans un répertoire local, puis servis par SyntheticStarburstConnector
+qui reconnaît la source d'une requête rendue à sa vue Starburst. LocalS3Client reproduit
+le sous-ensemble du client S3 (ibm_boto3 / boto3) utilisé pour COS, y compris l'upload
+multipart et les lectures par plage, sur un répertoire local servant de bucket.
+
+Usage:
+    PDO_SYNTHETIC_DATA_DIR=/tmp/pdo_synthetic PDO_SYNTHETIC_SCALE=1M python batch.py
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import Callable, Iterable, Optional
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.pdo_pipeline import SOURCE_KEYS
+from common.pdo_synthetic import (
+    generate_donnees_transac,
+    generate_reboot,
+    generate_rsc,
+    generate_safir_cc,
+    generate_safir_cd,
+    generate_safir_sc,
+    generate_safir_sd,
+    generate_soldes,
+    generate_unfiltered_df_main,
+)
+from common.source_loader import load_sources_concurrently
+
+logger = logging.getLogger(LOGGER_NAME)
+
+MANIFEST_FILE = "synthetic_manifest.json"
+
+GENERATORS: dict[str, Callable[..., pl.DataFrame]] = {
+    "unfiltered_df_main": generate_unfiltered_df_main,
+    "rsc": generate_rsc,
+    "soldes": generate_soldes,
+    "reboot": generate_reboot,
+    "donnees_transac": generate_donnees_transac,
+    "safir_cc": generate_safir_cc,
+    "safir_cd": generate_safir_cd,
+    "safir_sc": generate_safir_sc,
+    "safir_sd": generate_safir_sd,
+}
+
+# Graine de base de chaque source (SAFIR : même graine pour l'en-tête et les postes d'un bilan)
+SOURCE_SEEDS = {
+    "unfiltered_df_main": 0,
+    "rsc": 1,
+    "soldes": 2,
+    "reboot": 3,
+    "donnees_transac": 4,
+    "safir_cc": 8,
+    "safir_cd": 8,
+    "safir_sc": 10,
+    "safir_sd": 10,
+}
+
+# Vue Starburst propre à chaque requête (les vues FAM de mapping sont communes à plusieurs)
+QUERY_VIEWS = {
+    "v_fam100s_current": "unfiltered_df_main",
+    "v_lacorp_current": "rsc",
+    "v_btiasld2_detail": "soldes",
+    "v_hisnot": "reboot",
+    "v_hsta1100_detail": "donnees_transac",
+    "v_dlfapcc1_current": "safir_cc",
+    "v_dlfapcd1_current": "safir_cd",
+    "v_dlfapsc2_current": "safir_sc",
+    "v_dlfapsd2_current": "safir_sd",
+}
+
+
+def materialize_sources(
+    directory: str,
+    n_companies: int,
+    seed: int = 0,
+    sources: Iterable[str] = SOURCE_KEYS,
+) -> dict[str, str]:
+    """
+    Génère les extraits en Parquet (un fichier par source) s'ils n'existent pas déjà
+    pour cette échelle et cette graine.
+
+    Returns:
+        {source: chemin du fichier Parquet}
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    if manifest.get("n_companies") != n_companies or manifest.get("seed") != seed:
+        manifest = {"n_companies": n_companies, "seed": seed, "sources": {}}
+
+    paths = {}
+    for source in sources:
+        path = os.path.join(directory, f"{source}.parquet")
+        if source not in manifest["sources"] or not os.path.exists(path):
+            df = GENERATORS[source](n_companies, seed=seed * 100 + SOURCE_SEEDS[source])
+            tmp_path = f"{path}.tmp"
+            df.write_parquet(tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+            manifest["sources"][source] = {"rows": df.height, "generated_at": datetime.now().isoformat(timespec="seconds")}
+            logger.info(f"      🧪 {source}: {df.height:,} lignes synthétiques générées")
+        paths[source] = path
+
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return paths
+
+
+class SyntheticStarburstConnector:
+    """
+    Stand-in de StarburstConnector : les requêtes sont servies depuis les extraits Parquet locaux.
+
+    Usage:
+        with SyntheticStarburstConnector("/tmp/pdo_synthetic", n_companies=1_000_000) as connector:
+            df = connector.get_engine(rendered_sql)     # source reconnue à sa vue Starburst
+            initial_data = connector.load_data()        # les neuf sources, comme load_data()
+    """
+
+    def __init__(self, directory: str, n_companies: int, seed: int = 0):
+        self.directory = directory
+        self.n_companies = n_companies
+        self.seed = seed
+        self.paths = materialize_sources(directory, n_companies, seed)
+
+    def __enter__(self) -> "SyntheticStarburstConnector":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    @staticmethod
+    def source_of(query: str) -> str:
+        """Source d'une requête : nom de source ou SQL rendu contenant la vue de la source."""
+        if query in GENERATORS:
+            return query
+        for view, source in QUERY_VIEWS.items():
+            if view in query:
+                return source
+        raise ValueError("Requête sans source synthétique connue (aucune vue Starburst reconnue)")
+
+    def lazy_query(self, query: str) -> pl.LazyFrame:
+        """Scan Parquet de la source (projections et filtres poussés à la lecture)."""
+        return pl.scan_parquet(self.paths[self.source_of(query)])
+
+    def get_engine(self, query: str) -> pl.DataFrame:
+        """Résultat de la requête en DataFrame."""
+        return pl.read_parquet(self.paths[self.source_of(query)])
+
+    def load_data(self, max_concurrency: int = 4) -> dict[str, pl.DataFrame]:
+        """Les neuf sources du batch, chargées en parallèle comme par BaseTransformation.load_data()."""
+        data, _ = load_sources_concurrently(
+            {source: partial(self.get_engine, source) for source in SOURCE_KEYS},
+            max_concurrency=max_concurrency,
+        )
+        return data
+
+
+def _etag(digest: bytes, n_parts: Optional[int] = None) -> str:
+    """ETag S3 : MD5 de l'objet, ou MD5 des MD5 des parties suivi de -N (upload multipart)."""
+    if n_parts is None:
+        return f'"{digest.hex()}"'
+    return f'"{digest.hex()}-{n_parts}"'
+
+
+class LocalS3Client:
+    """
+    Sous-ensemble du client S3 (ibm_boto3.client("s3")) sur un répertoire local.
+
+    Chaque bucket est un sous-répertoire de root ; les métadonnées (ETag, taille)
+    sont conservées dans un fichier .meta.json à côté de l'objet. Les ETag suivent la
+    convention S3 (MD5, ou "<md5 des parties>-N" pour un upload multipart).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, bucket: str, key: str) -> str:
+        bucket_dir = os.path.join(os.path.normpath(self.root), bucket)
+        path = os.path.normpath(os.path.join(bucket_dir, key))
+        if not path.startswith(bucket_dir + os.sep):
+            raise ValueError(f"Clé hors du bucket: {key}")
+        return path
+
+    def _uploads_dir(self, bucket: str, upload_id: str) -> str:
+        return os.path.join(self.root, ".multipart", bucket, upload_id)
+
+    def _commit(self, bucket: str, key: str, tmp_path: str, etag: str) -> dict:
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        meta = {"ETag": etag, "ContentLength": os.path.getsize(path)}
+        with open(f"{path}.meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return meta
+
+    def create_bucket(self, Bucket: str) -> dict:
+        os.makedirs(os.path.join(self.root, Bucket), exist_ok=True)
+        return {}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> dict:
+        tmp_path = f"{self._path(Bucket, Key)}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(Body)
+        return {"ETag": self._commit(Bucket, Key, tmp_path, _etag(hashlib.md5(Body).digest()))["ETag"]}
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        meta_path = f"{self._path(Bucket, Key)}.meta.json"
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"s3://{Bucket}/{Key}")
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None) -> dict:
+        """Lecture de l'objet, ou de la plage "bytes=début-fin" (bornes incluses)."""
+        meta = self.head_object(Bucket, Key)
+        with open(self._path(Bucket, Key), "rb") as f:
+            if Range is None:
+                body = f.read()
+            else:
+                start, end = Range.removeprefix("bytes=").split("-")
+                f.seek(int(start))
+                body = f.read(int(end) - int(start) + 1)
+        return {"Body": io.BytesIO(body), "ContentLength": len(body), "ETag": meta["ETag"]}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        path = self._path(Bucket, Key)
+        for file_path in [path, f"{path}.meta.json"]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        return {}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "") -> dict:
+        bucket_dir = os.path.join(self.root, Bucket)
+        contents = []
+        for directory, _, files in os.walk(bucket_dir):
+            for name in files:
+                if not name.endswith(".meta.json"):
+                    continue
+                key = os.path.relpath(os.path.join(directory, name.removesuffix(".meta.json")), bucket_dir)
+                key = key.replace(os.sep, "/")
+                if key.startswith(Prefix):
+                    meta = self.head_object(Bucket, key)
+                    contents.append({"Key": key, "Size": meta["ContentLength"], "ETag": meta["ETag"]})
+        contents.sort(key=lambda item: item["Key"])
+        return {"Contents": contents, "KeyCount": len(contents)}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str) -> None:
+        with open(Filename, "rb") as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read())
+
+    def download_file(self, Bucket: str, Key: str, Filename: str) -> None:
+        self.head_object(Bucket, Key)
+        shutil.copyfile(self._path(Bucket, Key), Filename)
+
+    def create_multipart_upload(self, Bucket: str, Key: str) -> dict:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._uploads_dir(Bucket, upload_id))
+        return {"UploadId": upload_id, "Bucket": Bucket, "Key": Key}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        part_path = os.path.join(self._uploads_dir(Bucket, UploadId), f"{PartNumber:05d}")
+        with open(f"{part_path}.tmp", "wb") as f:
+            f.write(Body)
+        os.replace(f"{part_path}.tmp", part_path)
+        return {"ETag": _etag(hashlib.md5(Body).digest())}
+
+    def list_parts(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        upload_dir = self._uploads_dir(Bucket, UploadId)
+        parts = []
+        for name in sorted(name for name in os.listdir(upload_dir) if name.isdigit()):
+            with open(os.path.join(upload_dir, name), "rb") as f:
+                body = f.read()
+            parts.append({"PartNumber": int(name), "ETag": _etag(hashlib.md5(body).digest()), "Size": len(body)})
+        return {"Parts": parts}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        upload_dir = self._uploads_dir(Bucket, UploadId)
+        parts = sorted(MultipartUpload["Parts"], key=lambda part: part["PartNumber"])
+        tmp_path = os.path.join(upload_dir, "complete.tmp")
+        digests = b""
+        with open(tmp_path, "wb") as out:
+            for part in parts:
+                with open(os.path.join(upload_dir, f"{part['PartNumber']:05d}"), "rb") as f:
+                    body = f.read()
+                if _etag(hashlib.md5(body).digest()) != part["ETag"]:
+                    raise ValueError(f"ETag de la partie {part['PartNumber']} différent de celui transmis")
+                digests += hashlib.md5(body).digest()
+                out.write(body)
+        meta = self._commit(Bucket, Key, tmp_path, _etag(hashlib.md5(digests).digest(), len(parts)))
+        shutil.rmtree(upload_dir)
+        return {"ETag": meta["ETag"], "Bucket": Bucket, "Key": Key}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        shutil.rmtree(self._uploads_dir(Bucket, UploadId), ignore_errors=True)
+        return {}
+
+
+class LocalCosManager:
+    """
+    Stand-in de CosManager (common.con_cos) sur LocalS3Client : mêmes méthodes et même
+    client S3 (client), pour que l'export et les téléchargements du batch s'exécutent sans COS.
+    """
+
+    def __init__(self, root: str):
+        self.client = LocalS3Client(root)
+
+    def upload_file(self, local_path: str, bucket: str, key: str) -> None:
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"Local file not found: {local_path}")
+        self.client.upload_file(local_path, bucket, key)
+
+    def download_file(self, bucket: str, key: str, local_path: str) -> None:
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        self.client.download_file(bucket, key, local_path)
+
+    def list_files(self, bucket: str, prefix: str = "") -> list[dict]:
+        return self.client.list_objects_v2(Bucket=bucket, Prefix=prefix).get("Contents", [])
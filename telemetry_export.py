@@ -0,0 +1,218 @@
+"""
+Export structuré des métriques du batch.
+Transforme BatchMetrics (durées, CPU, pic RSS, lignes et octets par étape) en un
+enregistrement de run JSON-lines, une table Parquet (une ligne par étape et par run)
+et, en option, un fichier textfile Prometheus ou des spans OpenTelemetry.
+
+Mémoire, en octets : le pic RSS du processus (ru_maxrss, monotone sur tout le run)
+n'est publié qu'une fois par run (process_peak_rss_bytes) ; par étape, seul le pic
+échantillonné pendant l'étape (step_peak_rss_bytes, profilage mémoire activé) est
+exporté, NULL sinon.
+Les fichiers sont ajoutés run après run : les régressions se suivent de mois en mois
+par requête sur l'historique au lieu de comparer des logs.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Optional
+
+import polars as pl
+
+from common.constants import LOGGER_NAME
+from common.logging_utils import BatchMetrics, StepMetrics, batch_metrics, get_peak_rss_mb
+
+logger = logging.getLogger(LOGGER_NAME)
+
+RUNS_FILE = "pdo_runs.jsonl"
+STEPS_FILE = "pdo_steps.parquet"
+PROMETHEUS_PREFIX = "pdo_batch"
+
+
+def _rows_per_second(rows: int, duration: float) -> float:
+    return rows / duration if duration > 0 else 0.0
+
+
+def _mb_to_bytes(value_mb: float) -> Optional[int]:
+    """MB → octets, None pour une mesure absente (0, étape non profilée)."""
+    return int(value_mb * 1024**2) if value_mb > 0 else None
+
+
+def _escape_label(value: str) -> str:
+    """Échappe une valeur de label Prometheus (antislash, guillemet, retour à la ligne)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def step_record(step: StepMetrics, step_index: int) -> dict[str, Any]:
+    """Enregistrement d'une étape (valeurs brutes et débits dérivés)."""
+    return {
+        "step_index": step_index,
+        "step_name": step.step_name,
+        "status": step.status,
+        "error_message": step.error_message,
+        "start_time": step.start_time,
+        "duration_seconds": step.duration_seconds,
+        "cpu_seconds": step.cpu_seconds,
+        "step_peak_rss_bytes": _mb_to_bytes(step.step_peak_rss_mb),
+        "rss_start_bytes": _mb_to_bytes(step.rss_start_mb),
+        "input_rows": step.input_rows,
+        "input_cols": step.input_cols,
+        "input_bytes": step.input_bytes,
+        "output_rows": step.output_rows,
+        "output_cols": step.output_cols,
+        "output_bytes": step.output_bytes,
+        "input_rows_per_s": _rows_per_second(step.input_rows, step.duration_seconds),
+        "output_rows_per_s": _rows_per_second(step.output_rows, step.duration_seconds),
+        "source_latencies": step.source_latencies,
+    }
+
+
+def build_run_record(
+    version: str,
+    metrics: BatchMetrics = batch_metrics,
+    extra: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """
+    Construit l'enregistrement du run à partir des métriques globales.
+
+    Args:
+        version: Version du batch
+        metrics: Métriques du batch (défaut: collecteur global)
+        extra: Champs additionnels (ex: mode d'exécution)
+
+    Returns:
+        Dictionnaire sérialisable en JSON
+    """
+    end_time = metrics.batch_end_time or datetime.now()
+    return {
+        "run_id": metrics.batch_start_time.strftime("%Y%m%dT%H%M%S"),
+        "version": version,
+        "status": metrics.status,
+        "error_message": metrics.error_message,
+        "batch_start_time": metrics.batch_start_time.isoformat(),
+        "batch_end_time": end_time.isoformat(),
+        "total_duration_seconds": metrics.total_duration_seconds,
+        "cpu_seconds": sum(step.cpu_seconds for step in metrics.steps),
+        "process_peak_rss_bytes": _mb_to_bytes(get_peak_rss_mb()),
+        "final_output_rows": metrics.final_output_rows,
+        "final_output_cols": metrics.final_output_cols,
+        **(extra or {}),
+        "steps": [step_record(step, i) for i, step in enumerate(metrics.steps)],
+    }
+
+
+def append_run_jsonl(record: dict[str, Any], telemetry_dir: str) -> str:
+    """Ajoute l'enregistrement du run (une ligne JSON) à l'historique."""
+    os.makedirs(telemetry_dir, exist_ok=True)
+    path = os.path.join(telemetry_dir, RUNS_FILE)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+    return path
+
+
+def append_steps_parquet(record: dict[str, Any], telemetry_dir: str) -> str:
+    """Ajoute une ligne par étape à la table Parquet de l'historique."""
+    os.makedirs(telemetry_dir, exist_ok=True)
+    path = os.path.join(telemetry_dir, STEPS_FILE)
+    steps = pl.DataFrame([
+        {**{k: v for k, v in step.items() if k != "source_latencies"}, "run_id": record["run_id"], "version": record["version"]}
+        for step in record["steps"]
+    ])
+    if os.path.exists(path):
+        steps = pl.concat([pl.read_parquet(path), steps], how="diagonal_relaxed")
+    tmp_path = f"{path}.tmp"
+    steps.write_parquet(tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_prometheus_textfile(record: dict[str, Any], path: str) -> str:
+    """
+    Écrit les métriques du dernier run au format textfile Prometheus
+    (node_exporter --collector.textfile.directory).
+    """
+    lines = [
+        f"# TYPE {PROMETHEUS_PREFIX}_duration_seconds gauge",
+        f"{PROMETHEUS_PREFIX}_duration_seconds {record['total_duration_seconds']}",
+        f"# TYPE {PROMETHEUS_PREFIX}_process_peak_rss_bytes gauge",
+        f"{PROMETHEUS_PREFIX}_process_peak_rss_bytes {record['process_peak_rss_bytes']}",
+        f"# TYPE {PROMETHEUS_PREFIX}_output_rows gauge",
+        f"{PROMETHEUS_PREFIX}_output_rows {record['final_output_rows']}",
+        f"# TYPE {PROMETHEUS_PREFIX}_success gauge",
+        f"{PROMETHEUS_PREFIX}_success {int(record['status'] == 'SUCCESS')}",
+    ]
+    step_metrics = ["duration_seconds", "cpu_seconds", "step_peak_rss_bytes", "output_rows", "output_rows_per_s"]
+    for metric in step_metrics:
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_step_{metric} gauge")
+        for step in record["steps"]:
+            # Pas de série pour une mesure absente (étape non profilée)
+            if step[metric] is None:
+                continue
+            step_name = _escape_label(step["step_name"])
+            lines.append(f'{PROMETHEUS_PREFIX}_step_{metric}{{step="{step_name}"}} {step[metric]}')
+
+    # Écriture atomique : node_exporter ne doit jamais lire un fichier partiel
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def emit_otel_spans(record: dict[str, Any]) -> bool:
+    """
+    Émet un span OpenTelemetry par étape (sous un span racine du run).
+
+    Returns:
+        False si opentelemetry n'est pas installé
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning("   ⚠️  opentelemetry non installé: spans non émis")
+        return False
+
+    tracer = trace.get_tracer(PROMETHEUS_PREFIX)
+    with tracer.start_as_current_span("pdo_batch_run") as run_span:
+        run_span.set_attribute("pdo.run_id", record["run_id"])
+        run_span.set_attribute("pdo.status", record["status"])
+        for step in record["steps"]:
+            start_ns = int(step["start_time"] * 1e9)
+            end_ns = start_ns + int(step["duration_seconds"] * 1e9)
+            span = tracer.start_span(step["step_name"], start_time=start_ns)
+            for key in ("cpu_seconds", "step_peak_rss_bytes", "input_rows", "output_rows", "input_bytes", "output_bytes"):
+                if step[key] is not None:
+                    span.set_attribute(f"pdo.{key}", step[key])
+            span.end(end_time=end_ns)
+    return True
+
+
+def export_batch_metrics(
+    version: str,
+    telemetry_dir: Optional[str],
+    prometheus_path: Optional[str] = None,
+    otel: bool = False,
+    extra: Optional[dict[str, Any]] = None,
+) -> Optional[dict[str, Any]]:
+    """
+    Exporte les métriques du run courant vers les cibles configurées.
+
+    Une erreur d'export est loggée sans faire échouer le batch.
+    """
+    if not (telemetry_dir or prometheus_path or otel):
+        return None
+    try:
+        record = build_run_record(version, extra=extra)
+        if telemetry_dir:
+            append_run_jsonl(record, telemetry_dir)
+            append_steps_parquet(record, telemetry_dir)
+        if prometheus_path:
+            write_prometheus_textfile(record, prometheus_path)
+        if otel:
+            emit_otel_spans(record)
+        logger.info(f"   📤 Télémétrie du run {record['run_id']} exportée")
+        return record
+    except Exception as e:
+        logger.warning(f"   ⚠️  Export de la télémétrie impossible: {str(e)}")
+        return None
@@ -0,0 +1,107 @@
+"""
+Tests unitaires pour les modules pdo_synthetic.py et pdo_benchmark.py
+
+Ce module contient les tests des générateurs de données synthétiques et du banc
+de mesure des fonctions de preprocessing et de calcul PDO.
+
+Les tests couvrent:
+- Générateurs déterministes (graine) avec les clés et colonnes attendues
+- Mesure d'une fonction disponible (temps, mémoire, débit) et historique Parquet
+- Fonction dont le module est absent reportée SKIPPED
+- Détection d'une régression par rapport à une référence
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestSyntheticData(TestCase):
+    """Tests unitaires pour les générateurs de pdo_synthetic."""
+
+    def test_generators_deterministic(self) -> None:
+        """Vérifier que les générateurs sont reproductibles et partagent les clés de df_main."""
+        # ===== ARRANGE =====
+        from pdo_synthetic import generate_donnees_transac, generate_reboot, generate_unfiltered_df_main, parse_scale
+
+        # ===== ACT =====
+        df_main = generate_unfiltered_df_main(2_000, seed=0)
+        reboot = generate_reboot(2_000)
+        transac = generate_donnees_transac(2_000)
+
+        # ===== ASSERT =====
+        assert_frame_equal(df_main, generate_unfiltered_df_main(2_000, seed=0))
+        self.assertFalse(df_main.equals(generate_unfiltered_df_main(2_000, seed=1)))
+        self.assertEqual(df_main["i_uniq_kpi"].n_unique(), 2_000)
+        self.assertTrue(reboot["i_uniq_kpi"].is_in(df_main["i_uniq_kpi"].implode()).all())
+        self.assertTrue(reboot["q_score"].drop_nulls().str.contains(",").any())
+        self.assertGreater(transac.height, 2_000)
+        self.assertEqual(parse_scale("1M"), 1_000_000)
+        self.assertEqual(parse_scale("250_000"), 250_000)
+
+
+class TestBenchmark(TestCase):
+    """Tests unitaires pour run_benchmarks() et compare_to_baseline()."""
+
+    def test_run_benchmarks(self) -> None:
+        """Vérifier les mesures d'une fonction disponible et l'ajout à l'historique."""
+        # ===== ARRANGE =====
+        from pdo_benchmark import append_results, run_benchmarks
+
+        # ===== ACT =====
+        results = run_benchmarks([1_000], functions=["calcul_pdo_table", "format_variables_table"], repeats=2)
+
+        # ===== ASSERT =====
+        self.assertEqual(results["status"].to_list(), ["SUCCESS", "SUCCESS"])
+        self.assertEqual(results["output_rows"].to_list(), [1_000, 1_000])
+        self.assertTrue((results["wall_seconds_min"] <= results["wall_seconds_median"]).all())
+        self.assertTrue((results["companies_per_s"] > 0).all())
+        self.assertTrue((results["peak_rss_mb"] > 0).all())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            append_results(results, tmp_dir)
+            path = append_results(results, tmp_dir)
+            self.assertEqual(pl.read_parquet(path).height, 4)
+
+    def test_missing_module_skipped(self) -> None:
+        """Vérifier qu'une fonction dont le module est absent est reportée SKIPPED."""
+        from pdo_benchmark import BenchmarkCase, run_case
+
+        case = BenchmarkCase("absente", "common.module_inexistant", "f", lambda n, seed: ())
+
+        result = run_case(case, 1_000)
+
+        self.assertEqual(result.status, "SKIPPED")
+        self.assertEqual(result.repeats, 0)
+
+    def test_compare_to_baseline(self) -> None:
+        """Vérifier qu'un ralentissement au-delà de la tolérance est signalé, pas les autres."""
+        # ===== ARRANGE =====
+        from pdo_benchmark import compare_to_baseline
+
+        baseline = pl.DataFrame({
+            "function": ["calcul_pdo", "calcul_pdo", "df_encoding"],
+            "n_companies": [1_000, 1_000, 1_000],
+            "status": ["SUCCESS"] * 3,
+            "run_id": ["20261001T000000", "20261002T000000", "20261002T000000"],
+            "wall_seconds_median": [5.0, 1.0, 1.0],
+            "rss_growth_mb": [100.0, 100.0, 100.0],
+        })
+        results = baseline.filter(pl.col("run_id") == "20261002T000000").with_columns(
+            pl.Series("wall_seconds_median", [1.1, 1.5])
+        )
+
+        # ===== ACT =====
+        comparison = compare_to_baseline(results, baseline, tolerance=0.2)
+
+        # ===== ASSERT =====
+        self.assertEqual(comparison["function"].to_list(), ["calcul_pdo", "df_encoding"])
+        self.assertEqual(comparison["regression"].to_list(), [False, True])
+
+
+if __name__ == "__main__":
+    main()
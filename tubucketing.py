@@ -0,0 +1,159 @@
+"""
+Tests unitaires pour le module pdo_bucketing.py
+
+Ce module contient les tests du formatage des variables PDO par table de seuils
+(BucketTable, format_variables_table).
+
+Les tests couvrent:
+- Classes fermées à gauche : valeurs sur les seuils, juste en dessous, NULL
+- reboot_score2 NULL → NULL (pas de clause otherwise) ; égal au dernier seuil → "9" (écart assumé)
+- Classe fermée à droite (nbj : Q_JJ_DEPST_MM <= 12)
+- Modalités émises en pl.Enum, lues directement par le scorer
+- Validation de la table de seuils
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+from unittest import TestCase, main
+import polars as pl
+
+
+class TestBucketTable(TestCase):
+    """Tests unitaires pour la classe BucketTable."""
+
+    def _df_main(self, **columns) -> pl.DataFrame:
+        """Crée un df_main avec les colonnes sources de format_variables (NULL par défaut)."""
+        n_rows = len(next(iter(columns.values())))
+        base = {
+            "c_njur_prsne_enc": ["1-3"] * n_rows,
+            "c_sectrl_1_enc": ["2"] * n_rows,
+            "c_sgmttn_nae": ["ME"] * n_rows,
+        }
+        sources = ["Q_JJ_DEPST_MM", "solde_cav", "reboot_score2", "VB023", "VB005", "VB035", "VB055"]
+        data = {**base, **{col: [None] * n_rows for col in sources}, **columns}
+        return pl.DataFrame(data, schema_overrides={col: pl.Float64 for col in sources})
+
+    def test_left_closed_classes(self) -> None:
+        """
+        Vérifier le découpage [b_i, b_i+1[ : une valeur égale au seuil passe
+        dans la classe supérieure, NULL prend la modalité par défaut.
+        """
+        # ===== ARRANGE =====
+        from pdo_bucketing import format_variables_table
+
+        df_main = self._df_main(
+            solde_cav=[-10.0, -9.10499954, 15235.6445, 76378.7031, None],
+            VB035=[-9.0, -8.19350052, 2.02049994, 7.10350037, None],
+        )
+
+        # ===== ACT =====
+        result = format_variables_table(df_main)
+
+        # ===== ASSERT =====
+        self.assertEqual(result["solde_cav_char"].cast(pl.String).to_list(), ["1", "2", "3", "4", "4"])
+        self.assertEqual(result["res_total_passif_035"].cast(pl.String).to_list(), ["1", "2", "3", "4", "3"])
+        self.assertEqual(result["immob_total_passif_055"].cast(pl.String).to_list(), ["1"] * 5)
+        self.assertEqual(result["reboot_score_char2"].to_list(), [None] * 5)
+
+    def test_reboot_score_char2_classes(self) -> None:
+        """Vérifier les 9 classes de reboot_score2."""
+        from pdo_bucketing import format_variables_table
+
+        df_main = self._df_main(
+            reboot_score2=[0.001, 0.002, 0.004, 0.008, 0.012, 0.014, 0.0155, 0.03, 0.05]
+        )
+
+        result = format_variables_table(df_main)
+
+        self.assertEqual(
+            result["reboot_score_char2"].cast(pl.String).to_list(),
+            [str(i) for i in range(1, 10)],
+        )
+
+    def test_reboot_score_char2_null_and_last_break(self) -> None:
+        """
+        Vérifier qu'un score REBOOT absent reste NULL (coefficient par défaut, comme la
+        chaîne sans otherwise de format_variables) et qu'un score égal au dernier seuil
+        donne "9" (la chaîne historique < b8 / > b8 le laissait à NULL).
+        """
+        # ===== ARRANGE =====
+        from pdo_bucketing import format_variables_table
+        from pdo_scoring import PDO_MODALITIES, calcul_pdo_table
+
+        reboot = {"reboot_score_char2": PDO_MODALITIES["reboot_score_char2"]}
+        coeffs = {"intercept": -3.0}
+        coeffs.update({key: float(rank) for rank, key in enumerate(reboot["reboot_score_char2"].values())})
+        df_main = self._df_main(reboot_score2=[None, 0.0456250459, 0.0456250458, 0.0456250460])
+
+        # ===== ACT =====
+        result = format_variables_table(df_main)
+        scored = calcul_pdo_table(result, {"model": {"coeffs": coeffs, "modalities": reboot}})
+
+        # ===== ASSERT =====
+        self.assertEqual(result["reboot_score_char2"].cast(pl.String).to_list(), [None, "9", "8", "9"])
+        self.assertEqual(scored["reboot_score_char2_coeffs"].to_list(), [0.0, 8.0, 7.0, 8.0])
+
+    def test_nbj_right_closed(self) -> None:
+        """Vérifier que Q_JJ_DEPST_MM = 12 donne "<=12" et que négatif ou NULL donne "<=12"."""
+        from pdo_bucketing import format_variables_table
+
+        df_main = self._df_main(Q_JJ_DEPST_MM=[0.0, 12.0, 12.5, 30.0, -1.0, None])
+
+        result = format_variables_table(df_main)
+
+        self.assertEqual(
+            result["nbj"].cast(pl.String).to_list(),
+            ["<=12", "<=12", ">12", ">12", "<=12", "<=12"],
+        )
+
+    def test_enum_output_scored_like_strings(self) -> None:
+        """
+        Vérifier que les modalités sont des pl.Enum et que le score est identique
+        à celui obtenu à partir des mêmes modalités en String.
+        """
+        # ===== ARRANGE =====
+        from pdo_bucketing import PDO_THRESHOLDS, format_variables_table
+        from pdo_scoring import PDO_MODALITIES, CoefficientTable
+
+        coeffs = {"intercept": -3.0}
+        for i, key in enumerate(k for mapping in PDO_MODALITIES.values() for k in mapping.values()):
+            coeffs[key] = (i % 7 - 3) / 10
+        table = CoefficientTable.from_config({"model": {"coeffs": coeffs}})
+        df_main = self._df_main(
+            Q_JJ_DEPST_MM=[3.0, 20.0],
+            solde_cav=[100.0, 90000.0],
+            reboot_score2=[0.0001, 0.02],
+            VB023=[1.0, 5.0],
+            VB005=[10.0, None],
+            VB035=[0.0, 10.0],
+            VB055=[50.0, 0.0],
+        ).with_columns(pl.lit("(autre)").alias("top_ga"))
+        for name in ["remb_sepa_max", "pres_prlv_retourne", "pres_saisie", "net_int_turnover"]:
+            df_main = df_main.with_columns(pl.lit("1").alias(name))
+
+        # ===== ACT =====
+        formatted = format_variables_table(df_main)
+        as_strings = formatted.with_columns(pl.col([*PDO_THRESHOLDS, "seg_nae"]).cast(pl.String))
+
+        # ===== ASSERT =====
+        for name in PDO_THRESHOLDS:
+            self.assertIsInstance(formatted.schema[name], pl.Enum, name)
+        self.assertEqual(
+            table.score(formatted)["sum_total_coeffs"].to_list(),
+            table.score(as_strings)["sum_total_coeffs"].to_list(),
+        )
+
+    def test_invalid_thresholds(self) -> None:
+        """Vérifier qu'un nombre de seuils incohérent avec les modalités lève une ValueError."""
+        from pdo_bucketing import BucketTable
+
+        config = {"model": {"thresholds": {"caf_dmlt_005": {"source": "VB005", "breaks": [1.0, 2.0]}}}}
+
+        with self.assertRaises(ValueError):
+            BucketTable.from_config(config)
+
+
+if __name__ == "__main__":
+    main()
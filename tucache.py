@@ -0,0 +1,122 @@
+"""
+Tests unitaires pour le module starburst_cache.py
+
+Ce module contient les tests du cache Parquet local des extractions Starburst.
+
+Les tests couvrent:
+- Première lecture (MISS) puis relecture depuis le cache (HIT) sans appel Starburst
+- Clé différente selon les paramètres et la date d'extraction
+- Expiration par TTL
+- Éviction LRU au-delà de la taille maximale
+- Activation par configuration
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import os
+import tempfile
+import time
+from unittest import TestCase, main
+from unittest.mock import MagicMock
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestStarburstCache(TestCase):
+    """Tests unitaires pour la classe StarburstCache."""
+
+    def setUp(self) -> None:
+        """Crée un répertoire de cache temporaire et un résultat Starburst fictif."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp_dir.name
+        self.df = pl.DataFrame({"i_intrn": ["I001", "I002"], "solde": [1.5, -2.0]})
+        self.sql = "SELECT i_intrn, solde FROM soldes WHERE extract_date = '2026-09-30'"
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_get_or_fetch_hit_after_miss(self) -> None:
+        """
+        Vérifier que le second appel est servi par le cache sans appeler Starburst.
+        """
+        # ===== ARRANGE =====
+        from starburst_cache import StarburstCache
+
+        cache = StarburstCache(cache_dir=self.cache_dir)
+        fetch = MagicMock(return_value=self.df)
+
+        # ===== ACT =====
+        first = cache.get_or_fetch("soldes", self.sql, fetch, extraction_date="2026-09-30")
+        second = cache.get_or_fetch("soldes", self.sql, fetch, extraction_date="2026-09-30")
+
+        # ===== ASSERT =====
+        fetch.assert_called_once()
+        assert_frame_equal(first, self.df)
+        assert_frame_equal(second, self.df)
+
+    def test_make_key_depends_on_params_and_date(self) -> None:
+        """Vérifier que la clé change avec les paramètres et la date d'extraction."""
+        from starburst_cache import StarburstCache
+
+        base = StarburstCache.make_key(self.sql, {"start_date": "2026-03-01"}, "2026-09-30")
+
+        self.assertEqual(base, StarburstCache.make_key(self.sql, {"start_date": "2026-03-01"}, "2026-09-30"))
+        self.assertNotEqual(base, StarburstCache.make_key(self.sql, {"start_date": "2026-04-01"}, "2026-09-30"))
+        self.assertNotEqual(base, StarburstCache.make_key(self.sql, {"start_date": "2026-03-01"}, "2026-10-31"))
+
+    def test_get_expired_entry_returns_none(self) -> None:
+        """Vérifier qu'une entrée plus ancienne que le TTL est ignorée puis évincée."""
+        # ===== ARRANGE =====
+        from starburst_cache import StarburstCache
+
+        cache = StarburstCache(cache_dir=self.cache_dir, ttl_seconds=60)
+        key = cache.make_key(self.sql)
+        cache.put("soldes", key, self.df)
+        path = cache._path("soldes", key)
+        old = time.time() - 120
+        os.utime(path, times=(old, old))
+
+        # ===== ACT =====
+        result = cache.get("soldes", key)
+        removed = cache.evict()
+
+        # ===== ASSERT =====
+        self.assertIsNone(result)
+        self.assertEqual(removed, [path])
+
+    def test_evict_least_recently_used_above_max_size(self) -> None:
+        """
+        Vérifier que l'entrée la moins récemment lue est évincée quand la taille
+        totale dépasse max_size_bytes.
+        """
+        # ===== ARRANGE =====
+        from starburst_cache import StarburstCache
+
+        cache = StarburstCache(cache_dir=self.cache_dir)
+        cache.put("old", "k1", self.df)
+        cache.put("recent", "k2", self.df)
+        os.utime(cache._path("old", "k1"), times=(time.time() - 100, time.time()))
+        cache.max_size_bytes = os.path.getsize(cache._path("recent", "k2"))
+
+        # ===== ACT =====
+        removed = cache.evict()
+
+        # ===== ASSERT =====
+        self.assertEqual(removed, [cache._path("old", "k1")])
+        self.assertIsNotNone(cache.get("recent", "k2"))
+
+    def test_from_config_disabled_by_default(self) -> None:
+        """Vérifier que le cache n'est actif que si starburst_cache.enabled est vrai."""
+        from starburst_cache import StarburstCache
+
+        self.assertIsNone(StarburstCache.from_config({}))
+        cache = StarburstCache.from_config(
+            {"starburst_cache": {"enabled": True, "cache_dir": self.cache_dir, "ttl_seconds": 10}}
+        )
+        self.assertEqual(cache.ttl_seconds, 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Tests unitaires pour le module pdo_checkpoint.py
+
+Ce module contient les tests des points de reprise du batch (CheckpointStore,
+write_checkpoint) utilisés par batch.py --resume-from STEP.
+
+Les tests couvrent:
+- Relecture Parquet et Arrow IPC à l'identique (types Enum / Categorical inclus)
+- Choix du dernier point de reprise antérieur à l'étape de reprise
+- Manifeste : nouveau run réinitialisé, points de reprise postérieurs retirés à la réécriture
+- Écriture limitée aux étapes configurées
+- ValueError pour une étape sans point de reprise dans batch.py
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import os
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestCheckpointStore(TestCase):
+    """Tests unitaires pour la classe CheckpointStore."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.df_main = pl.DataFrame({
+            "i_uniq_kpi": ["E1", "E2", "E3"],
+            "nbj": pl.Series(["<=12", ">12", "<=12"], dtype=pl.Enum(["<=12", ">12"])),
+            "check": pl.Series(["flag_OK"] * 3, dtype=pl.Categorical()),
+            "solde_nb": pl.Series([1, 2, None], dtype=pl.Int32),
+            "PDO": [0.01, 0.2, 0.05],
+        })
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip_formats(self) -> None:
+        """Vérifier que df_main est relu à l'identique en Parquet et en Arrow IPC."""
+        from common.pdo_checkpoint import CheckpointStore
+
+        for file_format in ["parquet", "ipc"]:
+            # ===== ARRANGE =====
+            store = CheckpointStore(os.path.join(self.tmp_dir.name, file_format), steps=[11], file_format=file_format)
+            store.start_run("1.0.0")
+
+            # ===== ACT =====
+            store.write(11, "FORMATAGE VARIABLES", self.df_main)
+            entry = store.latest(before_step=12)
+
+            # ===== ASSERT =====
+            self.assertEqual(entry.step, 11)
+            assert_frame_equal(store.load(entry), self.df_main)
+
+    def test_latest_before_step(self) -> None:
+        """Vérifier que la reprise utilise le dernier point de reprise antérieur à l'étape demandée."""
+        from common.pdo_checkpoint import CheckpointStore
+
+        store = CheckpointStore(self.tmp_dir.name)
+        store.start_run("1.0.0")
+        for step in [9, 10, 11]:
+            store.write(step, f"STEP {step}", self.df_main.head(step - 8))
+
+        self.assertEqual(store.latest(before_step=12).step, 11)
+        self.assertEqual(store.latest(before_step=11).step, 10)
+        self.assertEqual(store.load(store.latest(before_step=10)).height, 1)
+        self.assertIsNone(store.latest(before_step=9))
+
+    def test_manifest_lifecycle(self) -> None:
+        """
+        Vérifier qu'une reprise conserve le manifeste, qu'un nouveau run le
+        réinitialise et qu'une réécriture retire les étapes postérieures.
+        """
+        # ===== ARRANGE =====
+        from common.pdo_checkpoint import CheckpointStore
+
+        store = CheckpointStore(self.tmp_dir.name)
+        store.start_run("1.0.0")
+        for step in [9, 10, 11]:
+            store.write(step, f"STEP {step}", self.df_main)
+        run_id = store.read_manifest()["run_id"]
+
+        # ===== ACT & ASSERT =====
+        resumed = CheckpointStore(self.tmp_dir.name)
+        resumed.start_run("1.0.0", resume=True)
+        resumed.write(10, "STEP 10", self.df_main)
+        manifest = resumed.read_manifest()
+        self.assertEqual(manifest["run_id"], run_id)
+        self.assertEqual([c["step"] for c in manifest["checkpoints"]], [9, 10])
+
+        CheckpointStore(self.tmp_dir.name).start_run("1.0.0")
+        self.assertNotEqual(CheckpointStore(self.tmp_dir.name).read_manifest()["run_id"], run_id)
+        self.assertIsNone(CheckpointStore(self.tmp_dir.name).latest(before_step=13))
+
+    def test_write_checkpoint_configured_steps(self) -> None:
+        """Vérifier que seules les étapes configurées sont écrites (jointures planifiées : étape 9)."""
+        from common.pdo_checkpoint import CheckpointStore, checkpointing, enable_checkpointing, write_checkpoint
+
+        store = CheckpointStore(self.tmp_dir.name, steps=[9, 12])
+        enable_checkpointing(store, "1.0.0")
+        try:
+            write_checkpoint(9, "FEATURES (JOINTURES PLANIFIÉES 4-9)", self.df_main, "df_main_features")
+            write_checkpoint(11, "FORMATAGE VARIABLES", self.df_main)
+        finally:
+            checkpointing.store = None
+
+        steps = [c["step"] for c in store.read_manifest()["checkpoints"]]
+        self.assertEqual(steps, [9])
+        self.assertEqual(store.latest(before_step=13).name, "df_main_features")
+
+    def test_unsupported_steps_rejected(self) -> None:
+        """Vérifier qu'une étape sans point de reprise dans batch.py (ex: 5, 13) lève une ValueError."""
+        from common.pdo_checkpoint import SUPPORTED_CHECKPOINT_STEPS, CheckpointStore
+
+        for steps in ([5], [9, 13]):
+            with self.subTest(steps=steps):
+                with self.assertRaises(ValueError):
+                    CheckpointStore(self.tmp_dir.name, steps=steps)
+        self.assertEqual(
+            CheckpointStore(self.tmp_dir.name, steps=SUPPORTED_CHECKPOINT_STEPS).steps, set(SUPPORTED_CHECKPOINT_STEPS)
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Tests unitaires pour le module pdo_contributions.py
+
+Ce module contient les tests de l'export des contributions au score PDO
+(ContributionRecorder, top_drivers, calcul_contributions).
+
+Les tests couvrent:
+- Contributions Float32 reprises des colonnes {variable}_coeffs, sans recalcul
+- Top 3 des facteurs de risque : contributions négatives seulement (PDO = 1 - σ), égalités, rangs vides
+- Identité avec un tri stable numpy sur le calcul PDO synthétique (eager et lazy)
+- Format long : une ligne par variable, rang de facteur de risque
+- Calcul PDO inchangé par le recorder, plan lazy matérialisé une seule fois avec les scores
+- Configuration désactivée, format inconnu et colonnes de contributions absentes
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+from unittest import TestCase, main
+import numpy as np
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestTopDrivers(TestCase):
+    """Tests unitaires pour top_drivers()."""
+
+    def test_negative_contributions_ties_and_empty_ranks(self) -> None:
+        """Vérifier le rang des contributions négatives (hausse de la PDO), l'ordre des égalités et les rangs vides."""
+        # ===== ARRANGE =====
+        from pdo_contributions import top_drivers
+
+        frame = pl.DataFrame({
+            "a_coeffs": [-0.1, -0.5, 0.2, 0.0],
+            "b_coeffs": [-0.4, -0.5, 0.1, 0.0],
+            "c_coeffs": [-0.3, -0.2, -0.3, 0.0],
+            "d_coeffs": [-0.2, -0.9, 0.5, 0.0],
+        })
+
+        # ===== ACT =====
+        result = top_drivers(frame, frame.columns, ["a", "b", "c", "d"])
+
+        # ===== ASSERT =====
+        self.assertEqual(result["top_driver_1"].to_list(), ["b", "d", "c", None])
+        # Égalité a / b : la première variable du modèle l'emporte
+        self.assertEqual(result["top_driver_2"].to_list(), ["c", "a", None, None])
+        self.assertEqual(result["top_driver_3"].to_list(), ["d", "b", None, None])
+        self.assertEqual(result["top_driver_1_coeffs"].to_list()[:3], [np.float32(-0.4), np.float32(-0.9), np.float32(-0.3)])
+        self.assertEqual(result["top_driver_3_coeffs"].null_count(), 2)
+        self.assertEqual(result["top_driver_1"].dtype, pl.Enum(["a", "b", "c", "d"]))
+
+    def test_matches_stable_argsort_on_synthetic_scores(self) -> None:
+        """Vérifier l'identité avec un tri stable numpy, en eager et en lazy."""
+        from pdo_contributions import calcul_contributions
+        from pdo_scoring import PDO_MODALITIES, calcul_pdo_table
+        from pdo_synthetic import generate_score_input, synthetic_model_config
+
+        config = synthetic_model_config()
+        scored = calcul_pdo_table(generate_score_input(20_000), config)
+        coeff_columns = [f"{variable}_coeffs" for variable in PDO_MODALITIES]
+        matrix = scored.select([pl.col(col).cast(pl.Float32) for col in coeff_columns]).to_numpy()
+        order = np.argsort(matrix, axis=1, kind="stable")[:, :3]
+        names = np.array(list(PDO_MODALITIES), dtype=object)
+        expected = np.where(np.take_along_axis(matrix, order, axis=1) < 0, names[order], None)
+
+        result = calcul_contributions(scored, config)
+        lazy_result = calcul_contributions(scored.lazy(), config).collect()
+
+        drivers = result.select(["top_driver_1", "top_driver_2", "top_driver_3"]).cast(pl.String)
+        self.assertEqual(drivers.rows(), [tuple(row) for row in expected])
+        assert_frame_equal(lazy_result, result)
+        assert_frame_equal(
+            result.select(coeff_columns),
+            scored.select([pl.col(col).cast(pl.Float32) for col in coeff_columns]),
+        )
+        self.assertEqual(result["sum_total_coeffs"].to_list(), scored["sum_total_coeffs"].to_list())
+
+
+class TestContributionRecorder(TestCase):
+    """Tests unitaires pour ContributionRecorder."""
+
+    def setUp(self) -> None:
+        from common.pdo_synthetic import generate_score_input, synthetic_model_config
+
+        self.config = {**synthetic_model_config(), "contributions": {"enabled": True}}
+        self.df_main = generate_score_input(1_000)
+
+    def test_scores_unchanged_and_frame_recorded(self) -> None:
+        """Vérifier que le calcul PDO est inchangé et que les contributions sont gardées au passage."""
+        # ===== ARRANGE =====
+        from common.pdo_contributions import ContributionRecorder
+        from common.pdo_scoring import CoefficientTable
+
+        scorer = CoefficientTable.from_config(self.config).score
+        recorder = ContributionRecorder.from_config(self.config, scorer)
+
+        # ===== ACT =====
+        result = recorder(self.df_main)
+
+        # ===== ASSERT =====
+        assert_frame_equal(result, scorer(self.df_main))
+        self.assertEqual(recorder.frame.height, self.df_main.height)
+        self.assertEqual(recorder.frame["i_uniq_kpi"].to_list(), self.df_main["i_uniq_kpi"].to_list())
+        self.assertEqual(recorder.frame["seg_nae_coeffs"].dtype, pl.Float32)
+
+    def test_lazy_plan_collected_with_scores(self) -> None:
+        """Vérifier que le plan des contributions est matérialisé avec celui des scores (une seule passe)."""
+        from common.pdo_contributions import ContributionRecorder
+        from common.pdo_pipeline import collect_lazy_plans
+        from common.pdo_scoring import CoefficientTable
+
+        calls = []
+
+        def scorer(df_main):
+            marked = df_main.with_columns(
+                pl.col("i_uniq_kpi").map_batches(lambda s: calls.append(1) or s, return_dtype=pl.String)
+            )
+            return CoefficientTable.from_config(self.config).score(marked)
+
+        recorder = ContributionRecorder.from_config(self.config, scorer)
+        eager = ContributionRecorder.from_config(self.config, scorer)
+        eager(self.df_main)
+        calls.clear()
+
+        df_final, contributions = collect_lazy_plans([recorder(self.df_main.lazy()), recorder.frame])
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(df_final.height, self.df_main.height)
+        assert_frame_equal(contributions, eager.frame)
+
+    def test_long_layout(self) -> None:
+        """Vérifier le format long : une ligne par (entreprise, variable) et le rang des facteurs de risque."""
+        from common.pdo_contributions import ContributionRecorder, calcul_contributions
+        from common.pdo_scoring import PDO_MODALITIES, calcul_pdo_table
+
+        scored = calcul_pdo_table(self.df_main, self.config)
+        wide = calcul_contributions(scored, self.config)
+        config = {**self.config, "contributions": {"enabled": True, "layout": "long", "top_k": 2}}
+
+        long = ContributionRecorder.from_config(config, lambda df: df).contributions(scored)
+
+        self.assertEqual(long.columns, ["i_uniq_kpi", "variable", "contribution", "driver_rank"])
+        self.assertEqual(long.height, scored.height * len(PDO_MODALITIES))
+        first = long.filter(pl.col("i_uniq_kpi") == scored["i_uniq_kpi"][0]).drop_nulls("driver_rank").sort("driver_rank")
+        self.assertEqual(first["variable"].cast(pl.String).to_list(), [wide["top_driver_1"][0], wide["top_driver_2"][0]])
+        self.assertEqual(first["contribution"].to_list(), [wide["top_driver_1_coeffs"][0], wide["top_driver_2_coeffs"][0]])
+
+    def test_configuration_errors(self) -> None:
+        """Vérifier la configuration désactivée, le format inconnu et les colonnes absentes."""
+        from common.pdo_contributions import ContributionRecorder
+
+        self.assertIsNone(ContributionRecorder.from_config({"contributions": {"enabled": False}}, lambda df: df))
+        with self.assertRaises(ValueError):
+            ContributionRecorder(lambda df: df, ["nbj"], layout="matrix")
+        with self.assertRaises(ValueError):
+            ContributionRecorder(lambda df: df, ["nbj"])(pl.DataFrame({"nbj": ["<=12"], "sum_total_coeffs": [0.0]}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Tests unitaires pour le module cos_transfer.py
+
+Ce module contient les tests des transferts COS parallèles (téléchargements par plages,
+uploads multipart), de leur reprise après interruption et du cache d'artefacts par
+ETag, sur le client S3 local de synthetic_backend.
+
+Les tests couvrent:
+- Aller-retour multipart : contenu identique, ETag multipart vérifié
+- Reprise d'un téléchargement interrompu (seules les parties manquantes)
+- Reprise d'un upload interrompu (même upload, parties manquantes)
+- Contenu corrompu rejeté
+- Cache d'artefacts : pas de retéléchargement à ETag inchangé
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import os
+import tempfile
+from unittest import TestCase, main
+import numpy as np
+
+PART_SIZE = 5 * 1024**2
+
+
+class TestCosTransfer(TestCase):
+    """Tests unitaires pour download_file, upload_file et ArtifactCache."""
+
+    def setUp(self) -> None:
+        from synthetic_backend import LocalS3Client
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.client = LocalS3Client(os.path.join(self.tmp_dir.name, "cos"))
+        self.client.create_bucket(Bucket="models")
+        # 12 MB aléatoires : 3 parties de 5 MB
+        self.payload = np.random.default_rng(0).bytes(12 * 1024**2)
+        self.local_path = os.path.join(self.tmp_dir.name, "model.pkl")
+        with open(self.local_path, "wb") as f:
+            f.write(self.payload)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_multipart_round_trip(self) -> None:
+        """Vérifier l'aller-retour upload / téléchargement parallèles et l'ETag multipart."""
+        # ===== ARRANGE =====
+        from cos_transfer import TransferConfig, compute_etag, download_file, upload_file
+
+        config = TransferConfig(part_size=PART_SIZE, max_workers=3)
+        target = os.path.join(self.tmp_dir.name, "download", "model.pkl")
+
+        # ===== ACT =====
+        etag = upload_file(self.client, self.local_path, "models", "pdo/model.pkl", config)
+        downloaded_etag = download_file(self.client, "models", "pdo/model.pkl", target, config)
+
+        # ===== ASSERT =====
+        self.assertEqual(etag, compute_etag(self.local_path, PART_SIZE))
+        self.assertTrue(etag.endswith('-3"'))
+        self.assertEqual(downloaded_etag, etag)
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(target))), ["model.pkl"])
+
+    def test_resume_interrupted_download(self) -> None:
+        """Vérifier qu'un téléchargement interrompu ne retélécharge que les parties manquantes."""
+        # ===== ARRANGE =====
+        from cos_transfer import TransferConfig, download_file
+        from synthetic_backend import LocalS3Client
+
+        self.client.upload_file(self.local_path, "models", "pdo/model.pkl")
+        ranges = []
+
+        class FlakyClient(LocalS3Client):
+            fail = True
+
+            def get_object(self, **kwargs) -> dict:
+                if self.fail and kwargs["Range"].startswith(f"bytes={PART_SIZE}-"):
+                    raise ConnectionError("connexion interrompue")
+                ranges.append(kwargs["Range"])
+                return super().get_object(**kwargs)
+
+        client = FlakyClient(os.path.join(self.tmp_dir.name, "cos"))
+        config = TransferConfig(part_size=PART_SIZE, max_workers=1)
+        target = os.path.join(self.tmp_dir.name, "model_copy.pkl")
+
+        # ===== ACT =====
+        with self.assertRaises(ConnectionError):
+            download_file(client, "models", "pdo/model.pkl", target, config)
+        self.assertTrue(os.path.exists(f"{target}.part.transfer.json"))
+        client.fail = False
+        ranges.clear()
+        download_file(client, "models", "pdo/model.pkl", target, config)
+
+        # ===== ASSERT =====
+        # Les parties 1 et 3 ont été reçues avant l'interruption
+        self.assertEqual(ranges, [f"bytes={PART_SIZE}-{2 * PART_SIZE - 1}"])
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertFalse(os.path.exists(f"{target}.part.transfer.json"))
+
+    def test_resume_interrupted_upload(self) -> None:
+        """Vérifier qu'un upload interrompu reprend le même upload multipart."""
+        # ===== ARRANGE =====
+        from cos_transfer import TransferConfig, compute_etag, upload_file
+        from synthetic_backend import LocalS3Client
+
+        sent = []
+
+        class FlakyClient(LocalS3Client):
+            fail = True
+
+            def upload_part(self, **kwargs) -> dict:
+                if self.fail and kwargs["PartNumber"] == 3:
+                    raise ConnectionError("connexion interrompue")
+                sent.append(kwargs["PartNumber"])
+                return super().upload_part(**kwargs)
+
+        client = FlakyClient(os.path.join(self.tmp_dir.name, "cos"))
+        config = TransferConfig(part_size=PART_SIZE, max_workers=1)
+
+        # ===== ACT =====
+        with self.assertRaises(ConnectionError):
+            upload_file(client, self.local_path, "models", "pdo/model.pkl", config)
+        client.fail = False
+        sent.clear()
+        etag = upload_file(client, self.local_path, "models", "pdo/model.pkl", config)
+
+        # ===== ASSERT =====
+        self.assertEqual(sent, [3])
+        self.assertEqual(etag, compute_etag(self.local_path, PART_SIZE))
+        body = client.get_object(Bucket="models", Key="pdo/model.pkl")["Body"].read()
+        self.assertEqual(body, self.payload)
+        self.assertFalse(os.path.exists(f"{self.local_path}.upload.transfer.json"))
+
+    def test_corrupted_download_rejected(self) -> None:
+        """Vérifier qu'un contenu différent de l'ETag est rejeté sans fichier partiel."""
+        import io
+        from cos_transfer import TransferConfig, download_file
+        from synthetic_backend import LocalS3Client
+
+        class CorruptingClient(LocalS3Client):
+            def get_object(self, **kwargs) -> dict:
+                response = super().get_object(**kwargs)
+                body = bytearray(response["Body"].read())
+                body[0] ^= 0xFF
+                return {**response, "Body": io.BytesIO(bytes(body))}
+
+        client = CorruptingClient(os.path.join(self.tmp_dir.name, "cos"))
+        client.put_object(Bucket="models", Key="iris/model.pkl", Body=b"coefficients")
+        target = os.path.join(self.tmp_dir.name, "iris.pkl")
+
+        with self.assertRaises(ValueError):
+            download_file(client, "models", "iris/model.pkl", target, TransferConfig())
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["cos", "model.pkl"])
+
+    def test_artifact_cache_skips_unchanged(self) -> None:
+        """Vérifier que le cache ne retélécharge un artefact que si son ETag change."""
+        from cos_transfer import CosTransfer
+        from synthetic_backend import LocalS3Client
+
+        downloads = []
+
+        class CountingClient(LocalS3Client):
+            def get_object(self, **kwargs) -> dict:
+                downloads.append(kwargs["Key"])
+                return super().get_object(**kwargs)
+
+        client = CountingClient(os.path.join(self.tmp_dir.name, "cos"))
+        client.put_object(Bucket="models", Key="fraud/model.pkl", Body=b"v1")
+        transfer = CosTransfer.from_config(
+            {"cos_transfer": {"part_size": PART_SIZE, "cache_dir": os.path.join(self.tmp_dir.name, "cache")}}, client
+        )
+
+        first = transfer.fetch_artifact("models", "fraud/model.pkl")
+        second = transfer.fetch_artifact("models", "fraud/model.pkl")
+        client.put_object(Bucket="models", Key="fraud/model.pkl", Body=b"v2")
+        third = transfer.fetch_artifact("models", "fraud/model.pkl")
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual(downloads, ["fraud/model.pkl", "fraud/model.pkl"])
+        with open(third, "rb") as f:
+            self.assertEqual(f.read(), b"v2")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Tests unitaires pour le module pdo_incremental.py
+
+Ce module contient les tests du recalcul incrémental de la PDO (IncrementalScorer,
+input_hashes). Les étapes 4 à 12 sont celles d'une BaseTransformation simplifiée
+(jointures RSC et soldes sur i_intrn, REBOOT et transac sur i_uniq_kpi, filtre,
+formatage, score).
+
+Les tests couvrent:
+- Premier run : toutes les entreprises passent les étapes 4 à 12, état écrit par commit()
+- Run suivant : seules les entreprises dont une tranche de source ou df_main a changé
+  (ou nouvelles) sont recalculées, sur les seules lignes des sources qui les concernent
+- Résultat fusionné identique à un recalcul complet (entreprises filtrées à l'étape 10 incluses)
+- Empreinte indépendante de l'ordre des lignes des sources
+- Changement de configuration : état invalidé, recalcul complet
+- État écrit seulement par commit() (après l'export), LazyFrame refusé
+- Activation par configuration
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+def run_steps_4_to_12(df_main: pl.DataFrame, sources: dict[str, pl.DataFrame]) -> pl.DataFrame:
+    """Étapes 4 à 12 réduites à leurs jointures, au filtre de périmètre et au score."""
+    rsc = sources["rsc"].group_by("i_intrn").agg(pl.col("k_dep_auth_10j").max().alias("nbj"))
+    soldes = sources["soldes"].group_by("i_intrn").agg(pl.col("solde").sum().alias("solde_cav"))
+    reboot = sources["reboot"].group_by("i_uniq_kpi").agg(pl.col("q_score").sum().alias("reboot_score"))
+    transac = sources["donnees_transac"].group_by("i_uniq_kpi").agg(pl.col("nops").sum())
+    sum_total_coeffs = (
+        -2.0
+        + 0.1 * pl.col("nbj").fill_null(0)
+        + 0.001 * pl.col("solde_cav").fill_null(0)
+        + pl.col("reboot_score").fill_null(0)
+        + 0.01 * pl.col("nops").fill_null(0)
+    )
+    return (
+        df_main
+        .join(rsc, on="i_intrn", how="left")
+        .join(soldes, on="i_intrn", how="left")
+        .join(reboot, on="i_uniq_kpi", how="left")
+        .join(transac, on="i_uniq_kpi", how="left")
+        .filter(pl.col("nbj").fill_null(0) < 8)
+        .with_columns(sum_total_coeffs.alias("sum_total_coeffs"))
+        .with_columns((1 - 1 / (1 + (-pl.col("sum_total_coeffs")).exp())).round(4).alias("PDO"))
+    )
+
+
+class TestIncrementalScorer(TestCase):
+    """Tests unitaires pour la classe IncrementalScorer."""
+
+    def setUp(self) -> None:
+        """Crée un répertoire d'état temporaire et les sources d'un premier run (E2 / E3 partagent INTRN_2)."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state_dir = self.tmp_dir.name
+        self.computed_keys: list[list[str]] = []
+        self.df_main = pl.DataFrame({
+            "i_uniq_kpi": ["E1", "E2", "E3", "E4"],
+            "i_intrn": ["INTRN_1", "INTRN_2", "INTRN_2", "INTRN_4"],
+            "seg_nae": ["ME", "ME", "autres", "ME"],
+        })
+        self.sources = {
+            "rsc": pl.DataFrame({"i_intrn": ["INTRN_1", "INTRN_2", "INTRN_4"], "k_dep_auth_10j": [1, 3, 9]}),
+            "soldes": pl.DataFrame({"i_intrn": ["INTRN_1", "INTRN_1", "INTRN_2"], "solde": [100.0, 50.0, -20.0]}),
+            "reboot": pl.DataFrame({"i_uniq_kpi": ["E1", "E2", "E3"], "q_score": [0.5, -1.0, 1.5]}),
+            "donnees_transac": pl.DataFrame({"i_uniq_kpi": ["E1", "E3", "E4"], "nops": [10.0, 20.0, 30.0]}),
+            "safir_cc": pl.DataFrame({"i_uniq_kpi": ["E1"], "c_duree_excce_conso": [12]}),
+            "safir_cd": pl.DataFrame({"i_uniq_kpi": ["E1"], "c_val": [1.0]}),
+            "safir_sc": pl.DataFrame({"i_uniq_kpi": ["E2"], "c_duree_excce_soc": [12]}),
+            "safir_sd": pl.DataFrame({"i_uniq_kpi": ["E2"], "c_val": [2.0]}),
+        }
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _incremental(self, fingerprint: str = "run_v1"):
+        from pdo_incremental import IncrementalScorer
+        return IncrementalScorer(self.state_dir, fingerprint)
+
+    def _run(self, incremental, df_main: pl.DataFrame, sources: dict[str, pl.DataFrame]) -> pl.DataFrame:
+        """Étapes 4 à 12 limitées aux entreprises modifiées, puis fusion."""
+        initial_data = dict(sources)
+        changed = incremental.split(df_main, initial_data)
+        self.computed_keys.append(sorted(changed["i_uniq_kpi"]))
+        return incremental.merge(run_steps_4_to_12(changed, initial_data))
+
+    def test_first_run_computes_everything(self) -> None:
+        """Vérifier qu'en l'absence d'état toutes les entreprises passent les étapes 4 à 12."""
+        # ===== ARRANGE =====
+        incremental = self._incremental()
+
+        # ===== ACT =====
+        result = self._run(incremental, self.df_main, self.sources)
+        incremental.commit()
+
+        # ===== ASSERT =====
+        self.assertEqual(self.computed_keys, [["E1", "E2", "E3", "E4"]])
+        assert_frame_equal(result, run_steps_4_to_12(self.df_main, self.sources))
+        hashes, rows = incremental.load_state()
+        self.assertEqual(hashes.height, 4)
+        # E4 écartée par le filtre de l'étape 10
+        self.assertEqual(rows["i_uniq_kpi"].to_list(), ["E1", "E2", "E3"])
+
+    def test_second_run_recomputes_only_changed_inputs(self) -> None:
+        """
+        Vérifier que seules les entreprises dont une tranche de source a changé (E2 / E3
+        par le solde de INTRN_2, E1 par sa ligne REBOOT) ou nouvelles (E5) sont recalculées,
+        sur les seules lignes des sources qui les concernent, et que le résultat fusionné
+        est identique à un recalcul complet.
+        """
+        # ===== ARRANGE =====
+        first_run = self._incremental()
+        self._run(first_run, self.df_main, self.sources)
+        first_run.commit()
+        self.computed_keys.clear()
+        next_month = {
+            **self.sources,
+            "soldes": self.sources["soldes"].with_columns(
+                pl.when(pl.col("i_intrn") == "INTRN_2").then(-5000.0).otherwise(pl.col("solde")).alias("solde")
+            ),
+            "reboot": pl.DataFrame({"i_uniq_kpi": ["E1", "E2", "E3", "E5"], "q_score": [0.7, -1.0, 1.5, 0.2]}),
+        }
+        df_main = pl.concat([
+            self.df_main.filter(pl.col("i_uniq_kpi") != "E1"),
+            pl.DataFrame({"i_uniq_kpi": ["E5", "E1"], "i_intrn": ["INTRN_5", "INTRN_1"], "seg_nae": ["ME", "ME"]}),
+        ])
+        incremental = self._incremental()
+
+        # ===== ACT =====
+        initial_data = dict(next_month)
+        changed = incremental.split(df_main, initial_data)
+        result = incremental.merge(run_steps_4_to_12(changed, initial_data))
+
+        # ===== ASSERT =====
+        self.assertEqual(sorted(changed["i_uniq_kpi"]), ["E1", "E2", "E3", "E5"])
+        self.assertEqual(sorted(initial_data["rsc"]["i_intrn"]), ["INTRN_1", "INTRN_2"])
+        self.assertEqual(sorted(initial_data["donnees_transac"]["i_uniq_kpi"]), ["E1", "E3"])
+        assert_frame_equal(result, run_steps_4_to_12(df_main, next_month))
+
+    def test_unchanged_inputs_skip_steps(self) -> None:
+        """Vérifier qu'un run sans changement (lignes des sources dans un autre ordre) ne recalcule rien."""
+        first_run = self._incremental()
+        expected = self._run(first_run, self.df_main, self.sources)
+        first_run.commit()
+        self.computed_keys.clear()
+        shuffled = {key: source.reverse() for key, source in self.sources.items()}
+
+        result = self._run(self._incremental(), self.df_main.reverse(), shuffled)
+
+        self.assertEqual(self.computed_keys, [[]])
+        assert_frame_equal(result, expected.reverse())
+
+    def test_config_change_invalidates_state(self) -> None:
+        """Vérifier qu'un changement d'empreinte (configuration, version) déclenche un recalcul complet."""
+        first_run = self._incremental("run_v1")
+        self._run(first_run, self.df_main, self.sources)
+        first_run.commit()
+        self.computed_keys.clear()
+
+        self._run(self._incremental("run_v2"), self.df_main, self.sources)
+
+        self.assertEqual(self.computed_keys, [["E1", "E2", "E3", "E4"]])
+
+    def test_state_written_on_commit_only(self) -> None:
+        """Vérifier qu'un run interrompu avant commit() laisse l'état précédent et qu'un LazyFrame est refusé."""
+        first_run = self._incremental()
+        self._run(first_run, self.df_main, self.sources)
+        self.assertIsNone(first_run.load_state())
+        first_run.commit()
+        previous_hashes, previous_rows = first_run.load_state()
+
+        interrupted = self._incremental()
+        self._run(interrupted, self.df_main.with_columns(pl.lit("autres").alias("seg_nae")), self.sources)
+
+        hashes, rows = interrupted.load_state()
+        assert_frame_equal(hashes, previous_hashes)
+        assert_frame_equal(rows, previous_rows)
+        with self.assertRaises(TypeError):
+            interrupted.split(self.df_main.lazy(), dict(self.sources))
+
+    def test_from_config(self) -> None:
+        """Vérifier que le mode incrémental est désactivé par défaut et que l'empreinte suit la configuration."""
+        from pdo_incremental import IncrementalScorer
+
+        config = {"model": {"coeffs": {}}, "incremental_scoring": {"enabled": True, "state_dir": self.state_dir}}
+
+        self.assertIsNone(IncrementalScorer.from_config({"model": {}}, "1.0.0"))
+        enabled = IncrementalScorer.from_config(config, "1.0.0")
+        self.assertEqual(enabled.state_dir, self.state_dir)
+        self.assertEqual(
+            enabled.fingerprint,
+            IncrementalScorer.from_config({**config, "incremental_scoring": {**config["incremental_scoring"]}}, "1.0.0").fingerprint,
+        )
+        self.assertNotEqual(enabled.fingerprint, IncrementalScorer.from_config(config, "1.0.1").fingerprint)
+        self.assertNotEqual(
+            enabled.fingerprint, IncrementalScorer.from_config({**config, "join_planner": True}, "1.0.0").fingerprint
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Tests unitaires pour le module pdo_join_planner.py
+
+Ce module contient les tests du planificateur de jointures des étapes 4 à 9
+(join_features). Une BaseTransformation simplifiée reproduit les jointures LEFT
+des preprocess_* (RSC et soldes sur i_intrn, reboot et transac sur i_uniq_kpi).
+
+Les tests couvrent:
+- Résultat identique à l'enchaînement séquentiel (valeurs, ordre des lignes et colonnes)
+- Colonne réécrite par plusieurs étapes (check) : valeur de la dernière étape
+- Clés NULL et entreprises absentes des sources
+- Fonctionnement en LazyFrame
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import random
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class FakeTransformation:
+    """Étapes 4 à 7 réduites à leur logique de jointure."""
+
+    def preprocess_risk(self, df_main, rsc):
+        agg = rsc.group_by("i_intrn").agg(pl.col("k_dep_auth_10j").max().alias("Q_JJ_DEPST_MM"))
+        return df_main.join(agg, on="i_intrn", how="left").with_columns(pl.lit("flag_risk_OK").alias("check"))
+
+    def preprocess_soldes(self, df_main, soldes):
+        agg = soldes.group_by("i_intrn").agg([
+            (pl.col("pref_m_ctrvl_sld_arr") / 100).sum().alias("solde_cav"),
+            pl.col("pref_i_uniq_cpt").count().alias("solde_nb"),
+        ])
+        return df_main.join(agg, on="i_intrn", how="left").with_columns(pl.lit("flag_soldes_OK").alias("check"))
+
+    def preprocess_reboot(self, df_main, reboot):
+        agg = reboot.group_by("i_uniq_kpi").agg(pl.col("q_score").sum().alias("reboot_score"))
+        return df_main.join(agg, on="i_uniq_kpi", how="left").with_columns(pl.lit("OK").alias("flag_reboot"))
+
+    def preprocess_donnees_transac(self, df_main, donnees_transac):
+        agg = donnees_transac.group_by("i_uniq_kpi").agg(pl.col("nops_total").sum().alias("nops"))
+        return df_main.join(agg, on="i_uniq_kpi", how="left").with_columns(pl.lit("OK").alias("flag_transac"))
+
+
+class TestJoinFeatures(TestCase):
+    """Tests unitaires pour la fonction join_features()."""
+
+    def setUp(self) -> None:
+        """Crée un df_main de 500 entreprises (clés NULL incluses) et des sources multi-lignes."""
+        from pdo_join_planner import INTRN_KEY, KPI_KEY, JoinStep
+
+        rng = random.Random(0)
+        n_rows = 500
+        self.df_main = pl.DataFrame({
+            "i_uniq_kpi": [f"KPI_{i}" for i in range(n_rows)],
+            "i_intrn": [None if i % 50 == 0 else f"INTRN_{i % 400}" for i in range(n_rows)],
+            "c_sgmttn_nae": [rng.choice(["ME", "GE"]) for _ in range(n_rows)],
+            "check": ["flag_df_main_OK"] * n_rows,
+        })
+        self.sources = {
+            "rsc": pl.DataFrame({
+                "i_intrn": [f"INTRN_{rng.randint(0, 450)}" for _ in range(800)],
+                "k_dep_auth_10j": [rng.randint(0, 10) for _ in range(800)],
+            }),
+            "soldes": pl.DataFrame({
+                "i_intrn": [f"INTRN_{rng.randint(0, 450)}" for _ in range(1000)],
+                "pref_i_uniq_cpt": [f"CPT_{i}" for i in range(1000)],
+                "pref_m_ctrvl_sld_arr": [rng.randint(-10**6, 10**6) for _ in range(1000)],
+            }),
+            "reboot": pl.DataFrame({
+                "i_uniq_kpi": [f"KPI_{rng.randint(0, 600)}" for _ in range(700)],
+                "q_score": [rng.uniform(-5, 0) for _ in range(700)],
+            }),
+            "donnees_transac": pl.DataFrame({
+                "i_uniq_kpi": [f"KPI_{rng.randint(0, 600)}" for _ in range(2000)],
+                "nops_total": [float(rng.randint(0, 30)) for _ in range(2000)],
+            }),
+        }
+        self.steps = [
+            JoinStep("RSC", "preprocess_risk", ["rsc"], INTRN_KEY),
+            JoinStep("SOLDES", "preprocess_soldes", ["soldes"], INTRN_KEY),
+            JoinStep("REBOOT", "preprocess_reboot", ["reboot"], KPI_KEY),
+            JoinStep("TRANSAC", "preprocess_donnees_transac", ["donnees_transac"], KPI_KEY),
+        ]
+        self.transformation = FakeTransformation()
+
+    def _sequential(self) -> pl.DataFrame:
+        df_main = self.df_main
+        for step in self.steps:
+            method = getattr(self.transformation, step.method)
+            df_main = method(df_main, *[self.sources[name] for name in step.sources])
+        return df_main
+
+    def test_join_features_matches_sequential(self) -> None:
+        """
+        Vérifier que la jointure unique donne exactement le df_main des
+        jointures successives (lignes, ordre des colonnes, check de la dernière étape).
+        """
+        # ===== ARRANGE =====
+        from pdo_join_planner import join_features
+
+        # ===== ACT =====
+        planned = join_features(self.transformation, self.df_main, self.sources, self.steps)
+
+        # ===== ASSERT =====
+        expected = self._sequential()
+        assert_frame_equal(planned, expected)
+        self.assertEqual(planned["check"].unique().to_list(), ["flag_soldes_OK"])
+        self.assertEqual(planned.height, self.df_main.height)
+
+    def test_join_features_null_keys(self) -> None:
+        """Vérifier que les entreprises à i_intrn NULL gardent leurs features i_uniq_kpi."""
+        from pdo_join_planner import join_features
+
+        planned = join_features(self.transformation, self.df_main, self.sources, self.steps)
+
+        null_intrn = planned.filter(pl.col("i_intrn").is_null())
+        self.assertTrue(null_intrn["solde_cav"].is_null().all())
+        self.assertTrue((null_intrn["flag_transac"] == "OK").all())
+        self.assertEqual(
+            null_intrn["nops"].to_list(),
+            self._sequential().filter(pl.col("i_intrn").is_null())["nops"].to_list(),
+        )
+
+    def test_join_features_lazy(self) -> None:
+        """Vérifier que le planificateur fonctionne sur des LazyFrames."""
+        from pdo_join_planner import join_features
+
+        lazy_sources = {key: df.lazy() for key, df in self.sources.items()}
+
+        planned = join_features(self.transformation, self.df_main.lazy(), lazy_sources, self.steps)
+
+        self.assertIsInstance(planned, pl.LazyFrame)
+        assert_frame_equal(planned.collect(), self._sequential())
+
+
+if __name__ == "__main__":
+    main()
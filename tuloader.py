@@ -0,0 +1,97 @@
+"""
+Tests unitaires pour le module source_loader.py
+
+Ce module contient les tests du chargement concurrent des sources Starburst
+(load_sources_concurrently).
+
+Les tests couvrent:
+- Résultats et latences retournés dans l'ordre des sources
+- Respect du plafond de concurrence
+- Timeout par requête
+- Propagation de l'erreur d'un chargement
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import threading
+import time
+from unittest import TestCase, main
+import polars as pl
+
+
+class TestLoadSourcesConcurrently(TestCase):
+    """Tests unitaires pour la fonction load_sources_concurrently()."""
+
+    def _slow_loader(self, rows: int, delay: float, counter: dict | None = None):
+        """Crée un chargement fictif qui attend `delay` secondes (latence réseau simulée)."""
+        def load() -> pl.DataFrame:
+            if counter is not None:
+                with counter["lock"]:
+                    counter["running"] += 1
+                    counter["max"] = max(counter["max"], counter["running"])
+            time.sleep(delay)
+            if counter is not None:
+                with counter["lock"]:
+                    counter["running"] -= 1
+            return pl.DataFrame({"i_uniq_kpi": [f"E{i}" for i in range(rows)]})
+        return load
+
+    def test_load_sources_concurrently_results_and_latencies(self) -> None:
+        """
+        Vérifier que chaque source est chargée, dans l'ordre des loaders, avec sa latence.
+        """
+        # ===== ARRANGE =====
+        from source_loader import load_sources_concurrently
+
+        loaders = {
+            "soldes": self._slow_loader(3, 0.2),
+            "reboot": self._slow_loader(5, 0.05),
+        }
+
+        # ===== ACT =====
+        data, latencies = load_sources_concurrently(loaders, max_concurrency=2)
+
+        # ===== ASSERT =====
+        self.assertEqual(list(data), ["soldes", "reboot"])
+        self.assertEqual(data["soldes"].height, 3)
+        self.assertEqual(data["reboot"].height, 5)
+        self.assertGreaterEqual(latencies["soldes"], 0.2)
+
+    def test_load_sources_concurrently_respects_concurrency_cap(self) -> None:
+        """Vérifier qu'au plus max_concurrency requêtes s'exécutent simultanément."""
+        # ===== ARRANGE =====
+        from source_loader import load_sources_concurrently
+
+        counter = {"lock": threading.Lock(), "running": 0, "max": 0}
+        loaders = {f"source_{i}": self._slow_loader(1, 0.1, counter) for i in range(6)}
+
+        # ===== ACT =====
+        load_sources_concurrently(loaders, max_concurrency=2)
+
+        # ===== ASSERT =====
+        self.assertEqual(counter["max"], 2)
+
+    def test_load_sources_concurrently_timeout(self) -> None:
+        """Vérifier qu'une requête au-delà du timeout lève une TimeoutError."""
+        from source_loader import load_sources_concurrently
+
+        loaders = {"transac": self._slow_loader(1, 2.0)}
+
+        with self.assertRaises(TimeoutError):
+            load_sources_concurrently(loaders, timeout_seconds=0.2)
+
+    def test_load_sources_concurrently_propagates_error(self) -> None:
+        """Vérifier que l'erreur d'une source est propagée à l'appelant."""
+        from source_loader import load_sources_concurrently
+
+        def failing() -> pl.DataFrame:
+            raise ConnectionError("Starburst indisponible")
+
+        with self.assertRaises(ConnectionError):
+            load_sources_concurrently({"rsc": failing, "soldes": self._slow_loader(1, 0.0)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Tests unitaires pour le profilage mémoire de logging_utils.py
+
+Ce module contient les tests du profilage mémoire par étape de StepTracker
+(enable_memory_profiling, RssSampler).
+
+Les tests couvrent:
+- Pic RSS échantillonné pendant l'étape (allocation Polars transitoire)
+- Attribution des allocations Python via tracemalloc
+- Profilage désactivé par défaut
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import tracemalloc
+from unittest import TestCase, main
+import polars as pl
+
+
+class TestMemoryProfiling(TestCase):
+    """Tests unitaires pour le profilage mémoire de StepTracker."""
+
+    def tearDown(self) -> None:
+        """Désactive le profilage (configuration globale du module)."""
+        from common.logging_utils import memory_profiling
+
+        memory_profiling.enabled = False
+        memory_profiling.tracemalloc_frames = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def test_step_peak_rss_captures_transient_allocation(self) -> None:
+        """
+        Vérifier que le pic RSS de l'étape inclut une copie intermédiaire
+        libérée avant la fin de l'étape (invisible dans les DataFrames loggés).
+        """
+        # ===== ARRANGE =====
+        from common.logging_utils import StepTracker, enable_memory_profiling
+
+        enable_memory_profiling(sample_interval_seconds=0.01)
+        df = pl.DataFrame({"x": pl.arange(0, 5_000_000, eager=True)})
+
+        # ===== ACT =====
+        with StepTracker(4, "FEATURES RSC (RISK)") as tracker:
+            transient = df.join(df, on="x").with_columns((pl.col("x") * 2).alias("y"))
+            del transient
+            tracker.log_output(df.head(10), "df_main_risk")
+
+        # ===== ASSERT =====
+        metrics = tracker.metrics
+        self.assertGreater(metrics.step_peak_rss_mb, metrics.rss_start_mb)
+        self.assertGreater(metrics.step_peak_rss_mb - metrics.rss_start_mb, 40)
+
+    def test_tracemalloc_top_allocations(self) -> None:
+        """Vérifier que les sites d'allocation Python de l'étape sont retenus."""
+        from common.logging_utils import StepTracker, enable_memory_profiling
+
+        enable_memory_profiling(tracemalloc_frames=1, top_allocations=3)
+
+        with StepTracker(5, "FEATURES SOLDES") as tracker:
+            kept = [str(i) * 10 for i in range(100_000)]
+
+        self.assertTrue(tracker.metrics.top_allocations)
+        self.assertLessEqual(len(tracker.metrics.top_allocations), 3)
+        site, size_mb = tracker.metrics.top_allocations[0]
+        self.assertIn("tumemory.py", site)
+        self.assertGreater(size_mb, 1)
+        del kept
+
+    def test_profiling_disabled_by_default(self) -> None:
+        """Vérifier qu'aucun échantillonnage n'est fait sans activation."""
+        from common.logging_utils import StepTracker
+
+        with StepTracker(6, "FEATURES REBOOT") as tracker:
+            pass
+
+        self.assertEqual(tracker.metrics.step_peak_rss_mb, 0.0)
+        self.assertEqual(tracker.metrics.top_allocations, [])
+
+
+if __name__ == "__main__":
+    main()
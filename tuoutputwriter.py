@@ -0,0 +1,176 @@
+"""
+Tests unitaires pour le module pdo_output_writer.py
+
+Ce module contient les tests de l'export des sorties du batch en Parquet partitionné
+(PartitionedParquetWriter) et de l'upload multipart vers COS pendant l'écriture
+(MultipartUploadStream), sur le client S3 local de synthetic_backend.
+
+Les tests couvrent:
+- Répertoires Hive (segment, date de calcul, NULL), relecture identique, manifeste
+- Plusieurs sorties d'un même plan lazy écrites en un seul passage, lignes comptées
+- Upload multipart : objets COS identiques aux fichiers locaux, ETag multipart
+- Échec d'upload : uploads abandonnés, aucun fichier partiel
+- Configuration (désactivé, bucket sans client)
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import json
+import os
+import tempfile
+from datetime import date
+from unittest import TestCase, main
+import numpy as np
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestPartitionedParquetWriter(TestCase):
+    """Tests unitaires pour la classe PartitionedParquetWriter."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        n_rows = 10_000
+        self.df_final = pl.DataFrame({
+            "ID_RP": [f"KPI_{i}" for i in range(n_rows)],
+            "c_sgmttn_nae": pl.Series(["ME", "GR", "A3", None]).gather(np.arange(n_rows) % 4),
+            "D_CALCUL_PDO": [date(2026, 10, 17)] * n_rows,
+            "PDO": np.linspace(0, 1, n_rows),
+        })
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_write_local_partitions(self) -> None:
+        """Vérifier les répertoires Hive, la relecture à l'identique et le manifeste."""
+        # ===== ARRANGE =====
+        from pdo_output_writer import HIVE_NULL, MANIFEST_FILE, PartitionedParquetWriter
+
+        writer = PartitionedParquetWriter(self.tmp_dir.name, max_rows_per_file=2_000, row_group_size=500)
+
+        # ===== ACT =====
+        files = writer.write(self.df_final, "df_main_final")
+
+        # ===== ASSERT =====
+        # 2 500 lignes par segment, au plus 2 000 par fichier
+        self.assertEqual(len(files), 8)
+        self.assertIn(f"df_main_final/c_sgmttn_nae={HIVE_NULL}/D_CALCUL_PDO=2026-10-17/part-00001.parquet",
+                      [f.path for f in files])
+        result = pl.scan_parquet(
+            os.path.join(self.tmp_dir.name, "df_main_final", "**", "*.parquet"), hive_partitioning=True
+        ).collect()
+        assert_frame_equal(result.sort("ID_RP"), self.df_final.sort("ID_RP"))
+        with open(os.path.join(self.tmp_dir.name, "df_main_final", MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["partition_by"], ["c_sgmttn_nae", "D_CALCUL_PDO"])
+        self.assertEqual(len(manifest["files"]), 8)
+
+    def test_write_all_streams_lazy_plan_once(self) -> None:
+        """
+        Vérifier que deux sorties issues du même plan lazy sont écrites depuis le plan
+        en un seul passage (sous-plan commun calculé une fois) et que les lignes sont comptées.
+        """
+        # ===== ARRANGE =====
+        from pdo_output_writer import MANIFEST_FILE, PartitionedParquetWriter, write_outputs
+
+        calls: list[int] = []
+
+        def score(pdo: pl.Series) -> pl.Series:
+            calls.append(len(pdo))
+            return pdo.round(4)
+
+        plan = self.df_final.lazy().with_columns(pl.col("PDO").map_batches(score, return_dtype=pl.Float64))
+        outputs = {
+            "df_main_final": plan,
+            "df_main_contributions": plan.filter(pl.col("PDO") > 0.5).select(["ID_RP", "c_sgmttn_nae", "PDO"]),
+        }
+        writer = PartitionedParquetWriter(self.tmp_dir.name, partition_by=["c_sgmttn_nae"])
+
+        # ===== ACT =====
+        files = write_outputs(writer, outputs)
+
+        # ===== ASSERT =====
+        self.assertEqual(sum(calls), self.df_final.height)
+        self.assertEqual(writer.rows, {"df_main_final": 10_000, "df_main_contributions": 5_000})
+        self.assertEqual(len(files["df_main_contributions"]), 4)
+        for name, expected in outputs.items():
+            result = pl.scan_parquet(
+                os.path.join(self.tmp_dir.name, name, "**", "*.parquet"), hive_partitioning=True
+            ).collect()
+            assert_frame_equal(result.sort("ID_RP"), expected.collect().sort("ID_RP"), check_column_order=False)
+            with open(os.path.join(self.tmp_dir.name, name, MANIFEST_FILE), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["rows"], writer.rows[name])
+
+    def test_multipart_upload_while_writing(self) -> None:
+        """Vérifier que les objets COS sont identiques aux fichiers locaux et envoyés en plusieurs parties."""
+        # ===== ARRANGE =====
+        from pdo_output_writer import MIN_PART_SIZE, PartitionedParquetWriter
+        from synthetic_backend import LocalS3Client
+
+        client = LocalS3Client(os.path.join(self.tmp_dir.name, "cos"))
+        client.create_bucket(Bucket="pdo")
+        # ~12 MB de flottants aléatoires (incompressibles) dans une seule partition
+        df_audit = pl.DataFrame({
+            "c_sgmttn_nae": ["ME"] * 1_500_000,
+            "PDO": np.random.default_rng(0).random(1_500_000),
+        })
+        writer = PartitionedParquetWriter(
+            os.path.join(self.tmp_dir.name, "local"), client=client, bucket="pdo", prefix="exports/2026-10-17",
+            partition_by=["c_sgmttn_nae"], part_size=MIN_PART_SIZE,
+        )
+
+        # ===== ACT =====
+        files = writer.write(df_audit, "df_main_audit_final")
+
+        # ===== ASSERT =====
+        self.assertEqual(len(files), 1)
+        self.assertRegex(files[0].etag, r'-[2-9]"$')
+        key = f"exports/2026-10-17/{files[0].path}"
+        body = client.get_object(Bucket="pdo", Key=key)["Body"].read()
+        with open(os.path.join(self.tmp_dir.name, "local", files[0].path), "rb") as f:
+            self.assertEqual(body, f.read())
+        self.assertEqual(len(body), files[0].bytes)
+        keys = [item["Key"] for item in client.list_objects_v2(Bucket="pdo", Prefix="exports/")["Contents"]]
+        self.assertEqual(keys, ["exports/2026-10-17/df_main_audit_final/_manifest.json", key])
+
+    def test_failed_upload_aborted(self) -> None:
+        """Vérifier qu'un échec d'upload abandonne les uploads multipart sans laisser de fichier partiel."""
+        from pdo_output_writer import MIN_PART_SIZE, PartitionedParquetWriter
+        from synthetic_backend import LocalS3Client
+
+        class FailingClient(LocalS3Client):
+            def upload_part(self, **kwargs) -> dict:
+                raise ConnectionError("COS indisponible")
+
+        client = FailingClient(os.path.join(self.tmp_dir.name, "cos"))
+        client.create_bucket(Bucket="pdo")
+        local_dir = os.path.join(self.tmp_dir.name, "local")
+        writer = PartitionedParquetWriter(local_dir, client=client, bucket="pdo", part_size=MIN_PART_SIZE)
+        df = pl.DataFrame({"PDO": np.random.default_rng(1).random(1_500_000)})
+
+        with self.assertRaises(Exception):
+            writer.write(df, "df_main_final")
+
+        self.assertEqual(client.list_objects_v2(Bucket="pdo")["KeyCount"], 0)
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir.name, "cos", ".multipart", "pdo")), [])
+        leftovers = [name for _, _, names in os.walk(local_dir) for name in names]
+        self.assertEqual(leftovers, [])
+
+    def test_from_config(self) -> None:
+        """Vérifier la construction depuis app_config et les erreurs de configuration."""
+        from pdo_output_writer import PartitionedParquetWriter
+
+        self.assertIsNone(PartitionedParquetWriter.from_config({}))
+        writer = PartitionedParquetWriter.from_config(
+            {"output_writer": {"enabled": True, "output_dir": self.tmp_dir.name, "partition_by": ["c_sgmttn_nae"]}}
+        )
+        self.assertEqual(writer.partition_by, ["c_sgmttn_nae"])
+        self.assertIsNone(writer.client)
+        with self.assertRaises(ValueError):
+            PartitionedParquetWriter(client=object())
+
+
+if __name__ == "__main__":
+    main()
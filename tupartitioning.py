@@ -0,0 +1,172 @@
+"""
+Tests unitaires pour le module pdo_partitioning.py
+
+Ce module contient les tests du découpage des sources en partitions (assign_shards,
+write_shards) de l'exécution partitionnée. Les sources sont les extraits synthétiques
+de pdo_synthetic (plusieurs entreprises par i_intrn, plusieurs lignes par entreprise) ;
+les étapes 2 à 13 sont celles d'une BaseTransformation simplifiée.
+
+Les tests couvrent:
+- Chaque i_uniq_kpi dans exactement une partition
+- Lignes rsc / soldes routées par i_intrn vers la ou les partitions de leur df_main
+- Partitions vides écrites avec le schéma de la source
+- Concaténation des sorties partitionnées identique à l'exécution en un seul processus
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class StubTransformation:
+    """Étapes 2 à 13 réduites à leurs jointures (RSC et soldes sur i_intrn, transac sur i_uniq_kpi)."""
+
+    def preprocess_df_main(self, unfiltered_df_main):
+        return {"df_main": unfiltered_df_main.select(["i_uniq_kpi", "i_intrn", "c_sgmttn_nae"])}
+
+    def preprocess_encoded_df_main(self, df_main):
+        return df_main
+
+    def preprocess_risk(self, df_main, rsc):
+        agg = rsc.group_by("i_intrn").agg(pl.col("k_dep_auth_10j").max().alias("nbj"))
+        return df_main.join(agg, on="i_intrn", how="left")
+
+    def preprocess_soldes(self, df_main, soldes):
+        agg = soldes.group_by("i_intrn").agg([
+            (pl.col("pref_m_ctrvl_sld_arr") / 100).sum().alias("solde_cav"),
+            pl.col("pref_i_uniq_cpt").count().cast(pl.Int64).alias("solde_nb"),
+        ])
+        return df_main.join(agg, on="i_intrn", how="left")
+
+    def preprocess_reboot(self, df_main, reboot):
+        return df_main
+
+    def preprocess_donnees_transac(self, df_main, donnees_transac):
+        agg = donnees_transac.group_by("i_uniq_kpi").agg(pl.col("nops_total").sum().alias("nops"))
+        return df_main.join(agg, on="i_uniq_kpi", how="left")
+
+    def preprocess_safir_conso(self, df_main, safir_cc, safir_cd):
+        return df_main
+
+    def preprocess_safir_soc(self, df_main, safir_sc, safir_sd):
+        return df_main
+
+    def preprocess_filters(self, df_main):
+        return df_main.filter(pl.col("c_sgmttn_nae").is_not_null())
+
+    def preprocess_format(self, df_main):
+        return df_main
+
+    def calcul_pdo(self, df_main):
+        return df_main.with_columns(
+            (0.1 + 0.01 * pl.col("nbj").fill_null(0) + 0.001 * pl.col("solde_nb").fill_null(0)).alias("PDO")
+        )
+
+    def postprocess_df_main(self, df_main):
+        return df_main
+
+
+class TestShards(TestCase):
+    """Tests unitaires pour assign_shards() et write_shards()."""
+
+    def setUp(self) -> None:
+        from common.pdo_synthetic import (
+            generate_donnees_transac, generate_reboot, generate_rsc, generate_safir_cc, generate_safir_cd,
+            generate_safir_sc, generate_safir_sd, generate_soldes, generate_unfiltered_df_main,
+        )
+
+        n_companies = 2_000
+        self.initial_data = {
+            "unfiltered_df_main": generate_unfiltered_df_main(n_companies),
+            "rsc": generate_rsc(n_companies),
+            "soldes": generate_soldes(n_companies),
+            "reboot": generate_reboot(n_companies),
+            "donnees_transac": generate_donnees_transac(n_companies),
+            "safir_cc": generate_safir_cc(n_companies),
+            "safir_cd": generate_safir_cd(n_companies),
+            "safir_sc": generate_safir_sc(n_companies),
+            "safir_sd": generate_safir_sd(n_companies),
+        }
+
+    def test_each_company_in_one_shard(self) -> None:
+        """Vérifier que chaque i_uniq_kpi est dans exactement une partition, avec toutes ses lignes."""
+        # ===== ARRANGE =====
+        from common.pdo_partitioning import SHARD_COL, assign_shards
+
+        df_main = self.initial_data["unfiltered_df_main"]
+
+        # ===== ACT =====
+        sharded = assign_shards(self.initial_data, 4)
+
+        # ===== ASSERT =====
+        shards = sharded["unfiltered_df_main"]
+        self.assertEqual(shards.height, df_main.height)
+        self.assertEqual(shards.group_by("i_uniq_kpi").agg(pl.col(SHARD_COL).n_unique())[SHARD_COL].max(), 1)
+        self.assertEqual(sorted(shards[SHARD_COL].unique().to_list()), [0, 1, 2, 3])
+        transac = sharded["donnees_transac"].join(
+            shards.select(["i_uniq_kpi", pl.col(SHARD_COL).alias("df_main_shard")]), on="i_uniq_kpi", how="inner"
+        )
+        self.assertTrue((transac[SHARD_COL] == transac["df_main_shard"]).all())
+
+    def test_intrn_sources_follow_df_main(self) -> None:
+        """Vérifier que les lignes rsc / soldes sont routées par i_intrn vers les partitions de leur df_main."""
+        from common.pdo_partitioning import SHARD_COL, assign_shards
+
+        sharded = assign_shards(self.initial_data, 4)
+
+        key_to_shards = sharded["unfiltered_df_main"].select(["i_intrn", SHARD_COL]).unique()
+        for key in ["rsc", "soldes"]:
+            with self.subTest(source=key):
+                source = self.initial_data[key]
+                # Une ligne par partition de df_main qui porte son i_intrn, aucune pour un i_intrn absent
+                expected = source.join(key_to_shards, on="i_intrn", how="inner")
+                assert_frame_equal(sharded[key], expected, check_row_order=False)
+                routed = sharded[key].join(key_to_shards, on=["i_intrn", SHARD_COL], how="anti")
+                self.assertEqual(routed.height, 0)
+                self.assertGreater(sharded[key].height, 0)
+
+    def test_empty_shards_keep_schema(self) -> None:
+        """Vérifier que les partitions sans entreprise sont écrites avec le schéma de la source."""
+        from common.pdo_partitioning import write_shards
+
+        initial_data = {key: df.head(3) for key, df in self.initial_data.items()}
+
+        with tempfile.TemporaryDirectory() as shard_dir:
+            shard_paths = write_shards(initial_data, 16, shard_dir)
+            parts = [{key: pl.read_parquet(path) for key, path in paths.items()} for paths in shard_paths]
+
+        self.assertEqual(len(parts), 16)
+        empty = [part for part in parts if part["unfiltered_df_main"].is_empty()]
+        self.assertGreaterEqual(len(empty), 13)
+        for key, source in initial_data.items():
+            with self.subTest(source=key):
+                self.assertEqual(empty[0][key].schema, source.schema)
+        self.assertEqual(sum(part["unfiltered_df_main"].height for part in parts), 3)
+
+    def test_partitioned_output_matches_single_process(self) -> None:
+        """Vérifier que la concaténation des sorties par partition est identique à l'exécution en un seul processus."""
+        from common.pdo_partitioning import write_shards
+        from common.pdo_pipeline import run_pdo_steps
+
+        transformation = StubTransformation()
+        expected = run_pdo_steps(transformation, self.initial_data)
+
+        with tempfile.TemporaryDirectory() as shard_dir:
+            shard_paths = write_shards(self.initial_data, 4, shard_dir)
+            results = [
+                run_pdo_steps(transformation, {key: pl.read_parquet(path) for key, path in paths.items()})
+                for paths in shard_paths
+            ]
+
+        result = pl.concat(results, how="vertical_relaxed")
+        self.assertGreater(result["solde_cav"].count(), 0)
+        assert_frame_equal(result, expected, check_row_order=False)
+
+
+if __name__ == "__main__":
+    main()
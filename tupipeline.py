@@ -0,0 +1,211 @@
+"""
+Tests unitaires pour le module pdo_pipeline.py
+
+Ce module contient les tests de l'enchaînement des étapes 2 à 13 (run_pdo_steps)
+et du mode lazy (build_lazy_plan, collect_lazy_plan, collect_lazy_plans). Une
+BaseTransformation simplifiée reproduit chaque étape par une opération Polars
+commune à DataFrame et LazyFrame.
+
+Les tests couvrent:
+- Résultat identique avec des sources DataFrame (eager) et LazyFrame (plan collecté)
+- Moteur streaming et moteur par défaut
+- TypeError quand une étape matérialise le plan lazy
+- Tables de référence versionnées : codes c_eco exclus du pré-filtre et encodage de l'étape 3
+- Plans issus d'un même plan matérialisés en une seule passe (collect_lazy_plans)
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import os
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class StubTransformation:
+    """Étapes 2 à 13 réduites à une jointure, un filtre ou une colonne calculée chacune."""
+
+    def preprocess_df_main(self, unfiltered_df_main):
+        return {"df_main": unfiltered_df_main.filter(pl.col("c_sgmttn_nae").is_in(["ME", "GE"]))}
+
+    def preprocess_encoded_df_main(self, df_main):
+        return df_main.with_columns((pl.col("c_sgmttn_nae") == "ME").cast(pl.Int32).alias("seg_nae"))
+
+    def preprocess_risk(self, df_main, rsc):
+        agg = rsc.group_by("i_intrn").agg(pl.col("k_dep_auth_10j").max().alias("nbj"))
+        return df_main.join(agg, on="i_intrn", how="left")
+
+    def preprocess_soldes(self, df_main, soldes):
+        agg = soldes.group_by("i_intrn").agg((pl.col("pref_m_ctrvl_sld_arr") / 100).sum().alias("solde_cav"))
+        return df_main.join(agg, on="i_intrn", how="left")
+
+    def preprocess_reboot(self, df_main, reboot):
+        agg = reboot.group_by("i_uniq_kpi").agg(pl.col("q_score").min().alias("reboot_score"))
+        return df_main.join(agg, on="i_uniq_kpi", how="left")
+
+    def preprocess_donnees_transac(self, df_main, donnees_transac):
+        agg = donnees_transac.group_by("i_uniq_kpi").agg(pl.col("nops_total").sum().alias("nops"))
+        return df_main.join(agg, on="i_uniq_kpi", how="left")
+
+    def preprocess_safir_conso(self, df_main, safir_cc, safir_cd):
+        return df_main.with_columns(pl.lit(None, dtype=pl.Float64).alias("VB023"))
+
+    def preprocess_safir_soc(self, df_main, safir_sc, safir_sd):
+        return df_main.with_columns(pl.lit(None, dtype=pl.Float64).alias("VB005"))
+
+    def preprocess_filters(self, df_main):
+        return df_main.filter(pl.col("nbj").fill_null(0) < 8)
+
+    def preprocess_format(self, df_main):
+        return df_main.with_columns(
+            pl.when(pl.col("solde_cav") > 0).then(pl.lit("2")).otherwise(pl.lit("1")).alias("solde_cav_char")
+        )
+
+    def calcul_pdo(self, df_main):
+        return df_main.with_columns(
+            (0.1 + 0.01 * pl.col("nbj").fill_null(0) + 0.05 * pl.col("seg_nae")).alias("PDO")
+        )
+
+    def postprocess_df_main(self, df_main):
+        return df_main.select(["i_uniq_kpi", "c_sgmttn_nae", "solde_cav_char", "reboot_score", "nops", "PDO"])
+
+
+class MaterialisingTransformation(StubTransformation):
+    """Étape de formatage qui matérialise le plan (interdit en mode lazy)."""
+
+    def preprocess_format(self, df_main):
+        if isinstance(df_main, pl.LazyFrame):
+            df_main = df_main.collect()
+        return super().preprocess_format(df_main)
+
+
+class TestRunPdoSteps(TestCase):
+    """Tests unitaires pour run_pdo_steps(), build_lazy_plan() et collect_lazy_plan()."""
+
+    def setUp(self) -> None:
+        """Crée des sources de 300 entreprises (segments hors périmètre et clés absentes inclus)."""
+        n_rows = 300
+        self.sources = {
+            "unfiltered_df_main": pl.DataFrame({
+                "i_uniq_kpi": [f"KPI_{i}" for i in range(n_rows)],
+                "i_intrn": [f"INTRN_{i}" for i in range(n_rows)],
+                "c_sgmttn_nae": [["ME", "GE", "PME"][i % 3] for i in range(n_rows)],
+                "c_eco": [["510", "011", "520", "520", "520"][i % 5] for i in range(n_rows)],
+            }),
+            "rsc": pl.DataFrame({
+                "i_intrn": [f"INTRN_{i % 250}" for i in range(600)],
+                "k_dep_auth_10j": [i % 11 for i in range(600)],
+            }),
+            "soldes": pl.DataFrame({
+                "i_intrn": [f"INTRN_{(i * 7) % 320}" for i in range(900)],
+                "pref_m_ctrvl_sld_arr": [(i * 7919) % 20001 - 10000 for i in range(900)],
+            }),
+            "reboot": pl.DataFrame({
+                "i_uniq_kpi": [f"KPI_{i % 200}" for i in range(400)],
+                "q_score": [-(i % 13) / 2 for i in range(400)],
+            }),
+            "donnees_transac": pl.DataFrame({
+                "i_uniq_kpi": [f"KPI_{(i * 3) % 350}" for i in range(1000)],
+                "nops_total": [float(i % 17) for i in range(1000)],
+            }),
+            "safir_cc": pl.DataFrame({"i_uniq_kpi": ["KPI_0"]}),
+            "safir_cd": pl.DataFrame({"i_uniq_kpi": ["KPI_0"]}),
+            "safir_sc": pl.DataFrame({"i_uniq_kpi": ["KPI_0"]}),
+            "safir_sd": pl.DataFrame({"i_uniq_kpi": ["KPI_0"]}),
+        }
+
+    def test_dataframe_and_lazyframe_sources_match(self) -> None:
+        """Vérifier que les sources DataFrame et le plan lazy collecté donnent le même df_main final."""
+        # ===== ARRANGE =====
+        from common.pdo_pipeline import build_lazy_plan, collect_lazy_plan, run_pdo_steps
+
+        transformation = StubTransformation()
+
+        # ===== ACT =====
+        eager = run_pdo_steps(transformation, self.sources)
+        plan = build_lazy_plan(transformation, self.sources)
+        lazy = collect_lazy_plan(plan)
+        streaming = collect_lazy_plan(plan, streaming=True)
+
+        # ===== ASSERT =====
+        self.assertIsInstance(eager, pl.DataFrame)
+        self.assertIsInstance(plan, pl.LazyFrame)
+        self.assertGreater(eager.height, 0)
+        self.assertLess(eager.height, self.sources["unfiltered_df_main"].height)
+        # Ordre des lignes non garanti par les jointures du plan lazy
+        assert_frame_equal(lazy, eager, check_row_order=False)
+        assert_frame_equal(streaming, eager, check_row_order=False)
+
+    def test_materialised_plan_rejected(self) -> None:
+        """Vérifier qu'une étape qui matérialise le plan lève une TypeError (pas de collect silencieux)."""
+        from common.pdo_pipeline import build_lazy_plan, run_pdo_steps
+
+        transformation = MaterialisingTransformation()
+
+        with self.assertRaises(TypeError):
+            build_lazy_plan(transformation, self.sources)
+        # En eager l'étape reste utilisable
+        assert_frame_equal(
+            run_pdo_steps(transformation, self.sources),
+            run_pdo_steps(StubTransformation(), self.sources),
+            check_row_order=False,
+        )
+
+    def test_reference_tables_drive_prefilter_and_encoding(self) -> None:
+        """Vérifier qu'un référentiel versionné change les codes c_eco exclus du pré-filtre et l'encodage."""
+        from common.pdo_pipeline import build_lazy_plan, run_pdo_steps, select_reference_tables
+        from common.pdo_scope_filters import SCOPE_RULES
+
+        transformation = StubTransformation()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "reference_df_main.csv")
+            reference = pl.DataFrame({"table": ["eco"], "code": ["510"], "bucket": ["exclu"], "version": ["2026.10"]})
+            reference.write_csv(path)
+            encoder, scope_rules = select_reference_tables(transformation, {"reference_tables": {"path": path}})
+        default_encoder, default_rules = select_reference_tables(transformation, {})
+
+        versioned = run_pdo_steps(transformation, self.sources, prefilter=True, scope_rules=scope_rules)
+        lazy = build_lazy_plan(transformation, self.sources, prefilter=True, scope_rules=scope_rules).collect()
+        builtin = run_pdo_steps(transformation, self.sources, prefilter=True)
+
+        # Pré-filtre (segment ME parmi ME / GE) puis étapes 3 à 13 = étapes 2 à 13 puis périmètre
+        unfiltered = self.sources["unfiltered_df_main"]
+        scored = set(run_pdo_steps(transformation, self.sources)["i_uniq_kpi"])
+
+        def in_scope(excluded_eco: str) -> list[str]:
+            scope = unfiltered.filter((pl.col("c_sgmttn_nae") == "ME") & (pl.col("c_eco") != excluded_eco))
+            return sorted(scored & set(scope["i_uniq_kpi"]))
+
+        self.assertEqual(sorted(versioned["i_uniq_kpi"]), in_scope("510"))
+        self.assertEqual(sorted(builtin["i_uniq_kpi"]), in_scope("011"))
+        assert_frame_equal(lazy, versioned, check_row_order=False)
+        self.assertEqual(encoder.__self__.version, "2026.10")
+        self.assertEqual(default_rules, SCOPE_RULES)
+        self.assertEqual(default_encoder, transformation.preprocess_encoded_df_main)
+
+    def test_collect_lazy_plans_shares_plan(self) -> None:
+        """Vérifier que deux plans issus du même plan sont matérialisés en une seule passe."""
+        from common.pdo_pipeline import build_lazy_plan, collect_lazy_plans
+
+        calls = []
+        transformation = StubTransformation()
+        plan = build_lazy_plan(transformation, self.sources).with_columns(
+            pl.col("PDO").map_batches(lambda s: calls.append(1) or s, return_dtype=pl.Float64)
+        )
+        expected = plan.collect()
+        calls.clear()
+
+        df_final, summary = collect_lazy_plans([plan, plan.group_by("c_sgmttn_nae").agg(pl.col("PDO").mean())])
+
+        self.assertEqual(len(calls), 1)
+        assert_frame_equal(df_final, expected, check_row_order=False)
+        assert_frame_equal(
+            summary, expected.group_by("c_sgmttn_nae").agg(pl.col("PDO").mean()), check_row_order=False
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Tests unitaires pour le module pdo_reboot.py
+
+Ce module contient les tests du moteur vectorisé des features REBOOT
+(add_reboot_features, latest_reboot_scores) et de son activation dans le pipeline
+(select_feature_engines).
+
+Les tests couvrent:
+- Virgule décimale, valeurs non numériques (NULL), sigmoid aux extrêmes
+- Notation la plus récente sans aucun score numérique : 0 / 0.5 comme preprocessing_reboot
+- Notation la plus récente (d_rev_notation puis d_histo), somme de ses drivers
+- Indépendance vis-à-vis de l'ordre des lignes (notations de même date)
+- Identité avec l'implémentation group_by + unique sur les extraits synthétiques
+- Remplacement de preprocess_reboot par app_config["feature_engines"]
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import math
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestAddRebootFeatures(TestCase):
+    """Tests unitaires pour la fonction add_reboot_features() de pdo_reboot."""
+
+    def _reboot(self, rows: list[dict]) -> pl.DataFrame:
+        """Crée un extrait reboot (colonnes de notation par défaut identiques)."""
+        defaults = {
+            "d_histo": "2024-01-01",
+            "c_int_modele": "011",
+            "d_rev_notation": "2024-01-01",
+            "c_not": "A",
+            "c_type_prsne": "PM",
+            "b_bddf_gestionnaire": "N",
+        }
+        return pl.DataFrame([{**defaults, **row} for row in rows])
+
+    def test_decimal_comma_and_sigmoid(self) -> None:
+        """Vérifier la conversion "1,5" → 1.5, les valeurs non numériques et la sigmoid aux extrêmes."""
+        # ===== ARRANGE =====
+        from pdo_reboot import add_reboot_features
+
+        df_main = pl.DataFrame({"i_uniq_kpi": ["E1", "E2", "E3", "E4", "E5", "E6"]})
+        reboot = self._reboot([
+            {"i_uniq_kpi": "E1", "q_score": "1,5"},
+            {"i_uniq_kpi": "E2", "q_score": "-1000,0"},
+            {"i_uniq_kpi": "E3", "q_score": "1000"},
+            {"i_uniq_kpi": "E4", "q_score": "N/A"},
+            {"i_uniq_kpi": "E5", "q_score": "#REF!"},
+        ])
+
+        # ===== ACT =====
+        result = add_reboot_features(df_main, reboot).sort("i_uniq_kpi")
+
+        # ===== ASSERT =====
+        # Drivers non numériques comptés 0 (comme preprocessing_reboot), E6 sans notation : NULL
+        self.assertEqual(result["reboot_score"].to_list(), [1.5, -1000.0, 1000.0, 0.0, 0.0, None])
+        scores2 = result["reboot_score2"].to_list()
+        self.assertAlmostEqual(scores2[0], 1 / (1 + math.exp(-1.5)), places=12)
+        self.assertEqual(scores2[1:], [0.0, 1.0, 0.5, 0.5, None])
+        self.assertEqual(result["flag_reboot"].unique().to_list(), ["OK"])
+
+    def test_all_invalid_latest_notation(self) -> None:
+        """
+        Vérifier qu'une notation dont tous les drivers sont non numériques donne les scores
+        de preprocessing_reboot (somme 0, sigmoid 0.5, classe "9"), même si une notation
+        plus ancienne est valide.
+        """
+        # ===== ARRANGE =====
+        from pdo_bucketing import format_variables_table
+        from pdo_reboot import add_reboot_features
+
+        FORMAT_SOURCES = ["Q_JJ_DEPST_MM", "solde_cav", "VB023", "VB005", "VB035", "VB055"]
+        df_main = pl.DataFrame({
+            "i_uniq_kpi": ["E1", "E2", "E3"],
+            "c_njur_prsne_enc": ["1-3"] * 3,
+            "c_sectrl_1_enc": ["2"] * 3,
+            "c_sgmttn_nae": ["ME"] * 3,
+        })
+        reboot = self._reboot([
+            # E1 : tous les drivers de l'unique notation sont invalides
+            {"i_uniq_kpi": "E1", "q_score": "N/A"},
+            {"i_uniq_kpi": "E1", "q_score": "#REF!"},
+            # E2 : notation récente invalide, notation plus ancienne valide ignorée
+            {"i_uniq_kpi": "E2", "q_score": "N/A"},
+            {"i_uniq_kpi": "E2", "q_score": "2,0", "d_rev_notation": "2023-01-01"},
+            # E3 : drivers invalides ignorés dans une notation qui a des scores numériques
+            {"i_uniq_kpi": "E3", "q_score": "#REF!"},
+            {"i_uniq_kpi": "E3", "q_score": "-0,5"},
+        ])
+
+        # ===== ACT =====
+        result = add_reboot_features(df_main, reboot).sort("i_uniq_kpi")
+        formatted = format_variables_table(
+            result.with_columns(pl.lit(None, dtype=pl.Float64).alias(col) for col in FORMAT_SOURCES)
+        )
+
+        # ===== ASSERT =====
+        self.assertEqual(result["reboot_score"].to_list(), [0.0, 0.0, -0.5])
+        self.assertEqual(result["reboot_score2"].to_list()[:2], [0.5, 0.5])
+        self.assertAlmostEqual(result["reboot_score2"][2], 1 / (1 + math.exp(0.5)), places=12)
+        self.assertEqual(formatted["reboot_score_char2"].cast(pl.String).to_list()[:2], ["9", "9"])
+
+    def test_latest_notation_summed(self) -> None:
+        """
+        Vérifier que la notation la plus récente est conservée (d_rev_notation puis
+        d_histo) et que ses drivers sont sommés.
+        """
+        from pdo_reboot import add_reboot_features
+
+        df_main = pl.DataFrame({"i_uniq_kpi": ["E1", "E2"]})
+        reboot = self._reboot([
+            {"i_uniq_kpi": "E1", "q_score": "1,0", "d_rev_notation": "2024-01-31", "c_not": "A"},
+            {"i_uniq_kpi": "E1", "q_score": "5,0", "d_rev_notation": "2024-03-31", "c_not": "C"},
+            {"i_uniq_kpi": "E1", "q_score": "6,0", "d_rev_notation": "2024-03-31", "c_not": "C"},
+            {"i_uniq_kpi": "E1", "q_score": "4,0", "d_rev_notation": "2024-02-15", "c_not": "B"},
+            # Même d_rev_notation : d_histo départage
+            {"i_uniq_kpi": "E2", "q_score": "3,0", "d_histo": "2024-01-31"},
+            {"i_uniq_kpi": "E2", "q_score": "1,0", "d_histo": "2024-01-01"},
+        ])
+
+        result = add_reboot_features(df_main, reboot).sort("i_uniq_kpi")
+
+        self.assertEqual(result["reboot_score"].to_list(), [11.0, 3.0])
+
+    def test_order_independent(self) -> None:
+        """Vérifier que des notations de même date donnent le même score quel que soit l'ordre des lignes."""
+        from pdo_reboot import add_reboot_features
+
+        df_main = pl.DataFrame({"i_uniq_kpi": ["E1"]})
+        reboot = self._reboot([
+            {"i_uniq_kpi": "E1", "q_score": "1,0", "c_not": "A"},
+            {"i_uniq_kpi": "E1", "q_score": "2,0", "c_not": "B"},
+            {"i_uniq_kpi": "E1", "q_score": "3,0", "c_not": "C"},
+        ])
+
+        scores = {
+            add_reboot_features(df_main, reboot.sample(fraction=1.0, shuffle=True, seed=seed))["reboot_score"][0]
+            for seed in range(10)
+        }
+
+        self.assertEqual(scores, {3.0})
+
+    def test_matches_group_by_unique_on_synthetic_extract(self) -> None:
+        """
+        Vérifier l'identité avec group_by sur la notation + unique + sigmoid quand chaque
+        entreprise n'a qu'une notation (extrait synthétique), en eager et en lazy.
+        """
+        from pdo_reboot import add_reboot_features
+        from pdo_synthetic import generate_reboot, generate_unfiltered_df_main
+
+        df_main = generate_unfiltered_df_main(5_000).select(["i_uniq_kpi", "i_intrn"])
+        reboot = generate_reboot(5_000)
+        scores = (
+            reboot
+            .with_columns(pl.col("q_score").str.replace(r",", ".").cast(pl.Float64))
+            .group_by(["d_histo", "i_uniq_kpi", "c_int_modele", "d_rev_notation", "c_not", "c_type_prsne",
+                       "b_bddf_gestionnaire"])
+            .agg(pl.col("q_score").sum())
+            .unique(subset=["i_uniq_kpi"], keep="first")
+            .with_columns((1 / (1 + (-pl.col("q_score")).exp())).alias("reboot_score2"))
+            .rename({"q_score": "reboot_score"})
+            .select(["i_uniq_kpi", "reboot_score", "reboot_score2"])
+        )
+        expected = df_main.join(scores, on="i_uniq_kpi", how="left").with_columns(pl.lit("OK").alias("flag_reboot"))
+
+        result = add_reboot_features(df_main, reboot)
+        lazy_result = add_reboot_features(df_main.lazy(), reboot.lazy()).collect()
+
+        assert_frame_equal(result.sort("i_uniq_kpi"), expected.sort("i_uniq_kpi"), rel_tol=1e-12)
+        assert_frame_equal(lazy_result.sort("i_uniq_kpi"), expected.sort("i_uniq_kpi"), rel_tol=1e-12)
+
+    def test_select_feature_engines(self) -> None:
+        """Vérifier que app_config["feature_engines"] remplace preprocess_reboot et délègue le reste."""
+        from common.pdo_pipeline import FeatureEngines, select_feature_engines
+        from common.pdo_reboot import add_reboot_features
+
+        class BaseTransformation:
+            def preprocess_reboot(self, df_main, reboot):
+                raise AssertionError("preprocess_reboot ne doit pas être appelé")
+
+            def preprocess_soldes(self, df_main, soldes):
+                return "soldes"
+
+        base_transformation = BaseTransformation()
+
+        engines = select_feature_engines(base_transformation, {"feature_engines": ["reboot"]})
+
+        self.assertIsInstance(engines, FeatureEngines)
+        self.assertIs(engines.preprocess_reboot, add_reboot_features)
+        self.assertEqual(engines.preprocess_soldes(None, None), "soldes")
+        self.assertIs(select_feature_engines(base_transformation, {}), base_transformation)
+        with self.assertRaises(ValueError):
+            select_feature_engines(base_transformation, {"feature_engines": ["inconnu"]})
+
+
+if __name__ == "__main__":
+    main()
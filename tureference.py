@@ -0,0 +1,148 @@
+"""
+Tests unitaires pour le module pdo_reference.py
+
+Ce module contient les tests des tables de référence de df_main (ReferenceTables,
+LookupTable, df_encoding_lookup) : encodage de la nature juridique et du code
+sectoriel par dictionnaire, référentiel versionné et exclusions c_eco partagées avec
+les règles de périmètre.
+
+Les tests couvrent:
+- Classes de nature juridique et de code sectoriel (TU-012 à TU-016)
+- Codes inconnus, NULL et chaîne vide dans la classe explicite
+- Identité avec les when / is_in enchaînés sur l'extrait synthétique
+- Référentiel CSV versionné : classes, classe des inconnus, version
+- Code rangé dans deux classes rejeté
+- Codes économiques exclus lus dans la table de référence par le pré-filtre
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import os
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestDfEncodingLookup(TestCase):
+    """Tests unitaires pour df_encoding_lookup() et ReferenceTables.encode()."""
+
+    def test_classes_and_unknown_bucket(self) -> None:
+        """Vérifier les classes connues et la classe explicite des codes inconnus, NULL ou vides."""
+        # ===== ARRANGE =====
+        from pdo_reference import df_encoding_lookup
+
+        df_main = pl.DataFrame({
+            "c_njur_prsne": ["26", "64", "58", "99", "XX", "", None],
+            "c_sectrl_1": ["420053", "360120", "380020", "010010", "", "999999", None],
+            "i_g_affre_rmpm": ["GA_1", None, "GA_2", None, None, None, None],
+        })
+
+        # ===== ACT =====
+        result = df_encoding_lookup(df_main)
+
+        # ===== ASSERT =====
+        self.assertEqual(result["c_njur_prsne_enc"].to_list(), ["1-3", "4-6", "7", "7", "7", "7", "7"])
+        self.assertEqual(result["c_sectrl_1_enc"].to_list(), ["1", "2", "3", "4", "3", "3", "3"])
+        self.assertEqual(result["top_ga"].to_list(), ["1", "0", "1", "0", "0", "0", "0"])
+        self.assertEqual(result["flag_df_main"].unique().to_list(), ["OK"])
+
+    def test_matches_chained_is_in_on_synthetic_extract(self) -> None:
+        """Vérifier l'identité avec les when / is_in enchaînés, en eager et en lazy."""
+        from pdo_reference import LEGAL_NATURE_CLASSES, SECTOR_CLASSES, df_encoding_lookup
+        from pdo_synthetic import generate_unfiltered_df_main
+
+        df_main = generate_unfiltered_df_main(20_000)
+        njur, sectrl = pl.col("c_njur_prsne"), pl.col("c_sectrl_1")
+        expected = df_main.with_columns([
+            pl.when(njur.is_in(LEGAL_NATURE_CLASSES["1-3"])).then(pl.lit("1-3"))
+            .when(njur.is_in(LEGAL_NATURE_CLASSES["4-6"])).then(pl.lit("4-6"))
+            .otherwise(pl.lit("7")).alias("c_njur_prsne_enc"),
+            pl.when(sectrl.is_in(SECTOR_CLASSES["1"])).then(pl.lit("1"))
+            .when(sectrl.is_in(SECTOR_CLASSES["2"])).then(pl.lit("2"))
+            .when(sectrl.is_in(SECTOR_CLASSES["4"])).then(pl.lit("4"))
+            .otherwise(pl.lit("3")).alias("c_sectrl_1_enc"),
+            pl.when(pl.col("i_g_affre_rmpm").is_null()).then(pl.lit("0")).otherwise(pl.lit("1")).alias("top_ga"),
+            pl.lit("OK").alias("flag_df_main"),
+        ])
+
+        assert_frame_equal(df_encoding_lookup(df_main), expected)
+        assert_frame_equal(df_encoding_lookup(df_main.lazy()).collect(), expected)
+
+
+class TestReferenceTables(TestCase):
+    """Tests unitaires pour le chargement du référentiel versionné et les règles de périmètre."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_versioned_csv_reference(self) -> None:
+        """Vérifier le chargement d'un référentiel CSV (classes, classe des inconnus, version)."""
+        # ===== ARRANGE =====
+        from pdo_reference import ReferenceTables
+
+        path = os.path.join(self.tmp_dir.name, "reference_df_main.csv")
+        pl.DataFrame({
+            "table": ["secteur", "secteur", "secteur", "eco"],
+            "code": ["010010", "710010", None, "510"],
+            "bucket": ["1", "4", "2", "exclu"],
+            "version": ["2026.10"] * 4,
+        }).write_csv(path)
+
+        # ===== ACT =====
+        tables = ReferenceTables.from_config({"reference_tables": {"path": path}})
+        result = tables.encode(pl.DataFrame({
+            "c_njur_prsne": ["26", "26", "26"],
+            "c_sectrl_1": ["010010", "710010", "420053"],
+            "i_g_affre_rmpm": [None, None, None],
+        }))
+
+        # ===== ASSERT =====
+        self.assertEqual(tables.version, "2026.10")
+        self.assertEqual(result["c_sectrl_1_enc"].to_list(), ["1", "4", "2"])
+        # Table absente du référentiel : contenu intégré conservé
+        self.assertEqual(result["c_njur_prsne_enc"].to_list(), ["1-3"] * 3)
+        self.assertEqual(tables.eco_codes.codes("exclu"), ["510"])
+        assert_frame_equal(ReferenceTables.from_frame(tables.to_frame()).to_frame(), tables.to_frame())
+
+    def test_conflicting_codes_rejected(self) -> None:
+        """Vérifier qu'un code rangé dans deux classes ou un référentiel multi-versions est rejeté."""
+        from pdo_reference import ReferenceTables
+
+        reference = pl.DataFrame({
+            "table": ["secteur", "secteur"],
+            "code": ["010010", "010010"],
+            "bucket": ["1", "4"],
+            "version": ["v1", "v1"],
+        })
+
+        with self.assertRaises(ValueError):
+            ReferenceTables.from_frame(reference)
+        with self.assertRaises(ValueError):
+            ReferenceTables.from_frame(reference.with_columns(pl.Series("version", ["v1", "v2"])))
+
+    def test_scope_rules_share_eco_codes(self) -> None:
+        """Vérifier que le pré-filtre exclut les codes c_eco de la table de référence."""
+        from common.pdo_reference import ReferenceTables
+        from common.pdo_scope_filters import EXCLUDED_ECO_CODES, SCOPE_RULES, apply_scope_prefilter
+
+        reference = pl.DataFrame({"table": ["eco"], "code": ["510"], "bucket": ["exclu"], "version": ["v2"]})
+        rules = ReferenceTables.from_frame(reference).scope_rules()
+        eco_rule = [rule for rule in rules if rule.columns == ("c_eco",)]
+        df_main = pl.DataFrame({"c_eco": ["510", "520", EXCLUDED_ECO_CODES[0]]})
+
+        result = apply_scope_prefilter(df_main, eco_rule)
+
+        self.assertEqual(len(rules), len(SCOPE_RULES))
+        self.assertEqual(eco_rule[0].values, ("510",))
+        self.assertEqual(result["c_eco"].to_list(), ["520", EXCLUDED_ECO_CODES[0]])
+        self.assertEqual(ReferenceTables.default().scope_rules(), SCOPE_RULES)
+
+
+if __name__ == "__main__":
+    main()
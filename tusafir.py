@@ -0,0 +1,354 @@
+"""
+Tests unitaires pour le module pdo_safir.py
+
+Ce module contient les tests du moteur des features SAFIR consolidées et sociales
+(SafirEngine, add_safir_conso_features, add_safir_soc_features) et de son activation
+dans le pipeline (select_feature_engines).
+
+Les tests couvrent:
+- Dernier bilan choisi parmi plusieurs, postes non utilisés ignorés
+- Dernier bilan ou bilan précédent sans poste utilisé : dates classées sur le détail complet
+- Repli du chiffre d'affaires consolidé sur mt_24 + mt_309, annualisation
+- Durée d'exercice imputée (écart avec le bilan précédent, 12 à défaut), régime par défaut
+- Conventions des ratios : dénominateur nul → 0, CAF NULL → VB005 = 0
+- Formules et codes surchargés par app_config["safir"], numérateurs de VB035 / VB055 requis
+- Identité eager / lazy et avec un classement par rang sur les extraits synthétiques
+- Parité des features sociales avec la logique historique (rang, pivot, durée, régime)
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+from datetime import date
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+def _detail(rows: list[tuple], date_column: str) -> pl.DataFrame:
+    """Crée un extrait de détail à partir de tuples (i_uniq_kpi, date, c_code, c_val)."""
+    return pl.DataFrame(
+        rows, schema=["i_uniq_kpi", date_column, "c_code", "c_val"], orient="row"
+    ).with_columns(pl.col(date_column).cast(pl.Date))
+
+
+class TestSafirConso(TestCase):
+    """Tests unitaires pour add_safir_conso_features()."""
+
+    def test_latest_balance_fallback_and_duration(self) -> None:
+        """
+        Vérifier le choix du dernier bilan, le repli sur mt_24 + mt_309 quand mt_310
+        est absent et la durée NULL ou nulle ramenée à 12 mois.
+        """
+        # ===== ARRANGE =====
+        from pdo_safir import add_safir_conso_features
+
+        df_main = pl.DataFrame({"i_uniq_kpi": ["E1", "E2", "E3", "E4"]})
+        safir_cc = pl.DataFrame({
+            "i_uniq_kpi": ["E1", "E2", "E3"],
+            "d_fin_excce_conso": [date(2025, 12, 31), date(2025, 6, 30), date(2025, 12, 31)],
+            "c_duree_excce_conso": [6, None, 0],
+        })
+        safir_cd = _detail([
+            # E1 : bilan précédent ignoré, exercice de 6 mois annualisé (sans effet sur le ratio)
+            ("E1", date(2024, 12, 31), "310", 1.0),
+            ("E1", date(2025, 12, 31), "310", 1000.0),
+            ("E1", date(2025, 12, 31), "26", 100.0),
+            ("E1", date(2025, 12, 31), "27", 50.0),
+            ("E1", date(2025, 12, 31), "100", 999.0),
+            # E2 : mt_310 absent, chiffre d'affaires = mt_24 + mt_309
+            ("E2", date(2025, 6, 30), "24", 300.0),
+            ("E2", date(2025, 6, 30), "309", 100.0),
+            ("E2", date(2025, 6, 30), "26", 40.0),
+            # E3 : chiffre d'affaires nul
+            ("E3", date(2025, 12, 31), "310", 0.0),
+            ("E3", date(2025, 12, 31), "26", 10.0),
+        ], "d_fin_excce_conso")
+
+        # ===== ACT =====
+        result = add_safir_conso_features(df_main, safir_cc, safir_cd).sort("i_uniq_kpi")
+
+        # ===== ASSERT =====
+        # E1 : (1000 + 100 - 50) / 1000 ; E2 : 40 / 400 (mt_310 NULL compté 0 dans le résultat)
+        self.assertEqual(result["VB023"].to_list(), [105.0, 10.0, 0.0, None])
+        self.assertEqual(result["flag_safir_conso"].unique().to_list(), ["OK"])
+
+    def test_matches_rank_on_synthetic_extract(self) -> None:
+        """Vérifier l'identité eager / lazy et avec un classement par rang sur l'extrait synthétique."""
+        from pdo_safir import add_safir_conso_features
+        from pdo_synthetic import generate_safir_cc, generate_safir_cd, generate_unfiltered_df_main
+
+        df_main = generate_unfiltered_df_main(20_000).select(["i_uniq_kpi", "i_intrn"])
+        safir_cc, safir_cd = generate_safir_cc(20_000), generate_safir_cd(20_000)
+        balance = (
+            safir_cd
+            .with_columns(pl.col("d_fin_excce_conso").rank("dense", descending=True).over("i_uniq_kpi").alias("N"))
+            .filter(pl.col("N") == 1)
+            .pivot(on="c_code", index=["i_uniq_kpi", "d_fin_excce_conso"], values="c_val", aggregate_function="first")
+            .join(safir_cc, on=["i_uniq_kpi", "d_fin_excce_conso"], how="inner")
+        )
+        signs = {"26": 1, "27": -1, "28": -1, "29": -1, "30": -1, "31": -1, "32": 1, "33": 1, "34": -1,
+                 "35": -1, "36": 1, "37": -1, "38": 1, "39": -1}
+        fallback = pl.when(pl.col("24").is_not_null() | pl.col("309").is_not_null()).then(
+            pl.col("24").fill_null(0) + pl.col("309").fill_null(0)
+        )
+        ca = pl.col("310").fill_null(fallback)
+        res = pl.col("310").fill_null(0) + pl.sum_horizontal([pl.col(code) * sign for code, sign in signs.items()])
+        expected = df_main.join(
+            balance.select(["i_uniq_kpi", pl.when(ca == 0).then(0.0).otherwise(res / ca * 100).alias("VB023")]),
+            on="i_uniq_kpi",
+            how="left",
+        ).with_columns(pl.lit("OK").alias("flag_safir_conso"))
+
+        result = add_safir_conso_features(df_main, safir_cc, safir_cd)
+        lazy_result = add_safir_conso_features(df_main.lazy(), safir_cc.lazy(), safir_cd.lazy()).collect()
+
+        self.assertGreater(result["VB023"].count(), 0)
+        assert_frame_equal(result.sort("i_uniq_kpi"), expected.sort("i_uniq_kpi"), rel_tol=1e-9)
+        assert_frame_equal(lazy_result.sort("i_uniq_kpi"), expected.sort("i_uniq_kpi"), rel_tol=1e-9)
+
+
+class TestSafirSoc(TestCase):
+    """Tests unitaires pour SafirEngine.add_soc_features() et add_safir_soc_features()."""
+
+    def setUp(self) -> None:
+        self.config = {
+            "safir": {
+                "formulas": {
+                    "res_soc": {"items": {"mt_900": 1}, "annualised": False},
+                    "immob": {"items": {"mt_910": 1}, "annualised": False},
+                }
+            }
+        }
+        self.df_main = pl.DataFrame({"i_uniq_kpi": ["E1", "E2", "E3", "E4"]})
+        self.safir_sc = pl.DataFrame({
+            "i_uniq_kpi": ["E1", "E2", "E3", "E4"],
+            "d_fin_excce_soc": [date(2025, 12, 31)] * 4,
+            "c_duree_excce_soc": [12, 0, 12, None],
+            "c_regme_fisc": [None, "2", "3", "1"],
+        })
+        self.safir_sd = _detail([
+            # E1 : régime NULL → réel normal, CAF = 100 - 20 + 10, service de la dette = mt_479
+            ("E1", date(2025, 12, 31), "182", 100.0),
+            ("E1", date(2025, 12, 31), "469", 20.0),
+            ("E1", date(2025, 12, 31), "287", 10.0),
+            ("E1", date(2025, 12, 31), "479", 45.0),
+            ("E1", date(2025, 12, 31), "534", 400.0),
+            ("E1", date(2025, 12, 31), "900", 40.0),
+            ("E1", date(2025, 12, 31), "910", 100.0),
+            # E2 : régime simplifié, durée nulle imputée par l'écart avec le bilan précédent (6 mois)
+            ("E2", date(2025, 6, 30), "182", 1.0),
+            ("E2", date(2025, 12, 31), "182", 60.0),
+            ("E2", date(2025, 12, 31), "285", 30.0),
+            ("E2", date(2025, 12, 31), "480", 100.0),
+            ("E2", date(2025, 12, 31), "435", 10.0),
+            ("E2", date(2025, 12, 31), "209", 20.0),
+            ("E2", date(2025, 12, 31), "534", 0.0),
+            # E3 : régime inconnu → CAF NULL → VB005 = 0
+            ("E3", date(2025, 12, 31), "182", 100.0),
+            ("E3", date(2025, 12, 31), "479", 10.0),
+            # E4 : service de la dette nul
+            ("E4", date(2025, 12, 31), "182", 100.0),
+            ("E4", date(2025, 12, 31), "479", 0.0),
+        ], "d_fin_excce_soc")
+
+    def test_regimes_duration_and_zero_conventions(self) -> None:
+        """Vérifier VB005 par régime, la durée imputée et les conventions de dénominateur nul."""
+        # ===== ARRANGE =====
+        from pdo_safir import add_safir_soc_features
+
+        # ===== ACT =====
+        result = add_safir_soc_features(self.df_main, self.safir_sc, self.safir_sd, self.config).sort("i_uniq_kpi")
+
+        # ===== ASSERT =====
+        vb005 = result["VB005"].to_list()
+        self.assertEqual(vb005[0], 200.0)
+        # E2 : CAF et service de la dette annualisés sur la même durée imputée
+        self.assertAlmostEqual(vb005[1], 90.0 / 90.0 * 100, places=9)
+        self.assertEqual(vb005[2:], [0.0, 0.0])
+        # E1 : 40 / 400 ; E2 : total bilan nul ; E3 / E4 : postes absents
+        self.assertEqual(result["VB035"].to_list(), [10.0, 0.0, None, None])
+        self.assertEqual(result["flag_safir_soc"].unique().to_list(), ["OK"])
+
+    def test_balances_without_used_items(self) -> None:
+        """
+        Vérifier que les dates sont classées sur le détail complet, comme le rang historique :
+        un dernier bilan sans poste utilisé donne des ratios NULL (pas de repli sur un bilan
+        plus ancien) et un bilan précédent sans poste utilisé fixe la durée imputée.
+        """
+        # ===== ARRANGE =====
+        from pdo_safir import DAYS_PER_MONTH, add_safir_soc_features
+
+        config = {
+            "safir": {
+                "formulas": {
+                    "res_soc": {"items": {"mt_900": 1}, "annualised": True},
+                    "immob": {"items": {"mt_910": 1}, "annualised": False},
+                }
+            }
+        }
+        df_main = pl.DataFrame({"i_uniq_kpi": ["E5", "E6"]})
+        safir_sc = pl.DataFrame({
+            "i_uniq_kpi": ["E5", "E6"],
+            "d_fin_excce_soc": [date(2025, 12, 31)] * 2,
+            "c_duree_excce_soc": [0, 12],
+            "c_regme_fisc": ["1", "1"],
+        })
+        safir_sd = _detail([
+            # E5 : bilan précédent (30/06/2025) sans poste utilisé → durée imputée 6 mois
+            ("E5", date(2024, 12, 31), "900", 1.0),
+            ("E5", date(2025, 6, 30), "999", 5.0),
+            ("E5", date(2025, 12, 31), "900", 60.0),
+            ("E5", date(2025, 12, 31), "534", 100.0),
+            # E6 : dernier bilan sans poste utilisé, bilan plus ancien complet ignoré
+            ("E6", date(2024, 12, 31), "900", 40.0),
+            ("E6", date(2024, 12, 31), "534", 400.0),
+            ("E6", date(2025, 12, 31), "999", 5.0),
+        ], "d_fin_excce_soc")
+
+        # ===== ACT =====
+        result = add_safir_soc_features(df_main, safir_sc, safir_sd, config).sort("i_uniq_kpi")
+
+        # ===== ASSERT =====
+        # E5 : 60 annualisé sur l'écart avec le 30/06/2025 (184 jours), / total bilan 100
+        gap_months = 184 / DAYS_PER_MONTH
+        self.assertAlmostEqual(result["VB035"][0], 60.0 / gap_months * 12, places=9)
+        self.assertIsNone(result["VB035"][1])
+        self.assertEqual(result["VB005"].to_list(), [0.0, 0.0])
+
+    def test_formulas_and_codes_from_config(self) -> None:
+        """Vérifier les formules de VB035 / VB055 et les codes de postes surchargés par app_config["safir"]."""
+        from pdo_safir import SafirEngine
+
+        engine = SafirEngine.from_config({
+            "safir": {
+                "formulas": {
+                    "res_soc": {"items": {"mt_res": 1}, "annualised": False},
+                    "immob": {"items": {"mt_immob": 1}, "annualised": False},
+                },
+                "item_codes": {"mt_res": "900", "mt_immob": "910"},
+            }
+        })
+
+        result = engine.add_soc_features(self.df_main, self.safir_sc, self.safir_sd).sort("i_uniq_kpi")
+
+        self.assertEqual(engine.code_of("mt_res"), "900")
+        self.assertEqual(engine.code_of("mt_534"), "534")
+        self.assertEqual(result["VB035"].to_list(), [10.0, 0.0, None, None])
+        self.assertEqual(result["VB055"].to_list(), [25.0, 0.0, None, None])
+
+    def test_missing_formulas_rejected(self) -> None:
+        """Vérifier que les numérateurs de VB035 / VB055 non configurés sont refusés (et non mis à NULL)."""
+        from pdo_safir import SafirEngine, add_safir_soc_features
+
+        with self.assertRaises(ValueError):
+            SafirEngine.from_config({"safir": {"formulas": {"res_soc": {"items": {"mt_900": 1}}}}})
+        with self.assertRaises(ValueError):
+            add_safir_soc_features(self.df_main, self.safir_sc, self.safir_sd, {})
+        with self.assertRaises(ValueError):
+            SafirEngine().add_soc_features(self.df_main, self.safir_sc, self.safir_sd)
+        # Moteur limité aux features consolidées
+        self.assertIsNone(SafirEngine.from_config({}, require_soc=False).formulas["res_soc"])
+
+    def test_matches_legacy_on_synthetic_extract(self) -> None:
+        """
+        Vérifier la parité avec la logique historique de preprocessing_safir_soc.py sur
+        l'extrait synthétique : rang ordinal des bilans, pivot du bilan N=1, durée imputée
+        par l'écart avec le bilan N=2, CAF et service de la dette par régime, "0" si le
+        service de la dette est nul ou la CAF NULL, ratios sur total bilan ("0" si nul).
+        """
+        from pdo_safir import add_safir_soc_features
+        from pdo_synthetic import (
+            generate_safir_sc, generate_safir_sd, generate_unfiltered_df_main, synthetic_safir_config,
+        )
+
+        config = synthetic_safir_config()
+        df_main = generate_unfiltered_df_main(20_000).select(["i_uniq_kpi", "i_intrn"])
+        # Une durée sur dix non renseignée ou nulle pour couvrir l'imputation
+        safir_sc = generate_safir_sc(20_000).with_columns(
+            pl.when(pl.int_range(pl.len()) % 20 == 0).then(None)
+            .when(pl.int_range(pl.len()) % 20 == 10).then(0)
+            .otherwise(pl.col("c_duree_excce_soc")).alias("c_duree_excce_soc")
+        )
+        safir_sd = generate_safir_sd(20_000)
+
+        # Bilans classés par date (rang ordinal), bilan N=1 pivoté, date du bilan N=2
+        balances = (
+            safir_sd.select(["i_uniq_kpi", "d_fin_excce_soc"]).unique()
+            .with_columns(pl.col("d_fin_excce_soc").rank("ordinal", descending=True).over("i_uniq_kpi").alias("N"))
+            .filter(pl.col("N") <= 2)
+        )
+        previous = balances.filter(pl.col("N") == 2).select(
+            ["i_uniq_kpi", pl.col("d_fin_excce_soc").alias("leg_d_fin")]
+        )
+        balance = (
+            safir_sd
+            .join(balances.filter(pl.col("N") == 1), on=["i_uniq_kpi", "d_fin_excce_soc"], how="inner")
+            .pivot(on="c_code", index=["i_uniq_kpi", "d_fin_excce_soc"], values="c_val", aggregate_function="first")
+            .join(safir_sc, on=["i_uniq_kpi", "d_fin_excce_soc"], how="inner")
+            .join(previous, on="i_uniq_kpi", how="left")
+        )
+
+        def total(signs: dict) -> pl.Expr:
+            columns = [pl.col(code) * sign for code, sign in signs.items() if code in balance.columns]
+            return pl.when(pl.any_horizontal([col.is_not_null() for col in columns])).then(pl.sum_horizontal(columns))
+
+        imputed = (pl.col("d_fin_excce_soc") - pl.col("leg_d_fin")).dt.total_days() / 30.44
+        duree = pl.col("c_duree_excce_soc").cast(pl.Float64)
+        duree = pl.when(duree.is_null() | (duree == 0)).then(imputed).otherwise(duree)
+        duree = pl.when(duree.is_null() | (duree <= 0)).then(12.0).otherwise(duree)
+        regime = pl.col("c_regme_fisc").fill_null("1")
+        caf_1 = total({"182": 1, "469": -1, "287": 1, "290": 1, "289": 1, "288": 1, "471": -1, "286": 1, "470": -1,
+                       "294": 1})
+        caf = pl.when(regime == "1").then(caf_1).when(regime == "2").then(total({"182": 1, "285": 1, "295": 1}))
+        servicedette = (
+            pl.when(regime == "1").then(total({"479": 1}))
+            .when(regime == "2").then(total({"480": 1, "435": 1, "209": -1}))
+        )
+        totb = total({"534": 1})
+        res_soc = total({"100": 1, "120": -1}) / duree * 12
+        immob = total({"140": 1, "160": 1})
+        expected = df_main.join(
+            balance.select([
+                "i_uniq_kpi",
+                pl.when(caf.is_null() | (servicedette == 0)).then(0.0)
+                .otherwise((caf / duree * 12) / (servicedette / duree * 12) * 100).alias("VB005"),
+                pl.when(totb == 0).then(0.0).otherwise(res_soc / totb * 100).alias("VB035"),
+                pl.when(totb == 0).then(0.0).otherwise(immob / totb * 100).alias("VB055"),
+            ]),
+            on="i_uniq_kpi",
+            how="left",
+        ).with_columns(pl.lit("OK").alias("flag_safir_soc"))
+
+        result = add_safir_soc_features(df_main, safir_sc, safir_sd, config)
+        lazy_result = add_safir_soc_features(df_main.lazy(), safir_sc.lazy(), safir_sd.lazy(), config).collect()
+
+        self.assertGreater(result["VB035"].count(), 0)
+        self.assertGreater(result["VB055"].count(), 0)
+        assert_frame_equal(result.sort("i_uniq_kpi"), expected.sort("i_uniq_kpi"), rel_tol=1e-9)
+        assert_frame_equal(lazy_result.sort("i_uniq_kpi"), expected.sort("i_uniq_kpi"), rel_tol=1e-9)
+
+    def test_select_feature_engines(self) -> None:
+        """Vérifier que app_config["feature_engines"] remplace les étapes SAFIR avec la configuration."""
+        from common.pdo_pipeline import select_feature_engines
+
+        class BaseTransformation:
+            def preprocess_safir_soc(self, df_main, safir_sc, safir_sd):
+                raise AssertionError("preprocess_safir_soc ne doit pas être appelé")
+
+        app_config = {"feature_engines": ["safir_conso", "safir_soc"], **self.config}
+
+        engines = select_feature_engines(BaseTransformation(), app_config)
+        result = engines.preprocess_safir_soc(self.df_main, self.safir_sc, self.safir_sd).sort("i_uniq_kpi")
+
+        self.assertEqual(result["VB035"].to_list(), [10.0, 0.0, None, None])
+        self.assertTrue(callable(engines.preprocess_safir_conso))
+        with self.assertRaises(ValueError):
+            select_feature_engines(BaseTransformation(), {"feature_engines": ["safir_soc"]})
+        conso_only = select_feature_engines(BaseTransformation(), {"feature_engines": ["safir_conso"]})
+        self.assertTrue(callable(conso_only.preprocess_safir_conso))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Tests unitaires pour le module pdo_schema.py
+
+Ce module contient les tests du schéma compact du pipeline PDO (SchemaLayer).
+
+Les tests couvrent:
+- Modalités du modèle en pl.Enum, modalités ouvertes et flags en pl.Categorical
+- Compteurs en Int32, montants conservés en Float64
+- Modalité hors modèle : erreur au lieu d'un NULL silencieux
+- Gain mémoire mesuré à chaque étape sur un df_main synthétique
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import random
+from unittest import TestCase, main
+import polars as pl
+
+
+class TestSchemaLayer(TestCase):
+    """Tests unitaires pour la classe SchemaLayer."""
+
+    def setUp(self) -> None:
+        from pdo_schema import SchemaLayer
+
+        self.schema_layer = SchemaLayer.from_config({})
+
+    def test_compact_dtypes(self) -> None:
+        """Vérifier les types compacts et la conservation des valeurs."""
+        # ===== ARRANGE =====
+        df_main = pl.DataFrame({
+            "i_uniq_kpi": ["E1", "E2"],
+            "nbj": ["<=12", ">12"],
+            "seg_nae": ["ME", "autres"],
+            "nat_jur_a": ["1-3", "XX"],
+            "check": ["flag_soldes_OK", "flag_soldes_OK"],
+            "flag_transac": ["OK", "OK"],
+            "solde_nb": [3, 12],
+            "solde_cav": [1234567.89, -0.01],
+        })
+
+        # ===== ACT =====
+        result = self.schema_layer.apply(df_main)
+
+        # ===== ASSERT =====
+        self.assertEqual(result.schema["nbj"], pl.Enum(["<=12", ">12"]))
+        self.assertEqual(result.schema["seg_nae"], pl.Enum(["ME", "autres"]))
+        self.assertEqual(result.schema["nat_jur_a"], pl.Categorical())
+        self.assertEqual(result.schema["check"], pl.Categorical())
+        self.assertEqual(result.schema["flag_transac"], pl.Categorical())
+        self.assertEqual(result.schema["solde_nb"], pl.Int32)
+        self.assertEqual(result.schema["solde_cav"], pl.Float64)
+        self.assertEqual(result.schema["i_uniq_kpi"], pl.String)
+        self.assertEqual(result["nat_jur_a"].cast(pl.String).to_list(), ["1-3", "XX"])
+        self.assertEqual(result["solde_cav"].to_list(), [1234567.89, -0.01])
+
+    def test_unknown_modality_raises(self) -> None:
+        """Vérifier qu'une modalité hors modèle fait échouer le cast en Enum."""
+        df_main = pl.DataFrame({"nbj": ["<=12", "inconnu"]})
+
+        with self.assertRaises(pl.exceptions.PolarsError):
+            self.schema_layer.apply(df_main)
+
+    def test_memory_saving_per_step(self) -> None:
+        """
+        Mesurer le gain mémoire à chaque étape sur 100 000 entreprises :
+        df_main s'élargit d'un jeu de colonnes par étape, le schéma compact
+        réduit chaque état intermédiaire.
+        """
+        # ===== ARRANGE =====
+        from pdo_schema import size_saving_mb
+
+        n_rows = 100_000
+        rng = random.Random(0)
+        steps = {
+            "df_main_soldes": {
+                "i_uniq_kpi": [f"KPI_{i:08d}" for i in range(n_rows)],
+                "nat_jur_a": [rng.choice(["1-3", "4-6", ">=7"]) for _ in range(n_rows)],
+                "top_ga": [rng.choice(["0", "1"]) for _ in range(n_rows)],
+                "check": ["flag_soldes_OK"] * n_rows,
+                "solde_nb": [rng.randint(0, 20) for _ in range(n_rows)],
+            },
+            "df_main_transac": {
+                "remb_sepa_max": [rng.choice(["1", "2"]) for _ in range(n_rows)],
+                "pres_saisie": [rng.choice(["1", "2"]) for _ in range(n_rows)],
+                "flag_transac": ["OK"] * n_rows,
+                "nops": [rng.randint(0, 500) for _ in range(n_rows)],
+            },
+            "df_main_format": {
+                "nbj": [rng.choice(["<=12", ">12"]) for _ in range(n_rows)],
+                "reboot_score_char2": [str(rng.randint(1, 9)) for _ in range(n_rows)],
+                "solde_cav_char": [str(rng.randint(1, 4)) for _ in range(n_rows)],
+                "flag_format": ["OK"] * n_rows,
+            },
+        }
+
+        # ===== ACT & ASSERT =====
+        df_main = pl.DataFrame(height=n_rows)
+        for step_name, columns in steps.items():
+            df_main = df_main.hstack(pl.DataFrame(columns).get_columns())
+            before_mb, after_mb = size_saving_mb(df_main, self.schema_layer)
+            self.assertLess(after_mb, before_mb * 0.8, step_name)
+
+
+if __name__ == "__main__":
+    main()
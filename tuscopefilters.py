@@ -0,0 +1,131 @@
+"""
+Tests unitaires pour le module pdo_scope_filters.py
+
+Ce module contient les tests des règles de périmètre PDO appliquées avant les
+jointures (apply_scope_prefilter) et poussées dans la requête SQL (push_scope_filter).
+La référence est la suite de filtres de filtre_df_main (preprocessing_filters.py).
+
+Les tests couvrent:
+- Pré-filtre identique à filtre_df_main, valeurs NULL incluses
+- Règles dont une colonne est absente reportées à l'étape 10
+- Requête filtrée par paramètres liés (SQLite) : mêmes lignes qu'en Polars
+- Fonctionnement en LazyFrame
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import random
+import sqlite3
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+def filtre_df_main(df_main: pl.DataFrame) -> pl.DataFrame:
+    """Filtres de preprocessing_filters.py, appliqués l'un après l'autre."""
+    from pdo_scope_filters import EXCLUDED_ECO_CODES
+
+    df_main = df_main.filter(~pl.col("c_njur_prsne").is_in(["31", "32", "34", "35", "93", "95", "99"]))
+    df_main = df_main.filter(~pl.col("c_naf").is_in(["6419Z"]))
+    df_main = df_main.filter(~(pl.col("c_sgmttn_nae").is_in(["AP"]) & (pl.col("c_naf").is_in(["8411Z"]))))
+    df_main = df_main.filter(pl.col("c_sgmttn_nae").is_in(["ME", "GR", "A3"]))
+    df_main = df_main.filter(~pl.col("c_profl_immbr").is_not_null())
+    df_main = df_main.filter(pl.col("c_pres_cpt") == "1")
+    df_main = df_main.filter(~pl.col("c_crisq").is_in(["1", "2"]))
+    df_main = df_main.filter(~pl.col("c_eco").is_in(EXCLUDED_ECO_CODES))
+    df_main = df_main.filter(pl.col("c_nture_clt_entrp") != "00003")
+    return df_main
+
+
+class TestScopeFilters(TestCase):
+    """Tests unitaires pour apply_scope_prefilter() et push_scope_filter()."""
+
+    def setUp(self) -> None:
+        """Crée un unfiltered_df_main de 5 000 entreprises avec des modalités NULL."""
+        rng = random.Random(0)
+        n_rows = 5_000
+
+        def pick(values: list) -> list:
+            return [rng.choice(values + [None]) for _ in range(n_rows)]
+
+        self.df_main = pl.DataFrame({
+            "i_uniq_kpi": [f"KPI_{i}" for i in range(n_rows)],
+            "c_njur_prsne": pick(["54", "57", "31", "99", "65"]),
+            "c_naf": pick(["6419Z", "8411Z", "4711D", "6201Z"]),
+            "c_sgmttn_nae": pick(["ME", "GR", "A3", "AP", "PE"]),
+            "c_profl_immbr": [rng.choice([None, None, None, "I1"]) for _ in range(n_rows)],
+            "c_pres_cpt": pick(["1", "1", "1", "0"]),
+            "c_crisq": pick(["0", "1", "2", "3"]),
+            "c_eco": pick(["011", "433", "510", "520", "600"]),
+            "c_nture_clt_entrp": pick(["00001", "00002", "00003"]),
+        })
+
+    def test_prefilter_matches_filtre_df_main(self) -> None:
+        """Vérifier que le pré-filtre conserve exactement les lignes de filtre_df_main."""
+        # ===== ARRANGE =====
+        from pdo_scope_filters import apply_scope_prefilter
+
+        # ===== ACT =====
+        result = apply_scope_prefilter(self.df_main)
+
+        # ===== ASSERT =====
+        expected = filtre_df_main(self.df_main)
+        assert_frame_equal(result, expected)
+        self.assertGreater(expected.height, 0)
+        self.assertLess(expected.height, self.df_main.height)
+        # L'étape 10 ne retire plus aucune ligne
+        self.assertEqual(filtre_df_main(result).height, result.height)
+
+    def test_prefilter_skips_missing_columns(self) -> None:
+        """Vérifier qu'une règle dont la colonne est absente est ignorée, les autres appliquées."""
+        from pdo_scope_filters import apply_scope_prefilter
+
+        df_main = self.df_main.drop("c_eco")
+
+        result = apply_scope_prefilter(df_main)
+
+        expected = filtre_df_main(self.df_main.with_columns(pl.lit("510").alias("c_eco"))).drop("c_eco")
+        assert_frame_equal(result, expected)
+
+    def test_push_scope_filter_sql(self) -> None:
+        """
+        Vérifier que la requête filtrée (paramètres liés, sans littéraux) renvoie
+        les mêmes entreprises que le pré-filtre Polars.
+        """
+        # ===== ARRANGE =====
+        from pdo_scope_filters import EXCLUDED_ECO_CODES, apply_scope_prefilter, push_scope_filter
+        from starburst_io import fetch_frame
+
+        connection = sqlite3.connect(":memory:")
+        connection.execute(f"CREATE TABLE df_main ({', '.join(f'{col} TEXT' for col in self.df_main.columns)})")
+        connection.executemany(
+            f"INSERT INTO df_main VALUES ({', '.join('?' for _ in self.df_main.columns)})",
+            self.df_main.rows(),
+        )
+
+        # ===== ACT =====
+        sql, params = push_scope_filter("SELECT * FROM df_main;")
+        result = fetch_frame(connection, sql, parameters=params)
+        connection.close()
+
+        # ===== ASSERT =====
+        expected = apply_scope_prefilter(self.df_main)
+        self.assertEqual(sorted(result["i_uniq_kpi"].to_list()), sorted(expected["i_uniq_kpi"].to_list()))
+        self.assertNotIn("6419Z", sql)
+        self.assertEqual(sql.count("?"), len(params))
+        self.assertIn(EXCLUDED_ECO_CODES[0], params)
+
+    def test_prefilter_lazy(self) -> None:
+        """Vérifier que le pré-filtre s'ajoute au plan d'un LazyFrame."""
+        from pdo_scope_filters import apply_scope_prefilter
+
+        result = apply_scope_prefilter(self.df_main.lazy())
+
+        self.assertIsInstance(result, pl.LazyFrame)
+        assert_frame_equal(result.collect(), filtre_df_main(self.df_main))
+
+
+if __name__ == "__main__":
+    main()
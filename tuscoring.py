@@ -0,0 +1,189 @@
+"""
+Tests unitaires pour le module pdo_scoring.py
+
+Ce module contient les tests du calcul PDO piloté par une table de coefficients
+(CoefficientTable / calcul_pdo_table).
+
+Les tests couvrent:
+- Coefficient de chaque modalité lu depuis config["model"]["coeffs"]
+- Modalité inconnue, vide ou NULL → coefficient par défaut (0)
+- Entrée déjà encodée en pl.Enum et entrée LazyFrame
+- Nouveau modèle livré par configuration uniquement (config["model"]["modalities"])
+- Coefficient manquant dans la configuration → KeyError explicite
+- Parité avec calcul_pdo (TU-004) : profil de référence → PDO ≈ 0.9794
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+from unittest import TestCase, main
+from typing import Any
+import math
+import polars as pl
+
+
+class TestCoefficientTable(TestCase):
+    """
+    Tests unitaires pour CoefficientTable et calcul_pdo_table().
+
+    Formule: PDO = 1 - 1 / (1 + exp(-sum_total_coeffs))  (modèle calibré sur P(non-défaut))
+    où sum_total_coeffs = intercept + Σ(coefficient de la modalité de chaque variable)
+    """
+
+    def setUp(self) -> None:
+        """
+        Initialise une configuration complète : toutes les modalités de la structure
+        du modèle ont un coefficient égal à leur rang (pour des sommes faciles à vérifier).
+        """
+        from pdo_scoring import PDO_MODALITIES
+
+        coeffs: dict[str, float] = {"intercept": -4.0}
+        for mapping in PDO_MODALITIES.values():
+            for rank, key in enumerate(mapping.values()):
+                coeffs[key] = rank * 0.1
+        self.config: dict[str, Any] = {"model": {"coeffs": coeffs}}
+
+        # Première modalité de chaque variable → coefficient 0
+        self.reference_row: dict[str, str] = {
+            name: next(iter(mapping)) for name, mapping in PDO_MODALITIES.items()
+        }
+
+    def test_calcul_pdo_table_reference_row(self) -> None:
+        """
+        Vérifier qu'avec toutes les modalités à coefficient nul, sum_total_coeffs = intercept.
+        """
+        # ===== ARRANGE =====
+        from pdo_scoring import calcul_pdo_table
+
+        df_input = pl.DataFrame([self.reference_row])
+
+        # ===== ACT =====
+        result = calcul_pdo_table(df_input, self.config)
+
+        # ===== ASSERT =====
+        expected_pdo = 1 - 1 / (1 + math.exp(4.0))
+        self.assertAlmostEqual(result["sum_total_coeffs"][0], -4.0)
+        self.assertAlmostEqual(result["PDO_compute"][0], expected_pdo)
+        self.assertEqual(result["PDO"][0], round(expected_pdo, 4))
+        self.assertEqual(result["flag_pdo_OK"][0], "flag")
+
+    def test_calcul_pdo_table_modalities_lookup(self) -> None:
+        """
+        Vérifier le coefficient de modalités non nulles et le cas des valeurs inattendues.
+
+        RÉSULTAT ATTENDU:
+        -----------------
+        - reboot_score_char2 = '3' → 0.2 (3e modalité)
+        - nat_jur_a = '>=7' → 0.2
+        - nat_jur_a = None / '' / 'INCONNU' → 0 (clause otherwise)
+        """
+        # ===== ARRANGE =====
+        from pdo_scoring import calcul_pdo_table
+
+        rows = [
+            {**self.reference_row, "reboot_score_char2": "3", "nat_jur_a": ">=7"},
+            {**self.reference_row, "nat_jur_a": None},
+            {**self.reference_row, "nat_jur_a": ""},
+            {**self.reference_row, "nat_jur_a": "INCONNU"},
+        ]
+
+        # ===== ACT =====
+        result = calcul_pdo_table(pl.DataFrame(rows), self.config)
+
+        # ===== ASSERT =====
+        self.assertAlmostEqual(result["reboot_score_char2_coeffs"][0], 0.2)
+        self.assertAlmostEqual(result["nat_jur_a_coeffs"][0], 0.2)
+        self.assertAlmostEqual(result["sum_total_coeffs"][0], -3.6)
+        self.assertEqual(result["nat_jur_a_coeffs"].to_list()[1:], [0.0, 0.0, 0.0])
+
+    def test_calcul_pdo_table_enum_and_lazy_input(self) -> None:
+        """
+        Vérifier qu'une entrée déjà encodée en pl.Enum et une entrée LazyFrame donnent
+        le même résultat qu'une entrée String.
+        """
+        # ===== ARRANGE =====
+        from pdo_scoring import CoefficientTable
+
+        table = CoefficientTable.from_config(self.config)
+        df_input = pl.DataFrame([{**self.reference_row, "secto_b": "2"}])
+        df_enum = df_input.with_columns(
+            [pl.col(variable.name).cast(variable.dtype) for variable in table.variables]
+        )
+
+        # ===== ACT =====
+        expected = table.score(df_input)["sum_total_coeffs"][0]
+        enum_result = table.score(df_enum)["sum_total_coeffs"][0]
+        lazy_result = table.score(df_input.lazy()).collect()["sum_total_coeffs"][0]
+
+        # ===== ASSERT =====
+        self.assertAlmostEqual(expected, -3.9)
+        self.assertAlmostEqual(enum_result, expected)
+        self.assertAlmostEqual(lazy_result, expected)
+
+    def test_calcul_pdo_table_new_model_from_config_only(self) -> None:
+        """
+        Vérifier qu'un modèle différent (une seule variable) est pris en compte par
+        la seule configuration config["model"]["modalities"].
+        """
+        # ===== ARRANGE =====
+        from pdo_scoring import calcul_pdo_table
+
+        config = {
+            "model": {
+                "coeffs": {"intercept": -2.0, "top_ga_0": 0.0, "top_ga_1": 1.5},
+                "modalities": {"top_ga": {"0": "top_ga_0", "1": "top_ga_1"}},
+            }
+        }
+
+        # ===== ACT =====
+        result = calcul_pdo_table(pl.DataFrame({"top_ga": ["0", "1"]}), config)
+
+        # ===== ASSERT =====
+        self.assertEqual(result["sum_total_coeffs"].to_list(), [-2.0, -0.5])
+        self.assertNotIn("nat_jur_a_coeffs", result.columns)
+
+    def test_coefficient_table_missing_coefficient_raises(self) -> None:
+        """Vérifier qu'un coefficient absent de la configuration lève une KeyError."""
+        from pdo_scoring import CoefficientTable
+
+        del self.config["model"]["coeffs"]["secto_b_3"]
+
+        with self.assertRaises(KeyError):
+            CoefficientTable.from_config(self.config)
+
+    def test_calcul_pdo_table_matches_calcul_pdo_reference_profile(self) -> None:
+        """
+        Vérifier la parité avec calcul_pdo (TU-004) : profil aux modalités de référence
+        (coefficient nul) et intercept -3.864 → PDO = 1 - σ(-3.864) ≈ 0.9794, et une
+        modalité protectrice (coefficient positif) fait baisser la PDO.
+        """
+        # ===== ARRANGE =====
+        from pdo_scoring import PDO_MODALITIES, calcul_pdo_table
+
+        high_risk_profile = {
+            "nat_jur_a": "1-3", "secto_b": "4", "seg_nae": "ME", "top_ga": "0", "nbj": ">12",
+            "solde_cav_char": "1", "reboot_score_char2": "9", "remb_sepa_max": "1",
+            "pres_prlv_retourne": "1", "pres_saisie": "1", "net_int_turnover": "1",
+            "rn_ca_conso_023b": "1", "caf_dmlt_005": "1", "res_total_passif_035": "1",
+            "immob_total_passif_055": "1",
+        }
+        coeffs: dict[str, float] = {"intercept": -3.864}
+        for name, mapping in PDO_MODALITIES.items():
+            for modality, key in mapping.items():
+                coeffs[key] = 0.0 if modality == high_risk_profile[name] else 0.5
+        coeffs["reboot_score_char2_1"] = 3.924
+        df_input = pl.DataFrame([high_risk_profile, {**high_risk_profile, "reboot_score_char2": "1"}])
+
+        # ===== ACT =====
+        result = calcul_pdo_table(df_input, {"model": {"coeffs": coeffs}})
+
+        # ===== ASSERT =====
+        self.assertAlmostEqual(result["sum_total_coeffs"][0], -3.864)
+        self.assertEqual(result["PDO"][0], 0.9794)
+        self.assertAlmostEqual(result["PDO_compute"][1], 1 - 1 / (1 + math.exp(-0.06)))
+        self.assertLess(result["PDO"][1], result["PDO"][0])
+
+
+if __name__ == "__main__":
+    main()
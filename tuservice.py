@@ -0,0 +1,210 @@
+"""
+Tests unitaires pour le module pdo_service.py
+
+Ce module contient les tests du service de scoring PDO à la demande (PdoModel,
+FeatureCache, PdoScoringService, routes HTTP).
+
+Les tests couvrent:
+- Identité du chemin ligne à ligne avec les tables Polars du batch (encodage, formatage, PDO)
+- PDO de calcul_pdo (1 - σ(sum_total_coeffs)) sur les deux chemins, sommes extrêmes incluses
+- Features absentes, NULL ou NaN, codes inconnus, valeur non numérique rejetée
+- Cache de features : PDO calculée une fois, remplacée quand les features changent, éviction LRU
+- Aller-retour HTTP : score par features, par i_uniq_kpi, entreprise inconnue, requête invalide
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import http.client
+import json
+import threading
+from unittest import TestCase, main
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+def _model(micro_batch_rows: int = 2_000):
+    """Modèle compilé sur la configuration synthétique."""
+    from common.pdo_service import PdoModel
+    from common.pdo_synthetic import synthetic_model_config
+
+    model = PdoModel.from_config(synthetic_model_config())
+    model.micro_batch_rows = micro_batch_rows
+    return model
+
+
+class TestPdoModel(TestCase):
+    """Tests unitaires pour PdoModel.score_row() et PdoModel.score()."""
+
+    def test_row_path_matches_frame_path(self) -> None:
+        """Vérifier que les lignes scorées une à une donnent la PDO des tables Polars."""
+        # ===== ARRANGE =====
+        from common.pdo_synthetic import generate_service_input
+
+        model = _model()
+        companies = generate_service_input(5_000)
+        rows = [model.coerce(row) for row in companies.to_dicts()]
+
+        # ===== ACT =====
+        expected = model.score_frame(companies)
+        result = pl.DataFrame([model.score_row(features) for features in rows], schema=expected.schema)
+
+        # ===== ASSERT =====
+        assert_frame_equal(result.select(["i_uniq_kpi", "PDO"]), expected.select(["i_uniq_kpi", "PDO"]))
+        # Somme des coefficients dans un ordre différent de sum_horizontal
+        assert_frame_equal(result, expected, rel_tol=1e-12)
+        assert_frame_equal(pl.DataFrame(_model(micro_batch_rows=1).score(rows), schema=expected.schema), expected)
+
+    def test_both_paths_match_calcul_pdo(self) -> None:
+        """
+        Vérifier que les deux chemins reproduisent calcul_pdo : PDO = 1 - σ(sum_total_coeffs),
+        plancher 0.0001, arrondi à 4 décimales (profil TU-004 : intercept seul → 0.9794).
+        """
+        # ===== ARRANGE =====
+        import math
+        from common.pdo_service import PdoModel
+        from common.pdo_synthetic import generate_service_input, synthetic_model_config
+
+        def legacy_pdo(total: float) -> float:
+            pdo_compute = 1 - 1 / (1 + math.exp(-total))
+            return 0.0001 if pdo_compute < 0.0001 else round(pdo_compute, 4)
+
+        model = _model()
+        rows = [model.coerce(row) for row in generate_service_input(2_000).to_dicts()]
+        intercept_only = synthetic_model_config()
+        intercept_only["model"]["coeffs"] = {key: 0.0 for key in intercept_only["model"]["coeffs"]}
+
+        # ===== ACT =====
+        by_row = [model.score_row(features) for features in rows]
+        by_frame = model.score_frame(pl.DataFrame(rows, schema=model.input_schema)).to_dicts()
+        extremes = {}
+        for intercept in [-3.864, -800.0, 800.0]:
+            intercept_only["model"]["coeffs"]["intercept"] = intercept
+            extreme_model = PdoModel.from_config(intercept_only)
+            features = extreme_model.coerce({"i_uniq_kpi": "E1"})
+            extremes[intercept] = (
+                extreme_model.score_row(features)["PDO"],
+                extreme_model.score_frame(pl.DataFrame([features], schema=extreme_model.input_schema))["PDO"][0],
+            )
+
+        # ===== ASSERT =====
+        for scored in [by_row, by_frame]:
+            self.assertEqual(
+                [score["PDO"] for score in scored], [legacy_pdo(score["sum_total_coeffs"]) for score in scored]
+            )
+        self.assertGreater(sum(score["PDO"] > 0.5 for score in by_row), 0)
+        self.assertEqual(extremes, {-3.864: (0.9794, 0.9794), -800.0: (1.0, 1.0), 800.0: (0.0001, 0.0001)})
+
+    def test_missing_unknown_and_nan_features(self) -> None:
+        """Vérifier les features absentes, NULL ou NaN et les codes inconnus sur les deux chemins."""
+        model = _model()
+        companies = [
+            {"i_uniq_kpi": "E1"},
+            {"i_uniq_kpi": "E2", "c_njur_prsne": "XX", "c_sectrl_1": "999999", "solde_cav": float("nan")},
+            {"i_uniq_kpi": "E3", "c_njur_prsne": 26, "Q_JJ_DEPST_MM": "12", "reboot_score2": None},
+        ]
+        rows = [model.coerce(company) for company in companies]
+
+        result = pl.DataFrame([model.score_row(features) for features in rows])
+        expected = model.score_frame(pl.DataFrame(rows, schema=model.input_schema))
+
+        assert_frame_equal(result, expected, rel_tol=1e-12)
+        self.assertEqual(model.modalities(rows[1])["nat_jur_a"], ">=7")
+        self.assertEqual(rows[2]["c_njur_prsne"], "26")
+        self.assertEqual(rows[2]["Q_JJ_DEPST_MM"], 12.0)
+        with self.assertRaises(ValueError):
+            model.coerce({"i_uniq_kpi": "E4", "solde_cav": "n/a"})
+
+
+class TestPdoScoringService(TestCase):
+    """Tests unitaires pour FeatureCache et PdoScoringService."""
+
+    def test_cached_scores(self) -> None:
+        """Vérifier la PDO calculée une fois par version de features et les entreprises inconnues."""
+        # ===== ARRANGE =====
+        from common.pdo_service import FeatureCache, PdoScoringService
+        from common.pdo_synthetic import generate_service_input
+
+        model = _model()
+        service = PdoScoringService(model, FeatureCache(max_entries=100))
+        companies = generate_service_input(150)
+        keys = companies["i_uniq_kpi"]
+
+        # ===== ACT =====
+        service.load_features(companies)
+        scores, unknown = service.score_cached([keys[149], keys[0], keys[120]])
+        cached = service.cache.get(keys[149])[1]
+        cached_again, _ = service.score_cached([keys[149]])
+        service.score_companies([{**companies.row(149, named=True), "solde_cav": -1e9}])
+        rescored, _ = service.score_cached([keys[149]])
+
+        # ===== ASSERT =====
+        expected = model.score_frame(companies)["PDO"]
+        # 100 entrées au plus : les 50 premières entreprises sont évincées
+        self.assertEqual(len(service.cache), 100)
+        self.assertEqual(unknown, [keys[0]])
+        self.assertEqual([score["i_uniq_kpi"] for score in scores], [keys[149], keys[120]])
+        self.assertEqual([score["PDO"] for score in scores], [expected[149], expected[120]])
+        self.assertIs(cached_again[0], cached)
+        self.assertIsNot(rescored[0], cached)
+        self.assertEqual(rescored[0]["PDO"], model.score_row(service.cache.get(keys[149])[0])["PDO"])
+
+
+class TestPdoRequestHandler(TestCase):
+    """Tests unitaires des routes HTTP (serveur sur un port libre)."""
+
+    def setUp(self) -> None:
+        from common.pdo_service import PdoScoringService, make_server
+        from common.pdo_synthetic import generate_service_input
+
+        self.service = PdoScoringService(_model())
+        self.companies = generate_service_input(20)
+        self.service.load_features(self.companies)
+        self.server = make_server(self.service, "127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+
+    def tearDown(self) -> None:
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _request(self, method: str, path: str, payload=None) -> tuple[int, dict]:
+        body = payload if isinstance(payload, bytes) or payload is None else json.dumps(payload).encode()
+        self.connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_score_routes(self) -> None:
+        """Vérifier le score par features et par i_uniq_kpi sur une même connexion persistante."""
+        # ===== ARRANGE =====
+        expected = self.service.model.score_frame(self.companies)
+        keys = self.companies["i_uniq_kpi"]
+
+        # ===== ACT =====
+        health = self._request("GET", "/health")
+        by_id = self._request("GET", f"/score/{keys[3]}")
+        by_ids = self._request("POST", "/score", {"i_uniq_kpi": [keys[1], "KPI_999"]})
+        by_features = self._request("POST", "/score", {"companies": self.companies.head(2).to_dicts()})
+
+        # ===== ASSERT =====
+        self.assertEqual(health, (200, {"status": "healthy", "cached_companies": 20}))
+        self.assertEqual(by_id[0], 200)
+        self.assertEqual(by_id[1]["PDO"], expected["PDO"][3])
+        self.assertEqual(by_ids[1]["unknown"], ["KPI_999"])
+        self.assertEqual([score["PDO"] for score in by_ids[1]["scores"]], [expected["PDO"][1]])
+        self.assertEqual([score["PDO"] for score in by_features[1]["scores"]], expected["PDO"].head(2).to_list())
+
+    def test_errors(self) -> None:
+        """Vérifier les réponses 404 et 400 sans fermer la connexion."""
+        self.assertEqual(self._request("GET", "/score/KPI_999")[0], 404)
+        self.assertEqual(self._request("GET", "/inconnue")[0], 404)
+        self.assertEqual(self._request("POST", "/score", b"{pas du json")[0], 400)
+        self.assertEqual(self._request("POST", "/score", {"autre": 1})[0], 400)
+        self.assertEqual(self._request("POST", "/score", {"companies": [{"solde_cav": "n/a"}]})[0], 400)
+        self.assertEqual(self._request("GET", "/health")[0], 200)
+
+
+if __name__ == "__main__":
+    main()
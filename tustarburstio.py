@@ -0,0 +1,168 @@
+"""
+Tests unitaires pour le module starburst_io.py
+
+Ce module contient les tests de la lecture des résultats Starburst
+(fetch_frame, iter_frames). Une base SQLite en mémoire joue le rôle de la connexion DBAPI.
+
+Les tests couvrent:
+- Types déclarés par source : colonnes numériques/Decimal reçues en Float64
+- Types fournis par l'appelant prioritaires sur ceux de la source
+- Source sans types déclarés : inférence sur l'ensemble du résultat
+- Lecture par morceaux bornés et agrégation incrémentale des soldes (contrat check / Int64, aucun morceau)
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import sqlite3
+from unittest import TestCase, main
+import polars as pl
+
+
+class TestFetchFrame(TestCase):
+    """Tests unitaires pour la fonction fetch_frame()."""
+
+    def setUp(self) -> None:
+        """Crée une table de transactions avec des montants entiers et décimaux."""
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute(
+            "CREATE TABLE transac (i_uniq_kpi TEXT, category TEXT, netamount NUMERIC, "
+            "nops_category NUMERIC, min_amount NUMERIC, max_amount NUMERIC, nops_total NUMERIC)"
+        )
+        self.connection.executemany(
+            "INSERT INTO transac VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("E001", "interets", -100, 2, -60, -40, 30),
+                ("E002", "turnover", 5000.5, 10, 10.25, 900, 12),
+            ],
+        )
+        self.query = "SELECT * FROM transac"
+
+    def tearDown(self) -> None:
+        self.connection.close()
+
+    def test_fetch_frame_declared_source_types(self) -> None:
+        """
+        Vérifier que les colonnes déclarées de donnees_transac arrivent en Float64,
+        même quand la première valeur est entière.
+        """
+        # ===== ARRANGE =====
+        from starburst_io import SOURCE_SCHEMA_OVERRIDES, fetch_frame
+
+        # ===== ACT =====
+        result = fetch_frame(self.connection, self.query, source="donnees_transac", batch_size=1)
+
+        # ===== ASSERT =====
+        for col in SOURCE_SCHEMA_OVERRIDES["donnees_transac"]:
+            self.assertEqual(result.schema[col], pl.Float64, f"{col} doit être en Float64")
+        self.assertEqual(result["netamount"].to_list(), [-100.0, 5000.5])
+        self.assertEqual(result.height, 2)
+
+    def test_fetch_frame_caller_overrides_take_precedence(self) -> None:
+        """Vérifier que les types fournis par l'appelant surchargent ceux de la source."""
+        from starburst_io import fetch_frame
+
+        result = fetch_frame(
+            self.connection,
+            self.query,
+            source="donnees_transac",
+            schema_overrides={"nops_total": pl.Int32},
+        )
+
+        self.assertEqual(result.schema["nops_total"], pl.Int32)
+        self.assertEqual(result.schema["netamount"], pl.Float64)
+
+    def test_fetch_frame_unknown_source_infers_types(self) -> None:
+        """Vérifier qu'une source sans types déclarés est lue avec inférence complète."""
+        from starburst_io import fetch_frame, source_schema_overrides
+
+        result = fetch_frame(self.connection, "SELECT i_uniq_kpi FROM transac", source="rsc")
+
+        self.assertIsNone(source_schema_overrides("rsc"))
+        self.assertEqual(result["i_uniq_kpi"].to_list(), ["E001", "E002"])
+
+
+class TestIterFrames(TestCase):
+    """Tests unitaires pour la fonction iter_frames() et l'agrégation incrémentale."""
+
+    def setUp(self) -> None:
+        """Crée une table de soldes : 3 entreprises, 7 comptes."""
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute(
+            "CREATE TABLE soldes (i_intrn TEXT, pref_i_uniq_cpt TEXT, pref_m_ctrvl_sld_arr NUMERIC)"
+        )
+        self.rows = [
+            ("A001", "CPT1", 100000),
+            ("A002", "CPT2", -5050),
+            ("A001", "CPT3", 25000),
+            ("A003", "CPT4", 0),
+            ("A002", "CPT5", 1000),
+            ("A001", "CPT6", 12.5),
+            ("A002", None, 300),
+        ]
+        self.connection.executemany("INSERT INTO soldes VALUES (?, ?, ?)", self.rows)
+        self.query = "SELECT * FROM soldes"
+
+    def tearDown(self) -> None:
+        self.connection.close()
+
+    def test_iter_frames_bounded_chunks(self) -> None:
+        """Vérifier que les morceaux ont au plus batch_size lignes et le même schéma."""
+        # ===== ARRANGE =====
+        from starburst_io import iter_frames
+
+        # ===== ACT =====
+        chunks = list(iter_frames(self.connection, self.query, source="soldes", batch_size=3))
+
+        # ===== ASSERT =====
+        self.assertEqual([chunk.height for chunk in chunks], [3, 3, 1])
+        for chunk in chunks:
+            self.assertEqual(chunk.schema["pref_m_ctrvl_sld_arr"], pl.Float64)
+        self.assertEqual(pl.concat(chunks).height, len(self.rows))
+
+    def test_add_soldes_features_chunked_matches_single_pass(self) -> None:
+        """
+        Vérifier que le repli des morceaux donne le même résultat qu'une agrégation
+        en une seule fois (somme en euros, nombre de comptes non nuls).
+        """
+        # ===== ARRANGE =====
+        from preprocessing_soldes_chunked import add_soldes_features_chunked
+        from starburst_io import fetch_frame, iter_frames
+
+        df_main = pl.DataFrame({"i_intrn": ["A001", "A002", "A003", "A004"]})
+
+        # ===== ACT =====
+        chunked = add_soldes_features_chunked(
+            df_main, iter_frames(self.connection, self.query, source="soldes", batch_size=2)
+        )
+        single = add_soldes_features_chunked(
+            df_main, [fetch_frame(self.connection, self.query, source="soldes")]
+        )
+
+        # ===== ASSERT =====
+        self.assertTrue(chunked.equals(single))
+        solde_cav = dict(zip(chunked["i_intrn"], chunked["solde_cav"]))
+        solde_nb = dict(zip(chunked["i_intrn"], chunked["solde_nb"]))
+        self.assertAlmostEqual(solde_cav["A001"], 1250.125)
+        self.assertAlmostEqual(solde_cav["A002"], -37.5)
+        self.assertEqual(solde_nb["A002"], 2)
+        self.assertIsNone(solde_cav["A004"])
+        self.assertEqual(chunked["solde_nb"].dtype, pl.Int64)
+        self.assertEqual(chunked["check"].unique().to_list(), ["flag_soldes_OK"])
+
+    def test_add_soldes_features_chunked_no_chunk(self) -> None:
+        """Vérifier qu'un itérable vide donne des features NULL (comme une table soldes vide)."""
+        from preprocessing_soldes_chunked import add_soldes_features_chunked
+
+        result = add_soldes_features_chunked(pl.DataFrame({"i_intrn": ["A001", "A002"]}), iter([]))
+
+        self.assertEqual(result.columns, ["i_intrn", "solde_cav", "solde_nb", "check"])
+        self.assertEqual(result["solde_cav"].null_count(), 2)
+        self.assertEqual(result["solde_nb"].null_count(), 2)
+        self.assertEqual(result.schema["solde_nb"], pl.Int64)
+        self.assertEqual(result["check"].to_list(), ["flag_soldes_OK"] * 2)
+
+
+if __name__ == "__main__":
+    main()
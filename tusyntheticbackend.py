@@ -0,0 +1,151 @@
+"""
+Tests unitaires pour le module synthetic_backend.py
+
+Ce module contient les tests du backend local qui remplace Starburst et COS pour les
+exécutions hors réseau du batch (SyntheticStarburstConnector, LocalS3Client).
+
+Les tests couvrent:
+- Neuf sources générées au schéma des requêtes, réutilisées d'une exécution à l'autre
+- Source d'une requête reconnue à sa vue Starburst
+- Cohérence des clés entre df_main et les extraits SAFIR
+- Objets S3 : écriture, lecture par plage, liste, suppression
+- Upload multipart : assemblage des parties et ETag au format S3
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import hashlib
+import os
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+
+
+class TestSyntheticStarburstConnector(TestCase):
+    """Tests unitaires pour la classe SyntheticStarburstConnector."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_load_data(self) -> None:
+        """Vérifier que les neuf sources sont servies et réutilisées à échelle et graine égales."""
+        # ===== ARRANGE =====
+        from synthetic_backend import SyntheticStarburstConnector
+        from pdo_pipeline import SOURCE_KEYS
+
+        # ===== ACT =====
+        connector = SyntheticStarburstConnector(self.tmp_dir.name, n_companies=2_000)
+        initial_data = connector.load_data()
+        mtime = os.path.getmtime(connector.paths["safir_sd"])
+        SyntheticStarburstConnector(self.tmp_dir.name, n_companies=2_000)
+
+        # ===== ASSERT =====
+        self.assertEqual(list(initial_data), SOURCE_KEYS)
+        self.assertEqual(initial_data["unfiltered_df_main"].height, 2_000)
+        self.assertEqual(
+            initial_data["safir_cd"].columns,
+            ["i_siren", "d_fin_excce_conso", "c_code", "c_val", "extract_date", "i_uniq_kpi_i", "i_uniq_kpi", "i_intrn"],
+        )
+        self.assertEqual(initial_data["safir_sc"].schema["c_duree_excce_soc"], pl.Int32)
+        self.assertEqual(os.path.getmtime(connector.paths["safir_sd"]), mtime)
+        self.assertNotEqual(
+            SyntheticStarburstConnector(self.tmp_dir.name, n_companies=1_000).get_engine("unfiltered_df_main").height,
+            2_000,
+        )
+
+    def test_source_of_query(self) -> None:
+        """Vérifier que la source d'une requête rendue est reconnue à sa vue Starburst."""
+        from synthetic_backend import SyntheticStarburstConnector
+
+        with open("query_starburst_transac_corrected_v2.sql", encoding="utf-8") as f:
+            sql = f.read()
+
+        self.assertEqual(SyntheticStarburstConnector.source_of(sql), "donnees_transac")
+        self.assertEqual(SyntheticStarburstConnector.source_of('SELECT * FROM "x"."v_dlfapsd2_current"'), "safir_sd")
+        with self.assertRaises(ValueError):
+            SyntheticStarburstConnector.source_of("SELECT 1")
+
+    def test_safir_keys_consistent(self) -> None:
+        """Vérifier que les postes SAFIR appartiennent aux bilans de l'en-tête et aux SIREN de df_main."""
+        from pdo_synthetic import generate_safir_cc, generate_safir_cd, generate_safir_sc, generate_unfiltered_df_main
+
+        df_main = generate_unfiltered_df_main(5_000)
+        safir_cc = generate_safir_cc(5_000)
+        safir_cd = generate_safir_cd(5_000)
+        safir_sc = generate_safir_sc(5_000)
+
+        self.assertTrue(safir_cc["i_siren"].is_unique().all())
+        self.assertTrue(safir_sc["i_siren"].is_in(df_main["i_siren"].implode()).all())
+        self.assertTrue(safir_cd["i_siren"].is_in(safir_cc["i_siren"].implode()).all())
+        latest = safir_cd.group_by("i_siren").agg(pl.col("d_fin_excce_conso").max())
+        joined = safir_cc.join(latest, on="i_siren", suffix="_cd")
+        self.assertTrue((joined["d_fin_excce_conso"] == joined["d_fin_excce_conso_cd"]).all())
+
+
+class TestLocalS3Client(TestCase):
+    """Tests unitaires pour la classe LocalS3Client."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_objects(self) -> None:
+        """Vérifier écriture, lecture complète et par plage, liste et suppression d'objets."""
+        # ===== ARRANGE =====
+        from synthetic_backend import LocalS3Client
+
+        client = LocalS3Client(self.tmp_dir.name)
+        client.create_bucket(Bucket="pdo")
+        body = bytes(range(256)) * 10
+
+        # ===== ACT =====
+        response = client.put_object(Bucket="pdo", Key="out/run=1/part-0.parquet", Body=body)
+        client.put_object(Bucket="pdo", Key="out/run=2/part-0.parquet", Body=b"x")
+
+        # ===== ASSERT =====
+        self.assertEqual(response["ETag"], f'"{hashlib.md5(body).hexdigest()}"')
+        self.assertEqual(client.get_object(Bucket="pdo", Key="out/run=1/part-0.parquet")["Body"].read(), body)
+        ranged = client.get_object(Bucket="pdo", Key="out/run=1/part-0.parquet", Range="bytes=10-19")
+        self.assertEqual(ranged["Body"].read(), body[10:20])
+        keys = [item["Key"] for item in client.list_objects_v2(Bucket="pdo", Prefix="out/run=1")["Contents"]]
+        self.assertEqual(keys, ["out/run=1/part-0.parquet"])
+        client.delete_object(Bucket="pdo", Key="out/run=1/part-0.parquet")
+        with self.assertRaises(FileNotFoundError):
+            client.head_object(Bucket="pdo", Key="out/run=1/part-0.parquet")
+        with self.assertRaises(ValueError):
+            client.put_object(Bucket="pdo", Key="../escape", Body=b"")
+
+    def test_multipart_upload(self) -> None:
+        """Vérifier l'assemblage des parties et l'ETag multipart "<md5 des md5>-N"."""
+        from synthetic_backend import LocalS3Client
+
+        client = LocalS3Client(self.tmp_dir.name)
+        client.create_bucket(Bucket="pdo")
+        parts = [b"a" * 1000, b"b" * 1000, b"c" * 10]
+
+        upload_id = client.create_multipart_upload(Bucket="pdo", Key="big.parquet")["UploadId"]
+        etags = [
+            client.upload_part(Bucket="pdo", Key="big.parquet", UploadId=upload_id, PartNumber=i + 1, Body=part)["ETag"]
+            for i, part in enumerate(parts)
+        ]
+        self.assertEqual(len(client.list_parts(Bucket="pdo", Key="big.parquet", UploadId=upload_id)["Parts"]), 3)
+        response = client.complete_multipart_upload(
+            Bucket="pdo", Key="big.parquet", UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": i + 1, "ETag": etag} for i, etag in enumerate(etags)]},
+        )
+
+        expected = hashlib.md5(b"".join(hashlib.md5(part).digest() for part in parts)).hexdigest()
+        self.assertEqual(response["ETag"], f'"{expected}-3"')
+        self.assertEqual(client.get_object(Bucket="pdo", Key="big.parquet")["Body"].read(), b"".join(parts))
+        self.assertEqual(client.head_object(Bucket="pdo", Key="big.parquet")["ETag"], response["ETag"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Tests unitaires pour le module telemetry_export.py
+
+Ce module contient les tests de l'export structuré des métriques du batch.
+
+Les tests couvrent:
+- Métriques collectées par StepTracker (CPU, pic RSS, octets)
+- Pic RSS du processus publié une fois par run, pic échantillonné par étape, en octets
+- Historique JSON-lines et Parquet ajouté run après run
+- Textfile Prometheus, échappement des valeurs de label
+- Absence de cible : aucun export
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+import json
+import os
+import tempfile
+from unittest import TestCase, main
+import polars as pl
+
+
+class TestTelemetryExport(TestCase):
+    """Tests unitaires pour les fonctions d'export de telemetry_export."""
+
+    def setUp(self) -> None:
+        """Simule un run de deux étapes tracké par StepTracker."""
+        from common.logging_utils import StepTracker, log_batch_start, print_final_summary, set_final_metrics
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.telemetry_dir = self.tmp_dir.name
+        df = pl.DataFrame({"i_uniq_kpi": [f"E{i}" for i in range(1000)], "PDO": [0.01] * 1000})
+
+        log_batch_start("test")
+        with StepTracker(1, "CHARGEMENT", 2) as tracker:
+            tracker.log_input_dict({"df_main": df})
+        with StepTracker(2, "CALCUL PDO", 2) as tracker:
+            tracker.log_input(df, "df_main")
+            tracker.log_output(df.with_columns(pl.col("PDO") * 2), "df_main_pdo")
+        set_final_metrics(df)
+        print_final_summary()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_step_tracker_collects_resource_metrics(self) -> None:
+        """Vérifier que StepTracker enregistre CPU, pic RSS et octets en entrée/sortie."""
+        # ===== ARRANGE =====
+        from common.telemetry_export import build_run_record
+
+        # ===== ACT =====
+        record = build_run_record("test")
+
+        # ===== ASSERT =====
+        step = record["steps"][1]
+        self.assertEqual(step["step_name"], "CALCUL PDO")
+        self.assertGreater(record["process_peak_rss_bytes"], 1024**2)
+        self.assertNotIn("peak_rss_mb", step)
+        # Profilage mémoire désactivé : pas de pic par étape
+        self.assertIsNone(step["step_peak_rss_bytes"])
+        self.assertGreaterEqual(step["cpu_seconds"], 0)
+        self.assertGreater(step["input_bytes"], 0)
+        self.assertGreater(step["output_bytes"], 0)
+        self.assertEqual(record["steps"][0]["input_rows"], 1000)
+        self.assertEqual(record["status"], "SUCCESS")
+
+    def test_step_peak_rss_bytes_when_profiled(self) -> None:
+        """Vérifier que le pic échantillonné de l'étape est exporté en octets quand le profilage est actif."""
+        from common.logging_utils import StepTracker, enable_memory_profiling, memory_profiling
+        from common.telemetry_export import build_run_record
+
+        enable_memory_profiling(sample_interval_seconds=0.01)
+        try:
+            with StepTracker(3, "EXPORT", 3) as tracker:
+                pass
+        finally:
+            memory_profiling.enabled = False
+
+        step = build_run_record("test")["steps"][-1]
+        self.assertEqual(step["step_peak_rss_bytes"], int(tracker.metrics.step_peak_rss_mb * 1024**2))
+        self.assertGreater(step["step_peak_rss_bytes"], 1024**2)
+
+    def test_export_appends_jsonl_and_parquet(self) -> None:
+        """Vérifier que deux exports ajoutent deux runs au JSON-lines et 2 x 2 étapes au Parquet."""
+        # ===== ARRANGE =====
+        from common.telemetry_export import RUNS_FILE, STEPS_FILE, export_batch_metrics
+
+        # ===== ACT =====
+        export_batch_metrics("test", self.telemetry_dir, extra={"execution_mode": "eager"})
+        export_batch_metrics("test", self.telemetry_dir, extra={"execution_mode": "eager"})
+
+        # ===== ASSERT =====
+        with open(os.path.join(self.telemetry_dir, RUNS_FILE), encoding="utf-8") as f:
+            runs = [json.loads(line) for line in f]
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(runs[0]["execution_mode"], "eager")
+
+        steps = pl.read_parquet(os.path.join(self.telemetry_dir, STEPS_FILE))
+        self.assertEqual(steps.height, 4)
+        self.assertIn("output_rows_per_s", steps.columns)
+
+    def test_prometheus_textfile(self) -> None:
+        """Vérifier le format textfile Prometheus (une série par étape)."""
+        from common.telemetry_export import export_batch_metrics
+
+        path = os.path.join(self.telemetry_dir, "pdo_batch.prom")
+        export_batch_metrics("test", None, prometheus_path=path)
+
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        self.assertIn("pdo_batch_success 1", content)
+        self.assertIn('pdo_batch_step_duration_seconds{step="CALCUL PDO"}', content)
+        self.assertEqual(content.count("\npdo_batch_process_peak_rss_bytes "), 1)
+        self.assertNotIn("pdo_batch_step_step_peak_rss_bytes{", content)
+
+    def test_prometheus_label_escaping(self) -> None:
+        """Vérifier l'échappement de l'antislash, du guillemet et du retour à la ligne dans les labels."""
+        from common.logging_utils import StepTracker
+        from common.telemetry_export import export_batch_metrics
+
+        with StepTracker(3, 'EXPORT "COS"\\partition\nfin', 3):
+            pass
+        path = os.path.join(self.telemetry_dir, "pdo_batch.prom")
+        export_batch_metrics("test", None, prometheus_path=path)
+
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertIn('pdo_batch_step_cpu_seconds{step="EXPORT \\"COS\\"\\\\partition\\nfin"}', "\n".join(lines))
+        self.assertTrue(all(line.startswith(("#", "pdo_batch_")) for line in lines))
+
+    def test_no_target_no_export(self) -> None:
+        """Vérifier qu'aucun export n'est fait sans cible configurée."""
+        from common.telemetry_export import export_batch_metrics
+
+        self.assertIsNone(export_batch_metrics("test", None))
+        self.assertEqual(os.listdir(self.telemetry_dir), [])
+
+
+if __name__ == "__main__":
+    main()
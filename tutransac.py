@@ -0,0 +1,149 @@
+"""
+Tests unitaires pour le module preprocessing_transac_corrected.py
+
+Ce module contient les tests de l'agrégation en un seul passage des transactions
+(add_transac_features) et de sa variante par morceaux (add_transac_features_chunked).
+
+Les tests couvrent:
+- Agrégation conditionnelle par catégorie (somme des montants et opérations)
+- Regroupement attri_blocage + atd_tres_pub dans saisie__
+- Catégorie absente → NULL (comportement identique au pivot)
+- Équivalence entre l'entrée complète, l'entrée LazyFrame et l'entrée par morceaux
+
+Auteur: Équipe MLOps - Fab IA
+Date: Octobre 2026
+Version: 1.0.0
+"""
+
+from unittest import TestCase, main
+from typing import Any
+import polars as pl
+from polars.testing import assert_frame_equal
+
+
+class TestAddTransacFeatures(TestCase):
+    """
+    Tests unitaires pour la fonction add_transac_features().
+
+    La fonction agrège donnees_transac par (i_uniq_kpi, agg_category) puis construit
+    les colonnes {categorie}__{mesure} par agrégations conditionnelles.
+    """
+
+    def setUp(self) -> None:
+        """
+        Initialise les fixtures de test.
+
+        Configure:
+        - self.df_main: 3 entreprises (E001, E002 avec transactions, E003 sans)
+        - self.transac: transactions de E001 et E002 sur plusieurs catégories
+        """
+        self.df_main = pl.DataFrame({"i_uniq_kpi": ["E001", "E002", "E003"]})
+
+        rows: list[dict[str, Any]] = [
+            # E001 : deux lignes d'intérêts (à sommer) + turnover + saisies
+            self._row("E001", "interets", -100.0, 2, 30),
+            self._row("E001", "interets", -50.0, 1, 30),
+            self._row("E001", "turnover", 50000.0, 10, 30),
+            self._row("E001", "attri_blocage", -10.0, 1, 1),
+            self._row("E001", "atd_tres_pub", -20.0, 1, 1),
+            # E002 : un remboursement SEPA important + catégorie non utilisée
+            self._row("E002", "rembt_prlv_sepa", 4000.0, 1, 5, max_amount=4000.0),
+            self._row("E002", "autre", 999.0, 1, 99),
+        ]
+        self.transac = pl.DataFrame(rows)
+
+    def _row(
+        self,
+        i_uniq_kpi: str,
+        category: str,
+        netamount: float,
+        nops_category: int,
+        nops_total: int,
+        max_amount: float = 0.0,
+    ) -> dict[str, Any]:
+        """Crée une ligne de transaction agrégée au format Starburst."""
+        return {
+            "i_uniq_kpi": i_uniq_kpi,
+            "category": category,
+            "netamount": netamount,
+            "nops_category": nops_category,
+            "min_amount": 0.0,
+            "max_amount": max_amount,
+            "nops_total": nops_total,
+        }
+
+    def test_add_transac_features_conditional_aggregation(self) -> None:
+        """
+        Vérifier les sommes par catégorie et le regroupement saisie__.
+
+        RÉSULTAT ATTENDU:
+        -----------------
+        - E001: interets__netamount = -150, interets__nops = 3
+        - E001: saisie__nops = 2 (attri_blocage + atd_tres_pub), pres_saisie = '1'
+        - E001: nops = 92 (somme des nops_total des catégories conservées)
+        - E002: la catégorie 'autre' est ignorée (nops = 5)
+        """
+        # ===== ARRANGE =====
+        from preprocessing_transac_corrected import add_transac_features
+
+        # ===== ACT =====
+        result = add_transac_features(self.df_main, self.transac).sort("i_uniq_kpi")
+
+        # ===== ASSERT =====
+        e001 = result.row(0, named=True)
+        self.assertAlmostEqual(e001["interets__netamount"], -150.0)
+        self.assertEqual(e001["interets__nops"], 3.0)
+        self.assertEqual(e001["saisie__nops"], 2.0)
+        self.assertEqual(e001["pres_saisie"], "1")
+        self.assertEqual(e001["nops"], 92.0)
+
+        e002 = result.row(1, named=True)
+        self.assertEqual(e002["nops"], 5.0)
+        self.assertEqual(e002["remb_sepa_max"], "1")
+
+    def test_add_transac_features_missing_category_is_null(self) -> None:
+        """
+        Vérifier qu'une catégorie absente donne NULL et qu'une entreprise sans
+        transaction est conservée (LEFT JOIN) avec flag_transac = 'OK'.
+        """
+        # ===== ARRANGE =====
+        from preprocessing_transac_corrected import add_transac_features
+
+        # ===== ACT =====
+        result = add_transac_features(self.df_main, self.transac).sort("i_uniq_kpi")
+
+        # ===== ASSERT =====
+        self.assertIsNone(result["turnover__netamount"][1], "E002 n'a pas de turnover")
+        self.assertIsNone(result["interets__netamount"][2], "E003 n'a aucune transaction")
+        self.assertEqual(result.height, 3)
+        self.assertEqual(result["flag_transac"].to_list(), ["OK", "OK", "OK"])
+
+    def test_add_transac_features_lazy_and_chunked_are_identical(self) -> None:
+        """
+        Vérifier que l'entrée LazyFrame et l'entrée par morceaux (une ligne par
+        morceau) donnent exactement le même résultat que l'entrée complète.
+        """
+        # ===== ARRANGE =====
+        from preprocessing_transac_corrected import add_transac_features, add_transac_features_chunked
+
+        expected = add_transac_features(self.df_main, self.transac).sort("i_uniq_kpi")
+        chunks = [self.transac.slice(i, 1) for i in range(self.transac.height)]
+
+        # ===== ACT =====
+        lazy_result = add_transac_features(self.df_main.lazy(), self.transac.lazy()).collect()
+        chunked_result = add_transac_features_chunked(self.df_main, chunks)
+
+        # ===== ASSERT =====
+        assert_frame_equal(lazy_result.sort("i_uniq_kpi"), expected)
+        assert_frame_equal(chunked_result.sort("i_uniq_kpi"), expected)
+
+    def test_add_transac_features_chunked_without_chunk_raises(self) -> None:
+        """Vérifier qu'une liste de morceaux vide lève une ValueError explicite."""
+        from preprocessing_transac_corrected import add_transac_features_chunked
+
+        with self.assertRaises(ValueError):
+            add_transac_features_chunked(self.df_main, [])
+
+
+if __name__ == "__main__":
+    main()